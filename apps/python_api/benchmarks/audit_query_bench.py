@@ -0,0 +1,158 @@
+#!/usr/bin/env python
+"""
+Benchmark the admin audit-log query API against a large audit_logs table.
+
+Seeds --rows audit logs (default 1M; use --rows 50000000 against PostgreSQL for
+the full-size run) into the database at --database-url, then times
+AuditService.get_audit_logs for each filter combination and compares walking
+pages by keyset cursor with the equivalent OFFSET queries.
+"""
+
+import argparse
+import json
+import os
+import random
+import statistics
+import sys
+import time
+import uuid
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from sqlalchemy import create_engine, func, text
+from sqlalchemy.orm import sessionmaker
+
+from db.database import Base
+from models.models import AuditLog
+from services.audit_service import AuditService
+
+ACTIONS = ["login", "logout", "update_user", "approve_transaction", "reject_transaction", "verify_document"]
+ENTITY_TYPES = ["user", "transaction", "document", "investment", "loan"]
+
+def seed(engine, rows: int, users: int, batch_size: int) -> None:
+    """
+    Insert `rows` audit logs with batched Core inserts
+    """
+    user_ids = [uuid.uuid4() for _ in range(users)]
+    start = datetime(2023, 1, 1)
+    step = timedelta(days=730) / max(rows, 1)
+
+    inserted = 0
+    started = time.perf_counter()
+    while inserted < rows:
+        count = min(batch_size, rows - inserted)
+        batch = []
+        for i in range(inserted, inserted + count):
+            entity_type = random.choice(ENTITY_TYPES)
+            entity_id = str(random.randrange(rows // 10 + 1))
+            batch.append({
+                "id": uuid.uuid4(),
+                "user_id": random.choice(user_ids),
+                "action": random.choice(ACTIONS),
+                "entity_type": entity_type,
+                "entity_id": entity_id,
+                "details": json.dumps({"reference": f"REF-{random.randrange(10 ** 9):09d}", "entity": entity_type}),
+                "ip_address": f"10.0.{random.randrange(256)}.{random.randrange(256)}",
+                "created_at": start + step * i,
+            })
+        with engine.begin() as conn:
+            conn.execute(AuditLog.__table__.insert(), batch)
+        inserted += count
+        if inserted % (batch_size * 100) == 0 or inserted == rows:
+            rate = inserted / (time.perf_counter() - started)
+            print(f"seeded {inserted:,}/{rows:,} rows ({rate:,.0f} rows/s)")
+
+def timed(fn, repeat: int):
+    """
+    Run `fn` `repeat` times and return latency percentiles in ms
+    """
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - started) * 1000)
+    samples.sort()
+    return {
+        "p50_ms": round(statistics.median(samples), 2),
+        "p95_ms": round(samples[max(0, int(len(samples) * 0.95) - 1)], 2),
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the audit-log query API")
+    parser.add_argument("--database-url", default="sqlite:///audit_query_bench.db")
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--users", type=int, default=5000)
+    parser.add_argument("--seed-batch-size", type=int, default=20_000)
+    parser.add_argument("--page-size", type=int, default=100)
+    parser.add_argument("--pages", type=int, default=50, help="Pages walked for the keyset vs offset comparison")
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--skip-seed", action="store_true", help="Reuse rows already in the database")
+    parser.add_argument("--output", help="Write the JSON report to this file")
+    args = parser.parse_args()
+
+    engine = create_engine(args.database_url)
+    Base.metadata.create_all(bind=engine)
+    if engine.dialect.name == "postgresql":
+        with engine.begin() as conn:
+            conn.execute(text("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
+            conn.execute(text(
+                "CREATE INDEX IF NOT EXISTS ix_audit_logs_details_trgm ON audit_logs USING gin (details gin_trgm_ops)"
+            ))
+    session_factory = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+    if not args.skip_seed:
+        seed(engine, args.rows, args.users, args.seed_batch_size)
+        if engine.dialect.name == "postgresql":
+            with engine.begin() as conn:
+                conn.execute(text("ANALYZE audit_logs"))
+
+    db = session_factory()
+    service = AuditService()
+    total_rows = db.query(func.count(AuditLog.id)).scalar()
+    sample = db.query(AuditLog).order_by(func.random()).limit(1).one()
+    window_end = sample.created_at
+    window_start = window_end - timedelta(days=7)
+
+    filters = {
+        "newest": {},
+        "user": {"user_id": sample.user_id},
+        "entity": {"entity_type": sample.entity_type, "entity_id": sample.entity_id},
+        "action_last_7_days": {"action": sample.action, "start_date": window_start, "end_date": window_end},
+        "user_action": {"user_id": sample.user_id, "action": sample.action},
+        "text_search": {"search": json.loads(sample.details)["reference"]},
+    }
+    report = {"rows": total_rows, "dialect": engine.dialect.name, "first_page": {}}
+    for name, kwargs in filters.items():
+        report["first_page"][name] = timed(
+            lambda: service.get_audit_logs(db, limit=args.page_size, **kwargs), args.repeat
+        )
+
+    # Walk --pages pages newest first with cursors, then fetch the last page by OFFSET
+    started = time.perf_counter()
+    cursor = None
+    for _ in range(args.pages):
+        page = service.get_audit_logs(db, limit=args.page_size, cursor=cursor)
+        cursor = page["next_cursor"]
+    keyset_last_page = timed(lambda: service.get_audit_logs(db, limit=args.page_size, cursor=cursor), args.repeat)
+    offset = args.pages * args.page_size
+    offset_last_page = timed(
+        lambda: db.query(AuditLog).order_by(AuditLog.created_at.desc(), AuditLog.id.desc())
+        .offset(offset).limit(args.page_size).all(),
+        args.repeat
+    )
+    report["deep_page"] = {
+        "offset_rows": offset,
+        "keyset": keyset_last_page,
+        "offset": offset_last_page,
+        "walk_seconds": round(time.perf_counter() - started, 2),
+    }
+    db.close()
+
+    print(json.dumps(report, indent=2, default=str))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2, default=str)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,178 @@
+#!/usr/bin/env python
+"""
+Drive the crypto deposit pipeline (order creation -> provider webhook ->
+wallet credit) at a target rate and record latencies.
+
+Requires a running API configured against benchmarks/mock_crypto_provider.py.
+Orders are issued open-loop at --rate per second for --duration seconds; each
+order is then polled until the API reports it as processed (wallet credited).
+"""
+
+import argparse
+import asyncio
+import json
+import time
+import uuid
+from typing import Any, Dict, List, Optional
+
+import httpx
+
+def percentile(values: List[float], pct: float) -> Optional[float]:
+    if not values:
+        return None
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return round(ordered[index], 2)
+
+def summarize(values: List[float]) -> Dict[str, Any]:
+    return {
+        "count": len(values),
+        "p50": percentile(values, 50),
+        "p95": percentile(values, 95),
+        "p99": percentile(values, 99),
+        "max": round(max(values), 2) if values else None,
+    }
+
+async def create_users(client: httpx.AsyncClient, count: int) -> List[str]:
+    """
+    Register throwaway users and return their access tokens
+    """
+    run_id = uuid.uuid4().hex[:8]
+    tokens = []
+    for i in range(count):
+        email = f"loadtest-{run_id}-{i}@example.com"
+        password = "loadtest-password"
+        response = await client.post("/auth/register", json={
+            "email": email,
+            "password": password,
+            "first_name": "Load",
+            "last_name": f"Test{i}",
+        })
+        response.raise_for_status()
+
+        response = await client.post("/auth/login", data={"username": email, "password": password})
+        response.raise_for_status()
+        tokens.append(response.json()["access_token"])
+    return tokens
+
+class LoadRun:
+    def __init__(self, args):
+        self.args = args
+        self.create_latencies_ms: List[float] = []
+        self.credit_latencies_ms: List[float] = []
+        self.errors: Dict[str, int] = {}
+        self.timeouts = 0
+        self.failed_orders = 0
+        self.semaphore = asyncio.Semaphore(args.max_in_flight)
+
+    def record_error(self, key: str) -> None:
+        self.errors[key] = self.errors.get(key, 0) + 1
+
+    async def run_order(self, client: httpx.AsyncClient, token: str) -> None:
+        headers = {"Authorization": f"Bearer {token}"}
+        async with self.semaphore:
+            started = time.perf_counter()
+            try:
+                response = await client.post(
+                    "/crypto-deposits/orders",
+                    json={"amount": self.args.amount, "currency": self.args.currency},
+                    headers=headers,
+                )
+            except httpx.HTTPError as e:
+                self.record_error(type(e).__name__)
+                return
+            self.create_latencies_ms.append((time.perf_counter() - started) * 1000)
+
+            if response.status_code != 201:
+                self.record_error(f"create_{response.status_code}")
+                return
+            order_id = response.json()["id"]
+
+            deadline = started + self.args.credit_timeout
+            while time.perf_counter() < deadline:
+                await asyncio.sleep(self.args.poll_interval)
+                try:
+                    response = await client.get(f"/crypto-deposits/orders/{order_id}", headers=headers)
+                except httpx.HTTPError as e:
+                    self.record_error(type(e).__name__)
+                    continue
+                if response.status_code != 200:
+                    self.record_error(f"poll_{response.status_code}")
+                    continue
+                order = response.json()
+                if order["is_processed"]:
+                    self.credit_latencies_ms.append((time.perf_counter() - started) * 1000)
+                    return
+                if order["status"] == "failed":
+                    self.failed_orders += 1
+                    return
+            self.timeouts += 1
+
+    async def run(self) -> Dict[str, Any]:
+        limits = httpx.Limits(max_connections=self.args.max_in_flight * 2)
+        async with httpx.AsyncClient(base_url=self.args.api_url, timeout=60.0, limits=limits) as client:
+            tokens = await create_users(client, self.args.users)
+
+            interval = 1.0 / self.args.rate
+            total_orders = int(self.args.rate * self.args.duration)
+            tasks = []
+            started = time.perf_counter()
+            for i in range(total_orders):
+                # Open-loop arrivals: schedule against the wall clock, not against completions
+                delay = started + i * interval - time.perf_counter()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+                tasks.append(asyncio.create_task(self.run_order(client, tokens[i % len(tokens)])))
+            issue_seconds = time.perf_counter() - started
+            await asyncio.gather(*tasks)
+            elapsed = time.perf_counter() - started
+
+        return {
+            "target_rate": self.args.rate,
+            "achieved_issue_rate": round(total_orders / issue_seconds, 2) if issue_seconds else None,
+            "orders": total_orders,
+            "credited": len(self.credit_latencies_ms),
+            "credited_per_second": round(len(self.credit_latencies_ms) / elapsed, 2),
+            "failed_orders": self.failed_orders,
+            "timeouts": self.timeouts,
+            "errors": self.errors,
+            "create_latency_ms": summarize(self.create_latencies_ms),
+            "credit_latency_ms": summarize(self.credit_latencies_ms),
+            "elapsed_seconds": round(elapsed, 2),
+        }
+
+async def fetch_provider_stats(provider_url: str) -> Optional[Dict[str, Any]]:
+    try:
+        async with httpx.AsyncClient(base_url=provider_url, timeout=10.0) as client:
+            response = await client.get("/_mock/stats")
+            return response.json()
+    except httpx.HTTPError:
+        return None
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test the crypto deposit pipeline")
+    parser.add_argument("--api-url", default="http://localhost:8000")
+    parser.add_argument("--provider-url", default="http://localhost:9000", help="Mock provider, for webhook stats")
+    parser.add_argument("--users", type=int, default=10, help="Number of users to spread orders over")
+    parser.add_argument("--rate", type=float, default=10.0, help="Target orders per second")
+    parser.add_argument("--duration", type=float, default=30.0, help="Seconds to issue orders for (use hours for soak runs)")
+    parser.add_argument("--amount", type=float, default=100.0)
+    parser.add_argument("--currency", default="USDT")
+    parser.add_argument("--max-in-flight", type=int, default=200)
+    parser.add_argument("--poll-interval", type=float, default=0.25)
+    parser.add_argument("--credit-timeout", type=float, default=60.0, help="Seconds to wait for a wallet credit")
+    parser.add_argument("--output", help="Write the JSON report to this file")
+
+    args = parser.parse_args()
+
+    report = asyncio.run(LoadRun(args).run())
+    report["provider"] = asyncio.run(fetch_provider_stats(args.provider_url))
+
+    output = json.dumps(report, indent=2)
+    print(output)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output)
+
+if __name__ == "__main__":
+    main()
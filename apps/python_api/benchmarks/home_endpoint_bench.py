@@ -0,0 +1,193 @@
+#!/usr/bin/env python
+"""
+Benchmark the aggregated mobile home endpoint against the per-section calls.
+
+Seeds one user with a wallet, transactions, investments, loans and
+notifications into the database at --database-url, then loads the home screen
+both ways through the ASGI app: the separate per-section endpoints the app
+called before, and a single GET /me/home. Reports HTTP round trips, SQL
+statements, principal lookups and p50/p95 latency for each, optionally with
+--rtt-ms of simulated network round trip added per HTTP request.
+"""
+
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+import uuid
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+
+from core.security import create_access_token
+from db.database import Base, get_db
+from main import app
+from models.models import (
+    User, Wallet, Transaction, TransactionType, TransactionStatus, InvestmentPlan, Investment,
+    InvestmentStatus, LoanProduct, Loan, LoanStatus, Notification
+)
+
+# What the home screen fetched before /me/home, one request per section
+# (there is no user-facing unread notification endpoint, so that badge was not shown)
+FAN_OUT_REQUESTS = [
+    "/auth/me",
+    "/wallets/me",
+    "/wallets/me/transactions?limit=10",
+    "/investments/my-investments?status=active",
+    "/loans/my-loans?status=active",
+    "/investments/my-investments/summary",
+]
+HOME_REQUEST = "/me/home"
+
+def seed(session_factory, transactions: int, investments: int, loans: int, notifications: int) -> User:
+    """
+    Insert one user with a wallet and the given number of rows of each kind
+    """
+    db = session_factory()
+    now = datetime.utcnow()
+    user = User(email=f"home-{uuid.uuid4().hex[:8]}@example.com", first_name="Home", last_name="Bench",
+                is_active=True, is_verified=True)
+    db.add(user)
+    db.flush()
+    wallet = Wallet(user_id=user.id, balance=1000.0)
+    plans = [
+        InvestmentPlan(name=f"Plan {i}", description="Benchmark plan", min_amount=10.0, max_amount=10000.0,
+                       roi_percentage=8.0 + i, duration_days=90 * (i + 1))
+        for i in range(3)
+    ]
+    products = [
+        LoanProduct(name=f"Product {i}", description="Benchmark product", min_amount=10.0, max_amount=10000.0,
+                    interest_rate=10.0 + i, term_months=6 * (i + 1))
+        for i in range(3)
+    ]
+    db.add_all([wallet] + plans + products)
+    db.flush()
+
+    for i in range(transactions):
+        db.add(Transaction(user_id=user.id, wallet_id=wallet.id, type=TransactionType.DEPOSIT, amount=25.0,
+                           status=TransactionStatus.COMPLETED, created_at=now - timedelta(hours=i)))
+    for i in range(investments):
+        db.add(Investment(user_id=user.id, plan_id=plans[i % len(plans)].id, amount=100.0, current_value=105.0,
+                          expected_return=120.0, start_date=now - timedelta(days=i), end_date=now + timedelta(days=90),
+                          status=InvestmentStatus.ACTIVE if i % 4 else InvestmentStatus.COMPLETED))
+    for i in range(loans):
+        db.add(Loan(user_id=user.id, product_id=products[i % len(products)].id, amount=500.0, interest_rate=10.0,
+                    term_months=6, remaining_balance=250.0, total_payment=550.0,
+                    status=LoanStatus.ACTIVE if i % 3 else LoanStatus.PAID))
+    for i in range(notifications):
+        db.add(Notification(user_id=user.id, title="Update", message="Benchmark notification", type="system",
+                            is_read=i % 2 == 0))
+    db.commit()
+    db.refresh(user)
+    db.expunge(user)
+    db.close()
+    return user
+
+class Counter:
+    """
+    Count SQL statements and principal (users by id) lookups on an engine
+    """
+    def __init__(self, engine):
+        self.statements = 0
+        self.user_lookups = 0
+        event.listen(engine, "before_cursor_execute", self._on_execute)
+
+    def _on_execute(self, conn, cursor, statement, *args):
+        self.statements += 1
+        if statement.lstrip().upper().startswith("SELECT USERS."):
+            self.user_lookups += 1
+
+    def reset(self):
+        self.statements = 0
+        self.user_lookups = 0
+
+def load(client: TestClient, paths, headers, rtt_ms: float) -> None:
+    for path in paths:
+        if rtt_ms:
+            time.sleep(rtt_ms / 1000)
+        response = client.get(path, headers=headers)
+        response.raise_for_status()
+
+def measure(client: TestClient, counter: Counter, paths, headers, repeat: int, rtt_ms: float):
+    """
+    Load the screen `repeat` times and return per-load costs and latency percentiles in ms
+    """
+    counter.reset()
+    load(client, paths, headers, 0)
+    statements, user_lookups = counter.statements, counter.user_lookups
+
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        load(client, paths, headers, rtt_ms)
+        samples.append((time.perf_counter() - started) * 1000)
+    samples.sort()
+    return {
+        "http_requests": len(paths),
+        "sql_statements": statements,
+        "principal_lookups": user_lookups,
+        "p50_ms": round(statistics.median(samples), 2),
+        "p95_ms": round(samples[max(0, int(len(samples) * 0.95) - 1)], 2),
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark GET /me/home against the per-section endpoints")
+    parser.add_argument("--database-url", default="sqlite:///home_endpoint_bench.db")
+    parser.add_argument("--transactions", type=int, default=500)
+    parser.add_argument("--investments", type=int, default=20)
+    parser.add_argument("--loans", type=int, default=6)
+    parser.add_argument("--notifications", type=int, default=50)
+    parser.add_argument("--repeat", type=int, default=200)
+    parser.add_argument("--rtt-ms", type=float, default=0.0,
+                        help="Simulated network round trip added to every HTTP request (e.g. 80 for mobile)")
+    parser.add_argument("--output", help="Write the JSON report to this file")
+    args = parser.parse_args()
+
+    engine = create_engine(args.database_url)
+    Base.metadata.create_all(bind=engine)
+    session_factory = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    user = seed(session_factory, args.transactions, args.investments, args.loans, args.notifications)
+
+    def get_bench_db():
+        db = session_factory()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    app.dependency_overrides[get_db] = get_bench_db
+    token = create_access_token({"sub": str(user.id), "role": "user"}, expires_delta=timedelta(hours=1))
+    headers = {"Authorization": f"Bearer {token}"}
+    counter = Counter(engine)
+
+    with TestClient(app) as client:
+        fan_out = measure(client, counter, FAN_OUT_REQUESTS, headers, args.repeat, args.rtt_ms)
+        home = measure(client, counter, [HOME_REQUEST], headers, args.repeat, args.rtt_ms)
+    app.dependency_overrides = {}
+
+    report = {
+        "dialect": engine.dialect.name,
+        "rtt_ms": args.rtt_ms,
+        "fan_out": fan_out,
+        "home": home,
+        "saved": {
+            "http_requests": fan_out["http_requests"] - home["http_requests"],
+            "sql_statements": fan_out["sql_statements"] - home["sql_statements"],
+            "principal_lookups": fan_out["principal_lookups"] - home["principal_lookups"],
+            "p50_ms": round(fan_out["p50_ms"] - home["p50_ms"], 2),
+            "p95_ms": round(fan_out["p95_ms"] - home["p95_ms"], 2),
+        },
+    }
+    print(json.dumps(report, indent=2, default=str))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2, default=str)
+
+if __name__ == "__main__":
+    main()
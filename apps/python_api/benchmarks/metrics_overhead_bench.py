@@ -0,0 +1,135 @@
+#!/usr/bin/env python
+"""
+Benchmark the overhead of the Prometheus instrumentation.
+
+Builds two copies of a small app, each with one route that runs one query on
+its own in-memory SQLite engine. The `instrumented` copy adds MetricsMiddleware
+and instrument_engine, the `bare` copy has neither. It then calls both straight
+through ASGI (no sockets or HTTP client, so the instrumentation is not hidden
+in transport noise) with the requests interleaved, and reports p50/p95 us per
+request and the difference. Also times the single operations the hot paths
+perform (child lookup plus observe, pre-resolved inc) and one /metrics render.
+
+--multiprocess runs with PROMETHEUS_MULTIPROC_DIR set, as under gunicorn,
+where every observe writes to a memory-mapped file.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+def percentiles(samples):
+    samples = sorted(sample * 1e6 for sample in samples)
+    return {
+        "p50_us": round(statistics.median(samples), 2),
+        "p95_us": round(samples[max(0, int(len(samples) * 0.95) - 1)], 2),
+    }
+
+def build_app(instrumented: bool):
+    from fastapi import FastAPI
+    from sqlalchemy import create_engine, text
+    from sqlalchemy.pool import StaticPool
+
+    from core.metrics import MetricsMiddleware, instrument_engine
+
+    engine = create_engine("sqlite:///:memory:", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    if instrumented:
+        instrument_engine(engine)
+    app = FastAPI()
+
+    @app.get("/items/{item_id}")
+    def get_item(item_id: int):
+        with engine.connect() as conn:
+            return {"id": item_id, "value": conn.execute(text("SELECT :id * 2"), {"id": item_id}).scalar()}
+
+    if instrumented:
+        app.add_middleware(MetricsMiddleware)
+    return app
+
+async def call(app, path: str) -> float:
+    """
+    Run one GET through the ASGI app and return its duration in seconds
+    """
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "GET", "scheme": "http",
+        "path": path, "raw_path": path.encode(), "root_path": "", "query_string": b"", "headers": [],
+        "client": ("127.0.0.1", 50000), "server": ("127.0.0.1", 80),
+    }
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        pass
+
+    started = time.perf_counter()
+    await app(scope, receive, send)
+    return time.perf_counter() - started
+
+async def compare(requests: int):
+    apps = {"bare": build_app(False), "instrumented": build_app(True)}
+    samples = {name: [] for name in apps}
+    for i in range(200):  # warm up routing, the engine and the metric children
+        for app in apps.values():
+            await call(app, f"/items/{i}")
+    for i in range(requests):
+        for name, app in apps.items():
+            samples[name].append(await call(app, f"/items/{i}"))
+    return {name: percentiles(values) for name, values in samples.items()}
+
+def time_operation(operation, repeat: int) -> float:
+    started = time.perf_counter()
+    for _ in range(repeat):
+        operation()
+    return (time.perf_counter() - started) / repeat * 1e9
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the overhead of the Prometheus instrumentation")
+    parser.add_argument("--requests", type=int, default=20000)
+    parser.add_argument("--repeat", type=int, default=200000, help="Calls per single-operation timing")
+    parser.add_argument("--multiprocess", action="store_true", help="Use prometheus_client's multiprocess mode")
+    parser.add_argument("--output", help="Write the JSON report to this file")
+    args = parser.parse_args()
+
+    if args.multiprocess:
+        # Read by prometheus_client when it is first imported
+        os.environ["PROMETHEUS_MULTIPROC_DIR"] = tempfile.mkdtemp(prefix="metrics-bench-")
+    from core.metrics import CACHE_REQUESTS, REQUEST_DURATION, render_metrics
+
+    requests = asyncio.run(compare(args.requests))
+    hits = CACHE_REQUESTS.labels("bench", "hit")
+    started = time.perf_counter()
+    body = render_metrics()
+    render_ms = (time.perf_counter() - started) * 1000
+
+    report = {
+        "multiprocess": args.multiprocess,
+        "requests": requests,
+        "overhead_p50_us": round(requests["instrumented"]["p50_us"] - requests["bare"]["p50_us"], 2),
+        "overhead_p50_percent": round(
+            (requests["instrumented"]["p50_us"] / requests["bare"]["p50_us"] - 1) * 100, 1
+        ),
+        "operations_ns": {
+            "histogram_labels_observe": round(time_operation(
+                lambda: REQUEST_DURATION.labels("GET", "/items/{item_id}", "200").observe(0.001), args.repeat
+            ), 1),
+            "counter_child_inc": round(time_operation(hits.inc, args.repeat), 1),
+            "perf_counter": round(time_operation(time.perf_counter, args.repeat), 1),
+        },
+        "render_ms": round(render_ms, 2),
+        "render_bytes": len(body),
+    }
+    print(json.dumps(report, indent=2))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,309 @@
+#!/usr/bin/env python
+"""
+Mock crypto payment provider for load and soak testing.
+
+Implements the subset of the provider API that CryptoService talks to
+(currencies, addresses, orders) and delivers signed webhook callbacks once
+an order confirms. Latency, error rate and throughput are configurable from
+the command line or at runtime through the /_mock endpoints.
+
+Point the API at it with:
+
+    CRYPTO_API_BASE_URL=http://localhost:9000
+    CRYPTO_API_KEY=mock-key
+    CRYPTO_WEBHOOK_SECRET=mock-webhook-secret
+"""
+
+import argparse
+import asyncio
+import hashlib
+import hmac
+import json
+import random
+import time
+import uuid
+from collections import deque
+from contextlib import asynccontextmanager
+from datetime import datetime, timedelta
+from typing import Any, Dict, Optional
+
+import httpx
+import uvicorn
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel, Field
+
+CURRENCIES = [
+    {"code": "BTC", "name": "Bitcoin"},
+    {"code": "ETH", "name": "Ethereum"},
+    {"code": "USDT", "name": "Tether"},
+    {"code": "USDC", "name": "USD Coin"},
+]
+
+class MockConfig(BaseModel):
+    latency_ms: float = Field(0.0, ge=0)  # Base latency added to every provider call
+    latency_jitter_ms: float = Field(0.0, ge=0)  # Uniform +/- jitter around the base latency
+    error_rate: float = Field(0.0, ge=0, le=1)  # Fraction of provider calls answered with a 503
+    max_rps: float = Field(0.0, ge=0)  # Provider throughput cap, 0 disables the limit
+    confirm_after_seconds: float = Field(1.0, ge=0)  # Delay before an order confirms
+    order_failure_rate: float = Field(0.0, ge=0, le=1)  # Fraction of orders that end up "failed"
+    auto_confirm: bool = True  # Confirm orders and send webhooks automatically
+    webhook_secret: str = "mock-webhook-secret"
+    webhook_retries: int = Field(3, ge=0)
+
+class TokenBucket:
+    """
+    Token bucket used to cap provider throughput at max_rps
+    """
+    def __init__(self, rate: float):
+        self.rate = rate
+        self.tokens = rate
+        self.updated_at = time.monotonic()
+
+    def acquire(self) -> bool:
+        if self.rate <= 0:
+            return True
+        now = time.monotonic()
+        self.tokens = min(self.rate, self.tokens + (now - self.updated_at) * self.rate)
+        self.updated_at = now
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return True
+        return False
+
+class MockState:
+    def __init__(self, config: MockConfig):
+        self.config = config
+        self.bucket = TokenBucket(config.max_rps)
+        self.orders: Dict[str, Dict[str, Any]] = {}
+        self.webhook_latencies_ms = deque(maxlen=100_000)
+        self.counters: Dict[str, int] = {}
+        self.started_at = time.time()
+
+    def incr(self, key: str, amount: int = 1) -> None:
+        self.counters[key] = self.counters.get(key, 0) + amount
+
+    def reconfigure(self, config: MockConfig) -> None:
+        self.config = config
+        self.bucket = TokenBucket(config.max_rps)
+
+def _percentile(values, pct: float) -> Optional[float]:
+    if not values:
+        return None
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return round(ordered[index], 2)
+
+def sign_payload(secret: str, body: bytes) -> str:
+    """
+    Sign a webhook body the same way CryptoService.verify_webhook_signature checks it
+    """
+    return hmac.new(secret.encode(), body, hashlib.sha256).hexdigest()
+
+def create_app(config: Optional[MockConfig] = None) -> FastAPI:
+    state = MockState(config or MockConfig())
+    http_client: Dict[str, httpx.AsyncClient] = {}
+
+    @asynccontextmanager
+    async def lifespan(app: FastAPI):
+        http_client["client"] = httpx.AsyncClient(timeout=10.0)
+        yield
+        await http_client["client"].aclose()
+
+    app = FastAPI(title="Mock Crypto Provider", lifespan=lifespan)
+    app.state.mock = state
+
+    @app.middleware("http")
+    async def provider_behaviour(request: Request, call_next):
+        # Control endpoints are never throttled, delayed or failed
+        if request.url.path.startswith("/_mock"):
+            return await call_next(request)
+
+        state.incr("requests")
+        cfg = state.config
+
+        if not request.headers.get("Authorization", "").startswith("Bearer "):
+            state.incr("unauthorized")
+            return JSONResponse(status_code=401, content={"message": "Missing API key"})
+
+        if not state.bucket.acquire():
+            state.incr("throttled")
+            return JSONResponse(status_code=429, content={"message": "Rate limit exceeded"})
+
+        if cfg.latency_ms or cfg.latency_jitter_ms:
+            delay_ms = cfg.latency_ms + random.uniform(-cfg.latency_jitter_ms, cfg.latency_jitter_ms)
+            await asyncio.sleep(max(0.0, delay_ms) / 1000)
+
+        if cfg.error_rate and random.random() < cfg.error_rate:
+            state.incr("injected_errors")
+            return JSONResponse(status_code=503, content={"message": "Injected provider error"})
+
+        return await call_next(request)
+
+    async def deliver_webhook(order: Dict[str, Any]) -> None:
+        body = json.dumps({
+            "order_id": order["id"],
+            "status": order["status"],
+            "transaction_hash": order.get("transaction_hash"),
+            "amount": order["amount"],
+            "currency": order["currency"],
+        }).encode()
+        headers = {
+            "Content-Type": "application/json",
+            "X-Signature": sign_payload(state.config.webhook_secret, body),
+        }
+
+        for attempt in range(state.config.webhook_retries + 1):
+            started = time.perf_counter()
+            try:
+                response = await http_client["client"].post(order["callback_url"], content=body, headers=headers)
+                state.webhook_latencies_ms.append((time.perf_counter() - started) * 1000)
+                if response.status_code < 500:
+                    state.incr("webhooks_delivered" if response.status_code < 400 else "webhooks_rejected")
+                    return
+            except httpx.HTTPError:
+                pass
+            state.incr("webhook_retries")
+            await asyncio.sleep(0.2 * (2 ** attempt))
+
+        state.incr("webhooks_failed")
+
+    async def confirm_order(external_id: str) -> None:
+        await asyncio.sleep(state.config.confirm_after_seconds)
+        order = state.orders.get(external_id)
+        if not order or order["status"] != "pending":
+            return
+
+        if random.random() < state.config.order_failure_rate:
+            order["status"] = "failed"
+        else:
+            order["status"] = "completed"
+            order["transaction_hash"] = "0x" + uuid.uuid4().hex + uuid.uuid4().hex
+        order["confirmed_at"] = datetime.utcnow().isoformat()
+        state.incr(f"orders_{order['status']}")
+
+        if order.get("callback_url"):
+            await deliver_webhook(order)
+
+    # Provider API
+    @app.get("/currencies")
+    async def get_currencies():
+        return CURRENCIES
+
+    @app.post("/addresses/generate")
+    async def generate_address(payload: Dict[str, Any]):
+        currency = str(payload.get("currency", "")).upper()
+        if currency not in {c["code"] for c in CURRENCIES}:
+            raise HTTPException(status_code=400, detail="Unsupported currency")
+        state.incr("addresses_generated")
+        return {
+            "address": "mock_" + uuid.uuid4().hex,
+            "currency": currency,
+            "customer_id": payload.get("customer_id"),
+        }
+
+    @app.post("/orders")
+    async def create_order(payload: Dict[str, Any]):
+        currency = str(payload.get("currency", "")).upper()
+        if currency not in {c["code"] for c in CURRENCIES}:
+            raise HTTPException(status_code=400, detail="Unsupported currency")
+
+        external_id = "mock_ord_" + uuid.uuid4().hex
+        order = {
+            "id": external_id,
+            "amount": payload.get("amount"),
+            "currency": currency,
+            "customer_id": payload.get("customer_id"),
+            "callback_url": payload.get("callback_url"),
+            "payment_address": "mock_" + uuid.uuid4().hex,
+            "status": "pending",
+            "created_at": datetime.utcnow().isoformat(),
+            "expires_at": (datetime.utcnow() + timedelta(hours=24)).isoformat(),
+        }
+        state.orders[external_id] = order
+        state.incr("orders_created")
+
+        if state.config.auto_confirm:
+            asyncio.create_task(confirm_order(external_id))
+
+        return {k: v for k, v in order.items() if k != "callback_url"}
+
+    @app.get("/orders/{external_id}")
+    async def get_order(external_id: str):
+        order = state.orders.get(external_id)
+        if not order:
+            raise HTTPException(status_code=404, detail="Order not found")
+        return {k: v for k, v in order.items() if k != "callback_url"}
+
+    # Control endpoints
+    @app.get("/_mock/config")
+    async def get_config():
+        return state.config
+
+    @app.put("/_mock/config")
+    async def update_config(config: MockConfig):
+        state.reconfigure(config)
+        return state.config
+
+    @app.post("/_mock/orders/{external_id}/confirm")
+    async def force_confirm(external_id: str):
+        if external_id not in state.orders:
+            raise HTTPException(status_code=404, detail="Order not found")
+        await confirm_order(external_id)
+        return state.orders[external_id]
+
+    @app.get("/_mock/stats")
+    async def get_stats():
+        latencies = list(state.webhook_latencies_ms)
+        return {
+            "uptime_seconds": round(time.time() - state.started_at, 2),
+            "counters": state.counters,
+            "orders_in_memory": len(state.orders),
+            "webhook_latency_ms": {
+                "count": len(latencies),
+                "p50": _percentile(latencies, 50),
+                "p95": _percentile(latencies, 95),
+                "p99": _percentile(latencies, 99),
+                "max": round(max(latencies), 2) if latencies else None,
+            },
+        }
+
+    @app.post("/_mock/reset")
+    async def reset():
+        state.orders.clear()
+        state.webhook_latencies_ms.clear()
+        state.counters.clear()
+        state.started_at = time.time()
+        return {"status": "reset"}
+
+    return app
+
+def main():
+    parser = argparse.ArgumentParser(description="Run a mock crypto payment provider")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=9000)
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="Base latency per provider call")
+    parser.add_argument("--latency-jitter-ms", type=float, default=0.0, help="Uniform jitter around the base latency")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of calls answered with a 503")
+    parser.add_argument("--max-rps", type=float, default=0.0, help="Throughput cap in requests/s (0 = unlimited)")
+    parser.add_argument("--confirm-after", type=float, default=1.0, help="Seconds before an order confirms")
+    parser.add_argument("--order-failure-rate", type=float, default=0.0, help="Fraction of orders that fail")
+    parser.add_argument("--webhook-secret", default="mock-webhook-secret", help="Must match CRYPTO_WEBHOOK_SECRET")
+    parser.add_argument("--no-auto-confirm", action="store_true", help="Only confirm orders via /_mock/orders/{id}/confirm")
+
+    args = parser.parse_args()
+
+    config = MockConfig(
+        latency_ms=args.latency_ms,
+        latency_jitter_ms=args.latency_jitter_ms,
+        error_rate=args.error_rate,
+        max_rps=args.max_rps,
+        confirm_after_seconds=args.confirm_after,
+        order_failure_rate=args.order_failure_rate,
+        auto_confirm=not args.no_auto_confirm,
+        webhook_secret=args.webhook_secret,
+    )
+    uvicorn.run(create_app(config), host=args.host, port=args.port, log_level="warning")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,235 @@
+#!/usr/bin/env python
+"""
+Benchmark the cost of rendering list responses, per 1k rows.
+
+Seeds --rows transactions for one wallet and --rows notifications into the
+database at --database-url, then renders pages of --page-size rows each way:
+
+- orm_stdlib: ORM objects, validated through the response model, converted to
+  plain data with jsonable_encoder and encoded with the stdlib `json` module
+  (what FastAPI does when a route's response class is not the default)
+- orm_dump_json: ORM objects through a prebuilt TypeAdapter straight to bytes
+- rows_dump_json: column-only query, prebuilt TypeAdapter straight to bytes
+  (the path behind GET /wallets/me/transactions and GET /admin/notifications)
+- rows_fields: a `fields=amount,type,status` sparse fieldset, selecting and
+  rendering only those columns (plus id)
+- notifications_dicts: the hand-built notification dicts the admin list used to
+  return, encoded with the stdlib (against rows_dump_json for notifications)
+
+Query and serialization time are reported separately, as p50/p95 ms per 1k
+rows, together with the body size and the cost of gzip and brotli on it.
+"""
+
+import argparse
+import gzip
+import json
+import os
+import statistics
+import sys
+import time
+import uuid
+from datetime import datetime, timedelta
+from typing import List
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from fastapi.encoders import jsonable_encoder
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from core.compression import RESPONSE_BROTLI_QUALITY, RESPONSE_GZIP_LEVEL, brotli
+from core.serialization import dump_json_list, schema_columns, sparse_schema, type_adapter
+from db.database import Base
+from models.models import User, Wallet, Transaction, TransactionType, TransactionStatus, Notification
+from repositories.notification_repository import NotificationRepository
+from repositories.transaction_repository import TransactionRepository
+from schemas.schemas import Transaction as TransactionSchema, Notification as NotificationSchema
+from services.notification_service import NOTIFICATION_LIST_COLUMNS
+from services.wallet_service import TRANSACTION_LIST_COLUMNS
+
+def seed(engine, rows: int):
+    """
+    Insert one user and wallet with `rows` transactions and `rows` notifications
+    """
+    user_id, wallet_id = uuid.uuid4(), uuid.uuid4()
+    now = datetime.utcnow()
+    types = list(TransactionType)
+    with engine.begin() as conn:
+        conn.execute(User.__table__.insert(), [
+            {"id": user_id, "email": f"serialize-{user_id.hex[:8]}@example.com", "first_name": "Bench",
+             "last_name": "Serialize"}
+        ])
+        conn.execute(Wallet.__table__.insert(), [{"id": wallet_id, "user_id": user_id, "balance": 0.0}])
+        conn.execute(Transaction.__table__.insert(), [
+            {
+                "id": uuid.uuid4(),
+                "user_id": user_id,
+                "wallet_id": wallet_id,
+                "type": types[i % len(types)],
+                "status": TransactionStatus.COMPLETED,
+                "amount": round(10 + i * 0.37, 2),
+                "description": f"Benchmark transaction {i}",
+                "reference": f"ref-{i:08d}",
+                "created_at": now - timedelta(minutes=i),
+                "updated_at": now - timedelta(minutes=i),
+            }
+            for i in range(rows)
+        ])
+        conn.execute(Notification.__table__.insert(), [
+            {
+                "id": uuid.uuid4(),
+                "user_id": user_id,
+                "title": "Deposit received",
+                "message": f"Your deposit of {10 + i * 0.37:.2f} USD has been credited",
+                "type": "transaction",
+                "reference_id": str(uuid.uuid4()),
+                "is_read": i % 2 == 0,
+                "created_at": now - timedelta(minutes=i),
+            }
+            for i in range(rows)
+        ])
+    return user_id, wallet_id
+
+def orm_stdlib(schema, objects) -> bytes:
+    adapter = type_adapter(List[schema])
+    content = jsonable_encoder(adapter.dump_python(adapter.validate_python(objects, from_attributes=True)))
+    return json.dumps(content, ensure_ascii=False, allow_nan=False, separators=(",", ":")).encode("utf-8")
+
+def notification_dicts(notifications) -> bytes:
+    content = jsonable_encoder([{
+        "id": str(notification.id),
+        "user_id": str(notification.user_id),
+        "title": notification.title,
+        "message": notification.message,
+        "is_read": notification.is_read,
+        "type": notification.type,
+        "reference_id": notification.reference_id,
+        "created_at": notification.created_at
+    } for notification in notifications])
+    return json.dumps(content, ensure_ascii=False, allow_nan=False, separators=(",", ":")).encode("utf-8")
+
+def percentiles(samples, per_rows: float):
+    samples = sorted(sample * 1000 / per_rows for sample in samples)
+    return {
+        "p50_ms": round(statistics.median(samples), 3),
+        "p95_ms": round(samples[max(0, int(len(samples) * 0.95) - 1)], 3),
+    }
+
+def measure(session_factory, fetch, render, page_size: int, pages: int, repeat: int):
+    """
+    Fetch and render `repeat` pages and return query and serialization cost per 1k rows
+    """
+    query_samples, render_samples, body = [], [], b""
+    for i in range(repeat):
+        db = session_factory()
+        try:
+            started = time.perf_counter()
+            rows = fetch(db, (i % pages) * page_size)
+            fetched = time.perf_counter()
+            body = render(rows)
+            rendered = time.perf_counter()
+        finally:
+            db.close()
+        query_samples.append(fetched - started)
+        render_samples.append(rendered - fetched)
+    per_rows = page_size / 1000
+    return {
+        "query": percentiles(query_samples, per_rows),
+        "serialize": percentiles(render_samples, per_rows),
+        "total": percentiles([q + r for q, r in zip(query_samples, render_samples)], per_rows),
+        "body_bytes": len(body),
+    }
+
+def compression(body: bytes, repeat: int):
+    """
+    Size and time of each content coding on one response body
+    """
+    codings = {"gzip": lambda data: gzip.compress(data, compresslevel=RESPONSE_GZIP_LEVEL)}
+    if brotli is not None:
+        codings["br"] = lambda data: brotli.compress(data, quality=RESPONSE_BROTLI_QUALITY)
+    report = {}
+    for name, compress in codings.items():
+        samples = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            compressed = compress(body)
+            samples.append(time.perf_counter() - started)
+        report[name] = {"bytes": len(compressed), "p50_ms": round(statistics.median(samples) * 1000, 3)}
+    return report
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark list response serialization per 1k rows")
+    parser.add_argument("--database-url", default="sqlite:///serialization_bench.db")
+    parser.add_argument("--rows", type=int, default=10000)
+    parser.add_argument("--page-size", type=int, default=1000)
+    parser.add_argument("--repeat", type=int, default=50)
+    parser.add_argument("--output", help="Write the JSON report to this file")
+    args = parser.parse_args()
+
+    engine = create_engine(args.database_url)
+    Base.metadata.create_all(bind=engine)
+    session_factory = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    user_id, wallet_id = seed(engine, args.rows)
+    pages = max(1, args.rows // args.page_size)
+    transactions = TransactionRepository()
+    notifications = NotificationRepository()
+
+    def orm_transactions(db, skip):
+        return transactions.get_by_wallet_id(db, wallet_id, skip=skip, limit=args.page_size)
+
+    def row_transactions(db, skip):
+        return transactions.get_by_wallet_id(db, wallet_id, skip=skip, limit=args.page_size,
+                                             columns=TRANSACTION_LIST_COLUMNS)
+
+    field_names = ("id", "type", "amount", "status")
+    field_columns = schema_columns(Transaction, TransactionSchema, field_names + ("created_at",))
+
+    def field_transactions(db, skip):
+        return transactions.get_by_wallet_id(db, wallet_id, skip=skip, limit=args.page_size, columns=field_columns)
+
+    def orm_notifications(db, skip):
+        return notifications.get_by_user_id(db, user_id, skip=skip, limit=args.page_size)
+
+    def row_notifications(db, skip):
+        return notifications.get_by_user_id(db, user_id, skip=skip, limit=args.page_size,
+                                            columns=NOTIFICATION_LIST_COLUMNS)
+
+    # Build the adapters and warm the connection before timing
+    db = session_factory()
+    body = dump_json_list(TransactionSchema, row_transactions(db, 0))
+    dump_json_list(NotificationSchema, row_notifications(db, 0))
+    db.close()
+
+    report = {
+        "dialect": engine.dialect.name,
+        "rows": args.rows,
+        "page_size": args.page_size,
+        "transactions": {
+            "orm_stdlib": measure(session_factory, orm_transactions,
+                                  lambda rows: orm_stdlib(TransactionSchema, rows), args.page_size, pages, args.repeat),
+            "orm_dump_json": measure(session_factory, orm_transactions,
+                                     lambda rows: dump_json_list(TransactionSchema, rows), args.page_size, pages,
+                                     args.repeat),
+            "rows_dump_json": measure(session_factory, row_transactions,
+                                      lambda rows: dump_json_list(TransactionSchema, rows), args.page_size, pages,
+                                      args.repeat),
+            "rows_fields": measure(session_factory, field_transactions,
+                                   lambda rows: dump_json_list(sparse_schema(TransactionSchema, field_names), rows),
+                                   args.page_size, pages, args.repeat),
+        },
+        "notifications": {
+            "notifications_dicts": measure(session_factory, orm_notifications, notification_dicts,
+                                           args.page_size, pages, args.repeat),
+            "rows_dump_json": measure(session_factory, row_notifications,
+                                      lambda rows: dump_json_list(NotificationSchema, rows), args.page_size, pages,
+                                      args.repeat),
+        },
+        "compression": compression(body, args.repeat),
+    }
+    print(json.dumps(report, indent=2))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+#!/usr/bin/env python
+"""
+Profile API startup and check it against a time budget.
+
+Imports `main` --repeat times, each in a fresh interpreter with
+`python -X importtime`, and reports the p50/p95 wall time of the import, the
+modules with the largest cumulative import time (from the median run) and any
+--deferred module (Celery, numpy, psutil, the provider HTTP client) that was
+imported at startup anyway. Exits with status 1 when the p50 import time
+exceeds --budget-ms or a deferred module was imported, so it can gate CI.
+
+DATABASE_URL is unset by default, the case that used to block startup.
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+SRC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src")
+
+PROBE = (
+    "import sys, time\n"
+    "started = time.perf_counter()\n"
+    "import main\n"
+    "elapsed = time.perf_counter() - started\n"
+    "print(repr((elapsed, sorted(sys.modules))))\n"
+)
+
+def import_main(env):
+    """
+    Import main in a new interpreter; return seconds, loaded modules and the importtime rows
+    """
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", PROBE], cwd=SRC_DIR, env=env,
+                            capture_output=True, text=True, check=True)
+    elapsed, modules = eval(result.stdout.strip().splitlines()[-1])
+    rows = []
+    for line in result.stderr.splitlines():
+        # "import time: self [us] | cumulative | imported package"
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        _, self_us, cumulative_us, name = [part.strip() for part in line.replace("import time:", "|", 1).split("|")]
+        rows.append({"module": name, "self_ms": int(self_us) / 1000, "cumulative_ms": int(cumulative_us) / 1000})
+    return elapsed, set(modules), rows
+
+def main():
+    parser = argparse.ArgumentParser(description="Profile the import time of the API against a budget")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--budget-ms", type=float, default=float(os.getenv("STARTUP_BUDGET_MS", "2000")))
+    parser.add_argument("--top", type=int, default=15, help="Number of slowest modules to report")
+    parser.add_argument("--deferred", default="celery,numpy,psutil,httpx",
+                        help="Comma-separated modules that must not be imported at startup")
+    parser.add_argument("--database-url", help="DATABASE_URL for the import (unset by default)")
+    parser.add_argument("--output", help="Write the JSON report to this file")
+    args = parser.parse_args()
+
+    env = dict(os.environ, PYTHONPATH=SRC_DIR)
+    env.pop("DATABASE_URL", None)
+    if args.database_url:
+        env["DATABASE_URL"] = args.database_url
+
+    runs = [import_main(env) for _ in range(args.repeat)]
+    samples = sorted(elapsed * 1000 for elapsed, _, _ in runs)
+    p50 = statistics.median(samples)
+    _, modules, rows = min(runs, key=lambda run: abs(run[0] * 1000 - p50))
+    deferred = [name.strip() for name in args.deferred.split(",") if name.strip()]
+    imported = sorted(name for name in deferred if name in modules)
+
+    report = {
+        "repeat": args.repeat,
+        "budget_ms": args.budget_ms,
+        "p50_ms": round(p50, 1),
+        "p95_ms": round(samples[max(0, int(len(samples) * 0.95) - 1)], 1),
+        "modules_loaded": len(modules),
+        "deferred_imported": imported,
+        "slowest": [
+            {"module": row["module"], "self_ms": round(row["self_ms"], 1), "cumulative_ms": round(row["cumulative_ms"], 1)}
+            for row in sorted(rows, key=lambda row: row["cumulative_ms"], reverse=True)[:args.top]
+        ],
+        "within_budget": p50 <= args.budget_ms and not imported,
+    }
+    print(json.dumps(report, indent=2))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+    if not report["within_budget"]:
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,140 @@
+#!/usr/bin/env python
+"""
+Benchmark the overhead of request tracing.
+
+Builds two copies of a small app, each with one route that calls a service,
+which calls a repository running one query on its own in-memory SQLite
+engine. The `traced` copy decorates both classes with @traced and adds
+TracingMiddleware and instrument_engine (whose hooks record the statement
+spans), the `bare` copy has none of these. Both are called straight through
+ASGI with the requests interleaved, and p50/p95 us per request are reported
+for the traced copy with no request sampled, and with every request sampled.
+
+--export-file also appends every sampled trace to a JSON-lines file, as with
+TRACE_EXPORT_FILE.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+def percentiles(samples):
+    samples = sorted(sample * 1e6 for sample in samples)
+    return {
+        "p50_us": round(statistics.median(samples), 2),
+        "p95_us": round(samples[max(0, int(len(samples) * 0.95) - 1)], 2),
+    }
+
+def build_app(traced_app: bool):
+    from fastapi import FastAPI
+    from sqlalchemy import create_engine, text
+    from sqlalchemy.pool import StaticPool
+
+    from core.metrics import instrument_engine
+    from core.tracing import TracingMiddleware, traced
+
+    engine = create_engine("sqlite:///:memory:", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    if traced_app:
+        instrument_engine(engine)
+
+    class ItemRepository:
+        def get_value(self, item_id: int):
+            with engine.connect() as conn:
+                return conn.execute(text("SELECT :id * 2"), {"id": item_id}).scalar()
+
+    class ItemService:
+        def __init__(self):
+            self.item_repository = ItemRepository()
+
+        def get_item(self, item_id: int):
+            return {"id": item_id, "value": self.item_repository.get_value(item_id)}
+
+    if traced_app:
+        traced(ItemRepository)
+        traced(ItemService)
+    item_service = ItemService()
+    app = FastAPI()
+
+    @app.get("/items/{item_id}")
+    def get_item(item_id: int):
+        return item_service.get_item(item_id)
+
+    if traced_app:
+        app.add_middleware(TracingMiddleware)
+    return app
+
+async def call(app, path: str, headers) -> float:
+    """
+    Run one GET through the ASGI app and return its duration in seconds
+    """
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "GET", "scheme": "http",
+        "path": path, "raw_path": path.encode(), "root_path": "", "query_string": b"", "headers": headers,
+        "client": ("127.0.0.1", 50000), "server": ("127.0.0.1", 80),
+    }
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        pass
+
+    started = time.perf_counter()
+    await app(scope, receive, send)
+    return time.perf_counter() - started
+
+async def compare(requests: int):
+    bare, traced_app = build_app(False), build_app(True)
+    # TRACE_SAMPLE_RATE is 0 here, so a (trusted) sampled traceparent is what makes a request traced
+    sampled = [(b"traceparent", b"00-4bf92f3577b34da6a3ce929d0e0e4736-00f067aa0ba902b7-01")]
+    runs = {"bare": (bare, []), "unsampled": (traced_app, []), "sampled": (traced_app, sampled)}
+    samples = {name: [] for name in runs}
+    for i in range(200):  # warm up routing and the engines
+        for app, headers in runs.values():
+            await call(app, f"/items/{i}", headers)
+    for i in range(requests):
+        for name, (app, headers) in runs.items():
+            samples[name].append(await call(app, f"/items/{i}", headers))
+    return {name: percentiles(values) for name, values in samples.items()}
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the overhead of request tracing")
+    parser.add_argument("--requests", type=int, default=20000)
+    parser.add_argument("--export-file", action="store_true", help="Also append traces to a JSON-lines file")
+    parser.add_argument("--output", help="Write the JSON report to this file")
+    args = parser.parse_args()
+
+    # Read by core.tracing when it is first imported
+    os.environ["TRACE_SAMPLE_RATE"] = "0"
+    os.environ["TRACE_TRUST_TRACEPARENT"] = "true"
+    if args.export_file:
+        os.environ["TRACE_EXPORT_FILE"] = os.path.join(tempfile.mkdtemp(prefix="tracing-bench-"), "traces.jsonl")
+    from core.tracing import recent_traces
+
+    requests = asyncio.run(compare(args.requests))
+    bare_p50 = requests["bare"]["p50_us"]
+    report = {
+        "export_file": args.export_file,
+        "requests": requests,
+        "overhead_p50_us": {
+            name: round(requests[name]["p50_us"] - bare_p50, 2) for name in ("unsampled", "sampled")
+        },
+        "overhead_p50_percent": {
+            name: round((requests[name]["p50_us"] / bare_p50 - 1) * 100, 1) for name in ("unsampled", "sampled")
+        },
+        "spans_per_trace": recent_traces(limit=1)[0]["span_count"],
+    }
+    print(json.dumps(report, indent=2))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+if __name__ == "__main__":
+    main()
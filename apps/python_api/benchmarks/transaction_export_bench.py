@@ -0,0 +1,142 @@
+#!/usr/bin/env python
+"""
+Benchmark the streaming transaction export against a large transactions table.
+
+Seeds --rows transactions (default 10M) spread over --wallets wallets into the
+database at --database-url (a fresh SQLite file by default), then runs
+ExportService.stream_transactions into a null sink and reports throughput,
+time to first byte and peak memory. Peak memory should stay flat as --rows grows.
+"""
+
+import argparse
+import json
+import os
+import random
+import resource
+import sys
+import time
+import uuid
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from sqlalchemy import create_engine, func
+from sqlalchemy.orm import sessionmaker
+
+from db.database import Base
+from models.models import User, Wallet, Transaction, TransactionType, TransactionStatus
+from services.export_service import ExportService
+
+def seed(engine, rows: int, wallets: int, batch_size: int) -> None:
+    """
+    Insert users, wallets and `rows` transactions with batched Core inserts
+    """
+    user_ids = [uuid.uuid4() for _ in range(wallets)]
+    wallet_ids = [uuid.uuid4() for _ in range(wallets)]
+    types = list(TransactionType)
+    start = datetime(2023, 1, 1)
+    step = timedelta(days=365) / max(rows, 1)
+
+    with engine.begin() as conn:
+        conn.execute(User.__table__.insert(), [
+            {"id": user_id, "email": f"bench-{i}@example.com", "first_name": "Bench", "last_name": str(i)}
+            for i, user_id in enumerate(user_ids)
+        ])
+        conn.execute(Wallet.__table__.insert(), [
+            {"id": wallet_id, "user_id": user_id, "balance": 0.0}
+            for wallet_id, user_id in zip(wallet_ids, user_ids)
+        ])
+
+    inserted = 0
+    started = time.perf_counter()
+    while inserted < rows:
+        count = min(batch_size, rows - inserted)
+        batch = []
+        for i in range(inserted, inserted + count):
+            owner = random.randrange(wallets)
+            batch.append({
+                "id": uuid.uuid4(),
+                "user_id": user_ids[owner],
+                "wallet_id": wallet_ids[owner],
+                "type": random.choice(types),
+                "status": TransactionStatus.COMPLETED,
+                "amount": round(random.uniform(1, 5000), 2),
+                "description": "Benchmark transaction",
+                "reference": None,
+                "created_at": start + step * i,
+            })
+        with engine.begin() as conn:
+            conn.execute(Transaction.__table__.insert(), batch)
+        inserted += count
+        if inserted % (batch_size * 100) == 0 or inserted == rows:
+            rate = inserted / (time.perf_counter() - started)
+            print(f"seeded {inserted:,}/{rows:,} rows ({rate:,.0f} rows/s)")
+
+def run_export(session_factory, export_format: str, compress: bool, batch_size: int, wallet_id=None):
+    """
+    Stream an export into a null sink and measure it
+    """
+    db = session_factory()
+    started = time.perf_counter()
+    first_byte = None
+    total_bytes = 0
+    chunks = 0
+
+    for chunk in ExportService().stream_transactions(
+        db, export_format=export_format, compress=compress, wallet_id=wallet_id, batch_size=batch_size
+    ):
+        if first_byte is None and chunk:
+            first_byte = time.perf_counter() - started
+        total_bytes += len(chunk)
+        chunks += 1
+
+    elapsed = time.perf_counter() - started
+    return {
+        "format": export_format,
+        "gzip": compress,
+        "wallet_id": str(wallet_id) if wallet_id else None,
+        "seconds": round(elapsed, 2),
+        "time_to_first_byte_ms": round((first_byte or 0) * 1000, 2),
+        "bytes": total_bytes,
+        "chunks": chunks,
+        "peak_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the streaming transaction export")
+    parser.add_argument("--database-url", default="sqlite:///transaction_export_bench.db")
+    parser.add_argument("--rows", type=int, default=10_000_000)
+    parser.add_argument("--wallets", type=int, default=1000)
+    parser.add_argument("--seed-batch-size", type=int, default=20_000)
+    parser.add_argument("--batch-size", type=int, default=1000, help="Rows fetched per cursor round trip")
+    parser.add_argument("--format", choices=["csv", "ndjson"], default="csv")
+    parser.add_argument("--gzip", action="store_true")
+    parser.add_argument("--skip-seed", action="store_true", help="Reuse rows already in the database")
+    parser.add_argument("--output", help="Write the JSON report to this file")
+    args = parser.parse_args()
+
+    engine = create_engine(args.database_url)
+    Base.metadata.create_all(bind=engine)
+    session_factory = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+    if not args.skip_seed:
+        seed(engine, args.rows, args.wallets, args.seed_batch_size)
+
+    db = session_factory()
+    total_rows = db.query(func.count(Transaction.id)).scalar()
+    wallet_id = db.query(Transaction.wallet_id).limit(1).scalar()
+    db.close()
+
+    full = run_export(session_factory, args.format, args.gzip, args.batch_size)
+    full["rows"] = total_rows
+    full["rows_per_second"] = round(total_rows / full["seconds"]) if full["seconds"] else None
+    single_wallet = run_export(session_factory, args.format, args.gzip, args.batch_size, wallet_id=wallet_id)
+
+    report = {"full_export": full, "single_wallet_export": single_wallet}
+    print(json.dumps(report, indent=2))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+if __name__ == "__main__":
+    main()
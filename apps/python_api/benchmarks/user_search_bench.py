@@ -0,0 +1,150 @@
+#!/usr/bin/env python
+"""
+Benchmark admin user search against a large users table.
+
+Seeds --rows users (default 1M; use --rows 5000000 against PostgreSQL for the
+full-size run) into the database at --database-url, then times
+UserService.search_users for exact, prefix, substring, typo, phone and
+filtered queries against the 50 ms p95 target.
+"""
+
+import argparse
+import json
+import os
+import random
+import statistics
+import sys
+import time
+import uuid
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from sqlalchemy import create_engine, func, text
+from sqlalchemy.orm import sessionmaker
+
+from db.database import Base
+from models.models import User, UserRole
+from repositories.user_repository import USER_SEARCH_DOCUMENT_SQL
+from services.user_service import UserService
+
+FIRST_NAMES = ["James", "Mary", "Robert", "Patricia", "John", "Jennifer", "Michael", "Linda", "David", "Elizabeth",
+               "Amara", "Chen", "Fatima", "Kwame", "Olga", "Priya", "Mateo", "Yuki", "Ngozi", "Lars"]
+LAST_NAMES = ["Smith", "Johnson", "Williams", "Brown", "Jones", "Garcia", "Miller", "Davis", "Okafor", "Nakamura",
+              "Kowalski", "Haddad", "Fernandez", "Mensah", "Ivanova", "Sharma", "Andersson", "Nguyen", "Rossi", "Adeyemi"]
+LATENCY_TARGET_MS = 50
+
+def seed(engine, rows: int, batch_size: int) -> None:
+    """
+    Insert `rows` users with batched Core inserts
+    """
+    start = datetime(2023, 1, 1)
+    step = timedelta(days=730) / max(rows, 1)
+
+    inserted = 0
+    started = time.perf_counter()
+    while inserted < rows:
+        count = min(batch_size, rows - inserted)
+        batch = []
+        for i in range(inserted, inserted + count):
+            first_name = random.choice(FIRST_NAMES)
+            last_name = random.choice(LAST_NAMES)
+            batch.append({
+                "id": uuid.uuid4(),
+                "email": f"{first_name.lower()}.{last_name.lower()}{i}@example.com",
+                "first_name": first_name,
+                "last_name": last_name,
+                "phone": f"+1 ({random.randrange(200, 1000)}) {random.randrange(10 ** 7):07d}",
+                "role": UserRole.ADMIN if i % 1000 == 0 else UserRole.USER,
+                "is_active": random.random() > 0.05,
+                "is_verified": random.random() > 0.3,
+                "created_at": start + step * i,
+            })
+        with engine.begin() as conn:
+            conn.execute(User.__table__.insert(), batch)
+        inserted += count
+        if inserted % (batch_size * 100) == 0 or inserted == rows:
+            rate = inserted / (time.perf_counter() - started)
+            print(f"seeded {inserted:,}/{rows:,} rows ({rate:,.0f} rows/s)")
+
+def timed(fn, repeat: int):
+    """
+    Run `fn` `repeat` times and return latency percentiles in ms
+    """
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - started) * 1000)
+    samples.sort()
+    p95 = samples[max(0, int(len(samples) * 0.95) - 1)]
+    return {
+        "p50_ms": round(statistics.median(samples), 2),
+        "p95_ms": round(p95, 2),
+        "within_target": p95 <= LATENCY_TARGET_MS,
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark admin user search")
+    parser.add_argument("--database-url", default="sqlite:///user_search_bench.db")
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--seed-batch-size", type=int, default=20_000)
+    parser.add_argument("--limit", type=int, default=20)
+    parser.add_argument("--repeat", type=int, default=50)
+    parser.add_argument("--skip-seed", action="store_true", help="Reuse rows already in the database")
+    parser.add_argument("--output", help="Write the JSON report to this file")
+    args = parser.parse_args()
+
+    engine = create_engine(args.database_url)
+    Base.metadata.create_all(bind=engine)
+    if engine.dialect.name == "postgresql":
+        with engine.begin() as conn:
+            conn.execute(text("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
+            conn.execute(text(
+                "CREATE INDEX IF NOT EXISTS ix_users_search_trgm "
+                f"ON users USING gin (({USER_SEARCH_DOCUMENT_SQL}) gin_trgm_ops)"
+            ))
+    session_factory = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+    if not args.skip_seed:
+        seed(engine, args.rows, args.seed_batch_size)
+        if engine.dialect.name == "postgresql":
+            with engine.begin() as conn:
+                conn.execute(text("ANALYZE users"))
+
+    db = session_factory()
+    service = UserService()
+    total_rows = db.query(func.count(User.id)).scalar()
+    sample = db.query(User).order_by(func.random()).limit(1).one()
+    digits = "".join(c for c in sample.phone if c.isdigit())
+
+    # The first search on SQLite builds the in-process index; report it separately
+    started = time.perf_counter()
+    service.search_users(db, sample.last_name, limit=args.limit)
+    report = {
+        "rows": total_rows,
+        "dialect": engine.dialect.name,
+        "first_search_ms": round((time.perf_counter() - started) * 1000, 2),
+        "target_p95_ms": LATENCY_TARGET_MS,
+        "queries": {},
+    }
+
+    queries = {
+        "exact_email": {"query": sample.email},
+        "prefix": {"query": sample.email[:6]},
+        "substring": {"query": sample.email.split("@")[0][2:9]},
+        "typo": {"query": sample.last_name[:-1] + sample.last_name[-2:]},
+        "phone_digits": {"query": digits[-7:]},
+        "filtered": {"query": sample.first_name, "role": UserRole.USER, "is_active": True, "is_verified": True},
+    }
+    for name, kwargs in queries.items():
+        report["queries"][name] = timed(lambda: service.search_users(db, limit=args.limit, **kwargs), args.repeat)
+    db.close()
+
+    print(json.dumps(report, indent=2, default=str))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2, default=str)
+
+if __name__ == "__main__":
+    main()
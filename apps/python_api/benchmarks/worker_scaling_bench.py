@@ -0,0 +1,139 @@
+#!/usr/bin/env python
+"""
+Benchmark API throughput against the number of gunicorn workers.
+
+For each count in --workers, starts the production server (gunicorn.conf.py)
+with that many uvicorn workers, drives --path with --concurrency concurrent
+keep-alive clients for --duration seconds and reports requests/s, p50/p95
+latency and errors. It then sends SIGTERM with requests in flight and reports
+how many of them still completed (graceful drain) and how long shutdown took.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import signal
+import statistics
+import subprocess
+import tempfile
+import time
+
+import httpx
+
+APP_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+
+def start_server(workers: int, port: int, database_url: str, pid_file: str) -> subprocess.Popen:
+    env = dict(os.environ, DATABASE_URL=database_url, WEB_CONCURRENCY=str(workers), GUNICORN_ACCESS_LOG="")
+    return subprocess.Popen(
+        ["gunicorn", "-c", "gunicorn.conf.py", "--bind", f"127.0.0.1:{port}", "--pid", pid_file],
+        cwd=APP_DIR, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+
+def wait_ready(base_url: str, timeout: float = 60.0) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            if httpx.get(f"{base_url}/health", timeout=1.0).status_code == 200:
+                return
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.2)
+    raise RuntimeError(f"Server at {base_url} did not become ready")
+
+async def drive(base_url: str, path: str, headers, concurrency: int, duration: float):
+    """
+    Keep `concurrency` clients busy for `duration` seconds; return latencies (s) and errors
+    """
+    latencies, errors = [], 0
+    deadline = time.perf_counter() + duration
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=base_url, headers=headers, limits=limits, timeout=30.0) as client:
+        async def worker():
+            nonlocal errors
+            while time.perf_counter() < deadline:
+                started = time.perf_counter()
+                try:
+                    response = await client.get(path)
+                    if response.status_code >= 500:
+                        errors += 1
+                    else:
+                        latencies.append(time.perf_counter() - started)
+                except httpx.HTTPError:
+                    errors += 1
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return latencies, errors
+
+async def drain(base_url: str, path: str, headers, concurrency: int, process: subprocess.Popen):
+    """
+    Send SIGTERM while `concurrency` requests are in flight; return completed, failed, shutdown seconds
+    """
+    async with httpx.AsyncClient(base_url=base_url, headers=headers, timeout=30.0) as client:
+        requests = [asyncio.ensure_future(client.get(path)) for _ in range(concurrency)]
+        # Let the requests reach the server before it is told to stop
+        await asyncio.sleep(0.05)
+        started = time.perf_counter()
+        process.send_signal(signal.SIGTERM)
+        results = await asyncio.gather(*requests, return_exceptions=True)
+    completed = sum(1 for result in results if isinstance(result, httpx.Response) and result.status_code < 500)
+    await asyncio.get_running_loop().run_in_executor(None, process.wait)
+    return completed, len(results) - completed, time.perf_counter() - started
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark throughput against gunicorn worker count")
+    parser.add_argument("--workers", default="1,2,4", help="Comma-separated worker counts")
+    parser.add_argument("--path", default="/")
+    parser.add_argument("--header", action="append", default=[], help="Extra request header, e.g. 'Authorization: Bearer ...'")
+    parser.add_argument("--concurrency", type=int, default=64)
+    parser.add_argument("--duration", type=float, default=15.0)
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--database-url", default=f"sqlite:///{os.path.join(tempfile.gettempdir(), 'worker_scaling_bench.db')}")
+    parser.add_argument("--output", help="Write the JSON report to this file")
+    args = parser.parse_args()
+
+    headers = dict(header.split(":", 1) for header in args.header)
+    headers = {name.strip(): value.strip() for name, value in headers.items()}
+    base_url = f"http://127.0.0.1:{args.port}"
+    pid_file = os.path.join(tempfile.gettempdir(), "worker_scaling_bench.pid")
+
+    runs = []
+    for workers in [int(count) for count in args.workers.split(",")]:
+        process = start_server(workers, args.port, args.database_url, pid_file)
+        try:
+            wait_ready(base_url)
+            # Warm every worker's connections and caches
+            asyncio.run(drive(base_url, args.path, headers, args.concurrency, 1.0))
+            latencies, errors = asyncio.run(drive(base_url, args.path, headers, args.concurrency, args.duration))
+            completed, failed, shutdown_seconds = asyncio.run(
+                drain(base_url, args.path, headers, args.concurrency, process)
+            )
+        finally:
+            if process.poll() is None:
+                process.kill()
+                process.wait()
+        latencies.sort()
+        run = {
+            "workers": workers,
+            "requests": len(latencies),
+            "errors": errors,
+            "requests_per_second": round(len(latencies) / args.duration, 1),
+            "p50_ms": round(statistics.median(latencies) * 1000, 2) if latencies else None,
+            "p95_ms": round(latencies[max(0, int(len(latencies) * 0.95) - 1)] * 1000, 2) if latencies else None,
+            "drain_completed": completed,
+            "drain_failed": failed,
+            "shutdown_seconds": round(shutdown_seconds, 2),
+        }
+        print(json.dumps(run))
+        runs.append(run)
+
+    baseline = runs[0]["requests_per_second"] or 1
+    for run in runs:
+        run["speedup"] = round(run["requests_per_second"] / baseline, 2)
+    report = {"path": args.path, "concurrency": args.concurrency, "cpus": os.cpu_count(), "runs": runs}
+    print(json.dumps(report, indent=2))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+"""
+Production server: gunicorn managing uvicorn workers.
+
+    gunicorn -c gunicorn.conf.py
+
+One worker per available CPU (at least two, so recycling a worker never leaves
+the container without one), honouring container CPU quotas. The app is
+imported once in the master and forked, so workers share its memory
+copy-on-write. Workers are recycled after a jittered number of requests, and
+SIGTERM drains in-flight requests for up to GUNICORN_GRACEFUL_TIMEOUT seconds
+before workers are stopped (keep it below the orchestrator's stop timeout).
+"""
+import math
+import os
+import shutil
+import tempfile
+from typing import Optional
+
+def cgroup_cpu_limit() -> Optional[float]:
+    """
+    CPUs allowed by the container's cgroup CPU quota, or None without a quota
+    """
+    try:
+        with open("/sys/fs/cgroup/cpu.max") as f:  # cgroup v2: "<quota|max> <period>"
+            quota, period = f.read().split()[:2]
+        return int(quota) / int(period) if quota != "max" else None
+    except (OSError, ValueError):
+        pass
+    try:
+        with open("/sys/fs/cgroup/cpu/cpu.cfs_quota_us") as f:  # cgroup v1, -1 without a quota
+            quota = int(f.read())
+        with open("/sys/fs/cgroup/cpu/cpu.cfs_period_us") as f:
+            period = int(f.read())
+        return quota / period if quota > 0 else None
+    except (OSError, ValueError):
+        return None
+
+def available_cpus() -> int:
+    """
+    CPUs this process may use: its affinity mask, capped by a cgroup CPU quota
+    """
+    try:
+        cpus = len(os.sched_getaffinity(0))
+    except AttributeError:
+        cpus = os.cpu_count() or 1
+    limit = cgroup_cpu_limit()
+    if limit is not None:
+        cpus = min(cpus, max(1, math.ceil(limit)))
+    return cpus
+
+def worker_count() -> int:
+    """
+    WEB_CONCURRENCY if set, otherwise GUNICORN_WORKERS_PER_CPU workers per CPU (at least 2)
+    """
+    if os.getenv("WEB_CONCURRENCY"):
+        return max(1, int(os.environ["WEB_CONCURRENCY"]))
+    per_cpu = float(os.getenv("GUNICORN_WORKERS_PER_CPU", "1"))
+    return max(2, int(available_cpus() * per_cpu))
+
+wsgi_app = "main:app"
+chdir = os.path.join(os.path.dirname(os.path.abspath(__file__)), "src")
+worker_class = "uvicorn_worker.UvicornWorker"
+bind = f"{os.getenv('HOST', '0.0.0.0')}:{os.getenv('PORT', '8000')}"
+workers = worker_count()
+
+# Import the app once in the master; workers share its pages copy-on-write
+preload_app = True
+# Recycle workers to bound slow leaks; jitter keeps them from restarting together
+max_requests = int(os.getenv("GUNICORN_MAX_REQUESTS", "10000"))
+max_requests_jitter = int(os.getenv("GUNICORN_MAX_REQUESTS_JITTER", "1000"))
+# Seconds a worker gets to finish in-flight requests after SIGTERM
+graceful_timeout = int(os.getenv("GUNICORN_GRACEFUL_TIMEOUT", "25"))
+timeout = int(os.getenv("GUNICORN_TIMEOUT", "60"))
+keepalive = int(os.getenv("GUNICORN_KEEPALIVE", "5"))
+# "-" logs requests to stdout; empty disables the access log
+accesslog = os.getenv("GUNICORN_ACCESS_LOG", "-") or None
+
+# Split the database connection budget between workers. Each worker has its own
+# pool, so DB_MAX_CONNECTIONS is a hard cap for the whole container. Explicit
+# DB_POOL_SIZE / DB_MAX_OVERFLOW win. Set before the app (and its engine) is loaded.
+if os.getenv("DB_MAX_CONNECTIONS"):
+    os.environ.setdefault("DB_POOL_SIZE", str(max(1, int(os.environ["DB_MAX_CONNECTIONS"]) // workers)))
+    os.environ.setdefault("DB_MAX_OVERFLOW", "0")
+
+# Workers (and Celery workers on this host, given the same path) write their metrics
+# here and /metrics aggregates them. It must exist before the preloaded app imports
+# prometheus_client, and is emptied on start so a previous run's counters are dropped.
+os.environ.setdefault("PROMETHEUS_MULTIPROC_DIR", os.path.join(tempfile.gettempdir(), "prime-invest-metrics"))
+os.makedirs(os.environ["PROMETHEUS_MULTIPROC_DIR"], exist_ok=True)
+
+def on_starting(server):
+    metrics_dir = os.environ["PROMETHEUS_MULTIPROC_DIR"]
+    shutil.rmtree(metrics_dir, ignore_errors=True)
+    os.makedirs(metrics_dir, exist_ok=True)
+
+def post_fork(server, worker):
+    # The engine is created by each worker's lifespan, but if anything in the
+    # master opened it, its pooled connections must not be shared across processes
+    from db.database import dispose_engine
+    dispose_engine(close=False)
+
+def child_exit(server, worker):
+    # Drop the exited worker's live gauges (pool connections) from /metrics
+    from core.metrics import mark_process_dead
+    mark_process_dead(worker.pid)
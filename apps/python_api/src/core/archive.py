@@ -0,0 +1,292 @@
+import enum
+import gzip
+import hashlib
+import heapq
+import itertools
+import json
+import mmap
+import os
+import threading
+import uuid
+from collections import namedtuple
+from datetime import datetime, timedelta, timezone
+from functools import lru_cache
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from sqlalchemy import DateTime, Enum
+
+# Root directory for archived rows: <ARCHIVE_DIR>/<table>/manifest.json plus
+# gzip NDJSON batch files under <ARCHIVE_DIR>/<table>/<YYYY-MM>/
+ARCHIVE_DIR = os.getenv("ARCHIVE_DIR", os.path.join(os.getcwd(), "archive"))
+
+_EPOCH = datetime(1970, 1, 1)
+
+def naive_utc(value: Optional[datetime]) -> Optional[datetime]:
+    """
+    Normalize a timestamp to naive UTC so database and archive values compare
+    """
+    if value is not None and value.tzinfo is not None:
+        return value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+def encode_value(value: Any) -> Any:
+    """
+    JSON-ready form of a column value, as stored in archive rows
+    """
+    if isinstance(value, uuid.UUID):
+        return str(value)
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, enum.Enum):
+        return value.value
+    return value
+
+def encode_row(instance: Any) -> Dict[str, Any]:
+    """
+    Serialize every column of an ORM instance to a JSON-ready dict
+    """
+    return {column.key: encode_value(getattr(instance, column.key)) for column in instance.__table__.columns}
+
+def decode_value(column: Any, value: Any) -> Any:
+    """
+    Column value from its stored form in an archive row
+    """
+    if value is not None:
+        if isinstance(column.type, DateTime):
+            return datetime.fromisoformat(value)
+        if isinstance(column.type, Enum) and column.type.enum_class is not None:
+            return column.type.enum_class(value)
+        if getattr(column.type, "as_uuid", False):
+            return uuid.UUID(value)
+    return value
+
+def decode_row(model: Any, row: Dict[str, Any]) -> Any:
+    """
+    Build a detached ORM instance from an archived row
+    """
+    return model(**{column.key: decode_value(column, row.get(column.key)) for column in model.__table__.columns})
+
+@lru_cache(maxsize=64)
+def _row_type(keys: Tuple[str, ...]):
+    return namedtuple("ArchivedRow", keys)
+
+def project_row(columns: List[Any], row: Dict[str, Any]) -> Any:
+    """
+    An archived row as a named tuple of `columns`, read by attribute or
+    position like the rows of a column query
+    """
+    return _row_type(tuple(column.key for column in columns))(
+        *(decode_value(column, row.get(column.key)) for column in columns)
+    )
+
+def _created_at(row: Any) -> datetime:
+    return naive_utc(row.created_at) or datetime.min
+
+def merge_pages(live: List[Any], archived: Iterable[Any], skip: int, limit: int,
+                newest_first: bool = True) -> List[Any]:
+    """
+    Merge live rows and a stream of archived rows, both already in created_at
+    order, and page the result; the archive is read only as far as the page needs
+    """
+    rows = heapq.merge(live, archived, key=_created_at, reverse=newest_first)
+    return list(itertools.islice(rows, skip, skip + limit))
+
+def merge_streams(live: Iterable[Any], archived: Iterable[Any]) -> Iterator[Any]:
+    """
+    Merge a stream of live rows with a stream of archived rows, both oldest first
+    """
+    return heapq.merge(archived, live, key=_created_at)
+
+class ArchiveStore:
+    """
+    Append-only store of archived table rows.
+
+    Each batch is one gzip NDJSON file. A per-table manifest records every
+    file's row count, created_at range and checksum, so reads only open the
+    files overlapping the requested range and scan them through a read-only
+    memory map rather than loading them into memory.
+    """
+    def __init__(self, root: Optional[str] = None):
+        self.root = root or ARCHIVE_DIR
+        self._lock = threading.Lock()
+        self._manifests: Dict[str, Any] = {}
+
+    def _table_dir(self, table: str) -> str:
+        return os.path.join(self.root, table)
+
+    def _manifest_path(self, table: str) -> str:
+        return os.path.join(self._table_dir(table), "manifest.json")
+
+    def get_manifest(self, table: str) -> List[Dict[str, Any]]:
+        """
+        Get the manifest entries for a table, reloading only when the file changed
+        """
+        path = self._manifest_path(table)
+        try:
+            mtime = os.stat(path).st_mtime_ns
+        except FileNotFoundError:
+            return []
+
+        with self._lock:
+            cached = self._manifests.get(table)
+            if cached and cached[0] == mtime:
+                return cached[1]
+            with open(path) as f:
+                entries = json.load(f)["files"]
+            self._manifests[table] = (mtime, entries)
+            return entries
+
+    def has_file(self, table: str, name: str) -> bool:
+        return any(entry["file"] == name for entry in self.get_manifest(table))
+
+    def write_file(self, table: str, name: str, rows: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """
+        Write a batch of encoded rows and record it in the manifest. The file
+        is fsynced before the manifest is atomically replaced, so a manifest
+        entry always points at a complete file.
+        """
+        path = os.path.join(self._table_dir(table), name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "wb") as raw:
+            with gzip.GzipFile(fileobj=raw, mode="wb", compresslevel=6, mtime=0) as f:
+                for row in rows:
+                    f.write(json.dumps(row, separators=(",", ":")).encode())
+                    f.write(b"\n")
+            raw.flush()
+            os.fsync(raw.fileno())
+        os.replace(tmp_path, path)
+
+        created = [naive_utc(datetime.fromisoformat(row["created_at"])) for row in rows if row.get("created_at")]
+        entry = {
+            "file": name,
+            "rows": len(rows),
+            "min_created_at": min(created).isoformat() if created else None,
+            "max_created_at": max(created).isoformat() if created else None,
+            "sha256": self._checksum(path),
+            "archived_at": datetime.utcnow().isoformat()
+        }
+
+        manifest_path = self._manifest_path(table)
+        entries = [e for e in self.get_manifest(table) if e["file"] != name] + [entry]
+        with open(f"{manifest_path}.tmp", "w") as f:
+            json.dump({"table": table, "files": entries}, f, indent=1)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(f"{manifest_path}.tmp", manifest_path)
+        return entry
+
+    def _checksum(self, path: str) -> str:
+        digest = hashlib.sha256()
+        with open(path, "rb") as f:
+            for block in iter(lambda: f.read(1024 * 1024), b""):
+                digest.update(block)
+        return digest.hexdigest()
+
+    def read_file(self, table: str, name: str) -> Iterator[Dict[str, Any]]:
+        """
+        Stream the rows of one archive file through a read-only memory map
+        """
+        with open(os.path.join(self._table_dir(table), name), "rb") as raw:
+            with mmap.mmap(raw.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                with gzip.GzipFile(fileobj=mapped, mode="rb") as f:
+                    for line in f:
+                        yield json.loads(line)
+
+    def newest_created_at(self, table: str) -> Optional[datetime]:
+        """
+        Latest created_at of any archived row of `table` (None: nothing archived).
+        Reads of rows newer than this never need the archive.
+        """
+        newest = [entry["max_created_at"] for entry in self.get_manifest(table) if entry["max_created_at"]]
+        return naive_utc(datetime.fromisoformat(max(newest))) if newest else None
+
+    def reaches(self, table: str, start_date: Optional[datetime] = None) -> bool:
+        """
+        Whether reads from `start_date` onwards (None: from the beginning) may
+        include archived rows of `table`
+        """
+        newest = self.newest_created_at(table)
+        return newest is not None and (start_date is None or naive_utc(start_date) <= newest)
+
+    def completes_page(self, table: str, live: List[Any], wanted: int,
+                       start_date: Optional[datetime] = None) -> bool:
+        """
+        Whether archived rows of `table` may belong on a newest-first page of
+        `wanted` rows whose live rows (from `start_date` on) are `live`: not
+        when the live rows fill the page and are all newer than the archive
+        """
+        if not self.reaches(table, start_date):
+            return False
+        return len(live) < wanted or naive_utc(live[-1].created_at) <= self.newest_created_at(table)
+
+    def _read_range(self, table: str, name: str, start_date: Optional[datetime], end_date: Optional[datetime],
+                    newest_first: bool) -> Iterator[Tuple[datetime, Dict[str, Any]]]:
+        rows = []
+        for row in self.read_file(table, name):
+            if row.get("created_at") is None:
+                continue
+            created_at = naive_utc(datetime.fromisoformat(row["created_at"]))
+            if (start_date is None or created_at >= start_date) and (end_date is None or created_at < end_date):
+                rows.append((created_at, row))
+        rows.sort(key=lambda item: item[0], reverse=newest_first)
+        return iter(rows)
+
+    def scan(self, table: str, start_date: Optional[datetime] = None, end_date: Optional[datetime] = None,
+             newest_first: bool = False) -> Iterator[Dict[str, Any]]:
+        """
+        Stream archived rows with created_at in [start_date, end_date) in
+        created_at order, oldest or newest first. Files whose manifest range
+        misses the window are skipped, and a file is only opened (one at a
+        time, through a memory map) once its rows can be next, so a reader that
+        stops early never touches the older (or newer) files.
+        """
+        start_date, end_date = naive_utc(start_date), naive_utc(end_date)
+        entries = []
+        for entry in self.get_manifest(table):
+            if entry["min_created_at"] is None:
+                continue
+            oldest = naive_utc(datetime.fromisoformat(entry["min_created_at"]))
+            newest = naive_utc(datetime.fromisoformat(entry["max_created_at"]))
+            if (end_date and oldest >= end_date) or (start_date and newest < start_date):
+                continue
+            # Heap keys ascend in reading order: the first row a file can yield
+            entries.append((_EPOCH - newest if newest_first else oldest - _EPOCH, entry["file"]))
+        entries.sort()
+
+        order = itertools.count()
+        heap: List[Tuple[timedelta, int, Dict[str, Any], Iterator]] = []
+
+        def push(rows: Iterator[Tuple[datetime, Dict[str, Any]]]) -> None:
+            for created_at, row in rows:
+                key = _EPOCH - created_at if newest_first else created_at - _EPOCH
+                heapq.heappush(heap, (key, next(order), row, rows))
+                return
+
+        files = iter(entries)
+        pending = next(files, None)
+        while heap or pending is not None:
+            while pending is not None and (not heap or pending[0] <= heap[0][0]):
+                push(self._read_range(table, pending[1], start_date, end_date, newest_first))
+                pending = next(files, None)
+            if not heap:
+                continue
+            _, _, row, rows = heapq.heappop(heap)
+            yield row
+            push(rows)
+
+    def iter_rows(self, model: Any, start_date: Optional[datetime] = None, end_date: Optional[datetime] = None,
+                  newest_first: bool = True, columns: Optional[List[Any]] = None,
+                  where: Optional[Callable[[Dict[str, Any]], bool]] = None, **filters: Any) -> Iterator[Any]:
+        """
+        Stream archived rows of `model` in [start_date, end_date) whose columns
+        equal `filters` (None values are ignored) and that pass `where`, in
+        created_at order. Rows are filtered in their stored form, so only
+        matches are decoded: as detached ORM instances, or with `columns` as
+        rows of those columns.
+        """
+        encoded = [(key, encode_value(value)) for key, value in filters.items() if value is not None]
+        for row in self.scan(model.__tablename__, start_date, end_date, newest_first=newest_first):
+            if all(row.get(key) == value for key, value in encoded) and (where is None or where(row)):
+                yield project_row(columns, row) if columns else decode_row(model, row)
@@ -0,0 +1,175 @@
+import random
+import threading
+import time
+from collections import deque
+from typing import Callable, Dict, Any
+
+# Breaker states
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+class CircuitBreaker:
+    """
+    Per-endpoint circuit breaker.
+
+    Opens after `failure_threshold` consecutive failures and rejects calls for
+    `recovery_timeout` seconds. It then lets up to `half_open_max_calls` probe
+    calls through: a successful probe closes the breaker, a failed one re-opens it.
+    Every admitted call must end in record_success(), record_failure() or
+    release(), or its probe slot is never given back.
+    """
+    def __init__(self, name: str, failure_threshold: int = 5, recovery_timeout: float = 30.0,
+                 half_open_max_calls: int = 1, clock: Callable[[], float] = time.monotonic):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.recovery_timeout = recovery_timeout
+        self.half_open_max_calls = half_open_max_calls
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._state = CLOSED
+        self._consecutive_failures = 0
+        self._opened_at = 0.0
+        self._half_open_in_flight = 0
+        self._total_failures = 0
+        self._total_rejected = 0
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            self._maybe_half_open()
+            return self._state
+
+    def _maybe_half_open(self) -> None:
+        if self._state == OPEN and self._clock() - self._opened_at >= self.recovery_timeout:
+            self._state = HALF_OPEN
+            self._half_open_in_flight = 0
+
+    def allow_request(self) -> bool:
+        """
+        Return True if a call may go through, False to fail fast
+        """
+        with self._lock:
+            self._maybe_half_open()
+            if self._state == CLOSED:
+                return True
+            if self._state == HALF_OPEN and self._half_open_in_flight < self.half_open_max_calls:
+                self._half_open_in_flight += 1
+                return True
+            self._total_rejected += 1
+            return False
+
+    def record_success(self) -> None:
+        with self._lock:
+            self._consecutive_failures = 0
+            self._half_open_in_flight = 0
+            self._state = CLOSED
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self._total_failures += 1
+            self._consecutive_failures += 1
+            if self._state == HALF_OPEN or self._consecutive_failures >= self.failure_threshold:
+                self._state = OPEN
+                self._opened_at = self._clock()
+                self._half_open_in_flight = 0
+
+    def release(self) -> None:
+        """
+        Give back the probe slot of an admitted call that ended without an
+        outcome, e.g. because it was cancelled
+        """
+        with self._lock:
+            if self._state == HALF_OPEN and self._half_open_in_flight > 0:
+                self._half_open_in_flight -= 1
+
+    def retry_after(self) -> float:
+        """
+        Seconds until the breaker will allow a probe call
+        """
+        with self._lock:
+            if self._state != OPEN:
+                return 0.0
+            return max(0.0, self.recovery_timeout - (self._clock() - self._opened_at))
+
+    def snapshot(self) -> Dict[str, Any]:
+        state = self.state
+        return {
+            "state": state,
+            "consecutive_failures": self._consecutive_failures,
+            "total_failures": self._total_failures,
+            "total_rejected": self._total_rejected,
+            "retry_after_seconds": round(self.retry_after(), 2),
+        }
+
+class RetryBudget:
+    """
+    Caps retries to a fraction of recent traffic so retries cannot amplify an outage.
+
+    Over a sliding `window_seconds`, at most `ratio` retries per request are
+    allowed, plus a floor of `min_retries_per_second`.
+    """
+    def __init__(self, ratio: float = 0.2, min_retries_per_second: float = 1.0,
+                 window_seconds: float = 10.0, clock: Callable[[], float] = time.monotonic):
+        self.ratio = ratio
+        self.min_retries_per_second = min_retries_per_second
+        self.window_seconds = window_seconds
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._requests = deque()
+        self._retries = deque()
+
+    def _prune(self, now: float) -> None:
+        cutoff = now - self.window_seconds
+        while self._requests and self._requests[0] < cutoff:
+            self._requests.popleft()
+        while self._retries and self._retries[0] < cutoff:
+            self._retries.popleft()
+
+    def record_request(self) -> None:
+        with self._lock:
+            now = self._clock()
+            self._prune(now)
+            self._requests.append(now)
+
+    def try_acquire(self) -> bool:
+        """
+        Spend one retry from the budget, returning False if it is exhausted
+        """
+        with self._lock:
+            now = self._clock()
+            self._prune(now)
+            allowed = self.ratio * len(self._requests) + self.min_retries_per_second * self.window_seconds
+            if len(self._retries) < allowed:
+                self._retries.append(now)
+                return True
+            return False
+
+def backoff_delay(attempt: int, base: float = 0.2, cap: float = 5.0) -> float:
+    """
+    Exponential backoff with full jitter for the given retry attempt (0-based)
+    """
+    return random.uniform(0, min(cap, base * (2 ** attempt)))
+
+# Process-wide breaker registry so state is shared by every service instance
+_breakers: Dict[str, CircuitBreaker] = {}
+_registry_lock = threading.Lock()
+
+def get_breaker(name: str, **kwargs) -> CircuitBreaker:
+    """
+    Get or create the named circuit breaker
+    """
+    with _registry_lock:
+        breaker = _breakers.get(name)
+        if breaker is None:
+            breaker = CircuitBreaker(name, **kwargs)
+            _breakers[name] = breaker
+        return breaker
+
+def breaker_states() -> Dict[str, Dict[str, Any]]:
+    """
+    Snapshot of every registered breaker, for health reporting
+    """
+    with _registry_lock:
+        breakers = list(_breakers.values())
+    return {breaker.name: breaker.snapshot() for breaker in breakers}
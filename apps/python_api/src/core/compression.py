@@ -0,0 +1,148 @@
+"""
+Response compression above a size threshold.
+
+Clients that accept `br` get brotli when the optional `brotli` package is
+installed; everyone else that accepts gzip gets gzip. Bodies smaller than
+RESPONSE_COMPRESS_MINIMUM_SIZE, already-encoded bodies and binary media types
+are sent as they are. Streamed responses (exports) are compressed chunk by chunk.
+"""
+import os
+import zlib
+from typing import Optional, Set
+
+import anyio.to_thread
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+try:
+    import brotli
+except ImportError:  # gzip only
+    brotli = None
+
+# Responses smaller than this are not worth the CPU (headers alone are a few hundred bytes)
+RESPONSE_COMPRESS_MINIMUM_SIZE = int(os.getenv("RESPONSE_COMPRESS_MINIMUM_SIZE", "1024"))
+# Low levels: responses are dynamic, so compression time is paid on every request
+RESPONSE_GZIP_LEVEL = int(os.getenv("RESPONSE_GZIP_LEVEL", "6"))
+RESPONSE_BROTLI_QUALITY = int(os.getenv("RESPONSE_BROTLI_QUALITY", "4"))
+# Chunks at least this large are compressed off the event loop
+COMPRESS_THREAD_MINIMUM_SIZE = 128 * 1024
+# Media types that are already compressed, or streamed as events and must not be held back
+EXCLUDED_MEDIA_TYPES = {
+    "application/gzip", "application/x-gzip", "application/zip", "application/grpc", "audio/*", "font/woff",
+    "font/woff2", "image/avif", "image/gif", "image/jpeg", "image/png", "image/webp", "text/event-stream", "video/*",
+}
+
+def accepted_encodings(accept_encoding: Optional[str]) -> Set[str]:
+    """
+    Content codings an Accept-Encoding header allows (q=0 excludes a coding)
+    """
+    encodings = set()
+    for item in (accept_encoding or "").split(","):
+        coding, _, params = item.partition(";")
+        coding = coding.strip().lower()
+        if not coding:
+            continue
+        quality = params.strip()
+        if quality.startswith("q="):
+            try:
+                if float(quality[2:]) <= 0:
+                    continue
+            except ValueError:
+                continue
+        encodings.add(coding)
+    return encodings
+
+class CompressionResponder:
+    """
+    Compresses one response with `encoding` ("br" or "gzip"). The start
+    message is held back until the first body chunk shows whether the
+    response is large enough to compress.
+    """
+    def __init__(self, app: ASGIApp, minimum_size: int, encoding: str, level: int) -> None:
+        self.app = app
+        self.minimum_size = minimum_size
+        self.encoding = encoding
+        self.level = level
+        self.send: Optional[Send] = None
+        self.start_message: Optional[Message] = None
+        self.passthrough = False
+        self.started = False
+        self._compressor = None
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        self.send = send
+        await self.app(scope, receive, self.send_with_compression)
+
+    async def send_with_compression(self, message: Message) -> None:
+        message_type = message["type"]
+        if message_type == "http.response.start":
+            self.start_message = message
+            headers = Headers(raw=message["headers"])
+            media_type = headers.get("content-type", "").partition(";")[0].strip().lower()
+            self.passthrough = (
+                "content-encoding" in headers or message["status"] == 206
+                or media_type in EXCLUDED_MEDIA_TYPES or f"{media_type.partition('/')[0]}/*" in EXCLUDED_MEDIA_TYPES
+            )
+            if self.passthrough:
+                await self.send(message)
+        elif self.passthrough or message_type != "http.response.body":
+            if message_type == "http.response.pathsend" and not self.passthrough:
+                # Files sent by the server itself are never compressed
+                await self.send(self.start_message)
+            await self.send(message)
+        elif not self.started:
+            self.started = True
+            body = message.get("body", b"")
+            more_body = message.get("more_body", False)
+            if len(body) < self.minimum_size and not more_body:
+                await self.send(self.start_message)
+                await self.send(message)
+                return
+            headers = MutableHeaders(raw=self.start_message["headers"])
+            headers.add_vary_header("Accept-Encoding")
+            headers["Content-Encoding"] = self.encoding
+            message["body"] = await self.compress(body, more_body)
+            if more_body or self.start_message.get("trailers", False):
+                del headers["Content-Length"]
+            else:
+                headers["Content-Length"] = str(len(message["body"]))
+            await self.send(self.start_message)
+            await self.send(message)
+        else:
+            message["body"] = await self.compress(message.get("body", b""), message.get("more_body", False))
+            await self.send(message)
+
+    async def compress(self, body: bytes, more_body: bool) -> bytes:
+        if len(body) >= COMPRESS_THREAD_MINIMUM_SIZE:
+            return await anyio.to_thread.run_sync(self._compress_body, body, more_body)
+        return self._compress_body(body, more_body)
+
+    def _compress_body(self, body: bytes, more_body: bool) -> bytes:
+        if self.encoding == "br":
+            if self._compressor is None:
+                self._compressor = brotli.Compressor(quality=self.level)
+            data = self._compressor.process(body)
+            return data + (self._compressor.flush() if more_body else self._compressor.finish())
+        if self._compressor is None:
+            self._compressor = zlib.compressobj(self.level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+        data = self._compressor.compress(body)
+        return data + self._compressor.flush(zlib.Z_SYNC_FLUSH if more_body else zlib.Z_FINISH)
+
+class CompressionMiddleware:
+    def __init__(self, app: ASGIApp, minimum_size: int = RESPONSE_COMPRESS_MINIMUM_SIZE,
+                 compresslevel: int = RESPONSE_GZIP_LEVEL, brotli_quality: int = RESPONSE_BROTLI_QUALITY) -> None:
+        self.app = app
+        self.minimum_size = minimum_size
+        self.compresslevel = compresslevel
+        self.brotli_quality = brotli_quality
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] == "http":
+            encodings = accepted_encodings(Headers(scope=scope).get("Accept-Encoding"))
+            if brotli is not None and "br" in encodings:
+                await CompressionResponder(self.app, self.minimum_size, "br", self.brotli_quality)(scope, receive, send)
+                return
+            if "gzip" in encodings:
+                await CompressionResponder(self.app, self.minimum_size, "gzip", self.compresslevel)(scope, receive, send)
+                return
+        await self.app(scope, receive, send)
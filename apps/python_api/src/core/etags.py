@@ -0,0 +1,17 @@
+"""
+Helpers for HTTP conditional requests (ETag / If-None-Match).
+"""
+from typing import Optional
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """
+    Whether an If-None-Match header matches `etag` (weak comparison, so
+    `W/` prefixes are ignored and `*` matches anything)
+    """
+    if not if_none_match:
+        return False
+    candidates = [candidate.strip() for candidate in if_none_match.split(",")]
+    if "*" in candidates:
+        return True
+    strip_weak = lambda tag: tag[2:] if tag.startswith("W/") else tag
+    return strip_weak(etag) in {strip_weak(candidate) for candidate in candidates}
@@ -0,0 +1,241 @@
+"""
+Prometheus metrics for the API and the Celery workers.
+
+GET /metrics renders them in the Prometheus text format. With
+PROMETHEUS_MULTIPROC_DIR set (gunicorn.conf.py sets it), every process writes
+its samples to files in that directory and a scrape aggregates all of them:
+each gunicorn worker, and Celery workers on the same host. Without it a scrape
+covers only the process that serves it. Celery workers on other hosts expose
+their own endpoint on CELERY_METRICS_PORT.
+
+Instrumentation stays on the hot path only as a clock read and an observe on a
+pre-resolved child metric per event. Ratios (cache hit ratio, error rate) are
+left to PromQL, e.g.
+    sum by (cache) (rate(cache_requests_total{result="hit"}[5m]))
+      / sum by (cache) (rate(cache_requests_total[5m]))
+"""
+import os
+import time
+from typing import Any, Dict, List, Tuple
+
+from prometheus_client import (
+    REGISTRY, CollectorRegistry, Counter, Gauge, Histogram, generate_latest, multiprocess
+)
+from sqlalchemy import event
+from sqlalchemy.pool import QueuePool
+
+from core.tracing import record_statement
+
+# Directory shared by the processes whose metrics are aggregated (multiprocess mode)
+PROMETHEUS_MULTIPROC_DIR = os.getenv("PROMETHEUS_MULTIPROC_DIR")
+# Seconds between readings of the connection pools (also read on every scrape)
+METRICS_POOL_SAMPLE_SECONDS = float(os.getenv("METRICS_POOL_SAMPLE_SECONDS", "1"))
+# Port of the Celery worker's own metrics endpoint (0 disables it)
+CELERY_METRICS_PORT = int(os.getenv("CELERY_METRICS_PORT", "0"))
+
+# Buckets in seconds: requests and provider calls, database queries, background tasks
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1.0)
+TASK_BUCKETS = (0.1, 0.5, 1.0, 5.0, 15.0, 60.0, 300.0, 900.0, 3600.0)
+
+REQUEST_DURATION = Histogram(
+    "http_request_duration_seconds", "HTTP request latency by route template",
+    ["method", "route", "status"], buckets=LATENCY_BUCKETS
+)
+DB_QUERY_DURATION = Histogram(
+    "db_query_duration_seconds", "Database query latency by statement type",
+    ["operation"], buckets=QUERY_BUCKETS
+)
+DB_POOL_CHECKED_OUT = Gauge(
+    "db_pool_connections_checked_out", "Pooled database connections in use", multiprocess_mode="livesum"
+)
+DB_POOL_OPEN = Gauge(
+    "db_pool_connections_open", "Database connections held by the pools", multiprocess_mode="livesum"
+)
+CACHE_REQUESTS = Counter("cache_requests_total", "In-process cache lookups by cache and result", ["cache", "result"])
+PROVIDER_DURATION = Histogram(
+    "crypto_provider_request_duration_seconds", "Crypto payment provider call latency by endpoint and outcome",
+    ["endpoint", "outcome"], buckets=LATENCY_BUCKETS
+)
+TASK_DURATION = Histogram(
+    "celery_task_duration_seconds", "Celery task run time by task and final state",
+    ["task", "state"], buckets=TASK_BUCKETS
+)
+TASK_ROWS = Counter("celery_task_rows_processed_total", "Rows processed by Celery tasks", ["task"])
+
+# Resolved label children; `labels()` validates and locks on every call
+_QUERY_DURATIONS = {
+    operation: DB_QUERY_DURATION.labels(operation) for operation in ("SELECT", "INSERT", "UPDATE", "DELETE", "OTHER")
+}
+_request_durations: Dict[Tuple[str, str, int], Any] = {}
+_task_started: Dict[str, float] = {}
+_engines: List[Any] = []
+_pools_sampled_at = 0.0
+
+def collector_registry() -> CollectorRegistry:
+    """
+    Registry to expose: every process in PROMETHEUS_MULTIPROC_DIR, or this one
+    """
+    if not PROMETHEUS_MULTIPROC_DIR:
+        return REGISTRY
+    registry = CollectorRegistry()
+    multiprocess.MultiProcessCollector(registry)
+    return registry
+
+def sample_pools() -> None:
+    """
+    Set the pool gauges from the pools of the instrumented engines. Read from
+    the pools rather than counted on checkout/checkin, which would put a pool
+    event on every request.
+    """
+    global _pools_sampled_at
+    _pools_sampled_at = time.perf_counter()
+    checked_out = checked_in = 0
+    for engine in _engines:
+        pool = engine.pool
+        if isinstance(pool, QueuePool):
+            checked_out += pool.checkedout()
+            checked_in += pool.checkedin()
+    DB_POOL_CHECKED_OUT.set(checked_out)
+    DB_POOL_OPEN.set(checked_out + checked_in)
+
+def render_metrics() -> bytes:
+    """
+    Current metrics in the Prometheus text format
+    """
+    sample_pools()
+    return generate_latest(collector_registry())
+
+class MetricsMiddleware:
+    """
+    ASGI middleware timing each request under its route template (not the raw
+    path, so path parameters do not multiply series)
+    """
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status_code = 500
+        started = time.perf_counter()
+
+        async def send_with_status(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            elapsed = time.perf_counter() - started
+            key = (scope["method"], route_template(scope), status_code)
+            child = _request_durations.get(key)
+            if child is None:
+                child = _request_durations[key] = REQUEST_DURATION.labels(key[0], key[1], str(status_code))
+            child.observe(elapsed)
+            if started - _pools_sampled_at >= METRICS_POOL_SAMPLE_SECONDS:
+                sample_pools()
+
+def route_template(scope) -> str:
+    """
+    Path template of the route that handled the request, e.g.
+    "/wallets/{wallet_id}/transactions", or "unmatched". FastAPI reports routes
+    relative to their router, so the router prefix is taken from the request
+    path: the segments before those the route template matched.
+    """
+    route = scope.get("route")
+    template = getattr(route, "path", None)
+    if template is None:
+        return "unmatched"
+    prefix = scope["path"].rsplit("/", template.count("/"))[0] if template else scope["path"]
+    return prefix + template
+
+def _query_duration(statement: str):
+    words = statement.split(None, 1)
+    return _QUERY_DURATIONS.get(words[0].upper() if words else "OTHER", _QUERY_DURATIONS["OTHER"])
+
+def instrument_engine(engine) -> None:
+    """
+    Record query latency of `engine` (and trace its statements), and report
+    its pool in the pool gauges
+    """
+    # The dialect-level execute hooks run the statement themselves (through the
+    # dialect, so its own execution paths still apply). Connection-level cursor
+    # events would do as well, but take SQLAlchemy off its fast execution path.
+    # Statements of a traced request or task are also recorded as spans.
+    @event.listens_for(engine, "do_execute")
+    def _execute(cursor, statement, parameters, context):
+        started = time.perf_counter()
+        try:
+            context.dialect.do_execute(cursor, statement, parameters, context)
+        finally:
+            elapsed = time.perf_counter() - started
+            _query_duration(statement).observe(elapsed)
+            record_statement(statement, started, elapsed)
+        return True
+
+    @event.listens_for(engine, "do_execute_no_params")
+    def _execute_no_params(cursor, statement, context):
+        started = time.perf_counter()
+        try:
+            context.dialect.do_execute_no_params(cursor, statement, context)
+        finally:
+            elapsed = time.perf_counter() - started
+            _query_duration(statement).observe(elapsed)
+            record_statement(statement, started, elapsed)
+        return True
+
+    @event.listens_for(engine, "do_executemany")
+    def _executemany(cursor, statement, parameters, context):
+        started = time.perf_counter()
+        try:
+            context.dialect.do_executemany(cursor, statement, parameters, context)
+        finally:
+            elapsed = time.perf_counter() - started
+            _query_duration(statement).observe(elapsed)
+            record_statement(statement, started, elapsed)
+        return True
+    _engines.append(engine)
+
+def record_task_rows(count: int) -> None:
+    """
+    Add `count` to the rows processed by the running Celery task
+    """
+    from celery import current_task
+    if current_task is not None and count:
+        TASK_ROWS.labels(current_task.name).inc(count)
+
+def instrument_celery() -> None:
+    """
+    Time every Celery task, and serve the worker's metrics on
+    CELERY_METRICS_PORT once it is ready (if set)
+    """
+    from celery import signals
+
+    @signals.task_prerun.connect(weak=False)
+    def _task_started_handler(task_id=None, **kwargs):
+        _task_started[task_id] = time.perf_counter()
+
+    @signals.task_postrun.connect(weak=False)
+    def _task_finished_handler(task_id=None, task=None, state=None, **kwargs):
+        started = _task_started.pop(task_id, None)
+        if started is not None:
+            TASK_DURATION.labels(task.name, state or "UNKNOWN").observe(time.perf_counter() - started)
+        sample_pools()
+
+    @signals.worker_ready.connect(weak=False)
+    def _serve_worker_metrics(**kwargs):
+        if CELERY_METRICS_PORT:
+            from prometheus_client import start_http_server
+            start_http_server(CELERY_METRICS_PORT, registry=collector_registry())
+
+def mark_process_dead(pid: int) -> None:
+    """
+    Drop the live gauges of an exited worker process (multiprocess mode)
+    """
+    if PROMETHEUS_MULTIPROC_DIR:
+        multiprocess.mark_process_dead(pid, PROMETHEUS_MULTIPROC_DIR)
@@ -0,0 +1,331 @@
+import math
+import re
+import threading
+from typing import Any, Callable, Dict, FrozenSet, Hashable, Iterable, Iterator, List, Optional, Sequence, Set, Tuple
+
+# Minimum trigram similarity for a fuzzy match (pg_trgm's default threshold)
+SIMILARITY_THRESHOLD = 0.3
+# Matches ranked per result asked for: a broad query stops collecting matches
+# after `limit` times this many, so ranking cost follows the limit
+CANDIDATES_PER_RESULT = 50
+# Length of the word prefixes the prefix map is keyed on
+PREFIX_LENGTH = 3
+
+# Like pg_trgm, treat anything but letters and digits as a word boundary
+WORD_SEPARATOR = re.compile(r"[\W_]+")
+
+def trigrams(value: str) -> Set[str]:
+    """
+    Trigrams of a normalized string, padded so short words still produce some
+    """
+    padded = f"  {value} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+def words(value: str) -> List[str]:
+    """
+    Split a normalized string into words
+    """
+    return [word for word in WORD_SEPARATOR.split(value) if word]
+
+class NgramIndex:
+    """
+    In-process trigram index for prefix, substring and fuzzy search.
+
+    Each document is a set of text fields plus arbitrary attributes that
+    callers can filter on. Documents are split into words and the trigram
+    postings point at words rather than documents, so a word shared by many
+    documents (an email domain, a common surname) is indexed once.
+
+    Results are ranked the same way as the PostgreSQL trigram search: an
+    exact field match beats a prefix match, which beats a substring match,
+    with trigram similarity to the closest word breaking ties and admitting
+    fuzzy matches. Documents are visited best tier first (those with a word
+    starting with the query's first word, found through a map of word
+    prefixes, before other substring matches), so a broad query ranks a
+    bounded number of matches and skips the substring tier entirely once the
+    exact and prefix matches fill the page.
+    """
+    def __init__(self, threshold: float = SIMILARITY_THRESHOLD):
+        self.threshold = threshold
+        self._lock = threading.RLock()
+        self._documents: Dict[Hashable, Tuple[Tuple[str, ...], str, FrozenSet[str], Dict[str, Any]]] = {}
+        self._word_keys: Dict[str, Set[Hashable]] = {}
+        self._word_grams: Dict[str, FrozenSet[str]] = {}
+        self._gram_words: Dict[str, Set[str]] = {}
+        self._prefix_words: Dict[str, Set[str]] = {}
+        self._prefix_keys: Dict[str, Set[Hashable]] = {}
+
+    def __len__(self) -> int:
+        return len(self._documents)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._documents.clear()
+            self._word_keys.clear()
+            self._word_grams.clear()
+            self._gram_words.clear()
+            self._prefix_words.clear()
+            self._prefix_keys.clear()
+
+    def add(self, key: Hashable, fields: Sequence[Optional[str]], attributes: Optional[Dict[str, Any]] = None) -> None:
+        """
+        Index (or re-index) a document
+        """
+        normalized = tuple(field.lower() for field in fields if field)
+        text = " ".join(normalized)
+        document_words = frozenset(words(text))
+        with self._lock:
+            self.remove(key)
+            self._documents[key] = (normalized, text, document_words, attributes or {})
+            for word in document_words:
+                keys = self._word_keys.get(word)
+                if keys is None:
+                    keys = self._word_keys[word] = set()
+                    grams = self._word_grams[word] = frozenset(trigrams(word))
+                    for gram in grams:
+                        self._gram_words.setdefault(gram, set()).add(word)
+                    self._prefix_words.setdefault(word[:PREFIX_LENGTH], set()).add(word)
+                keys.add(key)
+                self._prefix_keys.setdefault(word[:PREFIX_LENGTH], set()).add(key)
+
+    def remove(self, key: Hashable) -> None:
+        with self._lock:
+            document = self._documents.pop(key, None)
+            if document is None:
+                return
+            for prefix in {word[:PREFIX_LENGTH] for word in document[2]}:
+                prefix_keys = self._prefix_keys[prefix]
+                prefix_keys.discard(key)
+                if not prefix_keys:
+                    del self._prefix_keys[prefix]
+            for word in document[2]:
+                keys = self._word_keys[word]
+                keys.discard(key)
+                if keys:
+                    continue
+                del self._word_keys[word]
+                for gram in self._word_grams.pop(word):
+                    gram_words = self._gram_words[gram]
+                    gram_words.discard(word)
+                    if not gram_words:
+                        del self._gram_words[gram]
+                prefix_words = self._prefix_words[word[:PREFIX_LENGTH]]
+                prefix_words.discard(word)
+                if not prefix_words:
+                    del self._prefix_words[word[:PREFIX_LENGTH]]
+
+    def _words_containing(self, piece: str) -> Set[str]:
+        """
+        Indexed words that contain `piece` (at least 3 characters)
+        """
+        postings = sorted(
+            (self._gram_words.get(piece[i:i + 3], set()) for i in range(len(piece) - 2)),
+            key=len
+        )
+        candidates = set(postings[0])
+        for posting in postings[1:]:
+            if not candidates:
+                break
+            candidates &= posting
+        return {word for word in candidates if piece in word}
+
+    def _words_starting_with(self, prefix: str) -> Iterator[str]:
+        """
+        Indexed words that start with `prefix`, the word itself first
+        """
+        if prefix in self._word_keys:
+            yield prefix
+        if len(prefix) >= PREFIX_LENGTH:
+            buckets = [self._prefix_words.get(prefix[:PREFIX_LENGTH], ())]
+        else:
+            buckets = [bucket for start, bucket in self._prefix_words.items() if start.startswith(prefix)]
+        for bucket in buckets:
+            for word in bucket:
+                if word != prefix and word.startswith(prefix):
+                    yield word
+
+    def _union_keys(self, words: Iterable[str]) -> Set[Hashable]:
+        """
+        Keys of the documents having any of `words`
+        """
+        return set().union(*(self._word_keys[word] for word in words))
+
+    def _whole_word_keys(self, whole_words: Set[str]) -> Set[Hashable]:
+        """
+        Keys of the documents having the rarest of `whole_words`
+        """
+        return min((self._word_keys.get(word, set()) for word in whole_words), key=len)
+
+    def _prefix_candidates(self, query: str) -> Iterator[Hashable]:
+        """
+        Keys of documents that may have a field starting with `query`: those
+        with the rarest of the query's whole words (each followed by a
+        separator), or else with a word starting with its first word. Keys
+        may repeat.
+        """
+        query_words = words(query)
+        if not query_words:
+            return
+        whole_words = set(query_words[:-1])
+        if WORD_SEPARATOR.match(query[-1]):
+            whole_words.add(query_words[-1])
+        if whole_words:
+            yield from self._whole_word_keys(whole_words)
+            return
+        for word in self._words_starting_with(query_words[0]):
+            yield from self._word_keys[word]
+
+    def _substring_candidates(self, query: str) -> Iterator[Hashable]:
+        """
+        Keys of documents that may contain `query`: those with the rarest of
+        the query's whole words (with a separator on both sides), or else with
+        a word matching each of its word pieces (every document when no piece
+        narrows anything down). Keys may repeat.
+        """
+        query_words = words(query)
+        whole_words = set(query_words[1:-1])
+        if query_words and WORD_SEPARATOR.match(query[0]):
+            whole_words.add(query_words[0])
+        if query_words and WORD_SEPARATOR.match(query[-1]):
+            whole_words.add(query_words[-1])
+        if whole_words:
+            yield from self._whole_word_keys(whole_words)
+            return
+
+        # Narrowed with set operations, which run in C, before documents are
+        # visited one by one
+        candidates = None
+        for i, piece in enumerate(query_words):
+            if len(query_words) == 1:
+                if len(piece) < 3:
+                    continue
+                keys = self._union_keys(self._words_containing(piece))
+            elif i == 0:
+                # Before a separator a piece ends a word, and the padded
+                # trigram of its last two characters marks word ends
+                if len(piece) < 2:
+                    continue
+                word_ends = self._gram_words.get(piece[-2:] + " ", ())
+                keys = self._union_keys(word for word in word_ends if word.endswith(piece))
+            elif len(piece) >= PREFIX_LENGTH:
+                # After a separator a piece starts a word: documents with a word
+                # sharing its first characters
+                keys = self._prefix_keys.get(piece[:PREFIX_LENGTH], set())
+            elif candidates is None:
+                keys = self._union_keys(self._words_starting_with(piece))
+            else:
+                # Too short to narrow the candidates by much
+                continue
+            candidates = keys if candidates is None else candidates & keys
+            if not candidates:
+                return
+        yield from self._documents if candidates is None else candidates
+
+    def _similar_words(self, query_grams: Set[str], max_words: int) -> Dict[str, float]:
+        """
+        Indexed words whose trigram similarity to the query reaches the
+        threshold, scoring at most `max_words` words
+        """
+        # A word reaching the threshold shares at least `required` of the query's
+        # trigrams, so it shares one of any len - required + 1 of them: only
+        # the postings of the rarest grams need reading, rarest first
+        required = max(1, math.ceil(self.threshold * len(query_grams)))
+        rarest = sorted(query_grams, key=lambda gram: len(self._gram_words.get(gram, ())))
+
+        similar = {}
+        scored = set()
+        for gram in rarest[:len(query_grams) - required + 1]:
+            for word in self._gram_words.get(gram, ()):
+                if word in scored:
+                    continue
+                scored.add(word)
+                grams = self._word_grams[word]
+                common = len(query_grams & grams)
+                similarity = common / (len(query_grams) + len(grams) - common)
+                if similarity >= self.threshold:
+                    similar[word] = similarity
+                if len(scored) >= max_words:
+                    return similar
+        return similar
+
+    def _similarity(self, query_grams: Set[str], document_words: FrozenSet[str], cache: Dict[str, float]) -> float:
+        """
+        Similarity to the closest word, like pg_trgm's word_similarity().
+        `cache` holds per-word similarities for the current query, since
+        matching documents tend to share words.
+        """
+        best = 0.0
+        for word in document_words:
+            similarity = cache.get(word)
+            if similarity is None:
+                grams = self._word_grams[word]
+                common = len(query_grams & grams)
+                similarity = cache[word] = common / (len(query_grams) + len(grams) - common)
+            if similarity > best:
+                best = similarity
+        return best
+
+    def search(self, query: str, limit: int = 20,
+               predicate: Optional[Callable[[Dict[str, Any]], bool]] = None) -> List[Tuple[Hashable, float]]:
+        """
+        Get up to `limit` (key, score) pairs matching `query`, best first.
+        `predicate` filters on the document attributes.
+        """
+        query = query.strip().lower()
+        if not query:
+            return []
+        query_grams = trigrams(query)
+        max_candidates = limit * CANDIDATES_PER_RESULT
+
+        with self._lock:
+            results = []
+            similarities = {}
+            seen = set()
+            ranked_above_substring = 0
+            tiers: List[Iterable[Hashable]] = [self._prefix_candidates(query), self._substring_candidates(query)]
+            for tier, candidates in enumerate(tiers):
+                # Every exact or prefix match was visited in the first tier
+                if len(results) >= max_candidates or (tier and ranked_above_substring >= limit):
+                    break
+                for key in candidates:
+                    if key in seen:
+                        continue
+                    seen.add(key)
+                    fields, text, document_words, attributes = self._documents[key]
+                    if query not in text:
+                        continue
+                    if predicate is not None and not predicate(attributes):
+                        continue
+                    if query in fields:
+                        rank = 3.0
+                    elif any(field.startswith(query) for field in fields):
+                        rank = 2.0
+                    else:
+                        rank = 1.0
+                    if rank > 1.0:
+                        ranked_above_substring += 1
+                    results.append((key, rank + self._similarity(query_grams, document_words, similarities)))
+                    if len(results) >= max_candidates:
+                        break
+
+            # Fuzzy matches rank below every substring match, so only look for
+            # them when there are not enough substring matches
+            if len(results) < limit:
+                # Closest words first, so a document keeps the similarity of the
+                # first word it is reached through
+                found = {key for key, _ in results}
+                similar = self._similar_words(query_grams, max_candidates)
+                for word in sorted(similar, key=similar.get, reverse=True):
+                    if len(results) >= max_candidates:
+                        break
+                    for key in self._word_keys[word]:
+                        if key in found:
+                            continue
+                        found.add(key)
+                        if predicate is None or predicate(self._documents[key][3]):
+                            results.append((key, similar[word]))
+                            if len(results) >= max_candidates:
+                                break
+
+        results.sort(key=lambda result: result[1], reverse=True)
+        return results[:limit]
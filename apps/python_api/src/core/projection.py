@@ -0,0 +1,59 @@
+"""
+Vectorized investment value projection.
+
+Mirrors the daily accrual in `tasks.investment_tasks.process_investment_returns`:
+an active investment earns `amount * roi_percentage / 100 / 365` per day until
+its end date, after which its value stays fixed. With `reinvest`, the matured
+value is rolled into a new term of the same plan, which then accrues on the
+matured value.
+
+Pure NumPy on plain arrays, so it can run in a worker process.
+"""
+from typing import Tuple
+
+import numpy as np
+
+def projection_days(horizon_days: int, step_days: int) -> np.ndarray:
+    """
+    Day offsets sampled by a projection: every `step_days` from 0, always
+    ending on `horizon_days`
+    """
+    days = np.arange(0, horizon_days + 1, step_days, dtype=np.int64)
+    if days[-1] != horizon_days:
+        days = np.append(days, horizon_days)
+    return days
+
+def project_values(principal: np.ndarray, current_value: np.ndarray, annual_roi: np.ndarray,
+                   days_remaining: np.ndarray, term_days: np.ndarray, days: np.ndarray,
+                   reinvest: bool = False) -> np.ndarray:
+    """
+    Value of each investment (rows) at each day offset (columns)
+    """
+    daily_rate = (annual_roi / 100.0 / 365.0)[:, None]
+    remaining = np.maximum(days_remaining, 0)[:, None]
+    elapsed = days[None, :]
+
+    accrued_days = np.minimum(elapsed, remaining)
+    values = current_value[:, None] + principal[:, None] * daily_rate * accrued_days
+    if not reinvest:
+        return values
+
+    # After maturity: whole terms compound on the matured value, then a partial term accrues
+    term = np.maximum(term_days, 1)[:, None]
+    matured_value = current_value[:, None] + principal[:, None] * daily_rate * remaining
+    after = np.maximum(elapsed - remaining, 0)
+    whole_terms = after // term
+    partial_days = after - whole_terms * term
+    rolled = matured_value * (1.0 + daily_rate * term) ** whole_terms * (1.0 + daily_rate * partial_days)
+    return np.where(elapsed > remaining, rolled, values)
+
+def project_portfolio(principal: np.ndarray, current_value: np.ndarray, annual_roi: np.ndarray,
+                      days_remaining: np.ndarray, term_days: np.ndarray, horizon_days: int,
+                      step_days: int = 1, reinvest: bool = False) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Project a portfolio. Returns the sampled day offsets, the portfolio's
+    total value on each of them and each investment's value at the horizon.
+    """
+    days = projection_days(horizon_days, step_days)
+    values = project_values(principal, current_value, annual_roi, days_remaining, term_days, days, reinvest)
+    return days, values.sum(axis=0), values[:, -1]
@@ -0,0 +1,102 @@
+"""
+Conditional GET and serialized-response caching for read-heavy routes.
+
+A route names a view, the principal it renders for (None for data that is the
+same for every user) and the entity's version: the column values of the rows
+it renders (`row_version`), or a version kept in the database such as the
+catalog's `cache_versions` row. Those make a strong ETag. A request whose
+If-None-Match matches gets a bodiless 304; otherwise the JSON body is served
+from an LRU keyed by the ETag, and only built and serialized on a miss.
+
+Versions come only from the database, so every process derives the same ETag
+for the same data, and nothing has to be invalidated when it changes. Whole
+rows are used rather than `updated_at`, which SQLite stores to the second.
+"""
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Hashable, Optional, Tuple
+
+from fastapi import Response, status
+from sqlalchemy import inspect
+
+from core.etags import etag_matches
+from core.metrics import CACHE_REQUESTS
+from core.serialization import type_adapter
+
+# Serialized bodies kept per process
+RESPONSE_CACHE_SIZE = int(os.getenv("RESPONSE_CACHE_SIZE", "4096"))
+
+# Cache-Control per kind of route. Every cached route needs a bearer token, so
+# nothing may be stored by shared caches.
+CATALOG_CACHE_CONTROL = "private, max-age=60, must-revalidate"
+USER_CACHE_CONTROL = "private, no-cache"
+
+# Cache lookups reported on /metrics
+_HITS = CACHE_REQUESTS.labels("response", "hit")
+_MISSES = CACHE_REQUESTS.labels("response", "miss")
+_NOT_MODIFIED = CACHE_REQUESTS.labels("response", "not_modified")
+
+def row_version(*rows: Any) -> Tuple[Any, ...]:
+    """
+    Version of ORM rows for `ResponseCache.etag`: their column values
+    """
+    return tuple(
+        None if row is None else tuple(getattr(row, column.key) for column in inspect(row).mapper.column_attrs)
+        for row in rows
+    )
+
+class ResponseCache:
+    def __init__(self, max_entries: int = RESPONSE_CACHE_SIZE):
+        self.max_entries = max_entries
+        self._bodies: "OrderedDict[str, bytes]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.not_modified = 0
+
+    def etag(self, view: str, principal_id: Optional[Hashable], entity_type: str, entity_id: Hashable,
+             version: Any) -> str:
+        """
+        Strong ETag of one view of an entity as rendered for `principal_id`
+        """
+        parts = [view, principal_id, entity_type, entity_id, version]
+        digest = hashlib.sha256(json.dumps(parts, default=str, separators=(",", ":")).encode()).hexdigest()
+        return f'"{digest[:32]}"'
+
+    def respond(self, if_none_match: Optional[str], etag: str, cache_control: str, response_model: Any,
+                build: Callable[[], Any]) -> Response:
+        """
+        304 if the client holds `etag`, otherwise the cached body for `etag`,
+        building and serializing it with `response_model` on a miss
+        """
+        headers = {"ETag": etag, "Cache-Control": cache_control, "Vary": "Authorization"}
+        if etag_matches(if_none_match, etag):
+            self.not_modified += 1
+            _NOT_MODIFIED.inc()
+            return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+        with self._lock:
+            body = self._bodies.get(etag)
+            if body is not None:
+                self._bodies.move_to_end(etag)
+                self.hits += 1
+                _HITS.inc()
+        if body is None:
+            _MISSES.inc()
+            adapter = type_adapter(response_model)
+            body = adapter.dump_json(adapter.validate_python(build(), from_attributes=True))
+            with self._lock:
+                self.misses += 1
+                self._bodies[etag] = body
+                while len(self._bodies) > self.max_entries:
+                    self._bodies.popitem(last=False)
+        return Response(content=body, media_type="application/json", headers=headers)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._bodies.clear()
+
+response_cache = ResponseCache()
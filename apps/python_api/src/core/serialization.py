@@ -0,0 +1,93 @@
+"""
+Fast JSON serialization for list responses.
+
+List routes select only the columns their response schema needs, so rows come
+back as plain SQLAlchemy `Row`s instead of ORM instances (no identity map, no
+attribute instrumentation). Pydantic validates them by attribute and writes the
+JSON bytes itself through a TypeAdapter built once per type.
+
+A `fields=` query parameter narrows a list further (a sparse fieldset): only
+the selected columns are queried and a reduced model built from the route's
+schema renders them.
+
+Routes that return plain data (dicts, no response model) are rendered with
+orjson instead of the stdlib encoder.
+"""
+from functools import lru_cache
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple, Type
+
+import orjson
+from fastapi import Response
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel, ConfigDict, TypeAdapter, create_model
+from sqlalchemy import inspect
+
+# Description of the `fields=` query parameter on list routes
+FIELDS_DESCRIPTION = "Comma-separated fields to return (id is always included)"
+
+_adapters: Dict[Any, TypeAdapter] = {}
+
+class ORJSONResponse(JSONResponse):
+    """
+    JSONResponse rendered with orjson (FastAPI's own ORJSONResponse is deprecated)
+    """
+    def render(self, content: Any) -> bytes:
+        return orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY)
+
+def type_adapter(tp: Any) -> TypeAdapter:
+    """
+    Get the shared TypeAdapter for `tp`, building it on first use
+    """
+    adapter = _adapters.get(tp)
+    if adapter is None:
+        adapter = _adapters[tp] = TypeAdapter(tp)
+    return adapter
+
+def dump_json_list(schema: Any, rows: Sequence[Any]) -> bytes:
+    """
+    Validate ORM objects or rows against `schema` and serialize them as a JSON array
+    """
+    adapter = type_adapter(List[schema])
+    return adapter.dump_json(adapter.validate_python(rows, from_attributes=True))
+
+def schema_columns(model: Any, schema: Type[BaseModel], field_names: Optional[Iterable[str]] = None) -> List[Any]:
+    """
+    Columns of `model` that `schema` renders (only `field_names` of them, if
+    given), for column-only list queries. Nested schemas (relationships) are
+    not columns and must be loaded separately.
+    """
+    column_keys = {attribute.key for attribute in inspect(model).column_attrs}
+    selected = set(schema.model_fields) if field_names is None else set(field_names)
+    return [getattr(model, name) for name in schema.model_fields if name in column_keys and name in selected]
+
+def parse_fields(schema: Type[BaseModel], fields: Optional[str]) -> Optional[Tuple[str, ...]]:
+    """
+    Parse a comma-separated `fields=` selection against `schema`. Returns the
+    field names in schema order, always with `id`, or None when nothing was selected.
+    """
+    requested = {name.strip() for name in (fields or "").split(",") if name.strip()}
+    if not requested:
+        return None
+    unknown = requested - set(schema.model_fields)
+    if unknown:
+        raise ValueError(f"Unknown fields: {', '.join(sorted(unknown))}")
+    if "id" in schema.model_fields:
+        requested.add("id")
+    return tuple(name for name in schema.model_fields if name in requested)
+
+@lru_cache(maxsize=256)
+def sparse_schema(schema: Type[BaseModel], field_names: Tuple[str, ...]) -> Type[BaseModel]:
+    """
+    Model with only `field_names` of `schema`, built once per selection
+    """
+    definitions = {name: (schema.model_fields[name].annotation, schema.model_fields[name]) for name in field_names}
+    return create_model(f"{schema.__name__}Fields", __config__=ConfigDict(from_attributes=True), **definitions)
+
+def sparse_response(schema: Type[BaseModel], rows: Sequence[Any], field_names: Optional[Tuple[str, ...]]) -> Any:
+    """
+    `rows` unchanged when no fields were selected (the route's response_model
+    renders them), otherwise a JSON response with only the selected fields
+    """
+    if field_names is None:
+        return rows
+    return Response(content=dump_json_list(sparse_schema(schema, field_names), rows), media_type="application/json")
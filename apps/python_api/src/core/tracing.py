@@ -0,0 +1,484 @@
+"""
+Lightweight request and task tracing.
+
+A sampled request or Celery task becomes a trace: a tree of timed spans for
+the route, each service and repository call (classes decorated with
+`@traced`), every SQL statement and every crypto provider call. Context is
+kept in a ContextVar and crosses process boundaries as a W3C `traceparent`
+header: incoming on HTTP requests, and added to the headers of every task
+queued with `.delay()` / `.apply_async()` while a trace is recorded, so the
+task's spans join the request's trace.
+
+Sampling is decided once, at the root: TRACE_SAMPLE_RATE of requests
+(TRACE_TASK_SAMPLE_RATE of tasks not queued from a trace), or whatever an
+incoming `traceparent` decided. A request's `traceparent` comes from the
+client, so it is ignored unless TRACE_TRUST_TRACEPARENT says every caller that
+can reach the API is trusted (e.g. behind a gateway that sets or strips it);
+otherwise anyone could have their requests traced. Unsampled work pays one
+ContextVar lookup per instrumented call. A trace keeps at most TRACE_MAX_SPANS
+spans; the rest are only counted.
+
+Finished traces are kept in memory (the last TRACE_BUFFER_SIZE per process)
+and, if TRACE_EXPORT_FILE is set, appended to it as JSON lines, which the
+admin trace endpoints read so that they cover every worker on the host. The
+file is rotated to `<file>.1` once it reaches TRACE_EXPORT_MAX_BYTES.
+"""
+import fcntl
+import functools
+import inspect
+import os
+import random
+import re
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Tuple
+
+import orjson
+
+# Fraction of requests traced (0 disables tracing unless a trusted caller sends a sampled traceparent)
+TRACE_SAMPLE_RATE = float(os.getenv("TRACE_SAMPLE_RATE", "0.01"))
+# Continue the traceparent sent with a request, sampled flag included (only when every caller is trusted)
+TRACE_TRUST_TRACEPARENT = os.getenv("TRACE_TRUST_TRACEPARENT", "false").lower() == "true"
+# Fraction of Celery tasks traced when they were not queued from a traced request
+TRACE_TASK_SAMPLE_RATE = float(os.getenv("TRACE_TASK_SAMPLE_RATE", str(TRACE_SAMPLE_RATE)))
+# Spans kept per trace; a long task stops recording spans after this many
+TRACE_MAX_SPANS = int(os.getenv("TRACE_MAX_SPANS", "1000"))
+# Finished traces kept in memory per process
+TRACE_BUFFER_SIZE = int(os.getenv("TRACE_BUFFER_SIZE", "200"))
+# JSON-lines file every process appends finished traces to (unset: memory only)
+TRACE_EXPORT_FILE = os.getenv("TRACE_EXPORT_FILE")
+# Size at which the export file is rotated; the file and one rotated file are kept
+TRACE_EXPORT_MAX_BYTES = int(os.getenv("TRACE_EXPORT_MAX_BYTES", str(64 * 1024 * 1024)))
+# Longest SQL statement text kept on a span
+TRACE_STATEMENT_LENGTH = 500
+
+_TRACEPARENT = re.compile(r"^00-([0-9a-f]{32})-([0-9a-f]{16})-([0-9a-f]{2})$")
+
+class Trace:
+    __slots__ = ("trace_id", "parent_id", "started_at", "origin", "spans", "dropped")
+
+    def __init__(self, trace_id: str, parent_id: Optional[str] = None):
+        self.trace_id = trace_id
+        self.parent_id = parent_id  # Span of the caller that sent the traceparent
+        self.started_at = datetime.now(timezone.utc)
+        self.origin = time.perf_counter()
+        self.spans: List["Span"] = []
+        self.dropped = 0
+
+class Span:
+    # Ids are kept as ints and parents as references; both are only formatted on export
+    __slots__ = ("trace", "id", "parent", "name", "start", "duration", "attributes", "error")
+
+    def __init__(self, trace: Trace, parent: Optional["Span"], name: str, attributes: Dict[str, Any],
+                 start: Optional[float] = None):
+        self.trace = trace
+        self.id = random.getrandbits(64)
+        self.parent = parent
+        self.name = name
+        self.start = time.perf_counter() if start is None else start
+        self.duration: Optional[float] = None
+        self.attributes = attributes
+        self.error: Optional[str] = None
+
+    @property
+    def span_id(self) -> str:
+        return f"{self.id:016x}"
+
+    @property
+    def traceparent(self) -> str:
+        return f"00-{self.trace.trace_id}-{self.span_id}-01"
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "span_id": self.span_id,
+            "parent_id": self.parent.span_id if self.parent is not None else self.trace.parent_id,
+            "name": self.name,
+            "offset_ms": round((self.start - self.trace.origin) * 1000, 3),
+            "duration_ms": round((self.duration or 0.0) * 1000, 3),
+            "attributes": self.attributes,
+            "error": self.error,
+        }
+
+_current: ContextVar[Optional[Span]] = ContextVar("current_span", default=None)
+_finished: deque = deque(maxlen=TRACE_BUFFER_SIZE)
+_export_lock = threading.Lock()
+# Append-mode handle on TRACE_EXPORT_FILE and the process that opened it (not shared across a fork)
+_export_file: Optional[Tuple[int, Any]] = None
+
+def current_span() -> Optional[Span]:
+    """
+    The span being recorded in this context, or None when nothing is traced
+    """
+    return _current.get()
+
+def parse_traceparent(header: Optional[str]) -> Optional[Tuple[str, str, bool]]:
+    """
+    Trace id, parent span id and sampled flag of a W3C traceparent header
+    """
+    match = _TRACEPARENT.match((header or "").strip().lower())
+    if match is None or match.group(1) == "0" * 32:
+        return None
+    return match.group(1), match.group(2), bool(int(match.group(3), 16) & 1)
+
+def start_trace(name: str, traceparent: Optional[str] = None, sample_rate: float = TRACE_SAMPLE_RATE,
+                **attributes) -> Optional[Span]:
+    """
+    Root span of a new trace, continuing `traceparent` if given, or None when
+    this unit of work is not sampled. Activate it with `activate`.
+    """
+    parent = parse_traceparent(traceparent)
+    if parent is not None:
+        trace_id, parent_id, sampled = parent
+        if not sampled:
+            return None
+    else:
+        if not (sample_rate > 0 and random.random() < sample_rate):
+            return None
+        trace_id, parent_id = f"{random.getrandbits(128):032x}", None
+    trace = Trace(trace_id, parent_id)
+    root = Span(trace, None, name, attributes)
+    trace.spans.append(root)
+    return root
+
+def activate(span: Optional[Span]):
+    """
+    Make `span` the current span; returns the token to pass to `deactivate`
+    """
+    return _current.set(span)
+
+def deactivate(token) -> None:
+    _current.reset(token)
+
+def finish(span: Span, error: Optional[BaseException] = None) -> None:
+    """
+    End `span`; ending the root span exports its trace
+    """
+    span.duration = time.perf_counter() - span.start
+    if error is not None:
+        span.error = f"{error.__class__.__name__}: {error}"
+    if span is span.trace.spans[0]:
+        _export(span.trace)
+
+def _start_child(name: str, attributes: Dict[str, Any]) -> Optional[Span]:
+    parent = _current.get()
+    if parent is None:
+        return None
+    trace = parent.trace
+    if len(trace.spans) >= TRACE_MAX_SPANS:
+        trace.dropped += 1
+        return None
+    child = Span(trace, parent, name, attributes)
+    trace.spans.append(child)
+    return child
+
+@contextmanager
+def span(name: str, **attributes):
+    """
+    Record the enclosed block as a child of the current span (a no-op when
+    nothing is traced). Yields the span, or None.
+    """
+    child = _start_child(name, attributes)
+    if child is None:
+        yield None
+        return
+    token = _current.set(child)
+    try:
+        yield child
+    except BaseException as e:
+        finish(child, e)
+        raise
+    else:
+        finish(child)
+    finally:
+        _current.reset(token)
+
+def record_span(name: str, start: float, duration: float, **attributes) -> None:
+    """
+    Add an already timed span (perf_counter start and duration) under the
+    current span, for hooks that measure their own time
+    """
+    parent = _current.get()
+    if parent is None:
+        return
+    trace = parent.trace
+    if len(trace.spans) >= TRACE_MAX_SPANS:
+        trace.dropped += 1
+        return
+    child = Span(trace, parent, name, attributes, start=start)
+    child.duration = duration
+    trace.spans.append(child)
+
+def record_statement(statement: str, start: float, duration: float) -> None:
+    """
+    Add a SQL statement span (called from the engine's execute hooks)
+    """
+    if _current.get() is not None:
+        record_span("db.query", start, duration, statement=statement[:TRACE_STATEMENT_LENGTH])
+
+def _traced_method(span_name: str, method):
+    # Spans are started inline rather than through `span()`: a generator-based
+    # context manager per call would double the cost of a traced call
+    if inspect.iscoroutinefunction(method):
+        @functools.wraps(method)
+        async def async_wrapper(*args, **kwargs):
+            if _current.get() is None:
+                return await method(*args, **kwargs)
+            child = _start_child(span_name, {})
+            if child is None:
+                return await method(*args, **kwargs)
+            token = _current.set(child)
+            try:
+                result = await method(*args, **kwargs)
+            except BaseException as e:
+                finish(child, e)
+                raise
+            finally:
+                _current.reset(token)
+            finish(child)
+            return result
+        return async_wrapper
+
+    @functools.wraps(method)
+    def wrapper(*args, **kwargs):
+        if _current.get() is None:
+            return method(*args, **kwargs)
+        child = _start_child(span_name, {})
+        if child is None:
+            return method(*args, **kwargs)
+        token = _current.set(child)
+        try:
+            result = method(*args, **kwargs)
+        except BaseException as e:
+            finish(child, e)
+            raise
+        finally:
+            _current.reset(token)
+        finish(child)
+        return result
+    return wrapper
+
+def traced(cls):
+    """
+    Class decorator: record each public method of a service or repository as
+    a "<Class>.<method>" span. Generator methods (streamed responses) are left
+    alone, since their work happens after the call returns.
+    """
+    for name, attribute in list(vars(cls).items()):
+        if (name.startswith("_") or not inspect.isfunction(attribute) or inspect.isgeneratorfunction(attribute)
+                or inspect.isasyncgenfunction(attribute)):
+            continue
+        setattr(cls, name, _traced_method(f"{cls.__name__}.{name}", attribute))
+    return cls
+
+def _trace_dict(trace: Trace) -> Dict[str, Any]:
+    root = trace.spans[0]
+    return {
+        "trace_id": trace.trace_id,
+        "name": root.name,
+        "started_at": trace.started_at.isoformat(),
+        "duration_ms": round((root.duration or 0.0) * 1000, 3),
+        "span_count": len(trace.spans),
+        "dropped_spans": trace.dropped,
+        "error": root.error,
+        "spans": [span.to_dict() for span in trace.spans],
+    }
+
+def _export(trace: Trace) -> None:
+    # Kept as objects: the in-memory buffer is only converted when it is read
+    _finished.append(trace)
+    if TRACE_EXPORT_FILE:
+        global _export_file
+        line = orjson.dumps(_trace_dict(trace), default=str) + b"\n"
+        with _export_lock:
+            if _export_file is None or _export_file[0] != os.getpid():
+                # Unbuffered, so each trace is a single append write and lines from
+                # different processes do not interleave
+                _export_file = (os.getpid(), open(TRACE_EXPORT_FILE, "ab", buffering=0))
+            _export_file[1].write(line)
+            if _export_file[1].tell() >= TRACE_EXPORT_MAX_BYTES:
+                _rotate_export_file(_export_file[1])
+                _export_file = None
+
+def _rotate_export_file(f) -> None:
+    """
+    Move the full export file to `<file>.1`, unless another process already
+    did (then `f` is the rotated file and the caller just reopens)
+    """
+    fcntl.flock(f, fcntl.LOCK_EX)
+    try:
+        current = os.stat(TRACE_EXPORT_FILE)
+        if current.st_ino == os.fstat(f.fileno()).st_ino and current.st_size >= TRACE_EXPORT_MAX_BYTES:
+            os.replace(TRACE_EXPORT_FILE, f"{TRACE_EXPORT_FILE}.1")
+    except FileNotFoundError:
+        pass
+    finally:
+        fcntl.flock(f, fcntl.LOCK_UN)
+        f.close()
+
+def _tail_lines(path: str, count: int, chunk_size: int = 64 * 1024) -> List[bytes]:
+    """
+    The last `count` lines of a file, reading it backwards from the end
+    """
+    try:
+        with open(path, "rb") as f:
+            end = f.seek(0, os.SEEK_END)
+            data = b""
+            while end > 0 and data.count(b"\n") <= count:
+                start = max(0, end - chunk_size)
+                f.seek(start)
+                data = f.read(end - start) + data
+                end = start
+    except FileNotFoundError:
+        return []
+    lines = [line for line in data.split(b"\n") if line.strip()]
+    return lines[-count:] if count else []
+
+def _exported_traces() -> List[Dict[str, Any]]:
+    """
+    Finished traces, oldest first: the last TRACE_BUFFER_SIZE lines of the
+    export file and, after a rotation, the rotated file (every process on
+    the host), or this process's buffer
+    """
+    if not TRACE_EXPORT_FILE:
+        return [_trace_dict(trace) for trace in list(_finished)]
+    lines = _tail_lines(TRACE_EXPORT_FILE, TRACE_BUFFER_SIZE)
+    if len(lines) < TRACE_BUFFER_SIZE:
+        lines = _tail_lines(f"{TRACE_EXPORT_FILE}.1", TRACE_BUFFER_SIZE - len(lines)) + lines
+    return [orjson.loads(line) for line in lines]
+
+def recent_traces(limit: int = 50, name: Optional[str] = None,
+                  min_duration_ms: float = 0.0) -> List[Dict[str, Any]]:
+    """
+    Newest finished traces (without their spans), optionally only those whose
+    root name contains `name` or that took at least `min_duration_ms`
+    """
+    traces = []
+    for trace in reversed(_exported_traces()):
+        if (name and name not in trace["name"]) or trace["duration_ms"] < min_duration_ms:
+            continue
+        traces.append({key: value for key, value in trace.items() if key != "spans"})
+        if len(traces) >= limit:
+            break
+    return traces
+
+def get_trace(trace_id: str) -> Optional[Dict[str, Any]]:
+    """
+    A finished trace with its spans. A request and the tasks it queued share
+    the trace id but finish separately; their spans are merged, with offsets
+    from the start of the earliest part.
+    """
+    parts = sorted((trace for trace in _exported_traces() if trace["trace_id"] == trace_id),
+                   key=lambda trace: trace["started_at"])
+    if not parts:
+        return None
+    trace = dict(parts[0])
+    started_at = datetime.fromisoformat(trace["started_at"])
+    spans, duration_ms = [], 0.0
+    for part in parts:
+        shift_ms = (datetime.fromisoformat(part["started_at"]) - started_at).total_seconds() * 1000
+        spans.extend(dict(span, offset_ms=round(span["offset_ms"] + shift_ms, 3)) for span in part["spans"])
+        duration_ms = max(duration_ms, shift_ms + part["duration_ms"])
+    trace["spans"] = spans
+    trace["span_count"] = len(spans)
+    trace["dropped_spans"] = sum(part["dropped_spans"] for part in parts)
+    trace["duration_ms"] = round(duration_ms, 3)
+    return trace
+
+def clear_traces() -> None:
+    _finished.clear()
+
+class TracingMiddleware:
+    """
+    ASGI middleware starting a trace for sampled requests (or requests with a
+    sampled `traceparent`, when TRACE_TRUST_TRACEPARENT is set); the trace id
+    is returned in X-Trace-Id
+    """
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        traceparent = None
+        if TRACE_TRUST_TRACEPARENT:
+            for key, value in scope["headers"]:
+                if key == b"traceparent":
+                    traceparent = value.decode("latin-1")
+                    break
+        root = start_trace(scope["method"], traceparent, sample_rate=TRACE_SAMPLE_RATE)
+        if root is None:
+            await self.app(scope, receive, send)
+            return
+
+        async def send_with_trace_id(message):
+            if message["type"] == "http.response.start":
+                root.attributes["http.status_code"] = message["status"]
+                message.setdefault("headers", [])
+                message["headers"] = list(message["headers"]) + [(b"x-trace-id", root.trace.trace_id.encode())]
+            await send(message)
+
+        # Imported here: core.metrics imports this module for its SQL hooks
+        from core.metrics import route_template
+        token = activate(root)
+        error = None
+        try:
+            await self.app(scope, receive, send_with_trace_id)
+        except BaseException as e:
+            error = e
+            raise
+        finally:
+            deactivate(token)
+            route = route_template(scope)
+            root.name = f"{scope['method']} {route}"
+            root.attributes["http.route"] = route
+            finish(root, error)
+
+def trace_celery_tasks() -> None:
+    """
+    Propagate the current trace into queued tasks' headers, and record each
+    task run as a trace (joining the queuing request's trace, if any)
+    """
+    from celery import signals
+    running: Dict[str, Tuple[Span, Any]] = {}
+
+    @signals.before_task_publish.connect(weak=False)
+    def _inject_traceparent(headers=None, **kwargs):
+        current = _current.get()
+        if current is not None and headers is not None:
+            headers["traceparent"] = current.traceparent
+
+    @signals.task_prerun.connect(weak=False)
+    def _start_task_trace(task_id=None, task=None, **kwargs):
+        request = task.request
+        traceparent = getattr(request, "traceparent", None) or (getattr(request, "headers", None) or {}).get(
+            "traceparent"
+        )
+        root = start_trace(f"task {task.name}", traceparent, sample_rate=TRACE_TASK_SAMPLE_RATE, task_id=task_id)
+        if root is not None:
+            running[task_id] = (root, activate(root))
+
+    @signals.task_failure.connect(weak=False)
+    def _record_task_error(task_id=None, exception=None, **kwargs):
+        started = running.get(task_id)
+        if started is not None and exception is not None:
+            started[0].error = f"{exception.__class__.__name__}: {exception}"
+
+    @signals.task_postrun.connect(weak=False)
+    def _finish_task_trace(task_id=None, state=None, **kwargs):
+        started = running.pop(task_id, None)
+        if started is None:
+            return
+        root, token = started
+        root.attributes["state"] = state
+        try:
+            deactivate(token)
+        except ValueError:
+            # Set in another context (the worker ran the task elsewhere); just clear it
+            _current.set(None)
+        finish(root)
@@ -0,0 +1,32 @@
+"""
+Incremental reads behind a high-water mark.
+
+Analytics rollups, reconciliation, ledger snapshots, the user search index and
+mobile sync each read only the rows changed since their previous run. A row is
+timestamped before its transaction commits, so it can become visible after a
+run has already read past its timestamp. Every such reader therefore:
+
+- takes its new mark with `new_high_water_mark()` before reading anything, so
+  changes made while it reads are picked up by the next run, and
+- starts reading WATERMARK_OVERLAP behind the previous mark (`read_from`), so
+  rows that committed late are not missed. Rows inside the overlap are read
+  twice, which every reader tolerates (upserts, idempotent rebuilds).
+"""
+import os
+from datetime import datetime, timedelta
+from typing import Optional
+
+# Longer than any transaction that writes rows these readers watch
+WATERMARK_OVERLAP = timedelta(seconds=int(os.getenv("WATERMARK_OVERLAP_SECONDS", "300")))
+
+def new_high_water_mark() -> datetime:
+    """
+    High-water mark of the run about to start
+    """
+    return datetime.utcnow()
+
+def read_from(mark: Optional[datetime]) -> Optional[datetime]:
+    """
+    Where a run after `mark` starts reading (None: from the beginning)
+    """
+    return mark - WATERMARK_OVERLAP if mark is not None else None
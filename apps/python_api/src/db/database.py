@@ -1,51 +1,93 @@
 import os
+import threading
+from typing import Optional
 from sqlalchemy import create_engine
+from sqlalchemy.engine import Engine
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.orm import Session, sessionmaker
 from dotenv import load_dotenv
-import time
+
+from core.metrics import instrument_engine
 
 # Load environment variables
 load_dotenv(override=True)
 
 # Database URL: use PostgreSQL (IPv6) if available, otherwise SQLite fallback
-DATABASE_URL = os.getenv("DATABASE_URL")
-
-# Retry mechanism for database connection
-def get_database_url(max_retries=5, retry_delay=3):
-    for attempt in range(max_retries):
-        db_url = os.getenv("DATABASE_URL")
-        if db_url:
-            print(f"Database URL found: {db_url[:10]}...")
-            return db_url
-        else:
-            print(f"Database URL not found, retrying ({attempt+1}/{max_retries})...")
-            # Reload environment variables with force override
-            load_dotenv(dotenv_path=None, override=True)
-            time.sleep(retry_delay)
+def get_database_url() -> str:
+    db_url = os.getenv("DATABASE_URL")
+    if db_url:
+        return db_url
     
-    # Default to SQLite if no database URL is provided after retries
+    # Default to SQLite if no database URL is provided
     sqlite_path = os.path.join(os.getcwd(), "prime_invest.db")
     sqlite_url = f"sqlite:////{sqlite_path}"
     print(f"Using SQLite fallback at: {sqlite_path}")
     return sqlite_url
 
-DATABASE_URL = get_database_url()
+# Connection pool of each process (every gunicorn worker has its own; see
+# gunicorn.conf.py, which derives these from DB_MAX_CONNECTIONS)
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "5"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+DB_POOL_TIMEOUT = int(os.getenv("DB_POOL_TIMEOUT", "30"))
+# Seconds before a pooled connection is replaced (stays under server/proxy idle limits)
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))
+
+_engine: Optional[Engine] = None
+_engine_lock = threading.Lock()
+
+def init_engine(database_url: Optional[str] = None) -> Engine:
+    """
+    Create the engine and bind SessionLocal to it. Called from the app's
+    lifespan; scripts and Celery tasks get it on their first session.
+    """
+    global _engine
+    with _engine_lock:
+        if _engine is not None:
+            return _engine
+        url = database_url or get_database_url()
+        if url.startswith("sqlite"):
+            connect_args = {"check_same_thread": False}
+            pool_args = {}
+        else:
+            # No special connect_args needed for PostgreSQL
+            connect_args = {}
+            pool_args = {
+                "pool_size": DB_POOL_SIZE,
+                "max_overflow": DB_MAX_OVERFLOW,
+                "pool_timeout": DB_POOL_TIMEOUT,
+                "pool_recycle": DB_POOL_RECYCLE,
+                "pool_pre_ping": True,
+            }
+        _engine = create_engine(url, connect_args=connect_args, **pool_args)
+        instrument_engine(_engine)
+        SessionLocal.configure(bind=_engine)
+        return _engine
+
+def get_engine() -> Engine:
+    """
+    Get the engine, creating it on first use
+    """
+    return _engine if _engine is not None else init_engine()
 
-if DATABASE_URL.startswith("sqlite"):
-    connect_args = {"check_same_thread": False}
-else:
-    # No special connect_args needed for PostgreSQL
-    connect_args = {}
+def dispose_engine(close: bool = True) -> None:
+    """
+    Drop the engine's pooled connections, if it was created. With close=False
+    the connections are abandoned rather than closed (after a fork).
+    """
+    if _engine is not None:
+        _engine.dispose(close=close)
 
-# Create SQLAlchemy engine
-engine = create_engine(
-    DATABASE_URL,
-    connect_args=connect_args
-)
+class LazySessionmaker(sessionmaker):
+    """
+    sessionmaker that creates the engine when the first session is opened
+    """
+    def __call__(self, **local_kw) -> Session:
+        if self.kw.get("bind") is None and "bind" not in local_kw:
+            get_engine()
+        return super().__call__(**local_kw)
 
-# Create SessionLocal class
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+# Create SessionLocal class (bound to the engine by init_engine)
+SessionLocal = LazySessionmaker(autocommit=False, autoflush=False)
 
 # Create Base class
 Base = declarative_base()
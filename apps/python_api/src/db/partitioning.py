@@ -0,0 +1,231 @@
+"""
+Opt-in PostgreSQL monthly range partitioning by `created_at`.
+
+With PARTITIONING_ENABLED=true, a daily beat task keeps
+PARTITION_PRECREATE_MONTHS months of future partitions in place for the
+tables in PARTITIONED_TABLES that are partitioned by month (one partition per
+calendar month, e.g. `transactions_p2026_10`). Converting the existing tables
+rewrites them and is a separate, explicit step: `init_db.py` only does it
+with PARTITIONING_CONVERT_TABLES=true as well, in a maintenance window. Queries that
+filter on `created_at` only touch the partitions covering that range, and an
+old month can be detached into a standalone table for archival. Rows outside
+every monthly partition (e.g. far-future timestamps) land in a DEFAULT
+partition, `<table>_default`, instead of failing the insert; a month must be
+created before rows for it arrive there, since PostgreSQL refuses to add a
+partition whose range the DEFAULT partition already holds rows for.
+
+PostgreSQL requires the partition key in every unique constraint, so the
+primary key of a partitioned table becomes (id, created_at) and foreign keys
+from other tables into it (ledger_entries.transaction_id and
+orders.transaction_id) are dropped: the referencing tables do not carry the
+referenced row's created_at. The ORM relationships are unaffected, but the
+database no longer enforces those references.
+"""
+import os
+import re
+from datetime import datetime, timezone
+from typing import List, Optional
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+from sqlalchemy.schema import AddConstraint, CreateIndex
+
+from models import models
+
+PARTITIONING_ENABLED = os.getenv("PARTITIONING_ENABLED", "false").lower() == "true"
+# Rebuild unpartitioned tables as partitioned ones; a one-off migration, never implied by PARTITIONING_ENABLED
+PARTITIONING_CONVERT_TABLES = os.getenv("PARTITIONING_CONVERT_TABLES", "false").lower() == "true"
+PARTITIONED_TABLES = ("transactions", "notifications", "audit_logs")
+# Future months that always have a partition ready
+PARTITION_PRECREATE_MONTHS = int(os.getenv("PARTITION_PRECREATE_MONTHS", "3"))
+
+PARTITION_NAME_PATTERN = re.compile(r"_p(\d{4})_(\d{2})$")
+
+def month_start(value: datetime) -> datetime:
+    """
+    First instant (UTC) of the month containing `value`
+    """
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+
+def add_months(month: datetime, months: int) -> datetime:
+    """
+    Shift a month start by a number of months
+    """
+    index = month.year * 12 + month.month - 1 + months
+    return month.replace(year=index // 12, month=index % 12 + 1)
+
+def partition_name(table: str, month: datetime) -> str:
+    """
+    Name of the partition holding `table` rows for the given month
+    """
+    return f"{table}_p{month.year:04d}_{month.month:02d}"
+
+def partition_month(name: str) -> Optional[datetime]:
+    """
+    Month covered by a partition, parsed from its name
+    """
+    match = PARTITION_NAME_PATTERN.search(name)
+    if not match:
+        return None
+    return datetime(int(match.group(1)), int(match.group(2)), 1)
+
+def is_supported(db: Session) -> bool:
+    """
+    Partitioning is only available on PostgreSQL
+    """
+    return db.get_bind().dialect.name == "postgresql"
+
+def is_partitioned(db: Session, table: str) -> bool:
+    """
+    Check whether `table` is already a partitioned table
+    """
+    return db.execute(text(
+        "SELECT 1 FROM pg_partitioned_table pt JOIN pg_class c ON c.oid = pt.partrelid "
+        "WHERE c.relname = :table AND pg_table_is_visible(c.oid)"
+    ), {"table": table}).first() is not None
+
+def get_partitions(db: Session, table: str) -> List[str]:
+    """
+    Get the names of a table's partitions, oldest month first and the
+    DEFAULT partition last
+    """
+    rows = db.execute(text(
+        "SELECT c.relname FROM pg_inherits i "
+        "JOIN pg_class c ON c.oid = i.inhrelid "
+        "JOIN pg_class p ON p.oid = i.inhparent "
+        "WHERE p.relname = :table AND pg_table_is_visible(p.oid)"
+    ), {"table": table}).all()
+    return sorted((row[0] for row in rows), key=lambda name: (partition_month(name) is None, name))
+
+def create_partition(db: Session, table: str, month: datetime) -> bool:
+    """
+    Create the partition for one month if it does not exist (no commit).
+    Returns True if a partition was created.
+    """
+    name = partition_name(table, month)
+    if db.execute(text("SELECT to_regclass(:name)"), {"name": name}).scalar() is not None:
+        return False
+
+    lower = month.strftime("%Y-%m-%d 00:00:00+00")
+    upper = add_months(month, 1).strftime("%Y-%m-%d 00:00:00+00")
+    db.execute(text(
+        f'CREATE TABLE "{name}" PARTITION OF "{table}" FOR VALUES FROM (\'{lower}\') TO (\'{upper}\')'
+    ))
+    return True
+
+def create_default_partition(db: Session, table: str) -> bool:
+    """
+    Create the DEFAULT partition catching rows outside every month if it does
+    not exist (no commit). Returns True if it was created.
+    """
+    name = f"{table}_default"
+    if db.execute(text("SELECT to_regclass(:name)"), {"name": name}).scalar() is not None:
+        return False
+
+    db.execute(text(f'CREATE TABLE "{name}" PARTITION OF "{table}" DEFAULT'))
+    return True
+
+def ensure_partitions(db: Session, table: str, months_ahead: Optional[int] = None,
+                      now: Optional[datetime] = None) -> List[str]:
+    """
+    Create any missing partitions from the current month through `months_ahead`
+    months ahead (no commit). Returns the names of the partitions created.
+    """
+    months_ahead = PARTITION_PRECREATE_MONTHS if months_ahead is None else months_ahead
+    current = month_start(now or datetime.utcnow())
+
+    created = []
+    for offset in range(months_ahead + 1):
+        month = add_months(current, offset)
+        if create_partition(db, table, month):
+            created.append(partition_name(table, month))
+    return created
+
+def detach_partitions_before(db: Session, table: str, before: datetime) -> List[str]:
+    """
+    Detach every partition whose month ends on or before `before` (no commit).
+    Detached partitions become standalone tables that can be archived and
+    dropped without touching the live table. Returns their names.
+    """
+    cutoff = month_start(before)
+    detached = []
+    for name in get_partitions(db, table):
+        month = partition_month(name)
+        if month is not None and add_months(month, 1) <= cutoff:
+            db.execute(text(f'ALTER TABLE "{table}" DETACH PARTITION "{name}"'))
+            detached.append(name)
+    return detached
+
+def convert_to_partitioned(db: Session, table: str, months_ahead: Optional[int] = None) -> None:
+    """
+    Rebuild an existing table as a monthly partitioned table, copying its rows
+    (no commit). This is a one-off migration: it rewrites the whole table, so
+    run it in a maintenance window.
+    """
+    model_table = models.Base.metadata.tables[table]
+    legacy = f"{table}_unpartitioned"
+
+    db.execute(text(f'ALTER TABLE "{table}" RENAME TO "{legacy}"'))
+    db.execute(text(f'ALTER TABLE "{legacy}" RENAME CONSTRAINT "{table}_pkey" TO "{legacy}_pkey"'))
+
+    # Foreign keys into the table cannot survive the primary key change: the
+    # referencing tables have no created_at to complete an (id, created_at) reference
+    for referencing_table, constraint in db.execute(text(
+        "SELECT conrelid::regclass::text, conname FROM pg_constraint "
+        "WHERE contype = 'f' AND confrelid = CAST(:legacy AS regclass)"
+    ), {"legacy": legacy}).all():
+        print(f"Dropping foreign key {constraint} on {referencing_table}")
+        db.execute(text(f'ALTER TABLE {referencing_table} DROP CONSTRAINT "{constraint}"'))
+
+    # Free the index names for the partitioned table
+    for index in model_table.indexes:
+        db.execute(text(f'DROP INDEX IF EXISTS "{index.name}"'))
+
+    db.execute(text(f'UPDATE "{legacy}" SET created_at = now() WHERE created_at IS NULL'))
+    db.execute(text(
+        f'CREATE TABLE "{table}" (LIKE "{legacy}" INCLUDING DEFAULTS) PARTITION BY RANGE (created_at)'
+    ))
+    db.execute(text(f'ALTER TABLE "{table}" ALTER COLUMN created_at SET NOT NULL'))
+    db.execute(text(f'ALTER TABLE "{table}" ADD PRIMARY KEY (id, created_at)'))
+
+    oldest = db.execute(text(f'SELECT min(created_at) FROM "{legacy}"')).scalar()
+    current = month_start(datetime.utcnow())
+    month = month_start(oldest) if oldest else current
+    while month < current:
+        create_partition(db, table, month)
+        month = add_months(month, 1)
+    ensure_partitions(db, table, months_ahead)
+    create_default_partition(db, table)
+
+    db.execute(text(f'INSERT INTO "{table}" SELECT * FROM "{legacy}"'))
+    db.execute(text(f'DROP TABLE "{legacy}"'))
+
+    # Indexes and foreign keys declared on the parent cascade to every partition
+    for index in model_table.indexes:
+        db.execute(CreateIndex(index))
+    for foreign_key in model_table.foreign_key_constraints:
+        db.execute(AddConstraint(foreign_key))
+
+def partition_tables(db: Session) -> None:
+    """
+    Convert the configured tables to partitioned tables where needed (only
+    with PARTITIONING_CONVERT_TABLES) and make sure their upcoming partitions
+    exist
+    """
+    if not is_supported(db):
+        print("Partitioning requires PostgreSQL, skipping")
+        return
+
+    for table in PARTITIONED_TABLES:
+        if not is_partitioned(db, table):
+            if not PARTITIONING_CONVERT_TABLES:
+                print(f"{table} is not partitioned; set PARTITIONING_CONVERT_TABLES=true to convert it")
+                continue
+            print(f"Converting {table} to monthly partitions...")
+            convert_to_partitioned(db, table)
+        created = ensure_partitions(db, table)
+        create_default_partition(db, table)
+        db.commit()
+        print(f"{table}: {len(get_partitions(db, table))} partitions ({len(created)} created)")
@@ -3,18 +3,54 @@
 Database initialization script.
 This script creates all the database tables.
 """
-from db.database import engine
+from sqlalchemy import text
+
+from db.database import get_engine, SessionLocal
+from db.partitioning import PARTITIONING_ENABLED, partition_tables
 from models import models
+from repositories.user_repository import USER_SEARCH_DOCUMENT_SQL
 
 def create_tables():
     """Create all database tables."""
     print("Creating database tables...")
     try:
-        models.Base.metadata.create_all(bind=engine)
+        models.Base.metadata.create_all(bind=get_engine())
         print("✅ Database tables created successfully!")
     except Exception as e:
         print(f"❌ Error creating database tables: {e}")
         raise
 
+def create_partitions():
+    """Convert large tables to monthly partitions (PostgreSQL, opt-in)."""
+    db = SessionLocal()
+    try:
+        partition_tables(db)
+    except Exception as e:
+        db.rollback()
+        print(f"❌ Error partitioning tables: {e}")
+        raise
+    finally:
+        db.close()
+
+def create_search_indexes():
+    """Create the trigram indexes behind audit log and user search (PostgreSQL only)."""
+    engine = get_engine()
+    if engine.dialect.name != "postgresql":
+        return
+    with engine.begin() as conn:
+        conn.execute(text("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
+        conn.execute(text(
+            "CREATE INDEX IF NOT EXISTS ix_audit_logs_details_trgm "
+            "ON audit_logs USING gin (details gin_trgm_ops)"
+        ))
+        conn.execute(text(
+            "CREATE INDEX IF NOT EXISTS ix_users_search_trgm "
+            f"ON users USING gin (({USER_SEARCH_DOCUMENT_SQL}) gin_trgm_ops)"
+        ))
+    print("✅ Search indexes created successfully!")
+
 if __name__ == "__main__":
     create_tables()
+    if PARTITIONING_ENABLED:
+        create_partitions()
+    create_search_indexes()
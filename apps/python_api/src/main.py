@@ -1,4 +1,6 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI, Depends, HTTPException, status
+from fastapi.datastructures import Default
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse
 from fastapi.security import OAuth2PasswordBearer
@@ -10,10 +12,34 @@ from dotenv import load_dotenv
 load_dotenv()
 
 # Import routers
-from routers import auth, users, wallets, investments, loans, admin, crypto_deposits, health
+from routers import auth, users, wallets, investments, loans, admin, crypto_deposits, health, me, sync
+from core.compression import CompressionMiddleware
+from core.metrics import MetricsMiddleware
+from core.tracing import TracingMiddleware
+from core.serialization import ORJSONResponse
+from services.idempotency_service import IdempotencyConflictError, IdempotencyKeyInvalidError
+from services.audit_writer import audit_writer
+from services.projection_service import shutdown_projection_pool
+from services.catalog_cache import catalog_cache
+from db.database import SessionLocal, init_engine, dispose_engine
 
-# Import Celery app for background tasks
-from tasks.celery_app import celery_app
+# Celery is not imported here: services import their tasks when they first queue one
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Connect to the database and load the plan and product catalog before the first request
+    init_engine()
+    db = SessionLocal()
+    try:
+        catalog_cache.warm(db)
+    finally:
+        db.close()
+    yield
+    # Write out queued audit events, stop the projection worker processes and
+    # close pooled connections before the worker exits
+    audit_writer.close()
+    shutdown_projection_pool()
+    dispose_engine()
 
 # Create FastAPI app
 app = FastAPI(
@@ -22,6 +48,10 @@ app = FastAPI(
     version="1.0.0",
     docs_url="/docs",
     redoc_url="/redoc",
+    # orjson for routes returning plain data. Passed as a default so routes with a
+    # response_model keep FastAPI's Pydantic-to-bytes path instead of being re-encoded.
+    default_response_class=Default(ORJSONResponse),
+    lifespan=lifespan,
 )
 
 # Configure CORS
@@ -40,6 +70,15 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Compress larger responses (brotli when the client accepts it, otherwise gzip)
+app.add_middleware(CompressionMiddleware)
+
+# Trace sampled requests (and requests with a sampled traceparent header)
+app.add_middleware(TracingMiddleware)
+
+# Time every request per route for /metrics (outermost, so compression is included)
+app.add_middleware(MetricsMiddleware)
+
 # Include routers
 app.include_router(health.router, tags=["Health"])
 app.include_router(auth.router, prefix="/auth", tags=["Authentication"])
@@ -49,6 +88,8 @@ app.include_router(investments.router, prefix="/investments", tags=["Investments
 app.include_router(loans.router, prefix="/loans", tags=["Loans"])
 app.include_router(crypto_deposits.router, prefix="/crypto-deposits", tags=["Crypto Deposits"])
 app.include_router(admin.router, prefix="/admin", tags=["Admin"])
+app.include_router(me.router, prefix="/me", tags=["Me"])
+app.include_router(sync.router, prefix="/sync", tags=["Sync"])
 
 # Root endpoint
 @app.get("/", tags=["Root"])
@@ -74,6 +115,33 @@ async def http_exception_handler(request, exc):
         },
     )
 
+@app.exception_handler(IdempotencyConflictError)
+async def idempotency_conflict_handler(request, exc):
+    return JSONResponse(
+        status_code=status.HTTP_409_CONFLICT,
+        content={
+            "detail": str(exc),
+            "status_code": status.HTTP_409_CONFLICT,
+            "path": request.url.path,
+            "method": request.method,
+            "type": "idempotency_conflict"
+        },
+        headers={"Retry-After": str(exc.retry_after)} if exc.retry_after is not None else None,
+    )
+
+@app.exception_handler(IdempotencyKeyInvalidError)
+async def idempotency_key_invalid_handler(request, exc):
+    return JSONResponse(
+        status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+        content={
+            "detail": str(exc),
+            "status_code": status.HTTP_422_UNPROCESSABLE_ENTITY,
+            "path": request.url.path,
+            "method": request.method,
+            "type": "idempotency_key_invalid"
+        },
+    )
+
 @app.exception_handler(ValueError)
 async def value_error_handler(request, exc):
     return JSONResponse(
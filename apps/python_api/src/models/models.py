@@ -1,4 +1,4 @@
-from sqlalchemy import Boolean, Column, ForeignKey, Integer, String, Float, DateTime, Text, Enum, Table
+from sqlalchemy import Boolean, Column, ForeignKey, Integer, String, Float, DateTime, Text, Enum, Table, Index, UniqueConstraint
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from sqlalchemy.dialects.postgresql import UUID
@@ -22,6 +22,10 @@ class TransactionType(str, enum.Enum):
     LOAN_PAYMENT = "loan_payment"
     INTEREST = "interest"
 
+# Transaction types that add to / subtract from a wallet balance once completed
+CREDIT_TRANSACTION_TYPES = [TransactionType.DEPOSIT, TransactionType.INTEREST]
+DEBIT_TRANSACTION_TYPES = [TransactionType.WITHDRAWAL, TransactionType.INVESTMENT, TransactionType.LOAN_PAYMENT]
+
 class TransactionStatus(str, enum.Enum):
     PENDING = "pending"
     COMPLETED = "completed"
@@ -68,6 +72,11 @@ class InvestmentStatus(str, enum.Enum):
 # Models
 class User(Base):
     __tablename__ = "users"
+    __table_args__ = (
+        # The in-process user search index syncs users changed since its watermark
+        Index("ix_users_created_at", "created_at"),
+        Index("ix_users_updated_at", "updated_at"),
+    )
 
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     email = Column(String, unique=True, index=True)
@@ -139,6 +148,15 @@ class InvestmentPlan(Base):
 
 class Investment(Base):
     __tablename__ = "investments"
+    __table_args__ = (
+        # Per-user portfolio summaries group by status; the included columns
+        # let PostgreSQL answer them with an index-only scan
+        Index("ix_investments_user_id_status", "user_id", "status",
+              postgresql_include=["amount", "current_value", "expected_return"]),
+        # Delta sync reads a user's rows created or updated since its change token
+        Index("ix_investments_user_id_created_at", "user_id", "created_at"),
+        Index("ix_investments_user_id_updated_at", "user_id", "updated_at"),
+    )
 
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     user_id = Column(UUID(as_uuid=True), ForeignKey("users.id"))
@@ -176,6 +194,12 @@ class LoanProduct(Base):
 
 class Loan(Base):
     __tablename__ = "loans"
+    __table_args__ = (
+        Index("ix_loans_user_id_status", "user_id", "status",
+              postgresql_include=["amount", "remaining_balance", "total_payment"]),
+        Index("ix_loans_user_id_created_at", "user_id", "created_at"),
+        Index("ix_loans_user_id_updated_at", "user_id", "updated_at"),
+    )
 
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     user_id = Column(UUID(as_uuid=True), ForeignKey("users.id"))
@@ -202,6 +226,15 @@ class Loan(Base):
 
 class Transaction(Base):
     __tablename__ = "transactions"
+    __table_args__ = (
+        # Per-wallet history and exports are read in created_at order
+        Index("ix_transactions_wallet_id_created_at", "wallet_id", "created_at"),
+        Index("ix_transactions_created_at", "created_at"),
+        Index("ix_transactions_user_id_created_at", "user_id", "created_at"),
+        # Incremental reconciliation looks up wallets touched since its high-water mark
+        Index("ix_transactions_updated_at", "updated_at"),
+        Index("ix_transactions_user_id_updated_at", "user_id", "updated_at"),
+    )
 
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     user_id = Column(UUID(as_uuid=True), ForeignKey("users.id"))
@@ -223,17 +256,60 @@ class Transaction(Base):
     investment = relationship("Investment", back_populates="transactions")
     loan = relationship("Loan", back_populates="transactions")
     order = relationship("Order", back_populates="transaction", uselist=False)
+    ledger_entries = relationship("LedgerEntry", back_populates="transaction")
+
+class LedgerEntry(Base):
+    __tablename__ = "ledger_entries"
+    __table_args__ = (
+        # One posting per sequence number per wallet; also serves last-entry lookups
+        UniqueConstraint("wallet_id", "sequence", name="uq_ledger_entries_wallet_id_sequence"),
+        Index("ix_ledger_entries_wallet_id_created_at", "wallet_id", "created_at"),
+    )
+
+    # Append-only: rows are never updated, and only deleted when moved to cold storage
+    # with their transaction. Every completed transaction posts two entries that sum
+    # to zero: one on the wallet, one on a platform account.
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    transaction_id = Column(UUID(as_uuid=True), ForeignKey("transactions.id"), index=True)
+    account = Column(String)  # "wallet" or a platform contra account, e.g. "platform:deposit"
+    wallet_id = Column(UUID(as_uuid=True), ForeignKey("wallets.id"), nullable=True)  # Set on wallet postings
+    sequence = Column(Integer, nullable=True)  # Per-wallet posting number, starting at 1
+    amount = Column(Float)  # Signed: positive credits, negative debits
+    balance_after = Column(Float, nullable=True)  # Wallet balance after this posting
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+    # Relationships
+    transaction = relationship("Transaction", back_populates="ledger_entries")
+
+class WalletBalanceSnapshot(Base):
+    __tablename__ = "wallet_balance_snapshots"
+    __table_args__ = (
+        UniqueConstraint("wallet_id", "sequence", name="uq_wallet_balance_snapshots_wallet_id_sequence"),
+        Index("ix_wallet_balance_snapshots_wallet_id_as_of", "wallet_id", "as_of"),
+    )
+
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    wallet_id = Column(UUID(as_uuid=True), ForeignKey("wallets.id"))
+    sequence = Column(Integer)  # Last ledger entry covered by the snapshot
+    balance = Column(Float)
+    as_of = Column(DateTime(timezone=True))  # created_at of that ledger entry
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
 
 class Order(Base):
     __tablename__ = "orders"
 
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
-    transaction_id = Column(UUID(as_uuid=True), ForeignKey("transactions.id"), unique=True)
-    external_id = Column(String, nullable=True)  # External payment provider order ID
-    payment_method = Column(String)
+    user_id = Column(UUID(as_uuid=True), ForeignKey("users.id"), nullable=True, index=True)
+    transaction_id = Column(UUID(as_uuid=True), ForeignKey("transactions.id"), unique=True, nullable=True)
+    external_id = Column(String, nullable=True, index=True)  # External payment provider order ID
+    payment_method = Column(String, default="crypto")
     amount = Column(Float)
     currency = Column(String)
     status = Column(String)
+    payment_address = Column(String, nullable=True)
+    transaction_hash = Column(String, nullable=True)  # On-chain tx hash reported by the provider
+    is_processed = Column(Boolean, default=False)  # True once the wallet has been credited
+    expires_at = Column(DateTime(timezone=True), nullable=True)
     payment_details = Column(Text, nullable=True)  # JSON string with payment details
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
@@ -243,6 +319,10 @@ class Order(Base):
 
 class Notification(Base):
     __tablename__ = "notifications"
+    __table_args__ = (
+        Index("ix_notifications_user_id_created_at", "user_id", "created_at"),
+        Index("ix_notifications_user_id_updated_at", "user_id", "updated_at"),
+    )
 
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     user_id = Column(UUID(as_uuid=True), ForeignKey("users.id"))
@@ -252,12 +332,20 @@ class Notification(Base):
     type = Column(String)  # e.g., "transaction", "investment", "loan", "system"
     reference_id = Column(String, nullable=True)  # ID of the referenced entity
     created_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), onupdate=func.now())
 
     # Relationships
     user = relationship("User", back_populates="notifications")
 
 class AuditLog(Base):
     __tablename__ = "audit_logs"
+    __table_args__ = (
+        # Audit queries filter on one of these and page newest first by (created_at, id)
+        Index("ix_audit_logs_created_at", "created_at"),
+        Index("ix_audit_logs_user_id_created_at", "user_id", "created_at"),
+        Index("ix_audit_logs_entity_created_at", "entity_type", "entity_id", "created_at"),
+        Index("ix_audit_logs_action_created_at", "action", "created_at"),
+    )
 
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     user_id = Column(UUID(as_uuid=True), ForeignKey("users.id"), nullable=True)
@@ -267,4 +355,113 @@ class AuditLog(Base):
     details = Column(Text, nullable=True)  # JSON string with action details
     ip_address = Column(String, nullable=True)
     user_agent = Column(String, nullable=True)
-    created_at = Column(DateTime(timezone=True), server_default=func.now())
\ No newline at end of file
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+class ReconciliationRun(Base):
+    __tablename__ = "reconciliation_runs"
+
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    mode = Column(String)  # "full" or "incremental"
+    status = Column(String, default="running")  # "running", "completed", "failed"
+    shard_index = Column(Integer, default=0)
+    shard_count = Column(Integer, default=1)
+    high_water_mark = Column(DateTime(timezone=True))  # Changes before this time are covered by the run
+    wallets_checked = Column(Integer, default=0)
+    mismatches_found = Column(Integer, default=0)
+    error = Column(Text, nullable=True)
+    started_at = Column(DateTime(timezone=True), server_default=func.now())
+    finished_at = Column(DateTime(timezone=True), nullable=True)
+
+    # Relationships
+    mismatches = relationship("ReconciliationMismatch", back_populates="run")
+
+class ReconciliationMismatch(Base):
+    __tablename__ = "reconciliation_mismatches"
+
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    run_id = Column(UUID(as_uuid=True), ForeignKey("reconciliation_runs.id"), index=True)
+    wallet_id = Column(UUID(as_uuid=True), ForeignKey("wallets.id"), index=True)
+    stored_balance = Column(Float)
+    expected_balance = Column(Float)  # Net of the wallet's completed transactions
+    difference = Column(Float)  # stored_balance - expected_balance
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+    # Relationships
+    run = relationship("ReconciliationRun", back_populates="mismatches")
+
+class WalletArchiveTotal(Base):
+    __tablename__ = "wallet_archive_totals"
+
+    # Net of a wallet's completed transactions moved to cold storage, so
+    # reconciliation still accounts for them
+    wallet_id = Column(UUID(as_uuid=True), ForeignKey("wallets.id"), primary_key=True)
+    net_amount = Column(Float, default=0.0)
+    transaction_count = Column(Integer, default=0)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+class AnalyticsRollup(Base):
+    __tablename__ = "analytics_rollups"
+    __table_args__ = (
+        UniqueConstraint("granularity", "metric", "status", "bucket_start", name="uq_analytics_rollups_bucket"),
+        # Time-series reads and bucket rebuilds scan this index by range
+        Index("ix_analytics_rollups_granularity_bucket_start", "granularity", "bucket_start"),
+    )
+
+    # Pre-aggregated count and sum per hour or day, maintained by a beat task
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    granularity = Column(String)  # "hour" or "day"
+    bucket_start = Column(DateTime(timezone=True))  # UTC start of the hour or day
+    metric = Column(String)  # Transaction type, or "loan_disbursement"
+    status = Column(String)  # Transaction or loan status
+    count = Column(Integer, default=0)
+    total = Column(Float, default=0.0)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+class AnalyticsRollupState(Base):
+    __tablename__ = "analytics_rollup_state"
+
+    name = Column(String, primary_key=True)
+    high_water_mark = Column(DateTime(timezone=True))  # Changes before this time are in the rollups
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+class IdempotencyKey(Base):
+    __tablename__ = "idempotency_keys"
+    __table_args__ = (
+        # Retries are matched with a single lookup on this index
+        UniqueConstraint("user_id", "key", name="uq_idempotency_keys_user_id_key"),
+    )
+
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    user_id = Column(UUID(as_uuid=True), ForeignKey("users.id"))
+    key = Column(String)  # Client-supplied Idempotency-Key header
+    request_hash = Column(String)  # SHA-256 of the endpoint and request parameters
+    status = Column(String, default="in_progress")  # "in_progress", "committed" (executed, response not stored yet) or "completed"
+    response_status_code = Column(Integer, nullable=True)
+    response_body = Column(Text, nullable=True)  # JSON string with the cached response
+    locked_until = Column(DateTime(timezone=True))  # An in-progress request holds the key until then
+    expires_at = Column(DateTime(timezone=True), index=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+class SyncTombstone(Base):
+    __tablename__ = "sync_tombstones"
+    __table_args__ = (
+        # Delta sync reads a user's deletions since its change token
+        Index("ix_sync_tombstones_user_id_deleted_at", "user_id", "deleted_at"),
+    )
+
+    # Records a deleted row so clients syncing with /sync can drop their copy;
+    # kept for SYNC_TOMBSTONE_RETENTION_DAYS
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    user_id = Column(UUID(as_uuid=True), ForeignKey("users.id"))
+    entity_type = Column(String)  # "transaction", "investment", "loan" or "notification"
+    entity_id = Column(UUID(as_uuid=True))
+    deleted_at = Column(DateTime(timezone=True), server_default=func.now())
+
+class CacheVersion(Base):
+    __tablename__ = "cache_versions"
+
+    # Bumped on every write to the cached data; processes compare it with the
+    # version they loaded to know when to reload
+    name = Column(String, primary_key=True)
+    version = Column(Integer, default=0)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
@@ -0,0 +1,179 @@
+from sqlalchemy.orm import Session
+from sqlalchemy import func, or_
+from typing import Dict, List, Optional, Tuple
+from datetime import datetime, timedelta
+
+from core.archive import ArchiveStore, naive_utc
+from core.tracing import traced
+from models.models import AnalyticsRollup, AnalyticsRollupState, Loan, Transaction
+
+# Rollup metric for loan disbursements, which are read from the loans table
+LOAN_DISBURSEMENT_METRIC = "loan_disbursement"
+
+# (bucket_start, metric, status) -> (count, total)
+Aggregates = Dict[Tuple[datetime, str, str], Tuple[int, float]]
+
+def _hour_bucket(db: Session, column):
+    """
+    SQL expression truncating a timestamp to the start of its UTC hour
+    """
+    if db.get_bind().dialect.name == "postgresql":
+        return func.date_trunc("hour", func.timezone("UTC", column))
+    return func.strftime("%Y-%m-%d %H:00:00", column)
+
+def _to_datetime(value) -> datetime:
+    # SQLite returns the strftime bucket as a string
+    if isinstance(value, str):
+        return datetime.fromisoformat(value)
+    return naive_utc(value)
+
+def _value(value) -> str:
+    return getattr(value, "value", value)
+
+def _add(aggregates: Aggregates, key: Tuple[datetime, str, str], count: int, total: float) -> None:
+    current_count, current_total = aggregates.get(key, (0, 0.0))
+    aggregates[key] = (current_count + count, current_total + total)
+
+@traced
+class AnalyticsRepository:
+    def __init__(self):
+        self.archive_store = ArchiveStore()
+    
+    def get_high_water_mark(self, db: Session, name: str) -> Optional[datetime]:
+        """
+        Get the time up to which the named rollups are complete
+        """
+        state = db.query(AnalyticsRollupState).filter(AnalyticsRollupState.name == name).first()
+        return naive_utc(state.high_water_mark) if state else None
+    
+    def set_high_water_mark(self, db: Session, name: str, high_water_mark: datetime) -> None:
+        """
+        Record the time up to which the named rollups are complete (no commit)
+        """
+        state = db.query(AnalyticsRollupState).filter(AnalyticsRollupState.name == name).first()
+        if state is None:
+            state = AnalyticsRollupState(name=name)
+            db.add(state)
+        state.high_water_mark = high_water_mark
+    
+    def get_first_activity(self, db: Session) -> Optional[datetime]:
+        """
+        Get the earliest transaction or loan disbursement time, including
+        archived transactions
+        """
+        candidates = [
+            db.query(func.min(Transaction.created_at)).scalar(),
+            db.query(func.min(Loan.start_date)).scalar()
+        ]
+        candidates.extend(
+            datetime.fromisoformat(entry["min_created_at"])
+            for entry in self.archive_store.get_manifest(Transaction.__tablename__)
+            if entry["min_created_at"]
+        )
+        candidates = [naive_utc(candidate) for candidate in candidates if candidate is not None]
+        return min(candidates) if candidates else None
+    
+    def get_changed_activity_times(self, db: Session, since: datetime) -> List[datetime]:
+        """
+        Get the bucketing times (transaction created_at, loan start_date) of
+        transactions and disbursed loans created or updated since `since`
+        """
+        transaction_times = db.query(Transaction.created_at).filter(
+            or_(Transaction.created_at >= since, Transaction.updated_at >= since)
+        ).all()
+        loan_times = db.query(Loan.start_date).filter(
+            Loan.start_date.isnot(None),
+            or_(Loan.created_at >= since, Loan.updated_at >= since)
+        ).all()
+        return [naive_utc(row[0]) for row in transaction_times + loan_times if row[0] is not None]
+    
+    def aggregate_hours(self, db: Session, start: datetime, end: datetime) -> Aggregates:
+        """
+        Count and sum transactions (by type and status) and loan disbursements
+        (by loan status) per UTC hour in [start, end), including archived
+        transactions
+        """
+        aggregates: Aggregates = {}
+        
+        transaction_bucket = _hour_bucket(db, Transaction.created_at)
+        rows = db.query(
+            transaction_bucket, Transaction.type, Transaction.status,
+            func.count(Transaction.id), func.coalesce(func.sum(Transaction.amount), 0.0)
+        ).filter(
+            Transaction.created_at >= start,
+            Transaction.created_at < end
+        ).group_by(transaction_bucket, Transaction.type, Transaction.status).all()
+        for bucket, transaction_type, status, count, total in rows:
+            _add(aggregates, (_to_datetime(bucket), _value(transaction_type), _value(status)), count, total)
+        
+        loan_bucket = _hour_bucket(db, Loan.start_date)
+        rows = db.query(
+            loan_bucket, Loan.status, func.count(Loan.id), func.coalesce(func.sum(Loan.amount), 0.0)
+        ).filter(
+            Loan.start_date >= start,
+            Loan.start_date < end
+        ).group_by(loan_bucket, Loan.status).all()
+        for bucket, status, count, total in rows:
+            _add(aggregates, (_to_datetime(bucket), LOAN_DISBURSEMENT_METRIC, _value(status)), count, total)
+        
+        # Only opens archive files whose range overlaps [start, end)
+        for row in self.archive_store.scan(Transaction.__tablename__, start, end):
+            created_at = naive_utc(datetime.fromisoformat(row["created_at"]))
+            bucket = created_at.replace(minute=0, second=0, microsecond=0)
+            _add(aggregates, (bucket, row["type"], row["status"]), 1, row["amount"] or 0.0)
+        
+        return aggregates
+    
+    def aggregate_rollups(self, db: Session, granularity: str, start: datetime, end: datetime,
+                          bucket_length: timedelta) -> Aggregates:
+        """
+        Re-aggregate `granularity` rollups in [start, end) into buckets of
+        `bucket_length` aligned to `start`
+        """
+        aggregates: Aggregates = {}
+        for rollup in self.get_rollups(db, granularity, start, end):
+            offset = (naive_utc(rollup.bucket_start) - start) // bucket_length
+            _add(aggregates, (start + offset * bucket_length, rollup.metric, rollup.status), rollup.count, rollup.total)
+        return aggregates
+    
+    def replace_rollups(self, db: Session, granularity: str, start: datetime, end: datetime,
+                        aggregates: Aggregates) -> int:
+        """
+        Replace every `granularity` rollup in [start, end) with `aggregates` (no commit)
+        """
+        db.query(AnalyticsRollup).filter(
+            AnalyticsRollup.granularity == granularity,
+            AnalyticsRollup.bucket_start >= start,
+            AnalyticsRollup.bucket_start < end
+        ).delete(synchronize_session=False)
+        
+        db.bulk_insert_mappings(AnalyticsRollup, [
+            {
+                "granularity": granularity,
+                "bucket_start": bucket_start,
+                "metric": metric,
+                "status": status,
+                "count": count,
+                "total": total
+            }
+            for (bucket_start, metric, status), (count, total) in aggregates.items()
+        ])
+        return len(aggregates)
+    
+    def get_rollups(self, db: Session, granularity: str, start: datetime, end: datetime,
+                    metrics: Optional[List[str]] = None, statuses: Optional[List[str]] = None) -> List[AnalyticsRollup]:
+        """
+        Get `granularity` rollups with bucket_start in [start, end)
+        """
+        query = db.query(AnalyticsRollup).filter(
+            AnalyticsRollup.granularity == granularity,
+            AnalyticsRollup.bucket_start >= start,
+            AnalyticsRollup.bucket_start < end
+        )
+        
+        if metrics:
+            query = query.filter(AnalyticsRollup.metric.in_(metrics))
+        if statuses:
+            query = query.filter(AnalyticsRollup.status.in_(statuses))
+        
+        return query.order_by(AnalyticsRollup.bucket_start).all()
@@ -0,0 +1,88 @@
+from sqlalchemy.orm import Session
+from sqlalchemy import exists, func, select
+from typing import Dict, List, Tuple
+from uuid import UUID
+from datetime import datetime
+
+from models.models import (
+    Transaction, TransactionStatus, AuditLog, LedgerEntry, Order, WalletArchiveTotal, WalletBalanceSnapshot
+)
+from core.tracing import traced
+
+@traced
+class ArchiveRepository:
+    def get_archivable_transactions(self, db: Session, before: datetime, limit: int = 10000) -> List[Transaction]:
+        """
+        Get the oldest settled transactions created before `before`. Pending
+        transactions, those referenced by an order, and those with a wallet
+        posting not yet behind the wallet's latest balance snapshot stay in the
+        live table. The posting a snapshot ends at stays live, so the wallet's
+        sequence carries on and its balance is carried by the snapshot.
+        """
+        snapshot_sequence = select(func.max(WalletBalanceSnapshot.sequence)).where(
+            WalletBalanceSnapshot.wallet_id == LedgerEntry.wallet_id
+        ).scalar_subquery()
+        return db.query(Transaction).filter(
+            Transaction.created_at < before,
+            Transaction.status != TransactionStatus.PENDING,
+            ~exists().where(
+                LedgerEntry.transaction_id == Transaction.id,
+                LedgerEntry.wallet_id.isnot(None),
+                LedgerEntry.sequence >= func.coalesce(snapshot_sequence, 0)
+            ),
+            ~exists().where(Order.transaction_id == Transaction.id)
+        ).order_by(Transaction.created_at, Transaction.id).limit(limit).all()
+    
+    def get_ledger_entries(self, db: Session, transaction_ids: List[UUID]) -> List[LedgerEntry]:
+        """
+        Get the ledger postings of transactions being archived
+        """
+        return db.query(LedgerEntry).filter(
+            LedgerEntry.transaction_id.in_(transaction_ids)
+        ).order_by(LedgerEntry.created_at, LedgerEntry.id).all()
+    
+    def get_archivable_audit_logs(self, db: Session, before: datetime, limit: int = 10000) -> List[AuditLog]:
+        """
+        Get the oldest audit logs created before `before`
+        """
+        return db.query(AuditLog).filter(
+            AuditLog.created_at < before
+        ).order_by(AuditLog.created_at, AuditLog.id).limit(limit).all()
+    
+    def delete_ledger_entries(self, db: Session, transaction_ids: List[UUID]) -> int:
+        """
+        Delete the postings of archived transactions in the caller's database
+        transaction (no commit)
+        """
+        return db.query(LedgerEntry).filter(
+            LedgerEntry.transaction_id.in_(transaction_ids)
+        ).delete(synchronize_session=False)
+    
+    def delete_by_ids(self, db: Session, model, ids: List[UUID]) -> int:
+        """
+        Delete archived rows in the caller's database transaction (no commit)
+        """
+        return db.query(model).filter(model.id.in_(ids)).delete(synchronize_session=False)
+    
+    def add_wallet_totals(self, db: Session, totals: Dict[UUID, Tuple[float, int]]) -> None:
+        """
+        Add (net_amount, transaction_count) to each wallet's archived totals
+        in the caller's database transaction (no commit)
+        """
+        if not totals:
+            return
+        
+        existing = {
+            total.wallet_id: total
+            for total in db.query(WalletArchiveTotal).filter(
+                WalletArchiveTotal.wallet_id.in_(list(totals))
+            ).with_for_update()
+        }
+        for wallet_id, (net_amount, count) in totals.items():
+            total = existing.get(wallet_id)
+            if total is None:
+                db.add(WalletArchiveTotal(wallet_id=wallet_id, net_amount=net_amount, transaction_count=count))
+            else:
+                total.net_amount = (total.net_amount or 0.0) + net_amount
+                total.transaction_count = (total.transaction_count or 0) + count
+        db.flush()
@@ -1,13 +1,17 @@
 from sqlalchemy.orm import Session
-from typing import List, Optional, Dict, Any
+from sqlalchemy import tuple_
+from typing import List, Optional, Dict, Any, Set, Tuple
 from uuid import UUID
-from datetime import datetime
+from datetime import datetime, timedelta
 
+from core.archive import ArchiveStore, merge_pages, naive_utc
+from core.tracing import traced
 from models.models import AuditLog, User
 
+@traced
 class AuditRepository:
     def __init__(self):
-        pass
+        self.archive_store = ArchiveStore()
     
     def create(self, db: Session, user_id: Optional[UUID], action: str, entity_type: str, 
                entity_id: str, details: Optional[Dict[str, Any]] = None, 
@@ -29,6 +33,22 @@ class AuditRepository:
         db.refresh(audit_log)
         return audit_log
     
+    def create_many(self, db: Session, audit_logs: List[Dict[str, Any]]) -> None:
+        """
+        Bulk insert audit log entries in the caller's database transaction (no commit)
+        """
+        if not audit_logs:
+            return
+        db.bulk_insert_mappings(AuditLog, audit_logs)
+    
+    def get_existing_ids(self, db: Session, audit_log_ids: List[UUID]) -> Set[UUID]:
+        """
+        Get which of the given audit log IDs are already stored
+        """
+        if not audit_log_ids:
+            return set()
+        return {row[0] for row in db.query(AuditLog.id).filter(AuditLog.id.in_(audit_log_ids))}
+    
     def get_by_id(self, db: Session, audit_log_id: UUID) -> Optional[AuditLog]:
         """
         Get an audit log by ID
@@ -41,6 +61,58 @@ class AuditRepository:
         """
         return db.query(AuditLog).order_by(AuditLog.created_at.desc()).offset(skip).limit(limit).all()
     
+    def search(self, db: Session, user_id: Optional[UUID] = None, action: Optional[str] = None,
+               entity_type: Optional[str] = None, entity_id: Optional[str] = None,
+               start_date: Optional[datetime] = None, end_date: Optional[datetime] = None,
+               text: Optional[str] = None, before: Optional[Tuple[datetime, UUID]] = None,
+               limit: int = 100) -> List[AuditLog]:
+        """
+        Get audit logs matching all given filters, newest first.
+        
+        Pages by keyset: pass the (created_at, id) of the last row of the
+        previous page as `before`. Each filter combination is served by one of
+        the composite (..., created_at) indexes; `text` matches a substring of
+        `details`, backed by a trigram index on PostgreSQL. Archived logs are
+        merged in whenever the page reaches back into cold storage.
+        """
+        query = db.query(AuditLog)
+        
+        if user_id:
+            query = query.filter(AuditLog.user_id == user_id)
+        if action:
+            query = query.filter(AuditLog.action == action)
+        if entity_type:
+            query = query.filter(AuditLog.entity_type == entity_type)
+        if entity_id:
+            query = query.filter(AuditLog.entity_id == entity_id)
+        if start_date:
+            query = query.filter(AuditLog.created_at >= start_date)
+        if end_date:
+            query = query.filter(AuditLog.created_at < end_date)
+        if text:
+            pattern = text.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+            query = query.filter(AuditLog.details.ilike(f"%{pattern}%", escape="\\"))
+        if before:
+            query = query.filter(tuple_(AuditLog.created_at, AuditLog.id) < tuple_(*before))
+        
+        live = query.order_by(AuditLog.created_at.desc(), AuditLog.id.desc()).limit(limit).all()
+        if not self.archive_store.completes_page(AuditLog.__tablename__, live, limit, start_date):
+            return live
+        
+        def matches(row: Dict[str, Any]) -> bool:
+            if text and text.lower() not in (row.get("details") or "").lower():
+                return False
+            if before:
+                created_at = naive_utc(datetime.fromisoformat(row["created_at"]))
+                return (created_at, UUID(row["id"])) < (naive_utc(before[0]), before[1])
+            return True
+        
+        archived = self.archive_store.iter_rows(
+            AuditLog, start_date, end_date, where=matches,
+            user_id=user_id, action=action, entity_type=entity_type, entity_id=entity_id
+        )
+        return merge_pages(live, archived, 0, limit)
+    
     def get_by_user_id(self, db: Session, user_id: UUID, skip: int = 0, limit: int = 100) -> List[AuditLog]:
         """
         Get audit logs for a specific user
@@ -64,9 +136,17 @@ class AuditRepository:
     
     def get_by_date_range(self, db: Session, start_date: datetime, end_date: datetime, skip: int = 0, limit: int = 100) -> List[AuditLog]:
         """
-        Get audit logs within a date range
+        Get audit logs within a date range, reading cold storage for any part
+        of the range that has been archived
         """
-        return db.query(AuditLog).filter(
+        query = db.query(AuditLog).filter(
             AuditLog.created_at >= start_date,
             AuditLog.created_at <= end_date
-        ).order_by(AuditLog.created_at.desc()).offset(skip).limit(limit).all()
\ No newline at end of file
+        ).order_by(AuditLog.created_at.desc())
+        
+        live = query.limit(skip + limit).all()
+        if not self.archive_store.completes_page(AuditLog.__tablename__, live, skip + limit, start_date):
+            return live[skip:]
+        
+        archived = self.archive_store.iter_rows(AuditLog, start_date, end_date + timedelta(microseconds=1))
+        return merge_pages(live, archived, skip, limit)
\ No newline at end of file
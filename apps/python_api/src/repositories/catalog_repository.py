@@ -0,0 +1,36 @@
+from sqlalchemy.orm import Session
+from typing import List
+
+from models.models import CacheVersion, InvestmentPlan, LoanProduct
+from core.tracing import traced
+
+@traced
+class CatalogRepository:
+    def get_version(self, db: Session, name: str) -> int:
+        """
+        Get the current version of a named cache (0 before its first write)
+        """
+        version = db.query(CacheVersion.version).filter(CacheVersion.name == name).scalar()
+        return version or 0
+    
+    def bump_version(self, db: Session, name: str) -> None:
+        """
+        Increment the version of a named cache (no commit)
+        """
+        updated = db.query(CacheVersion).filter(CacheVersion.name == name).update(
+            {CacheVersion.version: CacheVersion.version + 1}, synchronize_session=False
+        )
+        if not updated:
+            db.add(CacheVersion(name=name, version=1))
+    
+    def get_plans(self, db: Session) -> List[InvestmentPlan]:
+        """
+        Get every investment plan, active or not, oldest first
+        """
+        return db.query(InvestmentPlan).order_by(InvestmentPlan.created_at, InvestmentPlan.id).all()
+    
+    def get_products(self, db: Session) -> List[LoanProduct]:
+        """
+        Get every loan product, active or not, oldest first
+        """
+        return db.query(LoanProduct).order_by(LoanProduct.created_at, LoanProduct.id).all()
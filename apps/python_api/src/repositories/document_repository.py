@@ -3,7 +3,9 @@ from typing import List, Optional
 from uuid import UUID
 
 from models.models import Document, DocumentStatus
+from core.tracing import traced
 
+@traced
 class DocumentRepository:
     def get_by_id(self, db: Session, document_id: UUID) -> Optional[Document]:
         """
@@ -0,0 +1,86 @@
+from sqlalchemy.orm import Session
+from typing import Optional
+from uuid import UUID
+from datetime import datetime
+
+from models.models import IdempotencyKey
+from core.tracing import traced
+
+@traced
+class IdempotencyRepository:
+    def get(self, db: Session, user_id: UUID, key: str) -> Optional[IdempotencyKey]:
+        """
+        Get a user's idempotency key record
+        """
+        return db.query(IdempotencyKey).filter(
+            IdempotencyKey.user_id == user_id,
+            IdempotencyKey.key == key
+        ).first()
+    
+    def get_for_update(self, db: Session, record_id: UUID, skip_locked: bool = False) -> Optional[IdempotencyKey]:
+        """
+        Get a key record, locking it until the caller commits. With skip_locked
+        a record locked by another transaction is returned as None.
+        """
+        return db.query(IdempotencyKey).filter(
+            IdempotencyKey.id == record_id
+        ).with_for_update(skip_locked=skip_locked).populate_existing().first()
+    
+    def create(self, db: Session, user_id: UUID, key: str, request_hash: str,
+               locked_until: datetime, expires_at: datetime) -> IdempotencyKey:
+        """
+        Claim an idempotency key. Raises IntegrityError if the key already exists.
+        """
+        db_record = IdempotencyKey(
+            user_id=user_id,
+            key=key,
+            request_hash=request_hash,
+            status="in_progress",
+            locked_until=locked_until,
+            expires_at=expires_at
+        )
+        db.add(db_record)
+        db.commit()
+        db.refresh(db_record)
+        return db_record
+    
+    def mark_committed(self, db: Session, record: IdempotencyKey) -> None:
+        """
+        Mark a key's request as executed, without committing: called while the
+        request's own writes are being committed, so both commit together
+        """
+        record.status = "committed"
+        db.add(record)
+    
+    def complete(self, db: Session, record: IdempotencyKey, status_code: int, body: str) -> IdempotencyKey:
+        """
+        Store the response for a key
+        """
+        record.status = "completed"
+        record.response_status_code = status_code
+        record.response_body = body
+        db.add(record)
+        db.commit()
+        db.refresh(record)
+        return record
+    
+    def delete(self, db: Session, record: IdempotencyKey) -> None:
+        """
+        Release a key
+        """
+        db.delete(record)
+        db.commit()
+    
+    def delete_expired(self, db: Session, now: datetime, batch_size: int = 1000) -> int:
+        """
+        Delete up to `batch_size` expired keys
+        """
+        expired_ids = db.query(IdempotencyKey.id).filter(
+            IdempotencyKey.expires_at < now
+        ).limit(batch_size).subquery()
+        
+        deleted = db.query(IdempotencyKey).filter(
+            IdempotencyKey.id.in_(db.query(expired_ids.c.id))
+        ).delete(synchronize_session=False)
+        db.commit()
+        return deleted
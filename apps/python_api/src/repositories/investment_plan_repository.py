@@ -3,7 +3,9 @@ from typing import List, Optional
 from uuid import UUID
 
 from models.models import InvestmentPlan
+from core.tracing import traced
 
+@traced
 class InvestmentPlanRepository:
     def get_by_id(self, db: Session, plan_id: UUID) -> Optional[InvestmentPlan]:
         """
@@ -1,10 +1,13 @@
-from sqlalchemy.orm import Session
-from typing import List, Optional
+from sqlalchemy.orm import Session, joinedload, load_only
+from sqlalchemy import String, case, cast, func, literal, union_all
+from typing import Any, List, Optional, Tuple
 from uuid import UUID
 from datetime import datetime
 
-from models.models import Investment, InvestmentStatus
+from models.models import Investment, InvestmentPlan, InvestmentStatus, Loan
+from core.tracing import traced
 
+@traced
 class InvestmentRepository:
     def get_by_id(self, db: Session, investment_id: UUID) -> Optional[Investment]:
         """
@@ -13,23 +16,94 @@ class InvestmentRepository:
         return db.query(Investment).filter(Investment.id == investment_id).first()
     
     def get_by_user_id(self, db: Session, user_id: UUID, skip: int = 0, limit: int = 100,
-                      status: Optional[InvestmentStatus] = None) -> List[Investment]:
+                      status: Optional[InvestmentStatus] = None, columns: Optional[List[Any]] = None,
+                      with_plan: bool = True) -> List[Investment]:
         """
-        Get investments by user ID
+        Get investments by user ID, with their plans loaded in the same query
+        (unless `with_plan` is False). With `columns`, only those columns are loaded.
         """
-        query = db.query(Investment).filter(Investment.user_id == user_id)
+        query = db.query(Investment)
+        if with_plan:
+            query = query.options(joinedload(Investment.plan))
+        if columns:
+            query = query.options(load_only(*columns))
+        query = query.filter(Investment.user_id == user_id)
         
         if status:
             query = query.filter(Investment.status == status)
         
         return query.order_by(Investment.created_at.desc()).offset(skip).limit(limit).all()
     
+    def get_active_with_plans(self, db: Session, user_id: UUID) -> List[Tuple[Investment, InvestmentPlan]]:
+        """
+        Get a user's active investments together with their plans
+        """
+        return db.query(Investment, InvestmentPlan).join(
+            InvestmentPlan, InvestmentPlan.id == Investment.plan_id
+        ).filter(
+            Investment.user_id == user_id,
+            Investment.status == InvestmentStatus.ACTIVE
+        ).order_by(Investment.created_at, Investment.id).all()
+    
+    def get_active_by_user_id(self, db: Session, user_id: UUID) -> List[Investment]:
+        """
+        Get a user's active investments with their plans loaded in the same query
+        """
+        return db.query(Investment).options(joinedload(Investment.plan)).filter(
+            Investment.user_id == user_id,
+            Investment.status == InvestmentStatus.ACTIVE
+        ).order_by(Investment.created_at.desc()).all()
+    
+    def get_portfolio_version(self, db: Session, user_id: UUID) -> Tuple:
+        """
+        Get a cheap fingerprint of a user's investments and their plans that
+        changes whenever one of them is created or updated
+        """
+        return tuple(db.query(
+            func.count(Investment.id),
+            # Timestamps can tie within a second, so value and status changes are fingerprinted too
+            func.sum(Investment.current_value),
+            func.sum(case((Investment.status == InvestmentStatus.ACTIVE, 1), else_=0)),
+            func.max(Investment.created_at),
+            func.max(Investment.updated_at),
+            func.max(InvestmentPlan.updated_at)
+        ).outerjoin(
+            InvestmentPlan, InvestmentPlan.id == Investment.plan_id
+        ).filter(Investment.user_id == user_id).one())
+    
+    def get_portfolio_totals(self, db: Session, user_id: UUID) -> List[Tuple]:
+        """
+        Get a user's investment and loan totals per status in one grouped
+        query: (kind, status name, count, amount, current value or remaining
+        balance, expected return or total payment) rows, kind being
+        "investment" or "loan"
+        """
+        investments = db.query(
+            literal("investment", String).label("kind"),
+            cast(Investment.status, String).label("status"),
+            func.count(Investment.id),
+            func.coalesce(func.sum(Investment.amount), 0.0),
+            func.coalesce(func.sum(Investment.current_value), 0.0),
+            func.coalesce(func.sum(Investment.expected_return), 0.0)
+        ).filter(Investment.user_id == user_id).group_by(Investment.status)
+        
+        loans = db.query(
+            literal("loan", String).label("kind"),
+            cast(Loan.status, String).label("status"),
+            func.count(Loan.id),
+            func.coalesce(func.sum(Loan.amount), 0.0),
+            func.coalesce(func.sum(Loan.remaining_balance), 0.0),
+            func.coalesce(func.sum(Loan.total_payment), 0.0)
+        ).filter(Loan.user_id == user_id).group_by(Loan.status)
+        
+        return db.execute(union_all(investments.statement, loans.statement)).all()
+    
     def get_all(self, db: Session, skip: int = 0, limit: int = 100,
                status: Optional[InvestmentStatus] = None) -> List[Investment]:
         """
-        Get all investments
+        Get all investments, with their plans loaded in the same query
         """
-        query = db.query(Investment)
+        query = db.query(Investment).options(joinedload(Investment.plan))
         
         if status:
             query = query.filter(Investment.status == status)
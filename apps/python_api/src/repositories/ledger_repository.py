@@ -0,0 +1,170 @@
+from sqlalchemy.orm import Session
+from sqlalchemy import and_, exists, func
+from typing import Dict, List, Optional
+from uuid import UUID
+from datetime import datetime, timedelta
+
+from models.models import LedgerEntry, WalletBalanceSnapshot
+from core.archive import ArchiveStore, merge_pages, naive_utc
+from core.tracing import traced
+
+@traced
+class LedgerRepository:
+    def __init__(self):
+        self.archive_store = ArchiveStore()
+    
+    def get_last_entry(self, db: Session, wallet_id: UUID) -> Optional[LedgerEntry]:
+        """
+        Get the most recent posting on a wallet
+        """
+        return db.query(LedgerEntry).filter(
+            LedgerEntry.wallet_id == wallet_id
+        ).order_by(LedgerEntry.sequence.desc()).first()
+    
+    def get_last_sequences(self, db: Session, wallet_ids: List[UUID]) -> Dict[UUID, int]:
+        """
+        Get the latest posting sequence of each given wallet in one grouped query
+        """
+        rows = db.query(LedgerEntry.wallet_id, func.max(LedgerEntry.sequence)).filter(
+            LedgerEntry.wallet_id.in_(wallet_ids)
+        ).group_by(LedgerEntry.wallet_id).all()
+        return {wallet_id: sequence for wallet_id, sequence in rows}
+    
+    def add_entries(self, db: Session, entries: List[LedgerEntry]) -> None:
+        """
+        Stage postings in the caller's database transaction (no commit)
+        """
+        db.add_all(entries)
+        db.flush()
+    
+    def get_last_entry_before(self, db: Session, wallet_id: UUID, as_of: datetime,
+                              after_sequence: Optional[int] = None,
+                              since: Optional[datetime] = None) -> Optional[LedgerEntry]:
+        """
+        Get the last posting on a wallet at or before `as_of`, optionally only
+        considering postings after `after_sequence` (posted from `since` on),
+        whether live or archived
+        """
+        query = db.query(LedgerEntry).filter(
+            LedgerEntry.wallet_id == wallet_id,
+            LedgerEntry.created_at <= as_of
+        )
+        
+        if after_sequence is not None:
+            query = query.filter(LedgerEntry.sequence > after_sequence)
+        
+        entry = query.order_by(LedgerEntry.sequence.desc()).first()
+        
+        # Only a later archived posting can beat the live one
+        start = entry.created_at if entry else since
+        if not self._may_have_archived(db, wallet_id, start):
+            return entry
+        
+        archived = next(self.archive_store.iter_rows(
+            LedgerEntry, start, as_of + timedelta(microseconds=1), wallet_id=wallet_id
+        ), None)
+        if archived is None or (after_sequence is not None and archived.sequence <= after_sequence):
+            return entry
+        return archived if entry is None or archived.sequence > entry.sequence else entry
+    
+    def get_first_entry_after(self, db: Session, wallet_id: UUID, as_of: datetime) -> Optional[LedgerEntry]:
+        """
+        Get the first posting on a wallet after `as_of`, whether live or archived
+        """
+        entry = db.query(LedgerEntry).filter(
+            LedgerEntry.wallet_id == wallet_id,
+            LedgerEntry.created_at > as_of
+        ).order_by(LedgerEntry.sequence).first()
+        
+        start = as_of + timedelta(microseconds=1)
+        if not self._may_have_archived(db, wallet_id, start):
+            return entry
+        
+        # Only an earlier archived posting can beat the live one
+        archived = next(self.archive_store.iter_rows(
+            LedgerEntry, start, entry.created_at if entry else None, newest_first=False, wallet_id=wallet_id
+        ), None)
+        return archived or entry
+    
+    def get_entries(self, db: Session, wallet_id: UUID, start_date: datetime, end_date: datetime,
+                    skip: int = 0, limit: int = 100) -> List[LedgerEntry]:
+        """
+        Get wallet postings in [start_date, end_date), oldest first, merging
+        in archived postings when the range reaches back into cold storage
+        """
+        query = db.query(LedgerEntry).filter(
+            LedgerEntry.wallet_id == wallet_id,
+            LedgerEntry.created_at >= start_date,
+            LedgerEntry.created_at < end_date
+        ).order_by(LedgerEntry.sequence)
+        
+        if not self._may_have_archived(db, wallet_id, start_date):
+            return query.offset(skip).limit(limit).all()
+        
+        archived = self.archive_store.iter_rows(
+            LedgerEntry, start_date, end_date, newest_first=False, wallet_id=wallet_id
+        )
+        return merge_pages(query.limit(skip + limit).all(), archived, skip, limit, newest_first=False)
+    
+    def _may_have_archived(self, db: Session, wallet_id: UUID, start: Optional[datetime]) -> bool:
+        """
+        Whether postings of a wallet from `start` on may be in cold storage.
+        Only postings behind a snapshot are archived, so a wallet that was
+        never snapshotted has none.
+        """
+        if not self.archive_store.reaches(LedgerEntry.__tablename__, naive_utc(start)):
+            return False
+        return db.query(exists().where(WalletBalanceSnapshot.wallet_id == wallet_id)).scalar()
+    
+    def get_snapshot_before(self, db: Session, wallet_id: UUID, as_of: datetime) -> Optional[WalletBalanceSnapshot]:
+        """
+        Get the latest snapshot of a wallet taken at or before `as_of`
+        """
+        return db.query(WalletBalanceSnapshot).filter(
+            WalletBalanceSnapshot.wallet_id == wallet_id,
+            WalletBalanceSnapshot.as_of <= as_of
+        ).order_by(WalletBalanceSnapshot.as_of.desc()).first()
+    
+    def get_latest_snapshot_time(self, db: Session) -> Optional[datetime]:
+        """
+        Get the newest `as_of` across all snapshots
+        """
+        return db.query(func.max(WalletBalanceSnapshot.as_of)).scalar()
+    
+    def iter_latest_entries_since(self, db: Session, since: Optional[datetime], batch_size: int = 1000):
+        """
+        Stream the latest wallet posting per wallet among postings after `since`,
+        skipping postings that already have a snapshot
+        """
+        latest = db.query(
+            LedgerEntry.wallet_id.label("wallet_id"),
+            func.max(LedgerEntry.sequence).label("sequence")
+        ).filter(LedgerEntry.wallet_id.isnot(None))
+        
+        if since is not None:
+            latest = latest.filter(LedgerEntry.created_at > since)
+        
+        latest = latest.group_by(LedgerEntry.wallet_id).subquery()
+        
+        return db.query(
+            LedgerEntry.wallet_id,
+            LedgerEntry.sequence,
+            LedgerEntry.balance_after,
+            LedgerEntry.created_at
+        ).join(
+            latest,
+            and_(LedgerEntry.wallet_id == latest.c.wallet_id, LedgerEntry.sequence == latest.c.sequence)
+        ).filter(
+            ~exists().where(
+                WalletBalanceSnapshot.wallet_id == LedgerEntry.wallet_id,
+                WalletBalanceSnapshot.sequence == LedgerEntry.sequence
+            )
+        ).yield_per(batch_size)
+    
+    def add_snapshots(self, db: Session, snapshots: List[Dict]) -> None:
+        """
+        Bulk insert balance snapshots in the caller's database transaction (no commit)
+        """
+        if not snapshots:
+            return
+        db.bulk_insert_mappings(WalletBalanceSnapshot, snapshots)
@@ -3,7 +3,9 @@ from typing import List, Optional, Dict, Any
 from uuid import UUID
 
 from models.models import LoanProduct
+from core.tracing import traced
 
+@traced
 class LoanProductRepository:
     def get_by_id(self, db: Session, product_id: UUID) -> Optional[LoanProduct]:
         """
@@ -24,8 +26,8 @@ class LoanProductRepository:
         return db.query(LoanProduct).filter(LoanProduct.is_active == True).offset(skip).limit(limit).all()
     
     def create(self, db: Session, name: str, description: str, min_amount: float,
-              max_amount: float, interest_rate: float, min_term_months: int,
-              max_term_months: int, is_active: bool = True) -> LoanProduct:
+              max_amount: float, interest_rate: float, term_months: int,
+              is_active: bool = True) -> LoanProduct:
         """
         Create a new loan product
         """
@@ -35,8 +37,7 @@ class LoanProductRepository:
             min_amount=min_amount,
             max_amount=max_amount,
             interest_rate=interest_rate,
-            min_term_months=min_term_months,
-            max_term_months=max_term_months,
+            term_months=term_months,
             is_active=is_active
         )
         db.add(db_product)
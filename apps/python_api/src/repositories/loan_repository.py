@@ -1,10 +1,12 @@
-from sqlalchemy.orm import Session
+from sqlalchemy.orm import Session, joinedload, load_only
 from typing import List, Optional, Dict, Any
 from uuid import UUID
 from datetime import datetime, timedelta
 
 from models.models import Loan, LoanStatus
+from core.tracing import traced
 
+@traced
 class LoanRepository:
     def get_by_id(self, db: Session, loan_id: UUID) -> Optional[Loan]:
         """
@@ -13,23 +15,40 @@ class LoanRepository:
         return db.query(Loan).filter(Loan.id == loan_id).first()
     
     def get_by_user_id(self, db: Session, user_id: UUID, skip: int = 0, limit: int = 100,
-                      status: Optional[LoanStatus] = None) -> List[Loan]:
+                      status: Optional[LoanStatus] = None, columns: Optional[List[Any]] = None,
+                      with_product: bool = True) -> List[Loan]:
         """
-        Get loans by user ID
+        Get loans by user ID, with their products loaded in the same query
+        (unless `with_product` is False). With `columns`, only those columns are loaded.
         """
-        query = db.query(Loan).filter(Loan.user_id == user_id)
+        query = db.query(Loan)
+        if with_product:
+            query = query.options(joinedload(Loan.product))
+        if columns:
+            query = query.options(load_only(*columns))
+        query = query.filter(Loan.user_id == user_id)
         
         if status:
             query = query.filter(Loan.status == status)
         
         return query.order_by(Loan.created_at.desc()).offset(skip).limit(limit).all()
     
+    def get_by_user_id_with_products(self, db: Session, user_id: UUID, statuses: List[LoanStatus]) -> List[Loan]:
+        """
+        Get a user's loans in the given statuses with their products loaded
+        in the same query
+        """
+        return db.query(Loan).options(joinedload(Loan.product)).filter(
+            Loan.user_id == user_id,
+            Loan.status.in_(statuses)
+        ).order_by(Loan.created_at.desc()).all()
+    
     def get_all(self, db: Session, skip: int = 0, limit: int = 100,
                status: Optional[LoanStatus] = None) -> List[Loan]:
         """
-        Get all loans
+        Get all loans, with their products loaded in the same query
         """
-        query = db.query(Loan)
+        query = db.query(Loan).options(joinedload(Loan.product))
         
         if status:
             query = query.filter(Loan.status == status)
@@ -1,9 +1,12 @@
 from sqlalchemy.orm import Session
-from typing import List, Optional
+from typing import Any, List, Optional
 from uuid import UUID
+from datetime import datetime
 
 from models.models import Notification
+from core.tracing import traced
 
+@traced
 class NotificationRepository:
     def get_by_id(self, db: Session, notification_id: UUID) -> Optional[Notification]:
         """
@@ -11,13 +14,30 @@ class NotificationRepository:
         """
         return db.query(Notification).filter(Notification.id == notification_id).first()
     
-    def get_by_user_id(self, db: Session, user_id: UUID, skip: int = 0, limit: int = 100) -> List[Notification]:
+    def get_all(self, db: Session, skip: int = 0, limit: int = 100,
+                columns: Optional[List[Any]] = None) -> List[Any]:
         """
-        Get all notifications for a user with pagination
+        Get all notifications with pagination, newest first. With `columns`,
+        only those columns are selected and rows are returned instead of ORM objects.
         """
-        return db.query(Notification).filter(Notification.user_id == user_id)\
-            .order_by(Notification.created_at.desc())\
-            .offset(skip).limit(limit).all()
+        query = db.query(*columns) if columns else db.query(Notification)
+        return query.order_by(Notification.created_at.desc()).offset(skip).limit(limit).all()
+    
+    def get_by_user_id(self, db: Session, user_id: UUID, skip: int = 0, limit: int = 100,
+                       since: Optional[datetime] = None, columns: Optional[List[Any]] = None) -> List[Any]:
+        """
+        Get all notifications for a user with pagination, optionally only those
+        created since `since` (which lets PostgreSQL skip older monthly partitions).
+        With `columns`, only those columns are selected and rows are returned
+        instead of ORM objects.
+        """
+        query = db.query(*columns) if columns else db.query(Notification)
+        query = query.filter(Notification.user_id == user_id)
+        
+        if since:
+            query = query.filter(Notification.created_at >= since)
+        
+        return query.order_by(Notification.created_at.desc()).offset(skip).limit(limit).all()
     
     def get_unread_count(self, db: Session, user_id: UUID) -> int:
         """
@@ -4,7 +4,9 @@ from uuid import UUID
 from datetime import datetime
 
 from models.models import Order
+from core.tracing import traced
 
+@traced
 class OrderRepository:
     def get_by_id(self, db: Session, order_id: UUID) -> Optional[Order]:
         """
@@ -12,6 +14,12 @@ class OrderRepository:
         """
         return db.query(Order).filter(Order.id == order_id).first()
     
+    def get_for_update(self, db: Session, order_id: UUID) -> Optional[Order]:
+        """
+        Get an order by ID, locking the row until the caller commits
+        """
+        return db.query(Order).filter(Order.id == order_id).with_for_update().populate_existing().first()
+    
     def get_by_external_id(self, db: Session, external_id: str) -> Optional[Order]:
         """
         Get an order by external ID
@@ -0,0 +1,163 @@
+from sqlalchemy.orm import Session
+from sqlalchemy import case, func, or_, union
+from typing import Dict, List, Optional, Tuple
+from uuid import UUID
+from datetime import datetime
+
+from models.models import (
+    Wallet, Transaction, TransactionStatus, ReconciliationRun, ReconciliationMismatch, WalletArchiveTotal,
+    CREDIT_TRANSACTION_TYPES, DEBIT_TRANSACTION_TYPES
+)
+from core.tracing import traced
+
+@traced
+class ReconciliationRepository:
+    def get_last_completed_run(self, db: Session, shard_index: int = 0, shard_count: int = 1) -> Optional[ReconciliationRun]:
+        """
+        Get the most recent completed run for a shard
+        """
+        return db.query(ReconciliationRun).filter(
+            ReconciliationRun.status == "completed",
+            ReconciliationRun.shard_index == shard_index,
+            ReconciliationRun.shard_count == shard_count
+        ).order_by(ReconciliationRun.high_water_mark.desc()).first()
+    
+    def create_run(self, db: Session, mode: str, high_water_mark: datetime,
+                   shard_index: int = 0, shard_count: int = 1) -> ReconciliationRun:
+        """
+        Create a reconciliation run
+        """
+        db_run = ReconciliationRun(
+            mode=mode,
+            status="running",
+            shard_index=shard_index,
+            shard_count=shard_count,
+            high_water_mark=high_water_mark
+        )
+        db.add(db_run)
+        db.commit()
+        db.refresh(db_run)
+        return db_run
+    
+    def finish_run(self, db: Session, run: ReconciliationRun, status: str, wallets_checked: int,
+                   mismatches_found: int, error: Optional[str] = None) -> ReconciliationRun:
+        """
+        Record the outcome of a reconciliation run
+        """
+        run.status = status
+        run.wallets_checked = wallets_checked
+        run.mismatches_found = mismatches_found
+        run.error = error
+        run.finished_at = datetime.utcnow()
+        db.commit()
+        db.refresh(run)
+        return run
+    
+    def add_mismatches(self, db: Session, run_id: UUID, mismatches: List[Dict]) -> None:
+        """
+        Bulk insert mismatches found by a run
+        """
+        if not mismatches:
+            return
+        db.bulk_insert_mappings(ReconciliationMismatch, [
+            dict(mismatch, run_id=run_id) for mismatch in mismatches
+        ])
+        db.commit()
+    
+    def get_runs(self, db: Session, skip: int = 0, limit: int = 100) -> List[ReconciliationRun]:
+        """
+        Get reconciliation runs, newest first
+        """
+        return db.query(ReconciliationRun).order_by(
+            ReconciliationRun.started_at.desc()
+        ).offset(skip).limit(limit).all()
+    
+    def get_run(self, db: Session, run_id: UUID) -> Optional[ReconciliationRun]:
+        """
+        Get a reconciliation run by ID
+        """
+        return db.query(ReconciliationRun).filter(ReconciliationRun.id == run_id).first()
+    
+    def get_mismatches(self, db: Session, run_id: UUID, skip: int = 0, limit: int = 100) -> List[ReconciliationMismatch]:
+        """
+        Get mismatches for a run, largest discrepancy first
+        """
+        return db.query(ReconciliationMismatch).filter(
+            ReconciliationMismatch.run_id == run_id
+        ).order_by(func.abs(ReconciliationMismatch.difference).desc()).offset(skip).limit(limit).all()
+    
+    def get_mismatched_wallet_ids(self, db: Session, run_id: UUID) -> List[UUID]:
+        """
+        Get IDs of the wallets a run found out of balance
+        """
+        return [row[0] for row in db.query(ReconciliationMismatch.wallet_id).filter(
+            ReconciliationMismatch.run_id == run_id
+        )]
+    
+    def get_wallet_id_page(self, db: Session, after_id: Optional[UUID], limit: int,
+                           lower: Optional[UUID] = None, upper: Optional[UUID] = None) -> List[UUID]:
+        """
+        Keyset-paginate wallet IDs in [lower, upper) by primary key
+        """
+        query = db.query(Wallet.id)
+        
+        if lower is not None:
+            query = query.filter(Wallet.id >= lower)
+        if upper is not None:
+            query = query.filter(Wallet.id < upper)
+        if after_id is not None:
+            query = query.filter(Wallet.id > after_id)
+        
+        return [row[0] for row in query.order_by(Wallet.id).limit(limit)]
+    
+    def get_wallet_ids_changed_since(self, db: Session, since: datetime,
+                                     lower: Optional[UUID] = None, upper: Optional[UUID] = None) -> List[UUID]:
+        """
+        Get IDs of wallets with a transaction or balance change after `since`
+        """
+        transaction_query = db.query(Transaction.wallet_id.label("wallet_id")).filter(
+            Transaction.wallet_id.isnot(None),
+            or_(Transaction.created_at >= since, Transaction.updated_at >= since)
+        )
+        wallet_query = db.query(Wallet.id.label("wallet_id")).filter(
+            or_(Wallet.created_at >= since, Wallet.updated_at >= since)
+        )
+        
+        if lower is not None:
+            transaction_query = transaction_query.filter(Transaction.wallet_id >= lower)
+            wallet_query = wallet_query.filter(Wallet.id >= lower)
+        if upper is not None:
+            transaction_query = transaction_query.filter(Transaction.wallet_id < upper)
+            wallet_query = wallet_query.filter(Wallet.id < upper)
+        
+        changed = union(transaction_query.statement, wallet_query.statement).subquery()
+        return sorted(row[0] for row in db.query(changed.c.wallet_id))
+    
+    def get_balances(self, db: Session, wallet_ids: List[UUID]) -> List[Tuple[UUID, float, float]]:
+        """
+        Get (wallet_id, stored_balance, expected_balance) for the given wallets
+        in one grouped aggregate. Both balances come from the same statement so
+        they are read from a single snapshot.
+        """
+        signed_amount = case(
+            (Transaction.type.in_(CREDIT_TRANSACTION_TYPES), func.abs(Transaction.amount)),
+            (Transaction.type.in_(DEBIT_TRANSACTION_TYPES), -func.abs(Transaction.amount)),
+            else_=0.0
+        )
+        
+        # Completed transactions moved to cold storage are carried as a per-wallet total
+        archived_net = func.coalesce(WalletArchiveTotal.net_amount, 0.0)
+        
+        return db.query(
+            Wallet.id,
+            Wallet.balance,
+            func.coalesce(func.sum(signed_amount), 0.0) + archived_net
+        ).outerjoin(
+            Transaction,
+            (Transaction.wallet_id == Wallet.id) & (Transaction.status == TransactionStatus.COMPLETED)
+        ).outerjoin(
+            WalletArchiveTotal,
+            WalletArchiveTotal.wallet_id == Wallet.id
+        ).filter(
+            Wallet.id.in_(wallet_ids)
+        ).group_by(Wallet.id, Wallet.balance, WalletArchiveTotal.net_amount).all()
@@ -0,0 +1,91 @@
+from sqlalchemy.orm import Session
+from sqlalchemy import and_, func, or_
+from typing import Any, List, Optional, Tuple
+from uuid import UUID
+from datetime import datetime
+
+from models.models import SyncTombstone
+from core.tracing import traced
+
+# (change time, id) of the last row a sync page returned
+Cursor = Tuple[datetime, UUID]
+
+def _comparable(db: Session, expression):
+    """
+    SQLite keeps timestamps as text, with or without fractional seconds
+    depending on who wrote them; compare them as Julian days there
+    """
+    if db.get_bind().dialect.name == "sqlite":
+        return func.julianday(expression)
+    return expression
+
+def _after(db: Session, change_time, id_column, cursor: Cursor):
+    """
+    Rows ordered after `cursor` by (change time, id)
+    """
+    cursor_time = _comparable(db, cursor[0])
+    change_time = _comparable(db, change_time)
+    return or_(change_time > cursor_time, and_(change_time == cursor_time, id_column > cursor[1]))
+
+@traced
+class SyncRepository:
+    def get_changed(self, db: Session, model: Any, user_id: UUID, since: Optional[datetime], until: datetime,
+                    cursor: Optional[Cursor] = None, limit: int = 500, options: Optional[List[Any]] = None) -> List[Any]:
+        """
+        Get a user's rows of `model` created or updated in [since, until)
+        (every row when `since` is None), ordered by change time and id and
+        starting after `cursor`
+        """
+        change_time = func.coalesce(model.updated_at, model.created_at)
+        query = db.query(model).filter(model.user_id == user_id)
+        
+        if options:
+            query = query.options(*options)
+        if since:
+            # Each side is served by its (user_id, ...) index
+            query = query.filter(or_(model.created_at >= since, model.updated_at >= since))
+        query = query.filter(_comparable(db, change_time) < _comparable(db, until))
+        if cursor:
+            query = query.filter(_after(db, change_time, model.id, cursor))
+        
+        return query.order_by(change_time, model.id).limit(limit).all()
+    
+    def get_tombstones(self, db: Session, user_id: UUID, since: datetime, until: datetime,
+                       cursor: Optional[Cursor] = None, limit: int = 500) -> List[SyncTombstone]:
+        """
+        Get a user's tombstones recorded in [since, until), ordered by
+        deletion time and id and starting after `cursor`
+        """
+        query = db.query(SyncTombstone).filter(
+            SyncTombstone.user_id == user_id,
+            SyncTombstone.deleted_at >= since,
+            _comparable(db, SyncTombstone.deleted_at) < _comparable(db, until)
+        )
+        
+        if cursor:
+            query = query.filter(_after(db, SyncTombstone.deleted_at, SyncTombstone.id, cursor))
+        
+        return query.order_by(SyncTombstone.deleted_at, SyncTombstone.id).limit(limit).all()
+    
+    def add_tombstones(self, db: Session, user_id: UUID, entity_type: str, entity_ids: List[UUID]) -> None:
+        """
+        Record deleted rows for delta sync (no commit)
+        """
+        db.bulk_insert_mappings(SyncTombstone, [
+            {"user_id": user_id, "entity_type": entity_type, "entity_id": entity_id}
+            for entity_id in entity_ids
+        ])
+    
+    def delete_expired_tombstones(self, db: Session, before: datetime, batch_size: int = 1000) -> int:
+        """
+        Delete up to `batch_size` tombstones recorded before `before`
+        """
+        expired_ids = db.query(SyncTombstone.id).filter(
+            SyncTombstone.deleted_at < before
+        ).limit(batch_size).subquery()
+        
+        deleted = db.query(SyncTombstone).filter(
+            SyncTombstone.id.in_(db.query(expired_ids.c.id))
+        ).delete(synchronize_session=False)
+        db.commit()
+        return deleted
@@ -1,46 +1,132 @@
 from sqlalchemy.orm import Session
-from typing import List, Optional
+from typing import Any, Iterator, List, Optional
 from uuid import UUID
+from datetime import datetime
 
+from core.archive import ArchiveStore, merge_pages, merge_streams
+from core.tracing import traced
 from models.models import Transaction, TransactionType, TransactionStatus
 
+@traced
 class TransactionRepository:
+    def __init__(self):
+        self.archive_store = ArchiveStore()
+    
     def get_by_id(self, db: Session, transaction_id: UUID) -> Optional[Transaction]:
         """
         Get a transaction by ID
         """
         return db.query(Transaction).filter(Transaction.id == transaction_id).first()
     
+    def get_for_update(self, db: Session, transaction_id: UUID) -> Optional[Transaction]:
+        """
+        Get a transaction by ID, locking the row until the caller commits
+        """
+        return db.query(Transaction).filter(Transaction.id == transaction_id).with_for_update().populate_existing().first()
+    
     def get_by_wallet_id(self, db: Session, wallet_id: UUID, skip: int = 0, limit: int = 100,
-                        transaction_type: Optional[TransactionType] = None) -> List[Transaction]:
+                        transaction_type: Optional[TransactionType] = None, start_date: Optional[datetime] = None,
+                        end_date: Optional[datetime] = None, columns: Optional[List[Any]] = None) -> List[Any]:
         """
-        Get transactions by wallet ID
+        Get transactions by wallet ID, optionally in [start_date, end_date).
+        The date bounds let PostgreSQL skip monthly partitions outside the range;
+        a range reaching back into cold storage also reads the archive.
+        With `columns`, only those columns are selected and rows are returned
+        instead of ORM objects, archived ones included.
         """
-        query = db.query(Transaction).filter(Transaction.wallet_id == wallet_id)
+        query = db.query(*columns) if columns else db.query(Transaction)
+        query = query.filter(Transaction.wallet_id == wallet_id)
         
         if transaction_type:
             query = query.filter(Transaction.type == transaction_type)
+        if start_date:
+            query = query.filter(Transaction.created_at >= start_date)
+        if end_date:
+            query = query.filter(Transaction.created_at < end_date)
+        
+        if start_date or end_date:
+            return self._page_with_archive(
+                query, skip, limit, start_date, end_date, columns, wallet_id=wallet_id, type=transaction_type
+            )
         
         return query.order_by(Transaction.created_at.desc()).offset(skip).limit(limit).all()
     
     def get_by_user_id(self, db: Session, user_id: UUID, skip: int = 0, limit: int = 100,
-                      transaction_type: Optional[TransactionType] = None) -> List[Transaction]:
+                      transaction_type: Optional[TransactionType] = None, start_date: Optional[datetime] = None,
+                      end_date: Optional[datetime] = None, columns: Optional[List[Any]] = None) -> List[Any]:
         """
-        Get transactions by user ID
+        Get transactions by user ID, optionally in [start_date, end_date).
+        The date bounds let PostgreSQL skip monthly partitions outside the range;
+        a range reaching back into cold storage also reads the archive.
+        With `columns`, only those columns are selected and rows are returned
+        instead of ORM objects, archived ones included.
         """
-        query = db.query(Transaction).filter(Transaction.user_id == user_id)
+        query = db.query(*columns) if columns else db.query(Transaction)
+        query = query.filter(Transaction.user_id == user_id)
         
         if transaction_type:
             query = query.filter(Transaction.type == transaction_type)
+        if start_date:
+            query = query.filter(Transaction.created_at >= start_date)
+        if end_date:
+            query = query.filter(Transaction.created_at < end_date)
+        
+        if start_date or end_date:
+            return self._page_with_archive(
+                query, skip, limit, start_date, end_date, columns, user_id=user_id, type=transaction_type
+            )
         
         return query.order_by(Transaction.created_at.desc()).offset(skip).limit(limit).all()
     
+    def _page_with_archive(self, query, skip: int, limit: int, start_date: Optional[datetime],
+                           end_date: Optional[datetime], columns: Optional[List[Any]], **filters: Any) -> List[Any]:
+        """
+        Page `query` newest first together with the archived transactions
+        matching `filters`. The archive is left alone when the live rows fill
+        the page and are newer than anything archived, and otherwise read
+        newest first only as far as the page goes.
+        """
+        live = query.order_by(Transaction.created_at.desc()).limit(skip + limit).all()
+        if not self.archive_store.completes_page(Transaction.__tablename__, live, skip + limit, start_date):
+            return live[skip:]
+        
+        archived = self.archive_store.iter_rows(Transaction, start_date, end_date, columns=columns, **filters)
+        return merge_pages(live, archived, skip, limit)
+    
+    def lock_by_ids(self, db: Session, transaction_ids: List[UUID]) -> List[Transaction]:
+        """
+        Get transactions by ID, locking the rows in ID order until the caller commits
+        """
+        return db.query(Transaction).filter(
+            Transaction.id.in_(transaction_ids)
+        ).order_by(Transaction.id).with_for_update().populate_existing().all()
+    
+    def get_pending_ids(self, db: Session, transaction_type: Optional[TransactionType] = None,
+                        user_id: Optional[UUID] = None, created_before: Optional[datetime] = None,
+                        max_amount: Optional[float] = None, limit: int = 1000) -> List[UUID]:
+        """
+        Get IDs of pending transactions matching the filters, oldest first
+        """
+        query = db.query(Transaction.id).filter(Transaction.status == TransactionStatus.PENDING)
+        
+        if transaction_type:
+            query = query.filter(Transaction.type == transaction_type)
+        if user_id:
+            query = query.filter(Transaction.user_id == user_id)
+        if created_before:
+            query = query.filter(Transaction.created_at < created_before)
+        if max_amount is not None:
+            query = query.filter(Transaction.amount <= max_amount)
+        
+        return [row[0] for row in query.order_by(Transaction.created_at).limit(limit)]
+    
     def create(self, db: Session, user_id: UUID, wallet_id: UUID, amount: float, type: TransactionType,
               status: TransactionStatus = TransactionStatus.PENDING, description: Optional[str] = None,
               reference: Optional[str] = None, investment_id: Optional[UUID] = None,
-              loan_id: Optional[UUID] = None) -> Transaction:
+              loan_id: Optional[UUID] = None, commit: bool = True) -> Transaction:
         """
-        Create a new transaction
+        Create a new transaction. With commit=False the row is only flushed so
+        the caller can finish its database transaction.
         """
         db_transaction = Transaction(
             user_id=user_id,
@@ -54,6 +140,9 @@ class TransactionRepository:
             loan_id=loan_id
         )
         db.add(db_transaction)
+        if not commit:
+            db.flush()
+            return db_transaction
         db.commit()
         db.refresh(db_transaction)
         return db_transaction
@@ -81,4 +170,38 @@ class TransactionRepository:
         """
         Get transactions by loan ID
         """
-        return db.query(Transaction).filter(Transaction.loan_id == loan_id).all()
\ No newline at end of file
+        return db.query(Transaction).filter(Transaction.loan_id == loan_id).all()
+    
+    def iter_for_export(self, db: Session, columns: list, user_id: Optional[UUID] = None,
+                        wallet_id: Optional[UUID] = None, start_date: Optional[datetime] = None,
+                        end_date: Optional[datetime] = None, transaction_type: Optional[TransactionType] = None,
+                        status: Optional[TransactionStatus] = None, batch_size: int = 1000) -> Iterator:
+        """
+        Stream transaction rows oldest first through a server-side cursor,
+        fetching `batch_size` rows at a time. Archived transactions in the range
+        are merged in as rows of the same columns, which must include created_at.
+        """
+        query = db.query(*columns)
+        
+        if user_id:
+            query = query.filter(Transaction.user_id == user_id)
+        if wallet_id:
+            query = query.filter(Transaction.wallet_id == wallet_id)
+        if start_date:
+            query = query.filter(Transaction.created_at >= start_date)
+        if end_date:
+            query = query.filter(Transaction.created_at < end_date)
+        if transaction_type:
+            query = query.filter(Transaction.type == transaction_type)
+        if status:
+            query = query.filter(Transaction.status == status)
+        
+        live = query.order_by(Transaction.created_at, Transaction.id).yield_per(batch_size)
+        if not self.archive_store.reaches(Transaction.__tablename__, start_date):
+            return live
+        
+        archived = self.archive_store.iter_rows(
+            Transaction, start_date, end_date, newest_first=False, columns=columns,
+            user_id=user_id, wallet_id=wallet_id, type=transaction_type, status=status
+        )
+        return merge_streams(live, archived)
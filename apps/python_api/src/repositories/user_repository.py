@@ -1,9 +1,23 @@
 from sqlalchemy.orm import Session
-from typing import List, Optional
+from sqlalchemy import String, case, func, literal, literal_column, or_
+from typing import Any, List, Optional, Tuple
 from uuid import UUID
+from datetime import datetime
 
 from models.models import User, UserRole
+from core.tracing import traced
 
+# Lowercased text searched by admin user search. The trigram index created by
+# init_db.py is built on exactly this expression, so queries must use it verbatim.
+USER_SEARCH_DOCUMENT_SQL = (
+    "lower(coalesce(email, '') || ' ' || coalesce(first_name, '') || ' ' || coalesce(last_name, '') "
+    "|| ' ' || coalesce(phone, '') || ' ' || regexp_replace(coalesce(phone, ''), '[^0-9]', '', 'g'))"
+)
+
+def _escape_like(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+@traced
 class UserRepository:
     def get_by_id(self, db: Session, user_id: UUID) -> Optional[User]:
         """
@@ -17,11 +31,74 @@ class UserRepository:
         """
         return db.query(User).filter(User.email == email).first()
     
-    def get_all(self, db: Session, skip: int = 0, limit: int = 100) -> List[User]:
+    def get_all(self, db: Session, skip: int = 0, limit: int = 100, role: Optional[UserRole] = None,
+                is_active: Optional[bool] = None, is_verified: Optional[bool] = None,
+                columns: Optional[List[Any]] = None) -> List[Any]:
+        """
+        Get all users with pagination and optional filters. With `columns`,
+        only those columns are selected and rows are returned instead of ORM objects.
+        """
+        query = db.query(*columns) if columns else db.query(User)
+        return self._filter(query, role, is_active, is_verified).offset(skip).limit(limit).all()
+    
+    def _filter(self, query, role: Optional[UserRole], is_active: Optional[bool], is_verified: Optional[bool]):
+        if role:
+            query = query.filter(User.role == role)
+        if is_active is not None:
+            query = query.filter(User.is_active == is_active)
+        if is_verified is not None:
+            query = query.filter(User.is_verified == is_verified)
+        return query
+    
+    def search_trigram(self, db: Session, query: str, limit: int = 20, role: Optional[UserRole] = None,
+                       is_active: Optional[bool] = None, is_verified: Optional[bool] = None) -> List[User]:
+        """
+        Search users by email, name and phone on PostgreSQL with pg_trgm.
+        
+        Matches substrings and, through the `<%` word similarity operator, typos;
+        both are served by the GIN trigram index on USER_SEARCH_DOCUMENT_SQL.
+        Exact field matches rank first, then prefix matches, then substring
+        matches, with trigram similarity breaking ties.
+        """
+        query = query.strip().lower()
+        document = literal_column(USER_SEARCH_DOCUMENT_SQL, String)
+        term = literal(query, String)
+        prefix = literal(f"{_escape_like(query)}%", String)
+        substring = literal(f"%{_escape_like(query)}%", String)
+        fields = [func.lower(User.email), func.lower(User.first_name), func.lower(User.last_name), User.phone]
+        
+        rank = case(
+            (or_(*[field == term for field in fields]), 3.0),
+            (or_(*[field.like(prefix, escape="\\") for field in fields]), 2.0),
+            (document.like(substring, escape="\\"), 1.0),
+            else_=0.0
+        ) + func.word_similarity(term, document)
+        
+        matches = db.query(User).filter(
+            or_(document.like(substring, escape="\\"), term.op("<%")(document))
+        )
+        return self._filter(matches, role, is_active, is_verified).order_by(rank.desc()).limit(limit).all()
+    
+    def get_search_rows(self, db: Session, changed_since: Optional[datetime] = None) -> List[Tuple]:
+        """
+        Get the searchable fields of users created or updated since `changed_since`
+        (all users if None) for the in-process search index
+        """
+        query = db.query(
+            User.id, User.email, User.first_name, User.last_name, User.phone,
+            User.role, User.is_active, User.is_verified, User.created_at, User.updated_at
+        )
+        
+        if changed_since is not None:
+            query = query.filter(or_(User.created_at >= changed_since, User.updated_at >= changed_since))
+        
+        return query.all()
+    
+    def get_by_ids(self, db: Session, user_ids: List[UUID]) -> List[User]:
         """
-        Get all users with pagination
+        Get users by ID
         """
-        return db.query(User).offset(skip).limit(limit).all()
+        return db.query(User).filter(User.id.in_(user_ids)).all()
     
     def create(self, db: Session, email: str, hashed_password: str, first_name: str, 
                last_name: str, phone: Optional[str] = None, role: UserRole = UserRole.USER) -> User:
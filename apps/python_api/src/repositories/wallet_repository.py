@@ -3,7 +3,9 @@ from typing import List, Optional
 from uuid import UUID
 
 from models.models import Wallet
+from core.tracing import traced
 
+@traced
 class WalletRepository:
     def get_by_id(self, db: Session, wallet_id: UUID) -> Optional[Wallet]:
         """
@@ -11,6 +13,20 @@ class WalletRepository:
         """
         return db.query(Wallet).filter(Wallet.id == wallet_id).first()
     
+    def get_for_update(self, db: Session, wallet_id: UUID) -> Optional[Wallet]:
+        """
+        Get a wallet by ID, locking the row until the caller commits
+        """
+        return db.query(Wallet).filter(Wallet.id == wallet_id).with_for_update().populate_existing().first()
+    
+    def lock_by_ids(self, db: Session, wallet_ids: List[UUID]) -> List[Wallet]:
+        """
+        Get wallets by ID, locking the rows in ID order until the caller commits
+        """
+        return db.query(Wallet).filter(
+            Wallet.id.in_(wallet_ids)
+        ).order_by(Wallet.id).with_for_update().populate_existing().all()
+    
     def get_by_user_id(self, db: Session, user_id: UUID) -> Optional[Wallet]:
         """
         Get a wallet by user ID
@@ -31,28 +47,6 @@ class WalletRepository:
         db.refresh(db_wallet)
         return db_wallet
     
-    def update_balance(self, db: Session, wallet_id: UUID, amount: float) -> Optional[Wallet]:
-        """
-        Update wallet balance
-        """
-        db_wallet = self.get_by_id(db, wallet_id)
-        if db_wallet:
-            db_wallet.balance += amount
-            db.commit()
-            db.refresh(db_wallet)
-        return db_wallet
-    
-    def set_balance(self, db: Session, wallet_id: UUID, balance: float) -> Optional[Wallet]:
-        """
-        Set wallet balance
-        """
-        db_wallet = self.get_by_id(db, wallet_id)
-        if db_wallet:
-            db_wallet.balance = balance
-            db.commit()
-            db.refresh(db_wallet)
-        return db_wallet
-    
     def update_currency(self, db: Session, wallet_id: UUID, currency: str) -> Optional[Wallet]:
         """
         Update wallet currency
@@ -1,11 +1,14 @@
 from fastapi import APIRouter, Depends, HTTPException, status, Path, Query, Body
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
 from typing import List, Optional, Dict, Any
 from uuid import UUID
 from datetime import datetime
 
+from core.serialization import FIELDS_DESCRIPTION, parse_fields, sparse_response
+from core.tracing import get_trace, recent_traces
 from db.database import get_db
-from schemas.schemas import User, UserUpdate, UserRole, Document, DocumentStatus, Investment, InvestmentStatus, InvestmentPlan, TransactionStatus, Transaction
+from schemas.schemas import User, UserUpdate, UserRole, Document, DocumentStatus, Investment, InvestmentStatus, InvestmentPlan, TransactionStatus, TransactionType, Transaction, ReconciliationRun, ReconciliationMismatch, BulkTransactionAction, BulkTransactionActionResult, AuditLog, AuditLogPage, Timeseries, Notification, TraceSummary, TraceDetail
 from services.user_service import UserService
 from services.document_service import DocumentService
 from services.investment_service import InvestmentService
@@ -13,6 +16,9 @@ from services.loan_service import LoanService
 from services.wallet_service import WalletService
 from services.notification_service import NotificationService
 from services.audit_service import AuditService
+from services.export_service import ExportService, EXPORT_FORMATS
+from services.reconciliation_service import ReconciliationService
+from services.analytics_service import AnalyticsService
 from routers.auth import get_current_user, get_current_superuser
 
 # Admin dependency - require admin role
@@ -34,6 +40,9 @@ loan_service = LoanService()
 wallet_service = WalletService()
 notification_service = NotificationService()
 audit_service = AuditService()
+export_service = ExportService()
+reconciliation_service = ReconciliationService()
+analytics_service = AnalyticsService()
 
 # Superuser Management Endpoints
 @router.post("/admins", response_model=User, status_code=status.HTTP_201_CREATED)
@@ -84,10 +93,25 @@ async def delete_admin(
 async def get_all_users(
     skip: int = 0,
     limit: int = 100,
+    q: Optional[str] = Query(None, min_length=3, max_length=100, description="Search email, name or phone"),
+    role: Optional[UserRole] = None,
+    is_active: Optional[bool] = None,
+    is_verified: Optional[bool] = None,
+    fields: Optional[str] = Query(None, description=FIELDS_DESCRIPTION),
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_superuser)
 ):
-    return user_service.get_users(db, skip=skip, limit=limit)
+    field_names = parse_fields(User, fields)
+    if q:
+        # Search ranks whole users, so only the response is narrowed
+        users = user_service.search_users(
+            db, q, limit=min(limit, 100), role=role, is_active=is_active, is_verified=is_verified
+        )
+    else:
+        users = user_service.get_users(
+            db, skip=skip, limit=limit, role=role, is_active=is_active, is_verified=is_verified, fields=field_names
+        )
+    return sparse_response(User, users, field_names)
 
 @router.get("/users/{user_id}", response_model=User)
 async def get_user(
@@ -202,6 +226,26 @@ async def get_dashboard_stats(
         }
     }
 
+# Analytics Endpoints
+@router.get("/analytics/timeseries", response_model=Timeseries)
+async def get_analytics_timeseries(
+    start_date: datetime,
+    end_date: datetime,
+    granularity: str = Query("day", description="hour, day, week or month"),
+    metric: Optional[List[str]] = Query(None, description="Transaction type or loan_disbursement; all if omitted"),
+    status: Optional[List[str]] = Query(None, description="Transaction or loan status; all if omitted"),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_admin)
+):
+    return analytics_service.get_timeseries(
+        db,
+        start_date=start_date,
+        end_date=end_date,
+        granularity=granularity,
+        metrics=metric,
+        statuses=status
+    )
+
 # KYC Management Endpoints
 @router.get("/kyc", response_model=List[Document])
 async def get_all_kyc_documents(
@@ -300,6 +344,36 @@ async def get_all_transactions(
 ):
     return wallet_service.get_all_transactions(db, skip=skip, limit=limit, status=status)
 
+# Export transactions across all users as a streamed CSV/NDJSON file
+@router.get("/transactions/export")
+async def export_transactions(
+    format: str = Query("csv", pattern="^(csv|ndjson)$"),
+    gzip: bool = False,
+    user_id: Optional[UUID] = None,
+    start_date: Optional[datetime] = None,
+    end_date: Optional[datetime] = None,
+    transaction_type: Optional[TransactionType] = None,
+    status: Optional[TransactionStatus] = None,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_admin)
+):
+    filename = f"transactions-{datetime.utcnow():%Y%m%d}.{format}" + (".gz" if gzip else "")
+    
+    return StreamingResponse(
+        export_service.stream_transactions(
+            db,
+            export_format=format,
+            compress=gzip,
+            user_id=user_id,
+            start_date=start_date,
+            end_date=end_date,
+            transaction_type=transaction_type,
+            status=status
+        ),
+        media_type="application/gzip" if gzip else EXPORT_FORMATS[format],
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
+
 @router.get("/transactions/{transaction_id}")
 async def get_transaction(
     transaction_id: UUID = Path(...),
@@ -499,6 +573,53 @@ async def get_transaction(
         raise HTTPException(status_code=404, detail="Transaction not found")
     return transaction
 
+# Resolve a bulk action's target IDs and apply it
+def run_bulk_transaction_action(db: Session, action: BulkTransactionAction, approve: bool, actor_id: UUID,
+                                transaction_type: Optional[TransactionType] = None):
+    if (action.ids is None) == (action.filter is None):
+        raise HTTPException(status_code=400, detail="Provide exactly one of ids or filter")
+    if not approve and not action.rejection_reason:
+        raise HTTPException(status_code=400, detail="rejection_reason is required")
+    
+    if action.ids is not None:
+        transaction_ids = action.ids
+    else:
+        criteria = action.filter.model_dump()
+        if transaction_type:
+            criteria["transaction_type"] = transaction_type
+        transaction_ids = wallet_service.find_pending_transaction_ids(db, limit=action.limit, **criteria)
+    
+    if approve:
+        results = wallet_service.bulk_approve_transactions(db, transaction_ids, actor_id, transaction_type=transaction_type)
+    else:
+        results = wallet_service.bulk_reject_transactions(
+            db, transaction_ids, actor_id, rejection_reason=action.rejection_reason, transaction_type=transaction_type
+        )
+    
+    return {
+        "requested": len(results),
+        "succeeded": sum(1 for result in results if result["status"] in ("approved", "rejected")),
+        "results": results
+    }
+
+# Approve many pending transactions by ID or filter
+@router.post("/transactions/bulk/approve", response_model=BulkTransactionActionResult)
+async def bulk_approve_transactions(
+    action: BulkTransactionAction,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_admin)
+):
+    return run_bulk_transaction_action(db, action, approve=True, actor_id=current_user.id)
+
+# Reject many pending transactions by ID or filter
+@router.post("/transactions/bulk/reject", response_model=BulkTransactionActionResult)
+async def bulk_reject_transactions(
+    action: BulkTransactionAction,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_admin)
+):
+    return run_bulk_transaction_action(db, action, approve=False, actor_id=current_user.id)
+
 @router.put("/transactions/{transaction_id}/approve", response_model=Transaction)
 async def approve_transaction(
     transaction_id: UUID = Path(...),
@@ -550,6 +671,28 @@ async def get_withdrawal(
         raise HTTPException(status_code=404, detail="Withdrawal not found")
     return withdrawal
 
+# Approve many pending withdrawals by ID or filter
+@router.post("/withdrawals/bulk/approve", response_model=BulkTransactionActionResult)
+async def bulk_approve_withdrawals(
+    action: BulkTransactionAction,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_admin)
+):
+    return run_bulk_transaction_action(
+        db, action, approve=True, actor_id=current_user.id, transaction_type=TransactionType.WITHDRAWAL
+    )
+
+# Reject many pending withdrawals by ID or filter
+@router.post("/withdrawals/bulk/reject", response_model=BulkTransactionActionResult)
+async def bulk_reject_withdrawals(
+    action: BulkTransactionAction,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_admin)
+):
+    return run_bulk_transaction_action(
+        db, action, approve=False, actor_id=current_user.id, transaction_type=TransactionType.WITHDRAWAL
+    )
+
 @router.put("/withdrawals/{withdrawal_id}/approve", response_model=Transaction)
 async def approve_withdrawal(
     withdrawal_id: UUID = Path(...),
@@ -580,14 +723,17 @@ async def reject_withdrawal(
     return updated_withdrawal
 
 # Notification Endpoints
-@router.get("/notifications", response_model=List[dict])
+@router.get("/notifications", response_model=List[Notification])
 async def get_all_notifications(
     skip: int = 0,
     limit: int = 100,
+    fields: Optional[str] = Query(None, description=FIELDS_DESCRIPTION),
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_admin)
 ):
-    return notification_service.get_all_notifications(db, skip=skip, limit=limit)
+    field_names = parse_fields(Notification, fields)
+    notifications = notification_service.get_all_notifications(db, skip=skip, limit=limit, fields=field_names)
+    return sparse_response(Notification, notifications, field_names)
 
 @router.post("/notifications/broadcast", response_model=dict)
 async def send_broadcast_notification(
@@ -618,28 +764,34 @@ async def send_user_notification(
     )
 
 # Audit Log Endpoints
-@router.get("/audit-logs", response_model=List[dict])
+@router.get("/audit-logs", response_model=AuditLogPage)
 async def get_audit_logs(
-    skip: int = 0,
-    limit: int = 100,
+    limit: int = Query(100, ge=1, le=1000),
+    cursor: Optional[str] = None,
     user_id: Optional[UUID] = None,
     action_type: Optional[str] = None,
+    entity_type: Optional[str] = None,
+    entity_id: Optional[str] = None,
     start_date: Optional[datetime] = None,
     end_date: Optional[datetime] = None,
+    search: Optional[str] = Query(None, min_length=3, max_length=200),
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_admin)
 ):
     return audit_service.get_audit_logs(
         db, 
-        skip=skip, 
         limit=limit, 
+        cursor=cursor,
         user_id=user_id, 
-        action_type=action_type,
+        action=action_type,
+        entity_type=entity_type,
+        entity_id=entity_id,
         start_date=start_date,
-        end_date=end_date
+        end_date=end_date,
+        search=search
     )
 
-@router.get("/audit-logs/{log_id}", response_model=dict)
+@router.get("/audit-logs/{log_id}", response_model=AuditLog)
 async def get_audit_log(
     log_id: UUID = Path(...),
     db: Session = Depends(get_db),
@@ -648,4 +800,47 @@ async def get_audit_log(
     log = audit_service.get_audit_log(db, log_id)
     if not log:
         raise HTTPException(status_code=404, detail="Audit log not found")
-    return log
\ No newline at end of file
+    return log
+
+# Wallet Reconciliation Endpoints
+@router.get("/reconciliation/runs", response_model=List[ReconciliationRun])
+async def get_reconciliation_runs(
+    skip: int = 0,
+    limit: int = 100,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_admin)
+):
+    return reconciliation_service.get_runs(db, skip=skip, limit=limit)
+
+@router.get("/reconciliation/runs/{run_id}/mismatches", response_model=List[ReconciliationMismatch])
+async def get_reconciliation_mismatches(
+    run_id: UUID = Path(...),
+    skip: int = 0,
+    limit: int = 100,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_admin)
+):
+    run = reconciliation_service.get_run(db, run_id)
+    if not run:
+        raise HTTPException(status_code=404, detail="Reconciliation run not found")
+    return reconciliation_service.get_mismatches(db, run_id, skip=skip, limit=limit)
+
+# Tracing Endpoints
+@router.get("/traces", response_model=List[TraceSummary])
+async def get_traces(
+    limit: int = Query(50, ge=1, le=1000),
+    name: Optional[str] = None,
+    min_duration_ms: float = Query(0.0, ge=0),
+    current_user: User = Depends(get_current_admin)
+):
+    return recent_traces(limit=limit, name=name, min_duration_ms=min_duration_ms)
+
+@router.get("/traces/{trace_id}", response_model=TraceDetail)
+async def get_trace_detail(
+    trace_id: str = Path(..., pattern="^[0-9a-f]{32}$"),
+    current_user: User = Depends(get_current_admin)
+):
+    trace = get_trace(trace_id)
+    if not trace:
+        raise HTTPException(status_code=404, detail="Trace not found")
+    return trace
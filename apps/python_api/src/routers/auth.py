@@ -1,4 +1,4 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Body
+from fastapi import APIRouter, Depends, HTTPException, status, Body, Header
 from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
 from sqlalchemy.orm import Session
 from datetime import datetime, timedelta
@@ -10,6 +10,7 @@ from db.database import get_db
 from schemas.schemas import UserCreate, User, Token, TokenData, LoginRequest, RefreshTokenRequest
 from services.auth_service import AuthService
 from core.security import create_access_token, create_refresh_token, verify_refresh_token, get_password_hash
+from core.response_cache import response_cache, row_version, USER_CACHE_CONTROL
 
 router = APIRouter()
 auth_service = AuthService()
@@ -178,8 +179,12 @@ async def refresh_token(refresh_token_req: RefreshTokenRequest, db: Session = De
 
 # Get current user info
 @router.get("/me", response_model=User)
-async def read_users_me(current_user: User = Depends(get_current_active_user)):
-    return current_user
+async def read_users_me(
+    if_none_match: Optional[str] = Header(None),
+    current_user: User = Depends(get_current_active_user)
+):
+    etag = response_cache.etag("auth.me", current_user.id, "user", current_user.id, row_version(current_user))
+    return response_cache.respond(if_none_match, etag, USER_CACHE_CONTROL, User, lambda: current_user)
 
 # Password reset request
 @router.post("/forgot-password")
@@ -1,11 +1,12 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Path, Query, Body
+from fastapi import APIRouter, Depends, HTTPException, status, Path, Query, Body, Header, Request
 from sqlalchemy.orm import Session
 from typing import List, Optional, Dict, Any
 from uuid import UUID
+import json
 
 from db.database import get_db
-from schemas.schemas import User, CryptoPaymentRequest, CryptoPaymentResponse, Transaction, TransactionType, TransactionStatus
-from services.crypto_service import CryptoService
+from schemas.schemas import User, CryptoPaymentRequest, CryptoPaymentResponse, CryptoDepositOrderRequest, CryptoDepositOrder, Transaction, TransactionType, TransactionStatus
+from services.crypto_service import CryptoService, ProviderUnavailableError
 from services.wallet_service import WalletService
 from routers.auth import get_current_active_user, get_current_user
 
@@ -23,6 +24,8 @@ async def generate_deposit_address(
     try:
         address_data = await crypto_service.generate_address(currency, current_user.id)
         return address_data
+    except ProviderUnavailableError as e:
+        raise HTTPException(status_code=503, detail=str(e))
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
@@ -43,6 +46,34 @@ async def create_payment_request(
     except Exception as e:
         raise HTTPException(status_code=500, detail="Failed to create payment request")
 
+# Create crypto deposit order
+@router.post("/orders", response_model=CryptoDepositOrder, status_code=status.HTTP_201_CREATED)
+async def create_deposit_order(
+    order_request: CryptoDepositOrderRequest,
+    current_user = Depends(get_current_active_user),
+    db: Session = Depends(get_db)
+):
+    try:
+        return await crypto_service.create_deposit_order(
+            db, current_user.id, order_request.amount, order_request.currency
+        )
+    except ProviderUnavailableError as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+# Get crypto deposit order
+@router.get("/orders/{order_id}", response_model=CryptoDepositOrder)
+async def get_deposit_order(
+    order_id: UUID = Path(...),
+    current_user = Depends(get_current_active_user),
+    db: Session = Depends(get_db)
+):
+    order = crypto_service.get_order(db, order_id)
+    if order is None or order.user_id != current_user.id:
+        raise HTTPException(status_code=404, detail="Order not found")
+    return order
+
 # Get user's crypto deposit history
 @router.get("/history", response_model=List[Transaction])
 async def get_deposit_history(
@@ -66,21 +97,21 @@ async def get_deposit_history(
 # Webhook for crypto payment notifications
 @router.post("/webhook", status_code=status.HTTP_200_OK)
 async def crypto_webhook(
-    payload: Dict[str, Any] = Body(...),
-    signature: str = Query(..., alias="x-signature"),
+    request: Request,
+    x_signature: str = Header(...),
     db: Session = Depends(get_db)
 ):
+    # Verify webhook signature against the raw request body
+    body = await request.body()
+    if not crypto_service.verify_webhook_signature(body, x_signature):
+        raise HTTPException(status_code=400, detail="Invalid signature")
+    
     try:
-        # Verify webhook signature
-        is_valid = await crypto_service.verify_webhook_signature(payload, signature)
-        if not is_valid:
-            raise HTTPException(status_code=400, detail="Invalid signature")
-        
-        # Process the webhook
-        await crypto_service.process_webhook(db, payload)
-        return {"status": "success"}
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+        payload = json.loads(body)
+        message = await crypto_service.process_webhook_notification(db, payload)
+        return {"status": "success", "message": message}
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
 
 # Get supported cryptocurrencies
 @router.get("/currencies")
@@ -88,5 +119,7 @@ async def get_supported_currencies():
     try:
         currencies = await crypto_service._get_supported_currencies()
         return {"currencies": currencies}
+    except ProviderUnavailableError as e:
+        raise HTTPException(status_code=503, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail="Failed to fetch supported currencies")
\ No newline at end of file
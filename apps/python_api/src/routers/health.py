@@ -1,11 +1,13 @@
 from fastapi import APIRouter, Depends, Response
 from sqlalchemy.orm import Session
 from typing import Dict
+from prometheus_client import CONTENT_TYPE_LATEST
 import os
-import psutil
 import time
 
 from db.database import get_db
+from core.circuit_breaker import breaker_states
+from core.metrics import render_metrics
 
 router = APIRouter()
 
@@ -36,7 +38,8 @@ async def detailed_health_check(response: Response, db: Session = Depends(get_db
     """
     Detailed health check with system metrics and database connection test
     """
-    # System metrics
+    # System metrics (psutil is only needed here, so it is not imported at startup)
+    import psutil
     memory = psutil.virtual_memory()
     disk = psutil.disk_usage('/')
     uptime = time.time() - START_TIME
@@ -68,5 +71,14 @@ async def detailed_health_check(response: Response, db: Session = Depends(get_db
         "database": {
             "status": db_status,
             "response_time_ms": round(db_response_time * 1000, 2) if db_status == "connected" else None
-        }
-    }
\ No newline at end of file
+        },
+        "circuit_breakers": breaker_states()
+    }
+
+@router.get("/metrics", include_in_schema=False)
+def metrics():
+    """
+    Prometheus metrics of every API worker (and the Celery workers sharing
+    PROMETHEUS_MULTIPROC_DIR)
+    """
+    return Response(content=render_metrics(), media_type=CONTENT_TYPE_LATEST)
\ No newline at end of file
@@ -1,37 +1,47 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Path, Query, Body
+from fastapi import APIRouter, Depends, HTTPException, status, Path, Query, Body, Header
 from sqlalchemy.orm import Session
 from typing import List, Optional
 from uuid import UUID
 
+from core.response_cache import response_cache, row_version, CATALOG_CACHE_CONTROL, USER_CACHE_CONTROL
+from core.serialization import FIELDS_DESCRIPTION, parse_fields, sparse_response
 from db.database import get_db
-from schemas.schemas import Investment, InvestmentCreate, InvestmentPlan, InvestmentStatus
+from schemas.schemas import Investment, InvestmentCreate, InvestmentPlan, InvestmentStatus, PortfolioProjection, PortfolioSummary
 from services.investment_service import InvestmentService
+from services.idempotency_service import IdempotencyService
+from services.projection_service import ProjectionService
 from routers.auth import get_current_active_user, get_current_user
 
 router = APIRouter()
 investment_service = InvestmentService()
+idempotency_service = IdempotencyService()
+projection_service = ProjectionService()
 
-# Get all active investment plans
+# Get all active investment plans (304 when If-None-Match matches the catalog's ETag)
 @router.get("/plans", response_model=List[InvestmentPlan])
 async def get_investment_plans(
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=1, le=100),
+    if_none_match: Optional[str] = Header(None),
     db: Session = Depends(get_db),
     current_user = Depends(get_current_active_user)
 ):
-    return investment_service.get_active_plans(db, skip=skip, limit=limit)
+    plans, etag = investment_service.get_active_plans_with_etag(db, skip=skip, limit=limit)
+    return response_cache.respond(if_none_match, etag, CATALOG_CACHE_CONTROL, List[InvestmentPlan], lambda: plans)
 
 # Get investment plan by ID
 @router.get("/plans/{plan_id}", response_model=InvestmentPlan)
 async def get_investment_plan(
     plan_id: UUID = Path(...),
+    if_none_match: Optional[str] = Header(None),
     db: Session = Depends(get_db),
     current_user = Depends(get_current_active_user)
 ):
     plan = investment_service.get_plan(db, plan_id)
     if plan is None:
         raise HTTPException(status_code=404, detail="Investment plan not found")
-    return plan
+    etag = response_cache.etag("investments.plan", None, "investment_plan", plan.id, row_version(plan))
+    return response_cache.respond(if_none_match, etag, CATALOG_CACHE_CONTROL, InvestmentPlan, lambda: plan)
 
 # Get user's investments
 @router.get("/my-investments", response_model=List[Investment])
@@ -39,48 +49,95 @@ async def get_my_investments(
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=1, le=100),
     status: Optional[InvestmentStatus] = None,
+    fields: Optional[str] = Query(None, description=FIELDS_DESCRIPTION),
     db: Session = Depends(get_db),
     current_user = Depends(get_current_active_user)
 ):
-    return investment_service.get_user_investments(db, current_user.id, skip=skip, limit=limit, status=status)
+    field_names = parse_fields(Investment, fields)
+    investments = investment_service.get_user_investments(
+        db, current_user.id, skip=skip, limit=limit, status=status, fields=field_names
+    )
+    return sparse_response(Investment, investments, field_names)
+
+# Get totals and counts by status for the user's investments and loans
+@router.get("/my-investments/summary", response_model=PortfolioSummary)
+async def get_my_portfolio_summary(
+    db: Session = Depends(get_db),
+    current_user = Depends(get_current_active_user)
+):
+    return investment_service.get_portfolio_summary(db, current_user.id)
+
+# Project the value of the user's active investments
+@router.get("/my-investments/projection", response_model=PortfolioProjection)
+async def get_my_portfolio_projection(
+    horizon_days: int = Query(365, ge=1, le=3650),
+    step_days: int = Query(1, ge=1, le=365, description="Days between projected points"),
+    roi_delta: float = Query(0.0, ge=-100, le=100, description="What-if: percentage points added to every plan's annual ROI"),
+    reinvest: bool = Query(False, description="What-if: roll matured investments into a new term"),
+    db: Session = Depends(get_db),
+    current_user = Depends(get_current_active_user)
+):
+    return await projection_service.get_portfolio_projection(
+        db,
+        current_user.id,
+        horizon_days=horizon_days,
+        step_days=step_days,
+        roi_delta=roi_delta,
+        reinvest=reinvest
+    )
 
 # Get user's investment by ID
 @router.get("/my-investments/{investment_id}", response_model=Investment)
 async def get_my_investment(
     investment_id: UUID = Path(...),
+    if_none_match: Optional[str] = Header(None),
     db: Session = Depends(get_db),
     current_user = Depends(get_current_active_user)
 ):
     investment = investment_service.get_investment(db, investment_id)
     if investment is None or investment.user_id != current_user.id:
         raise HTTPException(status_code=404, detail="Investment not found")
-    return investment
+    version = row_version(investment, investment.plan)
+    etag = response_cache.etag("investments.my_investment", current_user.id, "investment", investment.id, version)
+    return response_cache.respond(if_none_match, etag, USER_CACHE_CONTROL, Investment, lambda: investment)
 
 # Create a new investment
 @router.post("/invest", response_model=Investment, status_code=status.HTTP_201_CREATED)
 async def create_investment(
     plan_id: UUID = Body(...),
     amount: float = Body(..., gt=0),
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key"),
     db: Session = Depends(get_db),
     current_user = Depends(get_current_active_user)
 ):
-    # Get the investment plan
-    plan = investment_service.get_plan(db, plan_id)
-    if plan is None:
-        raise HTTPException(status_code=404, detail="Investment plan not found")
-    
-    # Validate amount against plan min/max
-    if amount < plan.min_amount:
-        raise HTTPException(status_code=400, detail=f"Minimum investment amount is {plan.min_amount}")
-    if amount > plan.max_amount:
-        raise HTTPException(status_code=400, detail=f"Maximum investment amount is {plan.max_amount}")
+    def invest():
+        # Get the investment plan
+        plan = investment_service.get_plan(db, plan_id)
+        if plan is None:
+            raise HTTPException(status_code=404, detail="Investment plan not found")
+        
+        # Validate amount against plan min/max
+        if amount < plan.min_amount:
+            raise HTTPException(status_code=400, detail=f"Minimum investment amount is {plan.min_amount}")
+        if amount > plan.max_amount:
+            raise HTTPException(status_code=400, detail=f"Maximum investment amount is {plan.max_amount}")
+        
+        # Create the investment
+        try:
+            return investment_service.create_investment(db, current_user.id, plan_id, amount)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
     
-    # Create the investment
-    try:
-        investment = investment_service.create_investment(db, current_user.id, plan_id, amount)
-        return investment
-    except ValueError as e:
-        raise HTTPException(status_code=400, detail=str(e))
+    # Retries with the same Idempotency-Key replay the first response
+    return idempotency_service.execute(
+        db,
+        idempotency_key,
+        current_user.id,
+        request={"endpoint": "investments.invest", "plan_id": plan_id, "amount": amount},
+        handler=invest,
+        response_model=Investment,
+        status_code=status.HTTP_201_CREATED
+    )
 
 # Admin routes
 async def get_current_admin(current_user = Depends(get_current_user)):
@@ -1,37 +1,45 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Path, Query, Body
+from fastapi import APIRouter, Depends, HTTPException, status, Path, Query, Body, Header
 from sqlalchemy.orm import Session
 from typing import List, Optional
 from uuid import UUID
 
+from core.response_cache import response_cache, row_version, CATALOG_CACHE_CONTROL
+from core.serialization import FIELDS_DESCRIPTION, parse_fields, sparse_response
 from db.database import get_db
 from schemas.schemas import Loan, LoanCreate, LoanProduct, LoanStatus
 from services.loan_service import LoanService
+from services.idempotency_service import IdempotencyService
 from routers.auth import get_current_active_user, get_current_user
 
 router = APIRouter()
 loan_service = LoanService()
+idempotency_service = IdempotencyService()
 
-# Get all active loan products
+# Get all active loan products (304 when If-None-Match matches the catalog's ETag)
 @router.get("/products", response_model=List[LoanProduct])
 async def get_loan_products(
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=1, le=100),
+    if_none_match: Optional[str] = Header(None),
     db: Session = Depends(get_db),
     current_user = Depends(get_current_active_user)
 ):
-    return loan_service.get_active_products(db, skip=skip, limit=limit)
+    products, etag = loan_service.get_active_products_with_etag(db, skip=skip, limit=limit)
+    return response_cache.respond(if_none_match, etag, CATALOG_CACHE_CONTROL, List[LoanProduct], lambda: products)
 
 # Get loan product by ID
 @router.get("/products/{product_id}", response_model=LoanProduct)
 async def get_loan_product(
     product_id: UUID = Path(...),
+    if_none_match: Optional[str] = Header(None),
     db: Session = Depends(get_db),
     current_user = Depends(get_current_active_user)
 ):
     product = loan_service.get_product(db, product_id)
     if product is None:
         raise HTTPException(status_code=404, detail="Loan product not found")
-    return product
+    etag = response_cache.etag("loans.product", None, "loan_product", product.id, row_version(product))
+    return response_cache.respond(if_none_match, etag, CATALOG_CACHE_CONTROL, LoanProduct, lambda: product)
 
 # Get user's loans
 @router.get("/my-loans", response_model=List[Loan])
@@ -39,10 +47,13 @@ async def get_my_loans(
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=1, le=100),
     status: Optional[LoanStatus] = None,
+    fields: Optional[str] = Query(None, description=FIELDS_DESCRIPTION),
     db: Session = Depends(get_db),
     current_user = Depends(get_current_active_user)
 ):
-    return loan_service.get_user_loans(db, current_user.id, skip=skip, limit=limit, status=status)
+    field_names = parse_fields(Loan, fields)
+    loans = loan_service.get_user_loans(db, current_user.id, skip=skip, limit=limit, status=status, fields=field_names)
+    return sparse_response(Loan, loans, field_names)
 
 # Get user's loan by ID
 @router.get("/my-loans/{loan_id}", response_model=Loan)
@@ -88,24 +99,35 @@ async def apply_for_loan(
 async def make_loan_payment(
     loan_id: UUID = Path(...),
     amount: float = Body(..., gt=0),
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key"),
     db: Session = Depends(get_db),
     current_user = Depends(get_current_active_user)
 ):
-    # Get the loan
-    loan = loan_service.get_loan(db, loan_id)
-    if loan is None or loan.user_id != current_user.id:
-        raise HTTPException(status_code=404, detail="Loan not found")
-    
-    # Validate loan status
-    if loan.status != LoanStatus.ACTIVE:
-        raise HTTPException(status_code=400, detail="Loan is not active")
+    def pay():
+        # Get the loan
+        loan = loan_service.get_loan(db, loan_id)
+        if loan is None or loan.user_id != current_user.id:
+            raise HTTPException(status_code=404, detail="Loan not found")
+        
+        # Validate loan status
+        if loan.status != LoanStatus.ACTIVE:
+            raise HTTPException(status_code=400, detail="Loan is not active")
+        
+        # Make the payment
+        try:
+            return loan_service.make_loan_payment(db, loan_id, amount)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
     
-    # Make the payment
-    try:
-        updated_loan = loan_service.make_loan_payment(db, loan_id, amount)
-        return updated_loan
-    except ValueError as e:
-        raise HTTPException(status_code=400, detail=str(e))
+    # Retries with the same Idempotency-Key replay the first response
+    return idempotency_service.execute(
+        db,
+        idempotency_key,
+        current_user.id,
+        request={"endpoint": "loans.payment", "loan_id": loan_id, "amount": amount},
+        handler=pay,
+        response_model=Loan
+    )
 
 # Admin routes
 async def get_current_admin(current_user = Depends(get_current_user)):
@@ -0,0 +1,18 @@
+from fastapi import APIRouter, Depends
+from sqlalchemy.orm import Session
+
+from db.database import get_db
+from schemas.schemas import HomeScreen
+from services.home_service import HomeService
+from routers.auth import get_current_active_user
+
+router = APIRouter()
+home_service = HomeService()
+
+# Everything the mobile home screen needs in one request
+@router.get("/home", response_model=HomeScreen)
+async def get_home(
+    current_user = Depends(get_current_active_user),
+    db: Session = Depends(get_db)
+):
+    return await home_service.get_home(db, current_user)
@@ -0,0 +1,21 @@
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy.orm import Session
+from typing import Optional
+
+from db.database import get_db
+from schemas.schemas import SyncChanges
+from services.sync_service import SyncService, SYNC_PAGE_SIZE
+from routers.auth import get_current_active_user
+
+router = APIRouter()
+sync_service = SyncService()
+
+# Get the current user's changes since a change token (everything when omitted)
+@router.get("", response_model=SyncChanges)
+async def sync(
+    since: Optional[str] = Query(None, description="next_token from the previous sync"),
+    limit: int = Query(SYNC_PAGE_SIZE, ge=1, le=SYNC_PAGE_SIZE),
+    current_user = Depends(get_current_active_user),
+    db: Session = Depends(get_db)
+):
+    return sync_service.get_changes(db, current_user.id, token=since, limit=limit)
@@ -41,10 +41,20 @@ async def get_current_admin(
 async def get_users(
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=1, le=100),
+    q: Optional[str] = Query(None, min_length=3, max_length=100, description="Search email, name or phone"),
+    role: Optional[UserRole] = None,
+    is_active: Optional[bool] = None,
+    is_verified: Optional[bool] = None,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_admin)
 ):
-    return user_service.get_users(db, skip=skip, limit=limit)
+    if q:
+        return user_service.search_users(
+            db, q, limit=limit, role=role, is_active=is_active, is_verified=is_verified
+        )
+    return user_service.get_users(
+        db, skip=skip, limit=limit, role=role, is_active=is_active, is_verified=is_verified
+    )
 
 # Get user by ID (admin only)
 @router.get("/{user_id}", response_model=User)
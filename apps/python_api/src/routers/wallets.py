@@ -1,26 +1,38 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Path, Query
+from fastapi import APIRouter, Depends, HTTPException, status, Path, Query, Header
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
 from typing import List, Optional
 from uuid import UUID
+from datetime import datetime
 
+from core.response_cache import response_cache, row_version, USER_CACHE_CONTROL
+from core.serialization import FIELDS_DESCRIPTION, parse_fields, sparse_response
 from db.database import get_db
-from schemas.schemas import Wallet, WalletUpdate, TransactionCreate, Transaction, TransactionType
+from schemas.schemas import Wallet, WalletUpdate, TransactionCreate, Transaction, TransactionType, TransactionStatus, WalletBalanceAsOf, WalletStatement
 from services.wallet_service import WalletService
+from services.export_service import ExportService, EXPORT_FORMATS
+from services.ledger_service import LedgerService
+from services.idempotency_service import IdempotencyService
 from routers.auth import get_current_active_user, get_current_user
 
 router = APIRouter()
 wallet_service = WalletService()
+export_service = ExportService()
+ledger_service = LedgerService()
+idempotency_service = IdempotencyService()
 
 # Get current user's wallet
 @router.get("/me", response_model=Wallet)
 async def get_my_wallet(
+    if_none_match: Optional[str] = Header(None),
     current_user = Depends(get_current_active_user),
     db: Session = Depends(get_db)
 ):
     wallet = wallet_service.get_wallet_by_user_id(db, current_user.id)
     if wallet is None:
         raise HTTPException(status_code=404, detail="Wallet not found")
-    return wallet
+    etag = response_cache.etag("wallets.me", current_user.id, "wallet", wallet.id, row_version(wallet))
+    return response_cache.respond(if_none_match, etag, USER_CACHE_CONTROL, Wallet, lambda: wallet)
 
 # Get wallet transactions
 @router.get("/me/transactions", response_model=List[Transaction])
@@ -28,6 +40,9 @@ async def get_my_transactions(
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=1, le=100),
     transaction_type: Optional[TransactionType] = None,
+    start_date: Optional[datetime] = None,
+    end_date: Optional[datetime] = None,
+    fields: Optional[str] = Query(None, description=FIELDS_DESCRIPTION),
     current_user = Depends(get_current_active_user),
     db: Session = Depends(get_db)
 ):
@@ -35,18 +50,28 @@ async def get_my_transactions(
     if wallet is None:
         raise HTTPException(status_code=404, detail="Wallet not found")
     
-    return wallet_service.get_wallet_transactions(
+    field_names = parse_fields(Transaction, fields)
+    transactions = wallet_service.get_wallet_transactions(
         db, 
         wallet_id=wallet.id, 
         skip=skip, 
         limit=limit,
-        transaction_type=transaction_type
+        transaction_type=transaction_type,
+        start_date=start_date,
+        end_date=end_date,
+        fields=field_names
     )
+    return sparse_response(Transaction, transactions, field_names)
 
-# Create deposit transaction
-@router.post("/me/deposit", response_model=Transaction)
-async def create_deposit(
-    amount: float = Query(..., gt=0),
+# Export wallet transactions as a streamed CSV/NDJSON file
+@router.get("/me/transactions/export")
+async def export_my_transactions(
+    format: str = Query("csv", pattern="^(csv|ndjson)$"),
+    gzip: bool = False,
+    start_date: Optional[datetime] = None,
+    end_date: Optional[datetime] = None,
+    transaction_type: Optional[TransactionType] = None,
+    status: Optional[TransactionStatus] = None,
     current_user = Depends(get_current_active_user),
     db: Session = Depends(get_db)
 ):
@@ -54,20 +79,49 @@ async def create_deposit(
     if wallet is None:
         raise HTTPException(status_code=404, detail="Wallet not found")
     
-    transaction = wallet_service.create_transaction(
-        db,
-        user_id=current_user.id,
-        wallet_id=wallet.id,
-        amount=amount,
-        transaction_type=TransactionType.DEPOSIT
+    filename = f"transactions-{datetime.utcnow():%Y%m%d}.{format}" + (".gz" if gzip else "")
+    headers = {"Content-Disposition": f'attachment; filename="{filename}"'}
+    
+    return StreamingResponse(
+        export_service.stream_transactions(
+            db,
+            export_format=format,
+            compress=gzip,
+            wallet_id=wallet.id,
+            start_date=start_date,
+            end_date=end_date,
+            transaction_type=transaction_type,
+            status=status
+        ),
+        media_type="application/gzip" if gzip else EXPORT_FORMATS[format],
+        headers=headers
     )
+
+# Get wallet balance as of a point in time
+@router.get("/me/balance", response_model=WalletBalanceAsOf)
+async def get_my_balance_as_of(
+    as_of: datetime = Query(...),
+    current_user = Depends(get_current_active_user),
+    db: Session = Depends(get_db)
+):
+    wallet = wallet_service.get_wallet_by_user_id(db, current_user.id)
+    if wallet is None:
+        raise HTTPException(status_code=404, detail="Wallet not found")
     
-    return transaction
+    balance = ledger_service.get_balance_as_of(db, wallet.id, as_of)
+    return {
+        "wallet_id": wallet.id,
+        "as_of": as_of,
+        "balance": wallet.balance if balance is None else balance
+    }
 
-# Create withdrawal transaction
-@router.post("/me/withdraw", response_model=Transaction)
-async def create_withdrawal(
-    amount: float = Query(..., gt=0),
+# Get wallet statement from the ledger
+@router.get("/me/statement", response_model=WalletStatement)
+async def get_my_statement(
+    start_date: datetime = Query(...),
+    end_date: datetime = Query(...),
+    skip: int = Query(0, ge=0),
+    limit: int = Query(100, ge=1, le=1000),
     current_user = Depends(get_current_active_user),
     db: Session = Depends(get_db)
 ):
@@ -75,18 +129,75 @@ async def create_withdrawal(
     if wallet is None:
         raise HTTPException(status_code=404, detail="Wallet not found")
     
-    if wallet.balance < amount:
-        raise HTTPException(status_code=400, detail="Insufficient balance")
+    try:
+        return ledger_service.get_statement(db, wallet, start_date, end_date, skip=skip, limit=limit)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+# Create deposit transaction
+@router.post("/me/deposit", response_model=Transaction)
+async def create_deposit(
+    amount: float = Query(..., gt=0),
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key"),
+    current_user = Depends(get_current_active_user),
+    db: Session = Depends(get_db)
+):
+    def deposit():
+        wallet = wallet_service.get_wallet_by_user_id(db, current_user.id)
+        if wallet is None:
+            raise HTTPException(status_code=404, detail="Wallet not found")
+        
+        return wallet_service.create_transaction(
+            db,
+            user_id=current_user.id,
+            wallet_id=wallet.id,
+            amount=amount,
+            transaction_type=TransactionType.DEPOSIT
+        )
     
-    transaction = wallet_service.create_transaction(
+    # Retries with the same Idempotency-Key replay the first response
+    return idempotency_service.execute(
         db,
-        user_id=current_user.id,
-        wallet_id=wallet.id,
-        amount=-amount,  # Negative amount for withdrawal
-        transaction_type=TransactionType.WITHDRAWAL
+        idempotency_key,
+        current_user.id,
+        request={"endpoint": "wallets.deposit", "amount": amount},
+        handler=deposit,
+        response_model=Transaction
     )
+
+# Create withdrawal transaction
+@router.post("/me/withdraw", response_model=Transaction)
+async def create_withdrawal(
+    amount: float = Query(..., gt=0),
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key"),
+    current_user = Depends(get_current_active_user),
+    db: Session = Depends(get_db)
+):
+    def withdraw():
+        wallet = wallet_service.get_wallet_by_user_id(db, current_user.id)
+        if wallet is None:
+            raise HTTPException(status_code=404, detail="Wallet not found")
+        
+        if wallet.balance < amount:
+            raise HTTPException(status_code=400, detail="Insufficient balance")
+        
+        return wallet_service.create_transaction(
+            db,
+            user_id=current_user.id,
+            wallet_id=wallet.id,
+            amount=-amount,  # Negative amount for withdrawal
+            transaction_type=TransactionType.WITHDRAWAL
+        )
     
-    return transaction
+    # Retries with the same Idempotency-Key replay the first response
+    return idempotency_service.execute(
+        db,
+        idempotency_key,
+        current_user.id,
+        request={"endpoint": "wallets.withdraw", "amount": amount},
+        handler=withdraw,
+        response_model=Transaction
+    )
 
 # Admin routes
 async def get_current_admin(current_user = Depends(get_current_user)):
@@ -130,6 +241,9 @@ async def get_wallet_transactions(
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=1, le=100),
     transaction_type: Optional[TransactionType] = None,
+    start_date: Optional[datetime] = None,
+    end_date: Optional[datetime] = None,
+    fields: Optional[str] = Query(None, description=FIELDS_DESCRIPTION),
     db: Session = Depends(get_db),
     current_user = Depends(get_current_admin)
 ):
@@ -137,10 +251,15 @@ async def get_wallet_transactions(
     if wallet is None:
         raise HTTPException(status_code=404, detail="Wallet not found")
     
-    return wallet_service.get_wallet_transactions(
+    field_names = parse_fields(Transaction, fields)
+    transactions = wallet_service.get_wallet_transactions(
         db, 
         wallet_id=wallet.id, 
         skip=skip, 
         limit=limit,
-        transaction_type=transaction_type
-    )
\ No newline at end of file
+        transaction_type=transaction_type,
+        start_date=start_date,
+        end_date=end_date,
+        fields=field_names
+    )
+    return sparse_response(Transaction, transactions, field_names)
\ No newline at end of file
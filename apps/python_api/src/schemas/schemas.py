@@ -212,6 +212,55 @@ class InvestmentInDB(InvestmentBase):
 class Investment(InvestmentInDB):
     plan: InvestmentPlan
 
+class StatusTotal(BaseModel):
+    count: int
+    amount: float
+
+class InvestmentTotals(BaseModel):
+    count: int
+    active_count: int
+    total_invested: float  # Principal of active investments
+    current_value: float  # Active investments, including accrued returns
+    expected_return: float  # Active investments at maturity
+    lifetime_invested: float  # Principal across every status
+    by_status: Dict[str, StatusTotal]
+
+class LoanTotals(BaseModel):
+    count: int
+    outstanding_count: int
+    outstanding_balance: float  # Remaining balance of approved, active and defaulted loans
+    total_repayable: float
+    by_status: Dict[str, StatusTotal]
+
+class PortfolioSummary(BaseModel):
+    investments: InvestmentTotals
+    loans: LoanTotals
+
+class ProjectionPoint(BaseModel):
+    day: int  # Days after as_of
+    date: datetime
+    value: float  # Total portfolio value
+
+class InvestmentProjection(BaseModel):
+    investment_id: UUID
+    plan_name: str
+    amount: float
+    current_value: float
+    projected_value: float  # Value at the end of the horizon
+    matures_at: Optional[datetime] = None
+
+class PortfolioProjection(BaseModel):
+    as_of: datetime
+    horizon_days: int
+    step_days: int
+    roi_delta: float
+    reinvest: bool
+    current_value: float
+    projected_value: float
+    projected_gain: float
+    points: List[ProjectionPoint]
+    investments: List[InvestmentProjection]
+
 # Loan Product schemas
 class LoanProductBase(BaseModel):
     name: str
@@ -368,6 +417,7 @@ class NotificationInDB(NotificationBase):
     id: UUID
     user_id: UUID
     created_at: datetime
+    updated_at: Optional[datetime] = None
 
     class Config:
         from_attributes = True
@@ -397,6 +447,139 @@ class CryptoPaymentResponse(BaseModel):
     payment_id: str
     expires_at: datetime
 
+class CryptoDepositOrderRequest(BaseModel):
+    amount: float = Field(..., gt=0)
+    currency: str
+
+class CryptoDepositOrder(BaseModel):
+    id: UUID
+    external_id: Optional[str] = None
+    amount: float
+    currency: str
+    status: str
+    payment_address: Optional[str] = None
+    transaction_hash: Optional[str] = None
+    is_processed: bool = False
+    expires_at: Optional[datetime] = None
+    created_at: datetime
+
+    class Config:
+        from_attributes = True
+
+# Bulk admin action schemas
+class BulkTransactionFilter(BaseModel):
+    user_id: Optional[UUID] = None
+    transaction_type: Optional[TransactionType] = None
+    created_before: Optional[datetime] = None
+    max_amount: Optional[float] = None
+
+class BulkTransactionAction(BaseModel):
+    ids: Optional[List[UUID]] = Field(None, max_length=10000)
+    filter: Optional[BulkTransactionFilter] = None
+    limit: int = Field(1000, ge=1, le=10000)  # Max pending transactions matched by `filter`
+    rejection_reason: Optional[str] = None
+
+class BulkTransactionItemResult(BaseModel):
+    id: UUID
+    status: str  # "approved", "rejected", "skipped", "not_found" or "failed"
+    detail: Optional[str] = None
+
+class BulkTransactionActionResult(BaseModel):
+    requested: int
+    succeeded: int
+    results: List[BulkTransactionItemResult]
+
+# Audit log schemas
+class AuditLog(BaseModel):
+    id: UUID
+    user_id: Optional[UUID] = None
+    action: str
+    entity_type: Optional[str] = None
+    entity_id: Optional[str] = None
+    details: Optional[str] = None  # JSON string
+    ip_address: Optional[str] = None
+    user_agent: Optional[str] = None
+    created_at: datetime
+
+    class Config:
+        from_attributes = True
+
+class AuditLogPage(BaseModel):
+    items: List[AuditLog]
+    next_cursor: Optional[str] = None  # Pass as `cursor` to get the next page
+
+# Ledger schemas
+class LedgerEntry(BaseModel):
+    id: UUID
+    transaction_id: UUID
+    sequence: int
+    amount: float
+    balance_after: float
+    created_at: datetime
+
+    class Config:
+        from_attributes = True
+
+class WalletBalanceAsOf(BaseModel):
+    wallet_id: UUID
+    as_of: datetime
+    balance: float
+
+class WalletStatement(BaseModel):
+    wallet_id: UUID
+    start_date: datetime
+    end_date: datetime
+    opening_balance: float
+    closing_balance: float
+    entries: List[LedgerEntry]
+
+# Reconciliation schemas
+class ReconciliationRun(BaseModel):
+    id: UUID
+    mode: str
+    status: str
+    shard_index: int
+    shard_count: int
+    high_water_mark: datetime
+    wallets_checked: int
+    mismatches_found: int
+    error: Optional[str] = None
+    started_at: datetime
+    finished_at: Optional[datetime] = None
+
+    class Config:
+        from_attributes = True
+
+class ReconciliationMismatch(BaseModel):
+    id: UUID
+    run_id: UUID
+    wallet_id: UUID
+    stored_balance: float
+    expected_balance: float
+    difference: float
+    created_at: datetime
+
+    class Config:
+        from_attributes = True
+
+# Analytics schemas
+class TimeseriesPoint(BaseModel):
+    bucket_start: datetime
+    count: int
+    total: float
+
+class TimeseriesSeries(BaseModel):
+    metric: str  # Transaction type, or "loan_disbursement"
+    status: str
+    points: List[TimeseriesPoint]
+
+class Timeseries(BaseModel):
+    granularity: str
+    start_date: datetime
+    end_date: datetime
+    rolled_up_through: Optional[datetime] = None  # Changes after this are not in the rollups yet
+    series: List[TimeseriesSeries]
+
 # Admin Dashboard schemas
 class DashboardStats(BaseModel):
     total_users: int
@@ -406,4 +589,66 @@ class DashboardStats(BaseModel):
     total_loans: float
     active_loans: int
     pending_withdrawals: int
-    pending_kyc: int
\ No newline at end of file
+    pending_kyc: int
+
+# Mobile home schemas
+class HomeScreen(BaseModel):
+    user: User
+    wallet: Optional[Wallet] = None
+    recent_transactions: List[Transaction]
+    active_investments: List[Investment]
+    active_loans: List[Loan]
+    unread_notifications: int
+    portfolio: PortfolioSummary
+
+# Delta sync schemas
+class TransactionChanges(BaseModel):
+    created: List[Transaction] = []
+    updated: List[Transaction] = []
+    deleted: List[UUID] = []
+
+class InvestmentChanges(BaseModel):
+    created: List[Investment] = []
+    updated: List[Investment] = []
+    deleted: List[UUID] = []
+
+class LoanChanges(BaseModel):
+    created: List[Loan] = []
+    updated: List[Loan] = []
+    deleted: List[UUID] = []
+
+class NotificationChanges(BaseModel):
+    created: List[Notification] = []
+    updated: List[Notification] = []
+    deleted: List[UUID] = []
+
+class SyncChanges(BaseModel):
+    next_token: str
+    has_more: bool  # Call again with next_token right away to get the rest of this sync
+    reset: bool  # Drop local data first: this is a full sync (no token, or one older than tombstones are kept)
+    transactions: TransactionChanges
+    investments: InvestmentChanges
+    loans: LoanChanges
+    notifications: NotificationChanges
+
+# Tracing schemas
+class TraceSpan(BaseModel):
+    span_id: str
+    parent_id: Optional[str] = None
+    name: str
+    offset_ms: float  # From the start of the trace
+    duration_ms: float
+    attributes: Dict[str, Any] = {}
+    error: Optional[str] = None
+
+class TraceSummary(BaseModel):
+    trace_id: str
+    name: str  # Root span: "GET /route/template" or "task <name>"
+    started_at: datetime
+    duration_ms: float
+    span_count: int
+    dropped_spans: int = 0  # Spans not recorded past TRACE_MAX_SPANS
+    error: Optional[str] = None
+
+class TraceDetail(TraceSummary):
+    spans: List[TraceSpan]
\ No newline at end of file
@@ -0,0 +1,178 @@
+from sqlalchemy.orm import Session
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+from datetime import datetime, timedelta
+import os
+
+from core.archive import naive_utc
+from core.tracing import traced
+from core.watermark import new_high_water_mark, read_from
+from models.models import TransactionType
+from repositories.analytics_repository import AnalyticsRepository, LOAN_DISBURSEMENT_METRIC
+
+ANALYTICS_METRICS = [transaction_type.value for transaction_type in TransactionType] + [LOAN_DISBURSEMENT_METRIC]
+TIMESERIES_GRANULARITIES = ("hour", "day", "week", "month")
+# Most points a single time-series request may return
+ANALYTICS_MAX_POINTS = int(os.getenv("ANALYTICS_MAX_POINTS", "2000"))
+# Hours rebuilt per aggregate query (and per commit)
+ANALYTICS_ROLLUP_CHUNK_HOURS = int(os.getenv("ANALYTICS_ROLLUP_CHUNK_HOURS", "168"))
+
+ROLLUP_STATE_NAME = "transactions"
+HOUR = timedelta(hours=1)
+DAY = timedelta(days=1)
+
+def bucket_start(value: datetime, granularity: str) -> datetime:
+    """
+    Start (naive UTC) of the hour, day, ISO week or month containing `value`
+    """
+    value = naive_utc(value).replace(minute=0, second=0, microsecond=0)
+    if granularity == "hour":
+        return value
+    value = value.replace(hour=0)
+    if granularity == "week":
+        return value - timedelta(days=value.weekday())
+    if granularity == "month":
+        return value.replace(day=1)
+    return value
+
+def next_bucket(start: datetime, granularity: str) -> datetime:
+    """
+    Start of the bucket following the one starting at `start`
+    """
+    if granularity == "hour":
+        return start + HOUR
+    if granularity == "week":
+        return start + timedelta(weeks=1)
+    if granularity == "month":
+        return (start + timedelta(days=32)).replace(day=1)
+    return start + DAY
+
+def hour_ranges(hours: Iterable[datetime], chunk_hours: int) -> List[Tuple[datetime, datetime]]:
+    """
+    Merge hour starts into [start, end) ranges of consecutive hours, each at
+    most `chunk_hours` long
+    """
+    ranges = []
+    for hour in sorted(set(hours)):
+        if ranges and ranges[-1][1] == hour and ranges[-1][1] - ranges[-1][0] < chunk_hours * HOUR:
+            ranges[-1][1] = hour + HOUR
+        else:
+            ranges.append([hour, hour + HOUR])
+    return [(start, end) for start, end in ranges]
+
+@traced
+class AnalyticsService:
+    def __init__(self):
+        self.analytics_repository = AnalyticsRepository()
+    
+    def update_rollups(self, db: Session, full: bool = False) -> Dict[str, Any]:
+        """
+        Bring the hourly and daily rollups up to date.
+        
+        Incremental runs rebuild only the hours holding a transaction or
+        disbursed loan created or updated since the last run's high-water
+        mark, so status changes move amounts between statuses. A full run
+        (or the first one) rebuilds every hour since the first activity.
+        """
+        high_water_mark = new_high_water_mark()
+        last_mark = None if full else self.analytics_repository.get_high_water_mark(db, ROLLUP_STATE_NAME)
+        
+        if last_mark is None:
+            mode = "full"
+            first = self.analytics_repository.get_first_activity(db)
+            hours = []
+            if first is not None:
+                hour = bucket_start(first, "day")
+                while hour <= high_water_mark:
+                    hours.append(hour)
+                    hour += HOUR
+        else:
+            mode = "incremental"
+            since = read_from(last_mark)
+            hours = [bucket_start(t, "hour") for t in self.analytics_repository.get_changed_activity_times(db, since)]
+        
+        ranges = hour_ranges(hours, ANALYTICS_ROLLUP_CHUNK_HOURS)
+        for start, end in ranges:
+            self.rebuild_range(db, start, end)
+        
+        self.analytics_repository.set_high_water_mark(db, ROLLUP_STATE_NAME, high_water_mark)
+        db.commit()
+        return {
+            "mode": mode,
+            "hours_rebuilt": sum((end - start) // HOUR for start, end in ranges),
+            "high_water_mark": high_water_mark
+        }
+    
+    def rebuild_range(self, db: Session, start: datetime, end: datetime) -> None:
+        """
+        Recompute the hourly rollups in [start, end) from the source tables,
+        then the daily rollups of every day they touch from the hourly ones
+        """
+        self.analytics_repository.replace_rollups(
+            db, "hour", start, end, self.analytics_repository.aggregate_hours(db, start, end)
+        )
+        db.flush()
+        
+        day_start = bucket_start(start, "day")
+        day_end = next_bucket(bucket_start(end - HOUR, "day"), "day")
+        self.analytics_repository.replace_rollups(
+            db, "day", day_start, day_end,
+            self.analytics_repository.aggregate_rollups(db, "hour", day_start, day_end, DAY)
+        )
+        db.commit()
+    
+    def get_timeseries(self, db: Session, start_date: datetime, end_date: datetime, granularity: str = "day",
+                       metrics: Optional[List[str]] = None, statuses: Optional[List[str]] = None) -> Dict[str, Any]:
+        """
+        Get count and total per bucket for each metric and status, read from
+        the rollups. The range is widened to whole buckets and empty buckets
+        are returned as zeros.
+        """
+        if granularity not in TIMESERIES_GRANULARITIES:
+            raise ValueError(f"granularity must be one of: {', '.join(TIMESERIES_GRANULARITIES)}")
+        unknown = set(metrics or []) - set(ANALYTICS_METRICS)
+        if unknown:
+            raise ValueError(f"Unknown metrics: {', '.join(sorted(unknown))}")
+        start_date, end_date = naive_utc(start_date), naive_utc(end_date)
+        if end_date <= start_date:
+            raise ValueError("end_date must be after start_date")
+        
+        start = bucket_start(start_date, granularity)
+        end_bucket = bucket_start(end_date, granularity)
+        end = end_bucket if end_bucket == end_date else next_bucket(end_bucket, granularity)
+        
+        buckets = [start]
+        while next_bucket(buckets[-1], granularity) < end:
+            buckets.append(next_bucket(buckets[-1], granularity))
+            if len(buckets) > ANALYTICS_MAX_POINTS:
+                raise ValueError(f"Range spans more than {ANALYTICS_MAX_POINTS} {granularity} buckets")
+        
+        # Hours come from the hourly rollups; days, weeks and months from the daily ones
+        source = "hour" if granularity == "hour" else "day"
+        series: Dict[Tuple[str, str], Dict[datetime, Tuple[int, float]]] = {}
+        for rollup in self.analytics_repository.get_rollups(db, source, start, end, metrics, statuses):
+            points = series.setdefault((rollup.metric, rollup.status), {})
+            bucket = bucket_start(rollup.bucket_start, granularity)
+            count, total = points.get(bucket, (0, 0.0))
+            points[bucket] = (count + rollup.count, total + rollup.total)
+        
+        return {
+            "granularity": granularity,
+            "start_date": start,
+            "end_date": end,
+            "rolled_up_through": self.analytics_repository.get_high_water_mark(db, ROLLUP_STATE_NAME),
+            "series": [
+                {
+                    "metric": metric,
+                    "status": status,
+                    "points": [
+                        {
+                            "bucket_start": bucket,
+                            "count": points.get(bucket, (0, 0.0))[0],
+                            "total": round(points.get(bucket, (0, 0.0))[1], 2)
+                        }
+                        for bucket in buckets
+                    ]
+                }
+                for (metric, status), points in sorted(series.items())
+            ]
+        }
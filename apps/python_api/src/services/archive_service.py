@@ -0,0 +1,141 @@
+from sqlalchemy.orm import Session
+from typing import Callable, Dict, List, Optional, Tuple
+from uuid import UUID
+from datetime import datetime
+import logging
+import os
+
+from core.archive import ArchiveStore, encode_row, naive_utc
+from core.tracing import traced
+from db.partitioning import month_start, add_months
+from models.models import (
+    Transaction, TransactionStatus, AuditLog, LedgerEntry, CREDIT_TRANSACTION_TYPES, DEBIT_TRANSACTION_TYPES
+)
+from repositories.archive_repository import ArchiveRepository
+
+logger = logging.getLogger(__name__)
+
+# Rows older than this many whole months are moved to cold storage
+ARCHIVE_AFTER_MONTHS = int(os.getenv("ARCHIVE_AFTER_MONTHS", "12"))
+# Rows per archive file and per delete transaction
+ARCHIVE_BATCH_SIZE = int(os.getenv("ARCHIVE_BATCH_SIZE", "10000"))
+
+def archive_file_name(rows: List) -> str:
+    """
+    Deterministic name for a batch: a rerun after a crash between writing the
+    file and deleting its rows finds the same file instead of writing a copy
+    """
+    first = rows[0]
+    created_at = naive_utc(first.created_at)
+    return f"{created_at:%Y-%m}/{created_at:%Y%m%dT%H%M%S%f}-{first.id.hex}.ndjson.gz"
+
+@traced
+class ArchiveService:
+    def __init__(self, archive_store: Optional[ArchiveStore] = None):
+        self.archive_store = archive_store or ArchiveStore()
+        self.archive_repository = ArchiveRepository()
+    
+    def archive_cutoff(self, now: Optional[datetime] = None) -> datetime:
+        """
+        Start of the oldest month kept in the live tables. Cutting at month
+        boundaries keeps archive files aligned with monthly partitions.
+        """
+        return add_months(month_start(now or datetime.utcnow()), -ARCHIVE_AFTER_MONTHS)
+    
+    def archive_transactions(self, db: Session, before: Optional[datetime] = None,
+                             batch_size: Optional[int] = None) -> int:
+        """
+        Move settled transactions created before `before`, and their ledger
+        postings, to cold storage. The net of archived completed transactions
+        is carried per wallet so reconciliation totals are unchanged.
+        """
+        return self._archive(
+            db,
+            Transaction,
+            self.archive_repository.get_archivable_transactions,
+            before or self.archive_cutoff(),
+            batch_size or ARCHIVE_BATCH_SIZE,
+            on_delete=self._archive_postings_and_carry_totals
+        )
+    
+    def archive_audit_logs(self, db: Session, before: Optional[datetime] = None,
+                           batch_size: Optional[int] = None) -> int:
+        """
+        Move audit logs created before `before` to cold storage
+        """
+        return self._archive(
+            db,
+            AuditLog,
+            self.archive_repository.get_archivable_audit_logs,
+            before or self.archive_cutoff(),
+            batch_size or ARCHIVE_BATCH_SIZE
+        )
+    
+    def _archive(self, db: Session, model, fetch_batch: Callable, before: datetime, batch_size: int,
+                 on_delete: Optional[Callable] = None) -> int:
+        """
+        Archive in batches, oldest first. Each batch is written and fsynced and
+        recorded in the manifest before its rows are deleted in one database
+        transaction, so a crash at any point loses nothing.
+        """
+        table = model.__tablename__
+        total = 0
+        while True:
+            rows = fetch_batch(db, before, limit=batch_size)
+            if not rows:
+                return total
+            
+            name = archive_file_name(rows)
+            if self.archive_store.has_file(table, name):
+                # Written by a run that stopped before deleting: delete only what the file holds
+                archived_ids = {UUID(row["id"]) for row in self.archive_store.read_file(table, name)}
+                rows = [row for row in rows if row.id in archived_ids]
+                if not rows:
+                    raise RuntimeError(f"Archive file {table}/{name} does not match the live rows")
+            else:
+                self.archive_store.write_file(table, name, [encode_row(row) for row in rows])
+            
+            try:
+                if on_delete:
+                    on_delete(db, rows, name)
+                self.archive_repository.delete_by_ids(db, model, [row.id for row in rows])
+                db.commit()
+            except Exception:
+                db.rollback()
+                raise
+            
+            total += len(rows)
+            logger.info("Archived %d %s rows to %s", len(rows), table, name)
+    
+    def _archive_postings_and_carry_totals(self, db: Session, transactions: List[Transaction], name: str) -> None:
+        """
+        Archive the ledger postings of a batch of transactions under the batch's
+        file name (before their transactions are deleted), and carry the batch's
+        totals
+        """
+        table = LedgerEntry.__tablename__
+        transaction_ids = [transaction.id for transaction in transactions]
+        if not self.archive_store.has_file(table, name):
+            entries = self.archive_repository.get_ledger_entries(db, transaction_ids)
+            if entries:
+                self.archive_store.write_file(table, name, [encode_row(entry) for entry in entries])
+        self.archive_repository.delete_ledger_entries(db, transaction_ids)
+        self._carry_wallet_totals(db, transactions)
+    
+    def _carry_wallet_totals(self, db: Session, transactions: List[Transaction]) -> None:
+        """
+        Add archived completed transactions to their wallets' archived totals
+        """
+        totals: Dict[UUID, Tuple[float, int]] = {}
+        for transaction in transactions:
+            if transaction.status != TransactionStatus.COMPLETED or transaction.wallet_id is None:
+                continue
+            if transaction.type in CREDIT_TRANSACTION_TYPES:
+                amount = abs(transaction.amount or 0.0)
+            elif transaction.type in DEBIT_TRANSACTION_TYPES:
+                amount = -abs(transaction.amount or 0.0)
+            else:
+                amount = 0.0
+            net_amount, count = totals.get(transaction.wallet_id, (0.0, 0))
+            totals[transaction.wallet_id] = (net_amount + amount, count + 1)
+        self.archive_repository.add_wallet_totals(db, totals)
@@ -1,27 +1,61 @@
 from sqlalchemy.orm import Session
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, Tuple
 from uuid import UUID
 from datetime import datetime
+import base64
 import json
 
 from models.models import AuditLog, User
 from repositories.audit_repository import AuditRepository
+from services.audit_writer import AUDIT_ASYNC_WRITES, audit_writer, new_audit_event
+from core.tracing import traced
 
+def encode_cursor(audit_log: AuditLog) -> str:
+    """
+    Opaque keyset cursor pointing just after `audit_log`
+    """
+    raw = f"{audit_log.created_at.isoformat()}|{audit_log.id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+def decode_cursor(cursor: str) -> Tuple[datetime, UUID]:
+    """
+    Parse a cursor from encode_cursor. Raises ValueError if it is malformed.
+    """
+    try:
+        created_at, audit_log_id = base64.urlsafe_b64decode(cursor.encode()).decode().split("|")
+        return datetime.fromisoformat(created_at), UUID(audit_log_id)
+    except Exception:
+        raise ValueError("Invalid cursor")
+
+@traced
 class AuditService:
     def __init__(self):
         self.audit_repository = AuditRepository()
+        self.audit_writer = audit_writer
     
     def log_action(self, db: Session, user_id: Optional[UUID], action: str, entity_type: str, 
                   entity_id: str, details: Optional[Dict[str, Any]] = None, 
                   ip_address: Optional[str] = None, user_agent: Optional[str] = None) -> AuditLog:
         """
-        Log an action in the audit log
+        Log an action in the audit log. With AUDIT_ASYNC_WRITES the entry is
+        queued for the background writer and returned unsaved.
         """
         # Convert details to JSON string if provided
         details_json = json.dumps(details) if details else None
         
-        return self.audit_repository.create(
-            db=db,
+        if not AUDIT_ASYNC_WRITES:
+            return self.audit_repository.create(
+                db=db,
+                user_id=user_id,
+                action=action,
+                entity_type=entity_type,
+                entity_id=str(entity_id),
+                details=details_json,
+                ip_address=ip_address,
+                user_agent=user_agent
+            )
+        
+        event = new_audit_event(
             user_id=user_id,
             action=action,
             entity_type=entity_type,
@@ -30,6 +64,33 @@ class AuditService:
             ip_address=ip_address,
             user_agent=user_agent
         )
+        self.audit_writer.submit(event)
+        return AuditLog(**event)
+    
+    def get_audit_logs(self, db: Session, limit: int = 100, cursor: Optional[str] = None,
+                       user_id: Optional[UUID] = None, action: Optional[str] = None,
+                       entity_type: Optional[str] = None, entity_id: Optional[str] = None,
+                       start_date: Optional[datetime] = None, end_date: Optional[datetime] = None,
+                       search: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Get one page of audit logs matching any combination of filters, newest
+        first, with the cursor for the next page (None on the last page)
+        """
+        audit_logs = self.audit_repository.search(
+            db,
+            user_id=user_id,
+            action=action,
+            entity_type=entity_type,
+            entity_id=entity_id,
+            start_date=start_date,
+            end_date=end_date,
+            text=search,
+            before=decode_cursor(cursor) if cursor else None,
+            limit=limit + 1
+        )
+        
+        next_cursor = encode_cursor(audit_logs[limit - 1]) if len(audit_logs) > limit else None
+        return {"items": audit_logs[:limit], "next_cursor": next_cursor}
     
     def get_audit_log(self, db: Session, audit_log_id: UUID) -> Optional[AuditLog]:
         """
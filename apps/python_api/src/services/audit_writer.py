@@ -0,0 +1,265 @@
+from sqlalchemy.orm import Session
+from typing import Any, Callable, Dict, List, Optional
+from datetime import datetime
+import atexit
+import fcntl
+import glob
+import json
+import logging
+import os
+import queue
+import threading
+import time
+import uuid
+
+from core.archive import decode_row, encode_row
+from db.database import SessionLocal
+from models.models import AuditLog
+from repositories.audit_repository import AuditRepository
+
+logger = logging.getLogger(__name__)
+
+# Write audit events in the background instead of in the request path
+AUDIT_ASYNC_WRITES = os.getenv("AUDIT_ASYNC_WRITES", "true").lower() == "true"
+# Flush when this many events are queued...
+AUDIT_BATCH_SIZE = int(os.getenv("AUDIT_BATCH_SIZE", "100"))
+# ...or when the oldest queued event has waited this long
+AUDIT_FLUSH_INTERVAL_MS = int(os.getenv("AUDIT_FLUSH_INTERVAL_MS", "200"))
+AUDIT_QUEUE_SIZE = int(os.getenv("AUDIT_QUEUE_SIZE", "10000"))
+# Events that cannot be written to the database are appended here and replayed
+# later. Processes may share it: appends and replays lock it with flock.
+AUDIT_SPOOL_PATH = os.getenv("AUDIT_SPOOL_PATH", os.path.join(os.getcwd(), "audit_spool.ndjson"))
+
+class AuditWriter:
+    """
+    Buffers audit events in-process and writes them with multi-row inserts
+    from a background thread.
+    
+    A batch is flushed once `batch_size` events are queued or the oldest has
+    waited `flush_interval_ms`. If the database is unavailable the batch is
+    appended to a local spool file, which is replayed after the next
+    successful flush. A replay first renames the spool to a name private to
+    the replaying process, so events other processes append meanwhile go to a
+    new spool instead of being removed with the replayed one. `close()` (also run at interpreter exit) drains the
+    queue before returning.
+    """
+    def __init__(self, session_factory: Callable[[], Session] = SessionLocal, batch_size: int = AUDIT_BATCH_SIZE,
+                 flush_interval_ms: int = AUDIT_FLUSH_INTERVAL_MS, spool_path: str = AUDIT_SPOOL_PATH,
+                 max_queue_size: int = AUDIT_QUEUE_SIZE):
+        self.session_factory = session_factory
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval_ms / 1000.0
+        self.spool_path = spool_path
+        self.audit_repository = AuditRepository()
+        self._queue: "queue.Queue[Dict[str, Any]]" = queue.Queue(maxsize=max_queue_size)
+        self._write_lock = threading.Lock()
+        self._spool_lock = threading.Lock()
+        self._start_lock = threading.Lock()
+        self._stopping = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.written = 0
+        self.spooled = 0
+    
+    def submit(self, event: Dict[str, Any]) -> None:
+        """
+        Queue an audit row (AuditLog column values) for writing
+        """
+        self._ensure_started()
+        try:
+            self._queue.put_nowait(event)
+        except queue.Full:
+            # Never block the request path: keep the event durable on disk instead
+            self._spool([event])
+    
+    def _ensure_started(self) -> None:
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._start_lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._stopping.clear()
+                self._thread = threading.Thread(target=self._run, name="audit-writer", daemon=True)
+                self._thread.start()
+    
+    def _run(self) -> None:
+        while True:
+            batch = self._next_batch()
+            if batch:
+                self._write(batch)
+            elif self._stopping.is_set():
+                return
+    
+    def _next_batch(self) -> List[Dict[str, Any]]:
+        """
+        Wait for an event, then collect more until the batch is full or the
+        flush interval has passed
+        """
+        try:
+            # Short wait so close() is not held up by an idle writer
+            batch = [self._queue.get(timeout=min(self.flush_interval, 0.1))]
+        except queue.Empty:
+            return []
+        
+        deadline = time.monotonic() + self.flush_interval
+        while len(batch) < self.batch_size and not self._stopping.is_set():
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+    
+    def flush(self) -> None:
+        """
+        Write everything queued so far from the calling thread
+        """
+        while True:
+            batch = []
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            if not batch:
+                return
+            self._write(batch)
+    
+    def _write(self, batch: List[Dict[str, Any]]) -> None:
+        with self._write_lock:
+            db = self.session_factory()
+            try:
+                self.audit_repository.create_many(db, batch)
+                db.commit()
+                self.written += len(batch)
+            except Exception as e:
+                db.rollback()
+                logger.warning("Audit writer: database write failed (%s), spooling %d events", e, len(batch))
+                self._spool(batch)
+                return
+            finally:
+                db.close()
+            
+            self._replay_spool()
+    
+    def _spool(self, batch: List[Dict[str, Any]]) -> None:
+        """
+        Append events to the spool file and fsync it
+        """
+        lines = "".join(json.dumps(encode_row(AuditLog(**event))) + "\n" for event in batch)
+        with self._spool_lock:
+            while True:
+                with open(self.spool_path, "a") as f:
+                    fcntl.flock(f, fcntl.LOCK_EX)
+                    if not _is_current_file(f, self.spool_path):
+                        # Claimed by a replay while we waited for the lock: append to the new spool
+                        continue
+                    f.write(lines)
+                    f.flush()
+                    os.fsync(f.fileno())
+                break
+            self.spooled += len(batch)
+    
+    def _replay_spool(self) -> None:
+        """
+        Claim the spool (and spools left by failed replays of this process or by
+        processes that have exited) by renaming it, then replay the claimed files
+        """
+        with self._spool_lock:
+            leftovers = [
+                path for path in sorted(glob.glob(glob.escape(self.spool_path) + ".replay-*"))
+                if _claimed_by(path) == os.getpid() or not _pid_alive(_claimed_by(path))
+            ]
+            for path in [self.spool_path] + leftovers:
+                claimed = f"{self.spool_path}.replay-{os.getpid()}-{uuid.uuid4().hex}"
+                try:
+                    os.rename(path, claimed)
+                except FileNotFoundError:
+                    continue
+                if not self._replay_file(claimed):
+                    return
+    
+    def _replay_file(self, path: str) -> bool:
+        """
+        Insert the events of a claimed spool file that are not in the database
+        yet, then remove it. Events carry their own IDs, so a replay interrupted
+        after its commit does not insert duplicates the next time.
+        """
+        with open(path) as f:
+            # Waits for a writer that opened the spool before it was claimed
+            fcntl.flock(f, fcntl.LOCK_EX)
+            rows = [decode_row(AuditLog, json.loads(line)) for line in f if line.strip()]
+        
+        db = self.session_factory()
+        try:
+            existing = self.audit_repository.get_existing_ids(db, [row.id for row in rows])
+            self.audit_repository.create_many(db, [
+                {column.key: getattr(row, column.key) for column in AuditLog.__table__.columns}
+                for row in rows if row.id not in existing
+            ])
+            db.commit()
+        except Exception as e:
+            db.rollback()
+            logger.warning("Audit writer: spool replay failed (%s), will retry", e)
+            return False
+        finally:
+            db.close()
+        
+        os.remove(path)
+        self.written += len(rows) - len(existing)
+        logger.info("Audit writer: replayed %d spooled events", len(rows))
+        return True
+    
+    def close(self, timeout: float = 10.0) -> None:
+        """
+        Stop the background thread and write everything still queued
+        """
+        self._stopping.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+        self.flush()
+        self._replay_spool()
+
+def _is_current_file(f, path: str) -> bool:
+    """
+    Whether the open file `f` is still the file at `path` (not renamed away)
+    """
+    try:
+        return os.stat(path).st_ino == os.fstat(f.fileno()).st_ino
+    except FileNotFoundError:
+        return False
+
+def _claimed_by(path: str) -> int:
+    """
+    PID of the process that claimed a spool file for replay
+    """
+    return int(path.rsplit(".replay-", 1)[1].split("-", 1)[0])
+
+def _pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+audit_writer = AuditWriter()
+atexit.register(audit_writer.close)
+
+def new_audit_event(user_id, action: str, entity_type: str, entity_id: str, details: Optional[str] = None,
+                    ip_address: Optional[str] = None, user_agent: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Build an audit row stamped with its own ID and the time of the action
+    """
+    return {
+        "id": uuid.uuid4(),
+        "user_id": user_id,
+        "action": action,
+        "entity_type": entity_type,
+        "entity_id": entity_id,
+        "details": details,
+        "ip_address": ip_address,
+        "user_agent": user_agent,
+        "created_at": datetime.utcnow()
+    }
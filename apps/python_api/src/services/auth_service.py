@@ -5,9 +5,11 @@ from uuid import UUID
 from models.models import User
 from schemas.schemas import UserCreate, UserRole, UserInDB
 from core.security import get_password_hash, verify_password
+from core.tracing import traced
 from repositories.user_repository import UserRepository
 from repositories.wallet_repository import WalletRepository
 
+@traced
 class AuthService:
     def __init__(self):
         self.user_repository = UserRepository()
@@ -58,7 +60,7 @@ class AuthService:
         if not verify_password(password, user.hashed_password):
             return None
         return user
-        
+    
     def create_superuser(self, db: Session, user_data: dict) -> User:
         """
         Create a new superuser with full CRUD abilities
@@ -0,0 +1,150 @@
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import Session
+from typing import Dict, List, Optional, Tuple
+from uuid import UUID
+import hashlib
+import json
+import os
+import threading
+import time
+
+from core.metrics import CACHE_REQUESTS
+from repositories.catalog_repository import CatalogRepository
+from schemas.schemas import InvestmentPlan, LoanProduct
+
+# How often a process checks whether another process changed the catalog; a write
+# in this process takes effect here immediately
+CATALOG_CACHE_CHECK_SECONDS = float(os.getenv("CATALOG_CACHE_CHECK_SECONDS", "5"))
+
+CATALOG_CACHE_NAME = "catalog"
+
+# Cache lookups reported on /metrics; a miss reloads the whole catalog
+_HITS = CACHE_REQUESTS.labels(CATALOG_CACHE_NAME, "hit")
+_MISSES = CACHE_REQUESTS.labels(CATALOG_CACHE_NAME, "miss")
+
+def _digest(items: List) -> str:
+    payload = json.dumps([item.model_dump(mode="json") for item in items], sort_keys=True)
+    return hashlib.sha256(payload.encode()).hexdigest()[:32]
+
+class CatalogSnapshot:
+    """
+    One immutable load of every investment plan and loan product
+    """
+    def __init__(self, bind, version: int, plans: List[InvestmentPlan], products: List[LoanProduct]):
+        self.bind = bind
+        self.version = version
+        self.checked_at = time.monotonic()
+        self.plans: Dict[UUID, InvestmentPlan] = {plan.id: plan for plan in plans}
+        self.products: Dict[UUID, LoanProduct] = {product.id: product for product in products}
+        self.active_plans = [plan for plan in plans if plan.is_active]
+        self.active_products = [product for product in products if product.is_active]
+        self.active_plans_digest = _digest(self.active_plans)
+        self.active_products_digest = _digest(self.active_products)
+
+class CatalogCache:
+    """
+    In-process cache of the investment plan and loan product catalog.
+    
+    The catalog changes a few times a month, so every plan and product is
+    kept in memory and served without touching the database. Admin writes
+    bump a version row in `cache_versions`; each process compares it with
+    the version it loaded at most every CATALOG_CACHE_CHECK_SECONDS and
+    reloads when it moved. Cached entries are read-only schema objects, not
+    ORM instances; write through the repositories.
+    """
+    def __init__(self, check_seconds: float = CATALOG_CACHE_CHECK_SECONDS):
+        self.check_seconds = check_seconds
+        self.catalog_repository = CatalogRepository()
+        self._snapshot: Optional[CatalogSnapshot] = None
+        self._lock = threading.Lock()
+    
+    def get_snapshot(self, db: Session, force_check: bool = False) -> CatalogSnapshot:
+        """
+        Get the current catalog, checking its version when the last check is
+        older than `check_seconds` (or `force_check` is set)
+        """
+        bind = db.get_bind()
+        snapshot = self._snapshot
+        if (snapshot is not None and snapshot.bind is bind and not force_check
+                and time.monotonic() - snapshot.checked_at < self.check_seconds):
+            _HITS.inc()
+            return snapshot
+        
+        with self._lock:
+            version = self.catalog_repository.get_version(db, CATALOG_CACHE_NAME)
+            snapshot = self._snapshot
+            if snapshot is not None and snapshot.bind is bind and snapshot.version == version:
+                snapshot.checked_at = time.monotonic()
+                _HITS.inc()
+                return snapshot
+            
+            _MISSES.inc()
+            snapshot = CatalogSnapshot(
+                bind, version,
+                [InvestmentPlan.model_validate(plan) for plan in self.catalog_repository.get_plans(db)],
+                [LoanProduct.model_validate(product) for product in self.catalog_repository.get_products(db)]
+            )
+            self._snapshot = snapshot
+            return snapshot
+    
+    def warm(self, db: Session) -> bool:
+        """
+        Load the catalog ahead of the first request. Returns False if the
+        database is not reachable yet; the catalog then loads on first use.
+        """
+        try:
+            self.get_snapshot(db, force_check=True)
+            return True
+        except SQLAlchemyError:
+            db.rollback()
+            return False
+    
+    def invalidate(self, db: Session) -> None:
+        """
+        Record a catalog write so every process reloads, and drop this
+        process's copy right away
+        """
+        self.catalog_repository.bump_version(db, CATALOG_CACHE_NAME)
+        db.commit()
+        with self._lock:
+            self._snapshot = None
+    
+    def get_plan(self, db: Session, plan_id: UUID) -> Optional[InvestmentPlan]:
+        """
+        Get an investment plan by ID. An unknown ID forces a version check in
+        case the plan was just created by another process.
+        """
+        plan = self.get_snapshot(db).plans.get(plan_id)
+        if plan is None:
+            plan = self.get_snapshot(db, force_check=True).plans.get(plan_id)
+        return plan
+    
+    def get_product(self, db: Session, product_id: UUID) -> Optional[LoanProduct]:
+        """
+        Get a loan product by ID. An unknown ID forces a version check in
+        case the product was just created by another process.
+        """
+        product = self.get_snapshot(db).products.get(product_id)
+        if product is None:
+            product = self.get_snapshot(db, force_check=True).products.get(product_id)
+        return product
+    
+    def get_active_plans(self, db: Session, skip: int = 0, limit: int = 100) -> Tuple[List[InvestmentPlan], str]:
+        """
+        Get a page of active investment plans and its ETag, which is equal
+        across processes holding the same catalog
+        """
+        snapshot = self.get_snapshot(db)
+        etag = f'"plans-{snapshot.active_plans_digest}-{skip}-{limit}"'
+        return snapshot.active_plans[skip:skip + limit], etag
+    
+    def get_active_products(self, db: Session, skip: int = 0, limit: int = 100) -> Tuple[List[LoanProduct], str]:
+        """
+        Get a page of active loan products and its ETag, which is equal
+        across processes holding the same catalog
+        """
+        snapshot = self.get_snapshot(db)
+        etag = f'"products-{snapshot.active_products_digest}-{skip}-{limit}"'
+        return snapshot.active_products[skip:skip + limit], etag
+
+catalog_cache = CatalogCache()
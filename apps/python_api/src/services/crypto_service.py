@@ -1,16 +1,37 @@
 from sqlalchemy.orm import Session
-from typing import Dict, Any, Optional, List
+from typing import TYPE_CHECKING, Dict, Any, Optional, List
 from uuid import UUID
-import httpx
 import hmac
 import hashlib
+import asyncio
 import os
+import time
 from datetime import datetime
 
+from core.circuit_breaker import RetryBudget, backoff_delay, get_breaker
+from core.metrics import PROVIDER_DURATION
+from core.tracing import record_span, traced
 from models.models import TransactionType, TransactionStatus, Order
 from repositories.order_repository import OrderRepository
 from services.wallet_service import WalletService
 
+# The HTTP client is imported when the provider is first called, not at startup
+if TYPE_CHECKING:
+    import httpx
+
+class ProviderUnavailableError(ValueError):
+    """
+    Raised without calling the provider when its circuit breaker is open
+    """
+    pass
+
+# Shared by every CryptoService instance so retries are budgeted process-wide
+_retry_budget = RetryBudget(
+    ratio=float(os.getenv("CRYPTO_RETRY_BUDGET_RATIO", "0.2")),
+    min_retries_per_second=float(os.getenv("CRYPTO_RETRY_MIN_PER_SECOND", "1.0"))
+)
+
+@traced
 class CryptoService:
     def __init__(self):
         self.order_repository = OrderRepository()
@@ -19,11 +40,84 @@ class CryptoService:
         self.api_secret = os.getenv("CRYPTO_API_SECRET")
         self.api_base_url = os.getenv("CRYPTO_API_BASE_URL")
         self.webhook_secret = os.getenv("CRYPTO_WEBHOOK_SECRET")
+        self.webhook_url = os.getenv(
+            "CRYPTO_WEBHOOK_URL",
+            f"{os.getenv('API_BASE_URL', 'http://localhost:8000')}/crypto-deposits/webhook"
+        )
+        self.api_timeout = float(os.getenv("CRYPTO_API_TIMEOUT", "30.0"))
+        self.max_retries = int(os.getenv("CRYPTO_API_MAX_RETRIES", "2"))
+        self.breaker_failure_threshold = int(os.getenv("CRYPTO_BREAKER_FAILURE_THRESHOLD", "5"))
+        self.breaker_recovery_timeout = float(os.getenv("CRYPTO_BREAKER_RECOVERY_SECONDS", "30.0"))
+        self.retry_budget = _retry_budget
+    
+    async def _request(self, endpoint: str, method: str, path: str, idempotent: bool = False,
+                       timeout: Optional[float] = None, **kwargs) -> "httpx.Response":
+        """
+        Call the provider through the endpoint's circuit breaker.
+        
+        Idempotent calls are retried on connection errors, 5xx and 429 responses
+        with jittered exponential backoff, as long as the retry budget allows.
+        Non-idempotent calls are never retried so orders cannot be duplicated.
+        """
+        import httpx
+        breaker = get_breaker(
+            f"crypto_provider.{endpoint}",
+            failure_threshold=self.breaker_failure_threshold,
+            recovery_timeout=self.breaker_recovery_timeout
+        )
+        self.retry_budget.record_request()
+        
+        attempt = 0
+        while True:
+            if not breaker.allow_request():
+                raise ProviderUnavailableError(
+                    f"Crypto payment provider is unavailable, retry in {breaker.retry_after():.0f}s"
+                )
+            
+            error = None
+            response = None
+            started = time.perf_counter()
+            try:
+                async with httpx.AsyncClient(timeout=timeout or self.api_timeout) as client:
+                    response = await client.request(
+                        method,
+                        f"{self.api_base_url}{path}",
+                        headers={
+                            "Authorization": f"Bearer {self.api_key}",
+                            "Content-Type": "application/json"
+                        },
+                        **kwargs
+                    )
+            except httpx.HTTPError as e:
+                error = e
+            except BaseException:
+                # A cancelled or otherwise aborted attempt has no outcome, but must give back its probe slot
+                breaker.release()
+                raise
+            # Every attempt is timed, retries included
+            elapsed = time.perf_counter() - started
+            outcome = "error" if error is not None else str(response.status_code)
+            PROVIDER_DURATION.labels(endpoint, outcome).observe(elapsed)
+            record_span("crypto_provider.request", started, elapsed, endpoint=endpoint, attempt=attempt, outcome=outcome)
+            
+            if error is None and response.status_code < 500 and response.status_code != 429:
+                breaker.record_success()
+                return response
+            breaker.record_failure()
+            
+            if not idempotent or attempt >= self.max_retries or not self.retry_budget.try_acquire():
+                if error is not None:
+                    raise error
+                return response
+            
+            await asyncio.sleep(backoff_delay(attempt))
+            attempt += 1
     
     async def generate_address(self, currency: str, user_id: UUID) -> Dict[str, Any]:
         """
         Generate a cryptocurrency deposit address for the user
         """
+        import httpx
         if not self.api_key or not self.api_base_url:
             raise ValueError("Crypto payment API configuration is missing")
         
@@ -34,35 +128,35 @@ class CryptoService:
         
         try:
             # Call external API to generate address
-            async with httpx.AsyncClient(timeout=30.0) as client:
-                response = await client.post(
-                    f"{self.api_base_url}/addresses/generate",
-                    json={
-                        "currency": currency.upper(),
-                        "customer_id": str(user_id)
-                    },
-                    headers={
-                        "Authorization": f"Bearer {self.api_key}",
-                        "Content-Type": "application/json"
-                    }
-                )
-                
-                if response.status_code != 200:
-                    error_msg = f"Failed to generate address: {response.status_code}"
-                    try:
-                        error_data = response.json()
-                        if "message" in error_data:
-                            error_msg = f"API Error: {error_data['message']}"
-                    except:
-                        error_msg = f"Failed to generate address: {response.text}"
-                    
-                    raise ValueError(error_msg)
+            response = await self._request(
+                "addresses.generate",
+                "POST",
+                "/addresses/generate",
+                json={
+                    "currency": currency.upper(),
+                    "customer_id": str(user_id)
+                }
+            )
+            
+            if response.status_code != 200:
+                error_msg = f"Failed to generate address: {response.status_code}"
+                try:
+                    error_data = response.json()
+                    if "message" in error_data:
+                        error_msg = f"API Error: {error_data['message']}"
+                except:
+                    error_msg = f"Failed to generate address: {response.text}"
                 
-                return response.json()
+                raise ValueError(error_msg)
+            
+            return response.json()
         except httpx.RequestError as e:
             raise ValueError(f"Connection error when generating address: {str(e)}")
         except httpx.TimeoutException:
             raise ValueError("Timeout when connecting to crypto payment API")
+        except ValueError as e:
+            # Re-raise ValueError exceptions
+            raise e
         except Exception as e:
             raise ValueError(f"Unexpected error generating address: {str(e)}")
     
@@ -70,6 +164,7 @@ class CryptoService:
         """
         Create a cryptocurrency deposit order
         """
+        import httpx
         if not self.api_key or not self.api_base_url:
             raise ValueError("Crypto payment API configuration is missing")
         
@@ -80,47 +175,44 @@ class CryptoService:
                 raise ValueError(f"Unsupported currency: {currency}")
             
             # Call external API to create order
-            async with httpx.AsyncClient(timeout=30.0) as client:
-                response = await client.post(
-                    f"{self.api_base_url}/orders",
-                    json={
-                        "amount": amount,
-                        "currency": currency.upper(),
-                        "customer_id": str(user_id),
-                        "callback_url": f"{os.getenv('API_BASE_URL')}/api/crypto/webhook"
-                    },
-                    headers={
-                        "Authorization": f"Bearer {self.api_key}",
-                        "Content-Type": "application/json"
-                    }
-                )
-                
-                if response.status_code != 200:
-                    error_msg = f"Failed to create order: {response.status_code}"
-                    try:
-                        error_data = response.json()
-                        if "message" in error_data:
-                            error_msg = f"API Error: {error_data['message']}"
-                    except:
-                        error_msg = f"Failed to create order: {response.text}"
-                    
-                    raise ValueError(error_msg)
-                
-                order_data = response.json()
-                
-                # Create order in database
-                order = self.order_repository.create(
-                    db=db,
-                    user_id=user_id,
-                    external_id=order_data["id"],
-                    amount=amount,
-                    currency=currency.upper(),
-                    payment_address=order_data.get("payment_address"),
-                    status=order_data.get("status", "pending"),
-                    expires_at=datetime.fromisoformat(order_data.get("expires_at")) if "expires_at" in order_data else None
-                )
+            response = await self._request(
+                "orders.create",
+                "POST",
+                "/orders",
+                json={
+                    "amount": amount,
+                    "currency": currency.upper(),
+                    "customer_id": str(user_id),
+                    "callback_url": self.webhook_url
+                }
+            )
+            
+            if response.status_code != 200:
+                error_msg = f"Failed to create order: {response.status_code}"
+                try:
+                    error_data = response.json()
+                    if "message" in error_data:
+                        error_msg = f"API Error: {error_data['message']}"
+                except:
+                    error_msg = f"Failed to create order: {response.text}"
                 
-                return order
+                raise ValueError(error_msg)
+            
+            order_data = response.json()
+            
+            # Create order in database
+            order = self.order_repository.create(
+                db=db,
+                user_id=user_id,
+                external_id=order_data["id"],
+                amount=amount,
+                currency=currency.upper(),
+                payment_address=order_data.get("payment_address"),
+                status=order_data.get("status", "pending"),
+                expires_at=datetime.fromisoformat(order_data.get("expires_at")) if "expires_at" in order_data else None
+            )
+            
+            return order
         except httpx.RequestError as e:
             raise ValueError(f"Connection error when creating order: {str(e)}")
         except httpx.TimeoutException:
@@ -137,10 +229,52 @@ class CryptoService:
         """
         return self.order_repository.get_by_id(db, order_id)
     
+    def get_pending_orders(self, db: Session) -> List[Order]:
+        """
+        Get all orders still awaiting confirmation from the provider
+        """
+        return self.order_repository.get_pending_orders(db)
+    
+    def _credit_completed_order(self, db: Session, order: Order) -> None:
+        """
+        Credit the user's wallet for a completed order and mark the order as
+        processed. The order row is locked and re-checked first, and the deposit
+        and the processed flag commit together, so duplicate webhooks or status
+        polls cannot credit an order twice.
+        """
+        order = self.order_repository.get_for_update(db, order.id)
+        if not order or order.is_processed:
+            db.rollback()
+            return
+        
+        wallet = self.wallet_service.get_wallet_by_user_id(db, order.user_id)
+        if not wallet:
+            db.rollback()
+            raise ValueError("User wallet not found")
+        
+        try:
+            transaction = self.wallet_service.create_transaction(
+                db,
+                user_id=order.user_id,
+                wallet_id=wallet.id,
+                amount=order.amount,
+                transaction_type=TransactionType.DEPOSIT,
+                description=f"Crypto deposit: {order.currency}",
+                reference=order.transaction_hash or order.external_id,
+                commit=False
+            )
+            order.transaction_id = transaction.id
+            order.is_processed = True
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+    
     async def update_order_status(self, db: Session, order_id: UUID) -> Order:
         """
         Update an order's status from the external API
         """
+        import httpx
         try:
             order = self.order_repository.get_by_id(db, order_id)
             if not order:
@@ -154,75 +288,45 @@ class CryptoService:
                 raise ValueError("Crypto payment API configuration is missing")
             
             # Call external API to get order status
-            async with httpx.AsyncClient(timeout=30.0) as client:
-                response = await client.get(
-                    f"{self.api_base_url}/orders/{order.external_id}",
-                    headers={
-                        "Authorization": f"Bearer {self.api_key}",
-                        "Content-Type": "application/json"
-                    }
-                )
-                
-                if response.status_code != 200:
-                    error_msg = f"Failed to get order status: {response.status_code}"
-                    try:
-                        error_data = response.json()
-                        if "message" in error_data:
-                            error_msg = f"API Error: {error_data['message']}"
-                    except:
-                        error_msg = f"Failed to get order status: {response.text}"
-                    
-                    raise ValueError(error_msg)
-                
-                order_data = response.json()
-                
-                # Update order status
-                updated_order = self.order_repository.update(
-                    db=db,
-                    order_id=order_id,
-                    status=order_data.get("status", order.status),
-                    transaction_hash=order_data.get("transaction_hash", order.transaction_hash)
-                )
-                
-                # If order is completed, create a deposit transaction
-                if updated_order.status == "completed" and not order.is_processed:
-                    try:
-                        transaction = self.wallet_service.create_transaction(
-                            db=db,
-                            user_id=order.user_id,
-                            amount=order.amount,
-                            transaction_type=TransactionType.DEPOSIT,
-                            status=TransactionStatus.COMPLETED,
-                            reference=f"Crypto deposit: {order.currency}",
-                            metadata={
-                                "order_id": str(order_id),
-                                "currency": order.currency,
-                                "transaction_hash": updated_order.transaction_hash
-                            }
-                        )
-                        
-                        # Add the deposit to the user's wallet
-                        self.wallet_service.process_deposit(
-                            db=db,
-                            user_id=order.user_id,
-                            amount=order.amount,
-                            transaction_id=transaction.id,
-                            description=f"Crypto deposit: {order.currency}"
-                        )
-                        
-                        # Mark order as processed
-                        self.order_repository.update(
-                            db=db,
-                            order_id=order_id,
-                            is_processed=True
-                        )
-                    except Exception as e:
-                        # Log the error but don't fail the entire operation
-                        # This allows us to retry processing later
-                        print(f"Error processing completed order: {str(e)}")
-                        # Consider adding proper logging here
+            response = await self._request(
+                "orders.get",
+                "GET",
+                f"/orders/{order.external_id}",
+                idempotent=True
+            )
+            
+            if response.status_code != 200:
+                error_msg = f"Failed to get order status: {response.status_code}"
+                try:
+                    error_data = response.json()
+                    if "message" in error_data:
+                        error_msg = f"API Error: {error_data['message']}"
+                except:
+                    error_msg = f"Failed to get order status: {response.text}"
                 
-                return updated_order
+                raise ValueError(error_msg)
+            
+            order_data = response.json()
+            
+            # Update order status
+            updated_order = self.order_repository.update(
+                db=db,
+                order_id=order_id,
+                status=order_data.get("status", order.status),
+                transaction_hash=order_data.get("transaction_hash", order.transaction_hash)
+            )
+            
+            # If order is completed, credit the user's wallet
+            if updated_order.status == "completed" and not updated_order.is_processed:
+                try:
+                    self._credit_completed_order(db, updated_order)
+                except Exception as e:
+                    # Log the error but don't fail the entire operation
+                    # This allows us to retry processing later
+                    print(f"Error processing completed order: {str(e)}")
+                    # Consider adding proper logging here
+            
+            return updated_order
         except httpx.RequestError as e:
             raise ValueError(f"Connection error when updating order status: {str(e)}")
         except httpx.TimeoutException:
@@ -261,38 +365,10 @@ class CryptoService:
                 transaction_hash=payload.get("transaction_hash", order.transaction_hash)
             )
             
-            # If order is completed, create a deposit transaction
-            if status == "completed" and not order.is_processed:
+            # If order is completed, credit the user's wallet
+            if status == "completed" and not updated_order.is_processed:
                 try:
-                    transaction = self.wallet_service.create_transaction(
-                        db=db,
-                        user_id=order.user_id,
-                        amount=order.amount,
-                        transaction_type=TransactionType.DEPOSIT,
-                        status=TransactionStatus.COMPLETED,
-                        reference=f"Crypto deposit: {order.currency}",
-                        metadata={
-                            "order_id": str(order.id),
-                            "currency": order.currency,
-                            "transaction_hash": updated_order.transaction_hash
-                        }
-                    )
-                    
-                    # Add the deposit to the user's wallet
-                    self.wallet_service.process_deposit(
-                        db=db,
-                        user_id=order.user_id,
-                        amount=order.amount,
-                        transaction_id=transaction.id,
-                        description=f"Crypto deposit: {order.currency}"
-                    )
-                    
-                    # Mark order as processed
-                    self.order_repository.update(
-                        db=db,
-                        order_id=order.id,
-                        is_processed=True
-                    )
+                    self._credit_completed_order(db, updated_order)
                     
                     return f"Order {external_order_id} completed and processed"
                 except Exception as e:
@@ -338,40 +414,43 @@ class CryptoService:
         """
         Get the list of supported currencies from the crypto payment API
         """
+        import httpx
         if not self.api_key or not self.api_base_url:
             raise ValueError("Crypto payment API configuration is missing")
         
         try:
             # Call external API to get supported currencies
-            async with httpx.AsyncClient(timeout=10.0) as client:
-                response = await client.get(
-                    f"{self.api_base_url}/currencies",
-                    headers={
-                        "Authorization": f"Bearer {self.api_key}",
-                        "Content-Type": "application/json"
-                    }
-                )
-                
-                if response.status_code != 200:
-                    error_msg = f"Failed to get supported currencies: {response.status_code}"
-                    try:
-                        error_data = response.json()
-                        if "message" in error_data:
-                            error_msg = f"API Error: {error_data['message']}"
-                    except:
-                        error_msg = f"Failed to get supported currencies: {response.text}"
-                    
-                    raise ValueError(error_msg)
+            response = await self._request(
+                "currencies",
+                "GET",
+                "/currencies",
+                idempotent=True,
+                timeout=10.0
+            )
+            
+            if response.status_code != 200:
+                error_msg = f"Failed to get supported currencies: {response.status_code}"
+                try:
+                    error_data = response.json()
+                    if "message" in error_data:
+                        error_msg = f"API Error: {error_data['message']}"
+                except:
+                    error_msg = f"Failed to get supported currencies: {response.text}"
                 
-                currencies = response.json()
-                return [currency["code"] for currency in currencies]
+                raise ValueError(error_msg)
+            
+            currencies = response.json()
+            return [currency["code"] for currency in currencies]
         except httpx.RequestError as e:
             raise ValueError(f"Connection error when fetching currencies: {str(e)}")
         except httpx.TimeoutException:
             raise ValueError("Timeout when connecting to crypto payment API")
+        except ValueError as e:
+            # Re-raise ValueError exceptions
+            raise e
         except Exception as e:
             raise ValueError(f"Unexpected error fetching currencies: {str(e)}")
-            
+    
     async def get_supported_cryptocurrencies(self) -> List[Dict[str, str]]:
         """
         Get a list of supported cryptocurrencies from the crypto payment API
@@ -391,7 +470,7 @@ class CryptoService:
             print(error_msg)
             # Consider adding proper logging here
             return []
-            
+    
     def _get_currency_name(self, code: str) -> str:
         """
         Get the human-readable name for a currency code
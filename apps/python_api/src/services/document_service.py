@@ -4,7 +4,9 @@ from uuid import UUID
 
 from models.models import DocumentStatus
 from repositories.document_repository import DocumentRepository
+from core.tracing import traced
 
+@traced
 class DocumentService:
     def __init__(self):
         self.document_repository = DocumentRepository()
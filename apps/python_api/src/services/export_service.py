@@ -0,0 +1,139 @@
+from sqlalchemy.orm import Session
+from typing import Iterable, Iterator, Optional
+from uuid import UUID
+from datetime import datetime
+import csv
+import enum
+import io
+import json
+import zlib
+
+from core.tracing import traced
+from models.models import Transaction, TransactionType, TransactionStatus
+from repositories.transaction_repository import TransactionRepository
+
+# Columns emitted by transaction exports, in output order
+TRANSACTION_EXPORT_COLUMNS = [
+    Transaction.id,
+    Transaction.created_at,
+    Transaction.type,
+    Transaction.status,
+    Transaction.amount,
+    Transaction.description,
+    Transaction.reference,
+    Transaction.user_id,
+    Transaction.wallet_id,
+    Transaction.investment_id,
+    Transaction.loan_id,
+]
+
+EXPORT_FORMATS = {
+    "csv": "text/csv",
+    "ndjson": "application/x-ndjson",
+}
+
+def _export_value(value):
+    """
+    Convert a column value to a plain JSON/CSV friendly value
+    """
+    if value is None:
+        return None
+    if isinstance(value, enum.Enum):
+        return value.value
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, UUID):
+        return str(value)
+    return value
+
+@traced
+class ExportService:
+    def __init__(self):
+        self.transaction_repository = TransactionRepository()
+
+    def stream_transactions(self, db: Session, export_format: str = "csv", compress: bool = False,
+                            user_id: Optional[UUID] = None, wallet_id: Optional[UUID] = None,
+                            start_date: Optional[datetime] = None, end_date: Optional[datetime] = None,
+                            transaction_type: Optional[TransactionType] = None,
+                            status: Optional[TransactionStatus] = None,
+                            batch_size: int = 1000, flush_rows: int = 1000) -> Iterator[bytes]:
+        """
+        Stream transactions as CSV or NDJSON byte chunks with constant memory.
+
+        Rows are read through a server-side cursor and encoded in blocks of
+        `flush_rows`. The session is closed once the stream finishes because a
+        streaming response outlives the request's dependency scope.
+        """
+        if export_format not in EXPORT_FORMATS:
+            raise ValueError(f"Unsupported export format: {export_format}")
+
+        try:
+            rows = self.transaction_repository.iter_for_export(
+                db,
+                TRANSACTION_EXPORT_COLUMNS,
+                user_id=user_id,
+                wallet_id=wallet_id,
+                start_date=start_date,
+                end_date=end_date,
+                transaction_type=transaction_type,
+                status=status,
+                batch_size=batch_size
+            )
+            fieldnames = [column.key for column in TRANSACTION_EXPORT_COLUMNS]
+
+            if export_format == "csv":
+                chunks = self._encode_csv(rows, fieldnames, flush_rows)
+            else:
+                chunks = self._encode_ndjson(rows, fieldnames, flush_rows)
+
+            if compress:
+                chunks = self._gzip(chunks)
+
+            yield from chunks
+        finally:
+            db.close()
+
+    def _encode_csv(self, rows: Iterable, fieldnames: list, flush_rows: int) -> Iterator[bytes]:
+        """
+        Encode rows as CSV, yielding one chunk per `flush_rows` rows
+        """
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerow(fieldnames)
+
+        pending = 0
+        for row in rows:
+            writer.writerow(["" if value is None else _export_value(value) for value in row])
+            pending += 1
+            if pending >= flush_rows:
+                yield buffer.getvalue().encode()
+                buffer.seek(0)
+                buffer.truncate()
+                pending = 0
+
+        yield buffer.getvalue().encode()
+
+    def _encode_ndjson(self, rows: Iterable, fieldnames: list, flush_rows: int) -> Iterator[bytes]:
+        """
+        Encode rows as newline-delimited JSON, yielding one chunk per `flush_rows` rows
+        """
+        lines = []
+        for row in rows:
+            lines.append(json.dumps(dict(zip(fieldnames, map(_export_value, row)))))
+            if len(lines) >= flush_rows:
+                yield ("\n".join(lines) + "\n").encode()
+                lines = []
+
+        if lines:
+            yield ("\n".join(lines) + "\n").encode()
+
+    def _gzip(self, chunks: Iterable[bytes]) -> Iterator[bytes]:
+        """
+        Incrementally gzip a stream of chunks
+        """
+        compressor = zlib.compressobj(6, zlib.DEFLATED, 31)  # wbits=31 writes a gzip header
+        for chunk in chunks:
+            compressed = compressor.compress(chunk)
+            if compressed:
+                yield compressed
+        yield compressor.flush()
@@ -0,0 +1,103 @@
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+from typing import Any, Callable, Dict, List
+import asyncio
+import os
+import threading
+
+from db.database import DB_POOL_SIZE
+from models.models import User, LoanStatus
+from repositories.wallet_repository import WalletRepository
+from repositories.transaction_repository import TransactionRepository
+from repositories.investment_repository import InvestmentRepository
+from repositories.loan_repository import LoanRepository
+from repositories.notification_repository import NotificationRepository
+from services.investment_service import InvestmentService
+from core.tracing import traced
+
+# Transactions shown on the home screen
+HOME_RECENT_TRANSACTIONS = int(os.getenv("HOME_RECENT_TRANSACTIONS", "10"))
+# Run the home screen reads concurrently, each on its own pooled connection
+HOME_PARALLEL_READS = os.getenv("HOME_PARALLEL_READS", "true").lower() == "true"
+# Extra pooled connections all home screen requests of this process may hold at
+# once, on top of each request's own; kept well below the pool size so a burst
+# of home screens can't take the connections other requests are waiting for
+HOME_PARALLEL_CONNECTIONS = int(os.getenv("HOME_PARALLEL_CONNECTIONS", str(DB_POOL_SIZE // 2)))
+# Dialects that serialize access to the database, where the reads run in turn
+SERIAL_DIALECTS = {"sqlite"}
+ACTIVE_LOAN_STATUSES = [LoanStatus.APPROVED, LoanStatus.ACTIVE]
+
+_parallel_slots = threading.BoundedSemaphore(HOME_PARALLEL_CONNECTIONS)
+
+@traced
+class HomeService:
+    def __init__(self):
+        self.wallet_repository = WalletRepository()
+        self.transaction_repository = TransactionRepository()
+        self.investment_repository = InvestmentRepository()
+        self.loan_repository = LoanRepository()
+        self.notification_repository = NotificationRepository()
+        self.investment_service = InvestmentService()
+    
+    async def get_home(self, db: Session, user: User) -> Dict[str, Any]:
+        """
+        Gather everything the mobile home screen shows for an already
+        authenticated user.
+        
+        Each section is one query and none depends on another, so on a
+        database with a connection pool they run concurrently in worker
+        threads with their own sessions, as far as free parallel slots
+        allow; the rest run in turn on the request session. SQLite
+        serializes access to the database anyway, so there they all run in
+        turn on the request session.
+        """
+        reads: Dict[str, Callable[[Session], Any]] = {
+            "wallet": lambda session: self.wallet_repository.get_by_user_id(session, user.id),
+            "recent_transactions": lambda session: self.transaction_repository.get_by_user_id(
+                session, user.id, limit=HOME_RECENT_TRANSACTIONS
+            ),
+            "active_investments": lambda session: self.investment_repository.get_active_by_user_id(session, user.id),
+            "active_loans": lambda session: self.loan_repository.get_by_user_id_with_products(
+                session, user.id, ACTIVE_LOAN_STATUSES
+            ),
+            "unread_notifications": lambda session: self.notification_repository.get_unread_count(session, user.id),
+            "portfolio": lambda session: self.investment_service.get_portfolio_summary(session, user.id)
+        }
+        
+        bind = db.get_bind()
+        if HOME_PARALLEL_READS and bind.dialect.name not in SERIAL_DIALECTS:
+            results = await self._gather(db, bind, list(reads.values()))
+        else:
+            results = [read(db) for read in reads.values()]
+        
+        return {"user": user, **dict(zip(reads, results))}
+    
+    async def _gather(self, db: Session, bind, reads: List[Callable[[Session], Any]]) -> List[Any]:
+        """
+        Run as many reads as there are free parallel slots on connections of
+        their own, and the rest on the request session, without ever waiting
+        for a slot
+        """
+        slots = 0
+        while slots < len(reads) - 1 and _parallel_slots.acquire(blocking=False):
+            slots += 1
+        try:
+            own, shared = reads[:slots], reads[slots:]
+            *results, shared_results = await asyncio.gather(
+                *(run_in_threadpool(self._read, bind, read) for read in own),
+                run_in_threadpool(lambda: [read(db) for read in shared])
+            )
+            return results + shared_results
+        finally:
+            for _ in range(slots):
+                _parallel_slots.release()
+    
+    def _read(self, bind, read: Callable[[Session], Any]) -> Any:
+        """
+        Run one read on a short-lived session of its own
+        """
+        session = Session(bind=bind)
+        try:
+            return read(session)
+        finally:
+            session.close()
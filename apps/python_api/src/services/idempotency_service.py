@@ -0,0 +1,179 @@
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+from sqlalchemy.exc import IntegrityError
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+from typing import Any, Callable, Dict, Optional, Type
+from uuid import UUID
+from datetime import datetime, timedelta, timezone
+import hashlib
+import json
+import os
+
+from models.models import IdempotencyKey
+from repositories.idempotency_repository import IdempotencyRepository
+from core.tracing import traced
+
+# How long a completed response is replayed for
+IDEMPOTENCY_KEY_TTL_HOURS = int(os.getenv("IDEMPOTENCY_KEY_TTL_HOURS", "24"))
+# How long duplicates of an in-progress request are told to wait. After that a
+# retry takes the key over only if the request's transaction is gone.
+IDEMPOTENCY_LOCK_SECONDS = int(os.getenv("IDEMPOTENCY_LOCK_SECONDS", "60"))
+MAX_IDEMPOTENCY_KEY_LENGTH = 255
+
+class IdempotencyKeyInvalidError(ValueError):
+    """
+    Raised for a malformed key or a key reused with a different request
+    """
+
+class IdempotencyConflictError(ValueError):
+    """
+    Raised when a request with the same key is still being processed, or was
+    executed but its response was not stored (no retry_after)
+    """
+    def __init__(self, message: str, retry_after: Optional[int] = None):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+def _utc(value: datetime) -> datetime:
+    """
+    Normalize a database timestamp to naive UTC for comparison with utcnow()
+    """
+    if value.tzinfo is not None:
+        return value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+def request_hash(request: Dict[str, Any]) -> str:
+    """
+    Stable hash of an endpoint and its parameters
+    """
+    payload = json.dumps(jsonable_encoder(request), sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+@traced
+class IdempotencyService:
+    def __init__(self):
+        self.idempotency_repository = IdempotencyRepository()
+    
+    def execute(self, db: Session, key: Optional[str], user_id: UUID, request: Dict[str, Any],
+                handler: Callable[[], Any], response_model: Type[BaseModel], status_code: int = 200) -> Any:
+        """
+        Run `handler` at most once per (user, Idempotency-Key).
+        
+        The key is claimed before the handler runs, so a concurrent duplicate
+        gets IdempotencyConflictError instead of executing again. The key row
+        stays locked until the handler commits, and that commit also marks the
+        key as executed, so the handler's writes and the key can never disagree.
+        A retry after completion gets the stored response back from one indexed
+        lookup. If the handler raises before committing, the key is released so
+        the request can be retried.
+        """
+        if key is None:
+            return handler()
+        if not key or len(key) > MAX_IDEMPOTENCY_KEY_LENGTH:
+            raise IdempotencyKeyInvalidError(f"Idempotency-Key must be 1-{MAX_IDEMPOTENCY_KEY_LENGTH} characters")
+        
+        fingerprint = request_hash(request)
+        record = self._claim(db, key, user_id, fingerprint)
+        if record.status == "completed":
+            return JSONResponse(
+                status_code=record.response_status_code,
+                content=json.loads(record.response_body),
+                headers={"Idempotent-Replayed": "true"}
+            )
+        
+        # Held until the handler's first commit: a retry that can take this lock
+        # knows the request is no longer running
+        self.idempotency_repository.get_for_update(db, record.id)
+        committed = False
+        
+        def _mark_committed(session):
+            nonlocal committed
+            committed = True
+            self.idempotency_repository.mark_committed(session, record)
+        
+        event.listen(db, "before_commit", _mark_committed, once=True)
+        try:
+            result = handler()
+        except Exception:
+            if not committed:
+                event.remove(db, "before_commit", _mark_committed)
+                db.rollback()
+                self.idempotency_repository.delete(db, record)
+            raise
+        
+        if not committed:
+            # The handler wrote nothing; its result is still the response to replay
+            event.remove(db, "before_commit", _mark_committed)
+        body = jsonable_encoder(response_model.model_validate(result))
+        self.idempotency_repository.complete(db, record, status_code, json.dumps(body))
+        return result
+    
+    def _claim(self, db: Session, key: str, user_id: UUID, fingerprint: str) -> IdempotencyKey:
+        """
+        Claim the key for this request, or return the completed record to replay
+        """
+        for _ in range(3):
+            now = datetime.utcnow()
+            existing = self.idempotency_repository.get(db, user_id, key)
+            
+            if existing is None:
+                try:
+                    return self.idempotency_repository.create(
+                        db,
+                        user_id=user_id,
+                        key=key,
+                        request_hash=fingerprint,
+                        locked_until=now + timedelta(seconds=IDEMPOTENCY_LOCK_SECONDS),
+                        expires_at=now + timedelta(hours=IDEMPOTENCY_KEY_TTL_HOURS)
+                    )
+                except IntegrityError:
+                    # A concurrent duplicate claimed it first
+                    db.rollback()
+                    continue
+            
+            if _utc(existing.expires_at) < now:
+                # Expired: take it over
+                self.idempotency_repository.delete(db, existing)
+                continue
+            
+            if existing.request_hash != fingerprint:
+                raise IdempotencyKeyInvalidError("Idempotency-Key was already used for a different request")
+            
+            if existing.status == "in_progress" and _utc(existing.locked_until) < now:
+                # Past its lock time, but the request may only be slow. Its row lock
+                # is held until it commits, so a lock we can take means it died.
+                abandoned = self.idempotency_repository.get_for_update(db, existing.id, skip_locked=True)
+                if abandoned is not None and abandoned.status == "in_progress":
+                    self.idempotency_repository.delete(db, abandoned)
+                    continue
+                db.rollback()
+                raise IdempotencyConflictError("A request with this Idempotency-Key is already in progress", 1)
+            
+            if existing.status == "in_progress":
+                retry_after = max(1, int((_utc(existing.locked_until) - now).total_seconds()))
+                raise IdempotencyConflictError("A request with this Idempotency-Key is already in progress", retry_after)
+            
+            if existing.status == "committed":
+                # Executed, but the response was not stored (the process died
+                # between the two commits): never run it again
+                raise IdempotencyConflictError(
+                    "A request with this Idempotency-Key was already processed, but its response is not available"
+                )
+            
+            return existing
+        
+        raise IdempotencyConflictError("A request with this Idempotency-Key is already in progress", 1)
+    
+    def delete_expired_keys(self, db: Session, batch_size: int = 1000) -> int:
+        """
+        Purge expired keys in batches
+        """
+        now = datetime.utcnow()
+        total = 0
+        while True:
+            deleted = self.idempotency_repository.delete_expired(db, now, batch_size=batch_size)
+            total += deleted
+            if deleted < batch_size:
+                return total
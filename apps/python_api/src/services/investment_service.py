@@ -1,30 +1,80 @@
 from sqlalchemy.orm import Session
-from typing import List, Optional
+from typing import Any, Dict, List, Optional, Sequence, Tuple
 from uuid import UUID
 from datetime import datetime, timedelta
 
-from models.models import Investment as InvestmentModel, InvestmentPlan as InvestmentPlanModel, InvestmentStatus, TransactionType
+from models.models import Investment as InvestmentModel, InvestmentPlan as InvestmentPlanModel, InvestmentStatus, LoanStatus, TransactionType
+from core.serialization import schema_columns
+from core.tracing import traced
 from repositories.investment_repository import InvestmentRepository
 from repositories.investment_plan_repository import InvestmentPlanRepository
+from schemas.schemas import Investment, InvestmentPlan, InvestmentPlanCreate, InvestmentPlanUpdate
+from services.catalog_cache import catalog_cache
 from services.wallet_service import WalletService
 
+# Loans whose remaining balance is still owed
+OUTSTANDING_LOAN_STATUSES = [LoanStatus.APPROVED, LoanStatus.ACTIVE, LoanStatus.DEFAULTED]
+
+def _status_value(enum_class, name: str) -> str:
+    # Enum columns store member names; fall back to values for rows written as values
+    return enum_class[name].value if name in enum_class.__members__ else enum_class(name).value
+
+@traced
 class InvestmentService:
     def __init__(self):
         self.investment_repository = InvestmentRepository()
         self.plan_repository = InvestmentPlanRepository()
         self.wallet_service = WalletService()
     
-    def get_plan(self, db: Session, plan_id: UUID) -> Optional[InvestmentPlanModel]:
+    def get_plan(self, db: Session, plan_id: UUID) -> Optional[InvestmentPlan]:
+        """
+        Get an investment plan by ID from the catalog cache
+        """
+        return catalog_cache.get_plan(db, plan_id)
+    
+    def get_active_plans(self, db: Session, skip: int = 0, limit: int = 100) -> List[InvestmentPlan]:
+        """
+        Get all active investment plans from the catalog cache
+        """
+        return self.get_active_plans_with_etag(db, skip=skip, limit=limit)[0]
+    
+    def get_active_plans_with_etag(self, db: Session, skip: int = 0,
+                                   limit: int = 100) -> Tuple[List[InvestmentPlan], str]:
+        """
+        Get a page of active investment plans from the catalog cache and its ETag
+        """
+        return catalog_cache.get_active_plans(db, skip=skip, limit=limit)
+    
+    def get_all_plans(self, db: Session, skip: int = 0, limit: int = 100) -> List[InvestmentPlanModel]:
         """
-        Get an investment plan by ID
+        Get all investment plans, active or not (admin function)
         """
-        return self.plan_repository.get_by_id(db, plan_id)
+        return self.plan_repository.get_all(db, skip=skip, limit=limit)
     
-    def get_active_plans(self, db: Session, skip: int = 0, limit: int = 100) -> List[InvestmentPlanModel]:
+    def create_plan(self, db: Session, plan_data: Dict[str, Any]) -> InvestmentPlanModel:
         """
-        Get all active investment plans
+        Create an investment plan and invalidate the catalog cache
         """
-        return self.plan_repository.get_active_plans(db, skip=skip, limit=limit)
+        plan = self.plan_repository.create(db, **InvestmentPlanCreate(**plan_data).model_dump())
+        catalog_cache.invalidate(db)
+        return plan
+    
+    def update_plan(self, db: Session, plan_id: UUID, plan_data: Dict[str, Any]) -> Optional[InvestmentPlanModel]:
+        """
+        Update an investment plan and invalidate the catalog cache
+        """
+        plan = self.plan_repository.update(db, plan_id, **InvestmentPlanUpdate(**plan_data).model_dump(exclude_unset=True))
+        catalog_cache.invalidate(db)
+        return plan
+    
+    def delete_plan(self, db: Session, plan_id: UUID) -> Optional[InvestmentPlanModel]:
+        """
+        Retire an investment plan. Existing investments still reference it,
+        so it is deactivated rather than removed.
+        """
+        plan = self.plan_repository.deactivate(db, plan_id)
+        catalog_cache.invalidate(db)
+        return plan
     
     def get_investment(self, db: Session, investment_id: UUID) -> Optional[InvestmentModel]:
         """
@@ -33,11 +83,58 @@ class InvestmentService:
         return self.investment_repository.get_by_id(db, investment_id)
     
     def get_user_investments(self, db: Session, user_id: UUID, skip: int = 0, limit: int = 100, 
-                            status: Optional[InvestmentStatus] = None) -> List[InvestmentModel]:
+                            status: Optional[InvestmentStatus] = None,
+                            fields: Optional[Sequence[str]] = None) -> List[InvestmentModel]:
         """
-        Get investments by user ID
+        Get investments by user ID, loading only `fields` of them if given
         """
-        return self.investment_repository.get_by_user_id(db, user_id, skip=skip, limit=limit, status=status)
+        if fields is None:
+            return self.investment_repository.get_by_user_id(db, user_id, skip=skip, limit=limit, status=status)
+        return self.investment_repository.get_by_user_id(
+            db, user_id, skip=skip, limit=limit, status=status,
+            columns=schema_columns(InvestmentModel, Investment, fields), with_plan="plan" in fields
+        )
+    
+    def get_portfolio_summary(self, db: Session, user_id: UUID) -> Dict[str, Any]:
+        """
+        Get a user's investment and loan totals and counts by status from
+        one grouped aggregate, independent of any page size
+        """
+        investments = {status.value: {"count": 0, "amount": 0.0} for status in InvestmentStatus}
+        loans = {status.value: {"count": 0, "amount": 0.0} for status in LoanStatus}
+        current_value = expected_return = outstanding_balance = total_repayable = 0.0
+        
+        for kind, status, count, amount, value, total in self.investment_repository.get_portfolio_totals(db, user_id):
+            if kind == "investment":
+                status = _status_value(InvestmentStatus, status)
+                investments[status] = {"count": count, "amount": round(amount, 2)}
+                if status == InvestmentStatus.ACTIVE.value:
+                    current_value, expected_return = value, total
+            else:
+                status = _status_value(LoanStatus, status)
+                loans[status] = {"count": count, "amount": round(amount, 2)}
+                if status in [loan_status.value for loan_status in OUTSTANDING_LOAN_STATUSES]:
+                    outstanding_balance += value
+                    total_repayable += total
+        
+        return {
+            "investments": {
+                "count": sum(entry["count"] for entry in investments.values()),
+                "active_count": investments[InvestmentStatus.ACTIVE.value]["count"],
+                "total_invested": investments[InvestmentStatus.ACTIVE.value]["amount"],
+                "current_value": round(current_value, 2),
+                "expected_return": round(expected_return, 2),
+                "lifetime_invested": round(sum(entry["amount"] for entry in investments.values()), 2),
+                "by_status": investments
+            },
+            "loans": {
+                "count": sum(entry["count"] for entry in loans.values()),
+                "outstanding_count": sum(loans[status.value]["count"] for status in OUTSTANDING_LOAN_STATUSES),
+                "outstanding_balance": round(outstanding_balance, 2),
+                "total_repayable": round(total_repayable, 2),
+                "by_status": loans
+            }
+        }
     
     def get_all_investments(self, db: Session, skip: int = 0, limit: int = 100,
                            status: Optional[InvestmentStatus] = None) -> List[InvestmentModel]:
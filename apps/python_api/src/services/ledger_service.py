@@ -0,0 +1,145 @@
+from sqlalchemy.orm import Session
+from typing import Any, Dict, List, Optional, Tuple
+from uuid import UUID
+from datetime import datetime, timedelta
+
+from models.models import LedgerEntry, Wallet as WalletModel, Transaction as TransactionModel
+from repositories.ledger_repository import LedgerRepository
+from core.tracing import traced
+from core.watermark import read_from
+
+@traced
+class LedgerService:
+    def __init__(self):
+        self.ledger_repository = LedgerRepository()
+    
+    def post_transaction(self, db: Session, wallet: WalletModel, transaction: TransactionModel, amount: float) -> LedgerEntry:
+        """
+        Post a completed transaction to the ledger.
+        
+        `wallet` must be locked by the caller and already carry the new balance.
+        Postings are staged in the caller's database transaction, so they commit
+        or roll back together with the balance change.
+        """
+        last_entry = self.ledger_repository.get_last_entry(db, wallet.id)
+        entries = self._build_entries(wallet, transaction, amount, last_entry.sequence if last_entry else 0, wallet.balance)
+        self.ledger_repository.add_entries(db, entries)
+        return entries[0]
+    
+    def apply_transactions(self, db: Session, postings: List[Tuple[WalletModel, TransactionModel, float]]) -> List[LedgerEntry]:
+        """
+        Apply several completed transactions to their wallets' balances and post
+        them, in order, with one sequence lookup for all wallets.
+        
+        Each wallet must be locked by the caller. Nothing is committed.
+        """
+        sequences = self.ledger_repository.get_last_sequences(db, list({wallet.id for wallet, _, _ in postings}))
+        
+        wallet_entries = []
+        entries = []
+        for wallet, transaction, amount in postings:
+            wallet.balance = (wallet.balance or 0.0) + amount
+            wallet_entry, contra_entry = self._build_entries(
+                wallet, transaction, amount, sequences.get(wallet.id, 0), wallet.balance
+            )
+            sequences[wallet.id] = wallet_entry.sequence
+            wallet_entries.append(wallet_entry)
+            entries.extend([wallet_entry, contra_entry])
+        
+        self.ledger_repository.add_entries(db, entries)
+        return wallet_entries
+    
+    def _build_entries(self, wallet: WalletModel, transaction: TransactionModel, amount: float,
+                       last_sequence: int, balance_after: float) -> List[LedgerEntry]:
+        """
+        Build the wallet and contra postings for one transaction
+        """
+        # Stamped after the wallet lock is held so created_at follows sequence order
+        posted_at = datetime.utcnow()
+        
+        wallet_entry = LedgerEntry(
+            transaction_id=transaction.id,
+            account="wallet",
+            wallet_id=wallet.id,
+            sequence=last_sequence + 1,
+            amount=amount,
+            balance_after=balance_after,
+            created_at=posted_at
+        )
+        contra_entry = LedgerEntry(
+            transaction_id=transaction.id,
+            account=f"platform:{transaction.type.value}",
+            amount=-amount,
+            created_at=posted_at
+        )
+        return [wallet_entry, contra_entry]
+    
+    def get_balance_as_of(self, db: Session, wallet_id: UUID, as_of: datetime) -> Optional[float]:
+        """
+        Get a wallet's balance after all postings at or before `as_of`.
+        
+        Reads the nearest snapshot and the last posting after it, so the lookup
+        stays short however long the wallet's history is. Returns None if the
+        wallet has no ledger history.
+        """
+        snapshot = self.ledger_repository.get_snapshot_before(db, wallet_id, as_of)
+        entry = self.ledger_repository.get_last_entry_before(
+            db, wallet_id, as_of, after_sequence=snapshot.sequence if snapshot else None,
+            since=snapshot.as_of if snapshot else None
+        )
+        if entry:
+            return entry.balance_after
+        if snapshot:
+            return snapshot.balance
+        
+        # Before the wallet's first posting: the balance it carried into the ledger
+        first_entry = self.ledger_repository.get_first_entry_after(db, wallet_id, as_of)
+        if first_entry:
+            return first_entry.balance_after - first_entry.amount
+        return None
+    
+    def get_statement(self, db: Session, wallet: WalletModel, start_date: datetime, end_date: datetime,
+                      skip: int = 0, limit: int = 100) -> Dict[str, Any]:
+        """
+        Get a wallet statement for [start_date, end_date)
+        """
+        if end_date <= start_date:
+            raise ValueError("end_date must be after start_date")
+        
+        opening_balance = self.get_balance_as_of(db, wallet.id, start_date - timedelta(microseconds=1))
+        closing_balance = self.get_balance_as_of(db, wallet.id, end_date - timedelta(microseconds=1))
+        
+        return {
+            "wallet_id": wallet.id,
+            "start_date": start_date,
+            "end_date": end_date,
+            "opening_balance": wallet.balance if opening_balance is None else opening_balance,
+            "closing_balance": wallet.balance if closing_balance is None else closing_balance,
+            "entries": self.ledger_repository.get_entries(db, wallet.id, start_date, end_date, skip=skip, limit=limit)
+        }
+    
+    def take_snapshots(self, db: Session, batch_size: int = 1000) -> int:
+        """
+        Snapshot the latest balance of every wallet posted to since the last snapshot
+        """
+        # Already-snapshotted postings in the overlap are skipped
+        since = read_from(self.ledger_repository.get_latest_snapshot_time(db))
+        
+        count = 0
+        batch = []
+        for wallet_id, sequence, balance, posted_at in self.ledger_repository.iter_latest_entries_since(db, since, batch_size):
+            batch.append({
+                "wallet_id": wallet_id,
+                "sequence": sequence,
+                "balance": balance,
+                "as_of": posted_at
+            })
+            if len(batch) >= batch_size:
+                self.ledger_repository.add_snapshots(db, batch)
+                count += len(batch)
+                batch = []
+        
+        self.ledger_repository.add_snapshots(db, batch)
+        count += len(batch)
+        db.commit()
+        return count
@@ -1,14 +1,19 @@
 from sqlalchemy.orm import Session
-from typing import List, Optional
+from typing import Any, Dict, List, Optional, Sequence, Tuple
 from uuid import UUID
 from datetime import datetime, timedelta
 
-from models.models import LoanStatus, TransactionType, TransactionStatus
+from models.models import Loan as LoanModel, LoanStatus, TransactionType, TransactionStatus
+from core.serialization import schema_columns
+from core.tracing import traced
 from repositories.loan_repository import LoanRepository
 from repositories.loan_product_repository import LoanProductRepository
 from repositories.transaction_repository import TransactionRepository
+from schemas.schemas import Loan, LoanProduct, LoanProductCreate, LoanProductUpdate
+from services.catalog_cache import catalog_cache
 from services.wallet_service import WalletService
 
+@traced
 class LoanService:
     def __init__(self):
         self.loan_repository = LoanRepository()
@@ -18,15 +23,64 @@ class LoanService:
     
     def get_product(self, db: Session, product_id: UUID):
         """
-        Get a loan product by ID
+        Get a loan product by ID from the catalog cache
         """
-        return self.loan_product_repository.get_by_id(db, product_id)
+        return catalog_cache.get_product(db, product_id)
     
     def get_active_products(self, db: Session, skip: int = 0, limit: int = 100):
         """
-        Get all active loan products
+        Get all active loan products from the catalog cache
         """
-        return self.loan_product_repository.get_active_products(db, skip, limit)
+        return self.get_active_products_with_etag(db, skip, limit)[0]
+    
+    def get_active_products_with_etag(self, db: Session, skip: int = 0,
+                                      limit: int = 100) -> Tuple[List[LoanProduct], str]:
+        """
+        Get a page of active loan products from the catalog cache and its ETag
+        """
+        return catalog_cache.get_active_products(db, skip=skip, limit=limit)
+    
+    def get_all_loan_products(self, db: Session, skip: int = 0, limit: int = 100) -> List[Dict[str, Any]]:
+        """
+        Get all loan products, active or not (admin function)
+        """
+        return [
+            LoanProduct.model_validate(product).model_dump()
+            for product in self.loan_product_repository.get_all(db, skip, limit)
+        ]
+    
+    def get_loan_product(self, db: Session, product_id: UUID) -> Optional[Dict[str, Any]]:
+        """
+        Get a loan product by ID straight from the database (admin function)
+        """
+        product = self.loan_product_repository.get_by_id(db, product_id)
+        return LoanProduct.model_validate(product).model_dump() if product else None
+    
+    def create_loan_product(self, db: Session, product_data: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Create a loan product and invalidate the catalog cache
+        """
+        product = self.loan_product_repository.create(db, **LoanProductCreate(**product_data).model_dump())
+        catalog_cache.invalidate(db)
+        return LoanProduct.model_validate(product).model_dump()
+    
+    def update_loan_product(self, db: Session, product_id: UUID, product_data: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """
+        Update a loan product and invalidate the catalog cache
+        """
+        product = self.loan_product_repository.update(
+            db, product_id, **LoanProductUpdate(**product_data).model_dump(exclude_unset=True)
+        )
+        catalog_cache.invalidate(db)
+        return LoanProduct.model_validate(product).model_dump() if product else None
+    
+    def delete_loan_product(self, db: Session, product_id: UUID) -> None:
+        """
+        Retire a loan product. Existing loans still reference it, so it is
+        deactivated rather than removed.
+        """
+        self.loan_product_repository.deactivate(db, product_id)
+        catalog_cache.invalidate(db)
     
     def get_loan(self, db: Session, loan_id: UUID):
         """
@@ -34,11 +88,17 @@ class LoanService:
         """
         return self.loan_repository.get_by_id(db, loan_id)
     
-    def get_user_loans(self, db: Session, user_id: UUID, skip: int = 0, limit: int = 100, status: Optional[LoanStatus] = None):
+    def get_user_loans(self, db: Session, user_id: UUID, skip: int = 0, limit: int = 100, status: Optional[LoanStatus] = None,
+                       fields: Optional[Sequence[str]] = None):
         """
-        Get loans for a specific user
+        Get loans for a specific user, loading only `fields` of them if given
         """
-        return self.loan_repository.get_by_user_id(db, user_id, skip, limit, status)
+        if fields is None:
+            return self.loan_repository.get_by_user_id(db, user_id, skip, limit, status)
+        return self.loan_repository.get_by_user_id(
+            db, user_id, skip, limit, status,
+            columns=schema_columns(LoanModel, Loan, fields), with_product="product" in fields
+        )
     
     def get_all_loans(self, db: Session, skip: int = 0, limit: int = 100, status: Optional[LoanStatus] = None):
         """
@@ -51,7 +111,7 @@ class LoanService:
         Create a new loan application
         """
         # Get the loan product
-        product = self.loan_product_repository.get_by_id(db, product_id)
+        product = self.get_product(db, product_id)
         if not product:
             raise ValueError("Loan product not found")
         
@@ -146,7 +206,7 @@ class LoanService:
                 transaction_id=transaction.id,
                 status=TransactionStatus.COMPLETED
             )
-            
+        
         elif status == LoanStatus.REJECTED and loan.status == LoanStatus.PENDING:
             # Update loan with rejection details
             loan = self.loan_repository.update(
@@ -155,7 +215,7 @@ class LoanService:
                 status=status,
                 rejection_reason=rejection_reason
             )
-            
+        
         elif status == LoanStatus.CLOSED and loan.status == LoanStatus.ACTIVE:
             # Ensure loan is fully repaid
             if loan.remaining_amount > 0:
@@ -167,7 +227,7 @@ class LoanService:
                 loan_id=loan_id,
                 status=status
             )
-            
+        
         else:
             raise ValueError(f"Invalid status transition from {loan.status} to {status}")
         
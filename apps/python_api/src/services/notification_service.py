@@ -1,51 +1,44 @@
 from sqlalchemy.orm import Session
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, Sequence
 from uuid import UUID
 
+from core.serialization import schema_columns
+from core.tracing import traced
 from models.models import Notification
+from schemas.schemas import Notification as NotificationSchema
 from repositories.notification_repository import NotificationRepository
-from tasks.notification_tasks import broadcast_notification as broadcast_task
-from tasks.notification_tasks import send_notification as send_notification_task
+from repositories.sync_repository import SyncRepository
 
+# Notification lists select only the columns the API renders
+NOTIFICATION_LIST_COLUMNS = schema_columns(Notification, NotificationSchema)
+
+@traced
 class NotificationService:
     def __init__(self):
         self.notification_repository = NotificationRepository()
+        self.sync_repository = SyncRepository()
     
-    def get_all_notifications(self, db: Session, skip: int = 0, limit: int = 100) -> List[Dict[str, Any]]:
+    def get_all_notifications(self, db: Session, skip: int = 0, limit: int = 100,
+                              fields: Optional[Sequence[str]] = None) -> List[Any]:
         """
-        Get all notifications with pagination
+        Get all notifications with pagination, as rows of the columns the API
+        renders, or only of `fields`
         """
         # In a real implementation, this would likely include filtering by user role
         # or other criteria for admin purposes
-        notifications = db.query(Notification).order_by(Notification.created_at.desc())\
-            .offset(skip).limit(limit).all()
-        
-        return [{
-            "id": str(notification.id),
-            "user_id": str(notification.user_id),
-            "title": notification.title,
-            "message": notification.message,
-            "is_read": notification.is_read,
-            "type": notification.type,
-            "reference_id": notification.reference_id,
-            "created_at": notification.created_at
-        } for notification in notifications]
+        columns = NOTIFICATION_LIST_COLUMNS
+        if fields is not None:
+            columns = schema_columns(Notification, NotificationSchema, fields)
+        return self.notification_repository.get_all(db, skip, limit, columns=columns)
     
-    def get_user_notifications(self, db: Session, user_id: UUID, skip: int = 0, limit: int = 100) -> List[Dict[str, Any]]:
+    def get_user_notifications(self, db: Session, user_id: UUID, skip: int = 0, limit: int = 100) -> List[Any]:
         """
-        Get notifications for a specific user with pagination
+        Get notifications for a specific user with pagination, as rows of the
+        columns the API renders
         """
-        notifications = self.notification_repository.get_by_user_id(db, user_id, skip, limit)
-        
-        return [{
-            "id": str(notification.id),
-            "title": notification.title,
-            "message": notification.message,
-            "is_read": notification.is_read,
-            "type": notification.type,
-            "reference_id": notification.reference_id,
-            "created_at": notification.created_at
-        } for notification in notifications]
+        return self.notification_repository.get_by_user_id(
+            db, user_id, skip, limit, columns=NOTIFICATION_LIST_COLUMNS
+        )
     
     def get_unread_count(self, db: Session, user_id: UUID) -> int:
         """
@@ -83,13 +76,16 @@ class NotificationService:
     
     def delete_notification(self, db: Session, notification_id: UUID) -> Dict[str, Any]:
         """
-        Delete a notification
+        Delete a notification, leaving a tombstone for clients that sync
         """
-        success = self.notification_repository.delete(db, notification_id)
-        
-        if not success:
+        notification = self.notification_repository.get_by_id(db, notification_id)
+        if notification is None:
             return {"success": False, "message": "Notification not found"}
         
+        # Committed together with the delete
+        self.sync_repository.add_tombstones(db, notification.user_id, "notification", [notification.id])
+        self.notification_repository.delete(db, notification_id)
+        
         return {"success": True, "message": "Notification deleted successfully"}
     
     def send_user_notification(self, db: Session, user_id: UUID, title: str, message: str, notification_type: str = "system") -> Dict[str, Any]:
@@ -107,6 +103,8 @@ class NotificationService:
         
         # Queue a task to send push notification if applicable
         # This is done asynchronously to avoid blocking the API
+        # (Celery is imported on first use, not at startup)
+        from tasks.notification_tasks import send_notification as send_notification_task
         send_notification_task.delay(
             user_id=str(user_id),
             title=title,
@@ -126,6 +124,7 @@ class NotificationService:
         """
         # Queue a task to send the broadcast notification
         # This is done asynchronously to avoid blocking the API
+        from tasks.notification_tasks import broadcast_notification as broadcast_task
         broadcast_task.delay(
             title=title,
             message=message,
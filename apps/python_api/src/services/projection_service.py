@@ -0,0 +1,143 @@
+from sqlalchemy.orm import Session
+from typing import Any, Dict, Optional
+from uuid import UUID
+from datetime import datetime, timedelta
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+import asyncio
+import multiprocessing
+import os
+import threading
+
+from core.archive import naive_utc
+from core.metrics import CACHE_REQUESTS
+from core.tracing import traced
+from repositories.investment_repository import InvestmentRepository
+
+# Projections with more investments x sampled days than this run in a worker process
+PROJECTION_OFFLOAD_CELLS = int(os.getenv("PROJECTION_OFFLOAD_CELLS", "250000"))
+PROJECTION_WORKERS = int(os.getenv("PROJECTION_WORKERS", "2"))
+# Cached projections kept per process (one per user and parameter set)
+PROJECTION_CACHE_SIZE = int(os.getenv("PROJECTION_CACHE_SIZE", "1024"))
+
+# Cache lookups reported on /metrics
+_HITS = CACHE_REQUESTS.labels("projection", "hit")
+_MISSES = CACHE_REQUESTS.labels("projection", "miss")
+
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_lock = threading.Lock()
+
+def get_projection_pool() -> ProcessPoolExecutor:
+    """
+    Get the shared worker pool for heavy projections, starting it on first use
+    """
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            # Workers are not forked from this process: forking copies the locks
+            # other threads (DB pool, tracing, metrics) may hold at that moment
+            start_method = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+            _pool = ProcessPoolExecutor(
+                max_workers=PROJECTION_WORKERS, mp_context=multiprocessing.get_context(start_method)
+            )
+        return _pool
+
+def shutdown_projection_pool() -> None:
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(wait=False, cancel_futures=True)
+            _pool = None
+
+@traced
+class ProjectionService:
+    """
+    Projects the value of a user's active investments over time.
+    
+    Results are cached per user and parameters, keyed on a fingerprint of
+    the user's investments and plans, so a projection is recomputed only
+    after the portfolio (or a plan, or the day) changes.
+    """
+    def __init__(self):
+        self.investment_repository = InvestmentRepository()
+        self._cache: "OrderedDict[tuple, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+    
+    async def get_portfolio_projection(self, db: Session, user_id: UUID, horizon_days: int = 365,
+                                       step_days: int = 1, roi_delta: float = 0.0,
+                                       reinvest: bool = False) -> Dict[str, Any]:
+        """
+        Project the total value of a user's active investments for
+        `horizon_days` days, sampled every `step_days`. `roi_delta` adds
+        percentage points to every plan's annual ROI and `reinvest` rolls
+        matured investments into a new term (what-if parameters).
+        """
+        as_of = datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0)
+        key = (user_id, horizon_days, step_days, roi_delta, reinvest)
+        version = (as_of,) + self.investment_repository.get_portfolio_version(db, user_id)
+        
+        with self._lock:
+            cached = self._cache.get(key)
+            if cached and cached[0] == version:
+                self._cache.move_to_end(key)
+                _HITS.inc()
+                return cached[1]
+        _MISSES.inc()
+        
+        # numpy is only needed for projections, so it is not imported at startup
+        import numpy as np
+        from core.projection import project_portfolio
+        
+        rows = self.investment_repository.get_active_with_plans(db, user_id)
+        principal = np.array([investment.amount or 0.0 for investment, _ in rows], dtype=float)
+        current_value = np.array([
+            investment.current_value if investment.current_value is not None else investment.amount or 0.0
+            for investment, _ in rows
+        ], dtype=float)
+        annual_roi = np.array([(plan.roi_percentage or 0.0) + roi_delta for _, plan in rows], dtype=float)
+        days_remaining = np.array([
+            (naive_utc(investment.end_date) - as_of).days if investment.end_date else 0 for investment, _ in rows
+        ], dtype=np.int64)
+        term_days = np.array([plan.duration_days or 0 for _, plan in rows], dtype=np.int64)
+        
+        args = (principal, current_value, annual_roi, days_remaining, term_days, horizon_days, step_days, reinvest)
+        cells = len(rows) * (horizon_days // step_days + 1)
+        if cells > PROJECTION_OFFLOAD_CELLS:
+            # Keep the event loop free while a worker process does the number crunching
+            loop = asyncio.get_running_loop()
+            days, totals, final_values = await loop.run_in_executor(get_projection_pool(), project_portfolio, *args)
+        else:
+            days, totals, final_values = project_portfolio(*args)
+        
+        projection = {
+            "as_of": as_of,
+            "horizon_days": horizon_days,
+            "step_days": step_days,
+            "roi_delta": roi_delta,
+            "reinvest": reinvest,
+            "current_value": round(float(current_value.sum()), 2),
+            "projected_value": round(float(totals[-1]), 2),
+            "projected_gain": round(float(totals[-1] - current_value.sum()), 2),
+            "points": [
+                {"day": int(day), "date": as_of + timedelta(days=int(day)), "value": round(float(total), 2)}
+                for day, total in zip(days, totals)
+            ],
+            "investments": [
+                {
+                    "investment_id": investment.id,
+                    "plan_name": plan.name,
+                    "amount": investment.amount,
+                    "current_value": float(value_now),
+                    "projected_value": round(float(value_then), 2),
+                    "matures_at": investment.end_date
+                }
+                for (investment, plan), value_now, value_then in zip(rows, current_value, final_values)
+            ]
+        }
+        
+        with self._lock:
+            self._cache[key] = (version, projection)
+            self._cache.move_to_end(key)
+            while len(self._cache) > PROJECTION_CACHE_SIZE:
+                self._cache.popitem(last=False)
+        return projection
@@ -0,0 +1,145 @@
+from sqlalchemy.orm import Session
+from typing import Dict, Iterator, List, Optional, Tuple
+from uuid import UUID
+from datetime import datetime
+import os
+
+from models.models import ReconciliationRun, ReconciliationMismatch
+from repositories.reconciliation_repository import ReconciliationRepository
+from core.tracing import traced
+from core.watermark import new_high_water_mark, read_from
+
+# Balances within this amount of the ledger net are treated as equal (float rounding)
+RECONCILIATION_TOLERANCE = float(os.getenv("RECONCILIATION_TOLERANCE", "0.01"))
+# Wallets compared per grouped aggregate query
+RECONCILIATION_CHUNK_SIZE = int(os.getenv("RECONCILIATION_CHUNK_SIZE", "5000"))
+
+def shard_bounds(shard_index: int, shard_count: int) -> Tuple[Optional[UUID], Optional[UUID]]:
+    """
+    Split the UUID keyspace into `shard_count` equal primary key ranges and
+    return the [lower, upper) bounds of one shard
+    """
+    if shard_count < 1 or not 0 <= shard_index < shard_count:
+        raise ValueError(f"Invalid shard {shard_index} of {shard_count}")
+    
+    keyspace = 2 ** 128
+    lower = UUID(int=keyspace * shard_index // shard_count) if shard_index > 0 else None
+    upper = UUID(int=keyspace * (shard_index + 1) // shard_count) if shard_index < shard_count - 1 else None
+    return lower, upper
+
+@traced
+class ReconciliationService:
+    def __init__(self):
+        self.reconciliation_repository = ReconciliationRepository()
+    
+    def reconcile(self, db: Session, full: bool = False, shard_index: int = 0, shard_count: int = 1,
+                  chunk_size: Optional[int] = None) -> ReconciliationRun:
+        """
+        Compare stored wallet balances with the net of their completed transactions.
+        
+        Runs incrementally from the shard's last completed run, checking only
+        wallets touched since its high-water mark plus the wallets that run
+        found out of balance, unless `full` is set or the shard has never been
+        reconciled. Shards split wallets by ID range so they can run in
+        parallel.
+        """
+        lower, upper = shard_bounds(shard_index, shard_count)
+        chunk_size = chunk_size or RECONCILIATION_CHUNK_SIZE
+        
+        last_run = None if full else self.reconciliation_repository.get_last_completed_run(db, shard_index, shard_count)
+        mode = "incremental" if last_run else "full"
+        
+        high_water_mark = new_high_water_mark()
+        run = self.reconciliation_repository.create_run(
+            db,
+            mode=mode,
+            high_water_mark=high_water_mark,
+            shard_index=shard_index,
+            shard_count=shard_count
+        )
+        
+        wallets_checked = 0
+        mismatches_found = 0
+        try:
+            if last_run:
+                since = read_from(last_run.high_water_mark)
+                chunks = self._changed_wallet_chunks(db, since, last_run.id, chunk_size, lower, upper)
+            else:
+                chunks = self._all_wallet_chunks(db, chunk_size, lower, upper)
+            
+            for wallet_ids in chunks:
+                mismatches = self.compare_balances(db, wallet_ids)
+                self.reconciliation_repository.add_mismatches(db, run.id, mismatches)
+                wallets_checked += len(wallet_ids)
+                mismatches_found += len(mismatches)
+        except Exception as e:
+            db.rollback()
+            self.reconciliation_repository.finish_run(
+                db, run, "failed", wallets_checked, mismatches_found, error=str(e)
+            )
+            raise
+        
+        return self.reconciliation_repository.finish_run(db, run, "completed", wallets_checked, mismatches_found)
+    
+    def compare_balances(self, db: Session, wallet_ids: List[UUID]) -> List[Dict]:
+        """
+        Get the mismatches among the given wallets
+        """
+        mismatches = []
+        for wallet_id, stored_balance, expected_balance in self.reconciliation_repository.get_balances(db, wallet_ids):
+            stored_balance = stored_balance or 0.0
+            difference = stored_balance - expected_balance
+            if abs(difference) > RECONCILIATION_TOLERANCE:
+                mismatches.append({
+                    "wallet_id": wallet_id,
+                    "stored_balance": stored_balance,
+                    "expected_balance": round(expected_balance, 2),
+                    "difference": round(difference, 2)
+                })
+        return mismatches
+    
+    def _all_wallet_chunks(self, db: Session, chunk_size: int, lower: Optional[UUID],
+                           upper: Optional[UUID]) -> Iterator[List[UUID]]:
+        """
+        Yield every wallet ID in the shard, `chunk_size` at a time
+        """
+        after_id = None
+        while True:
+            wallet_ids = self.reconciliation_repository.get_wallet_id_page(db, after_id, chunk_size, lower, upper)
+            if not wallet_ids:
+                return
+            yield wallet_ids
+            after_id = wallet_ids[-1]
+    
+    def _changed_wallet_chunks(self, db: Session, since: datetime, last_run_id: UUID, chunk_size: int,
+                               lower: Optional[UUID], upper: Optional[UUID]) -> Iterator[List[UUID]]:
+        """
+        Yield IDs of wallets in the shard changed since `since` or found out of
+        balance by the last run, `chunk_size` at a time
+        """
+        # Open mismatches are verified again on every run, so one stays reported
+        # until it is corrected even if the wallet itself does not change
+        wallet_ids = sorted(
+            set(self.reconciliation_repository.get_wallet_ids_changed_since(db, since, lower, upper))
+            | set(self.reconciliation_repository.get_mismatched_wallet_ids(db, last_run_id))
+        )
+        for i in range(0, len(wallet_ids), chunk_size):
+            yield wallet_ids[i:i + chunk_size]
+    
+    def get_runs(self, db: Session, skip: int = 0, limit: int = 100) -> List[ReconciliationRun]:
+        """
+        Get reconciliation runs, newest first
+        """
+        return self.reconciliation_repository.get_runs(db, skip=skip, limit=limit)
+    
+    def get_run(self, db: Session, run_id: UUID) -> Optional[ReconciliationRun]:
+        """
+        Get a reconciliation run by ID
+        """
+        return self.reconciliation_repository.get_run(db, run_id)
+    
+    def get_mismatches(self, db: Session, run_id: UUID, skip: int = 0, limit: int = 100) -> List[ReconciliationMismatch]:
+        """
+        Get the wallets a run found out of balance
+        """
+        return self.reconciliation_repository.get_mismatches(db, run_id, skip=skip, limit=limit)
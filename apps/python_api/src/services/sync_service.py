@@ -0,0 +1,154 @@
+from sqlalchemy.orm import Session, joinedload
+from typing import Any, Dict, List, Optional
+from uuid import UUID
+from datetime import datetime, timedelta
+import base64
+import binascii
+import json
+import os
+
+from core.archive import naive_utc
+from core.tracing import traced
+from core.watermark import new_high_water_mark, read_from
+from models.models import Transaction, Investment, Loan, Notification
+from repositories.sync_repository import SyncRepository
+
+# Rows returned per entity type (and deletions) per sync page
+SYNC_PAGE_SIZE = int(os.getenv("SYNC_PAGE_SIZE", "500"))
+# How long deletions are remembered; an older token gets a full sync
+SYNC_TOMBSTONE_RETENTION_DAYS = int(os.getenv("SYNC_TOMBSTONE_RETENTION_DAYS", "30"))
+
+SYNC_TOKEN_VERSION = 1
+DELETED_STREAM = "deleted"
+
+# Response key -> (model, tombstone entity type, loader options)
+SYNC_ENTITIES = {
+    "transactions": (Transaction, "transaction", []),
+    "investments": (Investment, "investment", [joinedload(Investment.plan)]),
+    "loans": (Loan, "loan", [joinedload(Loan.product)]),
+    "notifications": (Notification, "notification", [])
+}
+TOMBSTONE_KEYS = {entity_type: key for key, (_, entity_type, _) in SYNC_ENTITIES.items()}
+
+def encode_sync_token(state: Dict[str, Any]) -> str:
+    """
+    Serialize sync state into an opaque, URL-safe change token
+    """
+    payload = json.dumps({"v": SYNC_TOKEN_VERSION, **state}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+def decode_sync_token(token: str) -> Dict[str, Any]:
+    """
+    Parse a change token produced by `encode_sync_token`
+    """
+    try:
+        state = json.loads(base64.urlsafe_b64decode(token + "=" * (-len(token) % 4)))
+        if not isinstance(state, dict) or state.get("v") != SYNC_TOKEN_VERSION:
+            raise ValueError
+        return {
+            "since": _parse_time(state.get("since")),
+            "until": _parse_time(state.get("until")),
+            "cursors": {
+                stream: (_parse_time(cursor[0]), UUID(cursor[1]))
+                for stream, cursor in state.get("cursors", {}).items()
+            },
+            "done": list(state.get("done", []))
+        }
+    except (ValueError, TypeError, KeyError, IndexError, AttributeError, binascii.Error):
+        raise ValueError("Invalid sync token")
+
+def _parse_time(value: Optional[str]) -> Optional[datetime]:
+    return datetime.fromisoformat(value) if value is not None else None
+
+def _format_time(value: Optional[datetime]) -> Optional[str]:
+    return value.isoformat() if value is not None else None
+
+def _change_time(row: Any) -> datetime:
+    return naive_utc(row.updated_at or row.created_at)
+
+@traced
+class SyncService:
+    def __init__(self):
+        self.sync_repository = SyncRepository()
+    
+    def get_changes(self, db: Session, user_id: UUID, token: Optional[str] = None,
+                    limit: int = SYNC_PAGE_SIZE) -> Dict[str, Any]:
+        """
+        Get a user's transactions, investments, loans and notifications
+        created, updated or deleted since `token`.
+        
+        Without a token (or with one older than the tombstones) every row is
+        returned and `reset` tells the client to drop its local copy first.
+        Large syncs are split into pages of up to `limit` rows per entity
+        type: while `has_more` is set, the client calls again with
+        `next_token`. Once a sync is complete, `next_token` is the token for
+        the next refresh. Clients apply created and updated rows as upserts,
+        then deletions.
+        """
+        state = decode_sync_token(token) if token else {"since": None, "until": None, "cursors": {}, "done": []}
+        since, until, cursors, done = state["since"], state["until"], state["cursors"], state["done"]
+        
+        reset = False
+        if until is None:
+            # First page of a sync: fix its upper bound so later pages read the same snapshot of changes
+            until = new_high_water_mark()
+            retention = timedelta(days=SYNC_TOMBSTONE_RETENTION_DAYS)
+            if since is None or since < until - retention:
+                since, reset = None, True
+        lower = read_from(since)
+        
+        changes = {key: {"created": [], "updated": [], "deleted": []} for key in SYNC_ENTITIES}
+        for key, (model, _, options) in SYNC_ENTITIES.items():
+            if key in done:
+                continue
+            rows = self.sync_repository.get_changed(
+                db, model, user_id, lower, until, cursor=cursors.get(key), limit=limit + 1, options=options
+            )
+            if len(rows) <= limit:
+                done.append(key)
+            rows = rows[:limit]
+            if rows:
+                cursors[key] = (_change_time(rows[-1]), rows[-1].id)
+            for row in rows:
+                created = lower is None or naive_utc(row.created_at) >= lower
+                changes[key]["created" if created else "updated"].append(row)
+        
+        if DELETED_STREAM not in done:
+            # A full sync has no deletions to report
+            tombstones = [] if lower is None else self.sync_repository.get_tombstones(
+                db, user_id, lower, until, cursor=cursors.get(DELETED_STREAM), limit=limit + 1
+            )
+            if len(tombstones) <= limit:
+                done.append(DELETED_STREAM)
+            tombstones = tombstones[:limit]
+            if tombstones:
+                cursors[DELETED_STREAM] = (naive_utc(tombstones[-1].deleted_at), tombstones[-1].id)
+            for tombstone in tombstones:
+                key = TOMBSTONE_KEYS.get(tombstone.entity_type)
+                if key:
+                    changes[key]["deleted"].append(tombstone.entity_id)
+        
+        has_more = len(done) < len(SYNC_ENTITIES) + 1
+        if has_more:
+            next_state = {
+                "since": _format_time(since),
+                "until": _format_time(until),
+                "cursors": {stream: [_format_time(time), str(row_id)] for stream, (time, row_id) in cursors.items()},
+                "done": done
+            }
+        else:
+            next_state = {"since": _format_time(until)}
+        
+        return {"next_token": encode_sync_token(next_state), "has_more": has_more, "reset": reset, **changes}
+    
+    def delete_expired_tombstones(self, db: Session, batch_size: int = 1000) -> int:
+        """
+        Purge tombstones past the retention window in batches
+        """
+        before = datetime.utcnow() - timedelta(days=SYNC_TOMBSTONE_RETENTION_DAYS)
+        total = 0
+        while True:
+            deleted = self.sync_repository.delete_expired_tombstones(db, before, batch_size=batch_size)
+            total += deleted
+            if deleted < batch_size:
+                return total
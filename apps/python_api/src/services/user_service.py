@@ -1,16 +1,67 @@
 from sqlalchemy.orm import Session
-from typing import List, Optional
+from typing import Any, List, Optional, Sequence
 from uuid import UUID
+import threading
 
+from core.archive import naive_utc
+from core.ngram_index import NgramIndex
+from core.serialization import schema_columns
+from core.tracing import traced
+from core.watermark import read_from
 from models.models import User, UserRole
-from schemas.schemas import UserUpdate
+from schemas.schemas import UserUpdate, User as UserSchema
 from repositories.user_repository import UserRepository
 from repositories.notification_repository import NotificationRepository
 
+USER_SEARCH_MIN_LENGTH = 3
+
+class UserSearchIndex:
+    """
+    In-process trigram index over users, used for search when the database
+    has no pg_trgm (SQLite). Before each search it pulls users created or
+    updated since the last sync, and rebuilds fully if the user count no
+    longer matches (e.g. after deletes).
+    """
+    def __init__(self):
+        self.index = NgramIndex()
+        self.watermark = None
+        self._lock = threading.Lock()
+    
+    def sync(self, db: Session, user_repository: UserRepository) -> None:
+        with self._lock:
+            # Re-indexing a user read again in the overlap is idempotent
+            since = read_from(self.watermark)
+            rows = user_repository.get_search_rows(db, changed_since=since)
+            for row in rows:
+                self._add(row)
+            
+            if len(self.index) != user_repository.count_users(db):
+                self.index.clear()
+                self.watermark = None
+                for row in user_repository.get_search_rows(db):
+                    self._add(row)
+    
+    def _add(self, row) -> None:
+        user_id, email, first_name, last_name, phone, role, is_active, is_verified, created_at, updated_at = row
+        digits = "".join(c for c in phone if c.isdigit()) if phone else None
+        self.index.add(
+            user_id,
+            [email, first_name, last_name, phone, digits],
+            {"role": role, "is_active": is_active, "is_verified": is_verified}
+        )
+        timestamps = [naive_utc(t) for t in (created_at, updated_at) if t is not None]
+        if timestamps and (self.watermark is None or max(timestamps) > self.watermark):
+            self.watermark = max(timestamps)
+
+# Shared by every UserService in the process
+user_search_index = UserSearchIndex()
+
+@traced
 class UserService:
     def __init__(self):
         self.user_repository = UserRepository()
         self.notification_repository = NotificationRepository()
+        self.search_index = user_search_index
     
     def get_user(self, db: Session, user_id: UUID) -> Optional[User]:
         """
@@ -24,11 +75,43 @@ class UserService:
         """
         return self.user_repository.get_by_email(db, email)
     
-    def get_users(self, db: Session, skip: int = 0, limit: int = 100) -> List[User]:
+    def get_users(self, db: Session, skip: int = 0, limit: int = 100, role: Optional[UserRole] = None,
+                  is_active: Optional[bool] = None, is_verified: Optional[bool] = None,
+                  fields: Optional[Sequence[str]] = None) -> List[Any]:
         """
-        Get all users with pagination
+        Get all users with pagination, or rows of only `fields` of them
         """
-        return self.user_repository.get_all(db, skip=skip, limit=limit)
+        columns = schema_columns(User, UserSchema, fields) if fields is not None else None
+        return self.user_repository.get_all(
+            db, skip=skip, limit=limit, role=role, is_active=is_active, is_verified=is_verified, columns=columns
+        )
+    
+    def search_users(self, db: Session, query: str, limit: int = 20, role: Optional[UserRole] = None,
+                     is_active: Optional[bool] = None, is_verified: Optional[bool] = None) -> List[User]:
+        """
+        Search users by email, first/last name and phone (prefix, substring or
+        fuzzy match), best match first
+        """
+        if len(query.strip()) < USER_SEARCH_MIN_LENGTH:
+            raise ValueError(f"Search query must be at least {USER_SEARCH_MIN_LENGTH} characters")
+        
+        if db.get_bind().dialect.name == "postgresql":
+            return self.user_repository.search_trigram(
+                db, query, limit=limit, role=role, is_active=is_active, is_verified=is_verified
+            )
+        
+        self.search_index.sync(db, self.user_repository)
+        matches = self.search_index.index.search(
+            query,
+            limit=limit,
+            predicate=lambda user: (
+                (role is None or user["role"] == role)
+                and (is_active is None or user["is_active"] == is_active)
+                and (is_verified is None or user["is_verified"] == is_verified)
+            )
+        )
+        users = {user.id: user for user in self.user_repository.get_by_ids(db, [user_id for user_id, _ in matches])}
+        return [users[user_id] for user_id, _ in matches if user_id in users]
     
     def get_users_by_role(self, db: Session, role: UserRole, skip: int = 0, limit: int = 100) -> List[User]:
         """
@@ -54,7 +137,7 @@ class UserService:
         Deactivate a user
         """
         return self.user_repository.update(db, user_id, is_active=False)
-        
+    
     def activate_user(self, db: Session, user_id: UUID) -> Optional[User]:
         """
         Activate a user
@@ -103,7 +186,7 @@ class UserService:
         existing_user = self.get_user_by_email(db, email)
         if existing_user:
             return existing_user
-            
+        
         # Hash the password
         hashed_password = get_password_hash(password)
         
@@ -1,16 +1,33 @@
 from sqlalchemy.orm import Session
-from typing import List, Optional
+from typing import Any, Dict, List, Optional, Sequence
 from uuid import UUID
+from datetime import datetime
+import json
 
-from models.models import Wallet as WalletModel, Transaction as TransactionModel, TransactionType, TransactionStatus
-from schemas.schemas import WalletUpdate, TransactionCreate
+from core.serialization import schema_columns
+from core.tracing import traced
+from models.models import (
+    Wallet as WalletModel, Transaction as TransactionModel, TransactionType, TransactionStatus,
+    CREDIT_TRANSACTION_TYPES, DEBIT_TRANSACTION_TYPES
+)
+from schemas.schemas import WalletUpdate, TransactionCreate, Transaction as TransactionSchema
 from repositories.wallet_repository import WalletRepository
 from repositories.transaction_repository import TransactionRepository
+from repositories.audit_repository import AuditRepository
+from services.ledger_service import LedgerService
 
+# Transactions handled per database transaction by bulk approve/reject
+BULK_CHUNK_SIZE = 500
+# Transaction lists select only the columns the API renders
+TRANSACTION_LIST_COLUMNS = schema_columns(TransactionModel, TransactionSchema)
+
+@traced
 class WalletService:
     def __init__(self):
         self.wallet_repository = WalletRepository()
         self.transaction_repository = TransactionRepository()
+        self.ledger_service = LedgerService()
+        self.audit_repository = AuditRepository()
     
     def get_wallet(self, db: Session, wallet_id: UUID) -> Optional[WalletModel]:
         """
@@ -26,49 +43,76 @@ class WalletService:
     
     def update_wallet(self, db: Session, wallet_id: UUID, wallet_update: WalletUpdate) -> Optional[WalletModel]:
         """
-        Update a wallet
+        Update a wallet. A new balance is reached through a completed
+        adjustment transaction posted to the ledger, so the ledger and
+        reconciliation account for the difference.
         """
-        wallet = self.get_wallet(db, wallet_id)
+        # Locked so the difference is taken against the balance it replaces
+        wallet = self.wallet_repository.get_for_update(db, wallet_id)
         if not wallet:
+            db.rollback()
             return None
         
         update_data = wallet_update.model_dump(exclude_unset=True)
         
-        # Update balance if provided
-        if "balance" in update_data:
-            return self.wallet_repository.set_balance(db, wallet_id, update_data["balance"])
+        # Post the balance difference if a balance is provided
+        if update_data.get("balance") is not None:
+            difference = update_data["balance"] - (wallet.balance or 0.0)
+            if difference:
+                transaction = self.transaction_repository.create(
+                    db,
+                    user_id=wallet.user_id,
+                    wallet_id=wallet_id,
+                    amount=abs(difference),
+                    type=TransactionType.DEPOSIT if difference > 0 else TransactionType.WITHDRAWAL,
+                    status=TransactionStatus.COMPLETED,
+                    description="Balance adjustment",
+                    commit=False
+                )
+                wallet.balance = update_data["balance"]
+                self.ledger_service.post_transaction(db, wallet, transaction, difference)
         
         # Update currency if provided
-        if "currency" in update_data:
-            return self.wallet_repository.update_currency(db, wallet_id, update_data["currency"])
+        if update_data.get("currency") is not None:
+            wallet.currency = update_data["currency"]
         
+        # Balance, adjustment and ledger postings commit together
+        db.commit()
+        db.refresh(wallet)
         return wallet
     
-    def update_wallet_balance(self, db: Session, wallet_id: UUID, amount: float) -> Optional[WalletModel]:
-        """
-        Update wallet balance
-        """
-        return self.wallet_repository.update_balance(db, wallet_id, amount)
-    
     def get_wallet_transactions(self, db: Session, wallet_id: UUID, skip: int = 0, limit: int = 100, 
-                               transaction_type: Optional[TransactionType] = None) -> List[TransactionModel]:
+                               transaction_type: Optional[TransactionType] = None,
+                               start_date: Optional[datetime] = None,
+                               end_date: Optional[datetime] = None,
+                               fields: Optional[Sequence[str]] = None) -> List[Any]:
         """
-        Get wallet transactions
+        Get wallet transactions as rows of the columns the API renders, or
+        only of `fields` (plus created_at, which orders live and archived rows)
         """
+        columns = TRANSACTION_LIST_COLUMNS
+        if fields is not None:
+            columns = schema_columns(TransactionModel, TransactionSchema, set(fields) | {"created_at"})
         return self.transaction_repository.get_by_wallet_id(
             db, 
             wallet_id, 
             skip=skip, 
             limit=limit,
-            transaction_type=transaction_type
+            transaction_type=transaction_type,
+            start_date=start_date,
+            end_date=end_date,
+            columns=columns
         )
     
     def create_transaction(self, db: Session, user_id: UUID, wallet_id: UUID, amount: float, 
                           transaction_type: TransactionType, description: Optional[str] = None,
                           reference: Optional[str] = None, investment_id: Optional[UUID] = None,
-                          loan_id: Optional[UUID] = None, auto_approve: bool = True) -> TransactionModel:
+                          loan_id: Optional[UUID] = None, auto_approve: bool = True,
+                          commit: bool = True) -> TransactionModel:
         """
-        Create a new transaction and update wallet balance
+        Create a new transaction and update wallet balance. With commit=False
+        everything is only flushed so the caller can commit it together with
+        its own writes.
         """
         # Create transaction with appropriate status
         status = TransactionStatus.COMPLETED if auto_approve else TransactionStatus.PENDING
@@ -83,39 +127,173 @@ class WalletService:
             description=description,
             reference=reference,
             investment_id=investment_id,
-            loan_id=loan_id
+            loan_id=loan_id,
+            commit=False
         )
         
-        # Update wallet balance only if transaction is completed
+        # Update wallet balance and ledger only if transaction is completed
         if status == TransactionStatus.COMPLETED:
-            if transaction_type in [TransactionType.DEPOSIT, TransactionType.INTEREST]:
-                self.wallet_repository.update_balance(db, wallet_id, abs(amount))
-            elif transaction_type in [TransactionType.WITHDRAWAL, TransactionType.INVESTMENT, TransactionType.LOAN_PAYMENT]:
-                self.wallet_repository.update_balance(db, wallet_id, -abs(amount))
+            self._apply_completed_transaction(db, transaction)
+        
+        if not commit:
+            db.flush()
+            return transaction
         
+        # Transaction, balance and ledger postings commit together
+        db.commit()
+        db.refresh(transaction)
         return transaction
         
     def approve_transaction(self, db: Session, transaction_id: UUID) -> Optional[TransactionModel]:
         """
         Approve a pending transaction and update wallet balance
         """
-        # Get the transaction
-        transaction = self.transaction_repository.get_by_id(db, transaction_id)
+        # Get the transaction, locked so concurrent approvals cannot both apply it
+        transaction = self.transaction_repository.get_for_update(db, transaction_id)
         if not transaction or transaction.status != TransactionStatus.PENDING:
+            db.rollback()
             return None
             
-        # Update transaction status
-        updated_transaction = self.transaction_repository.update_status(
-            db, transaction_id, TransactionStatus.COMPLETED
+        # Update transaction status, wallet balance and ledger in one commit
+        transaction.status = TransactionStatus.COMPLETED
+        self._apply_completed_transaction(db, transaction)
+        db.commit()
+        db.refresh(transaction)
+            
+        return transaction
+    
+    def _apply_completed_transaction(self, db: Session, transaction: TransactionModel) -> None:
+        """
+        Apply a completed transaction to its wallet balance and post it to the
+        ledger, without committing
+        """
+        amount = self._signed_amount(transaction)
+        if amount is None:
+            return
+        
+        wallet = self.wallet_repository.get_for_update(db, transaction.wallet_id)
+        if not wallet:
+            return
+        
+        wallet.balance = (wallet.balance or 0.0) + amount
+        self.ledger_service.post_transaction(db, wallet, transaction, amount)
+    
+    def _signed_amount(self, transaction: TransactionModel) -> Optional[float]:
+        """
+        Balance change a completed transaction makes, or None if it has no effect
+        """
+        if transaction.type in CREDIT_TRANSACTION_TYPES:
+            return abs(transaction.amount)
+        if transaction.type in DEBIT_TRANSACTION_TYPES:
+            return -abs(transaction.amount)
+        return None
+        
+    def find_pending_transaction_ids(self, db: Session, transaction_type: Optional[TransactionType] = None,
+                                     user_id: Optional[UUID] = None, created_before: Optional[datetime] = None,
+                                     max_amount: Optional[float] = None, limit: int = 1000) -> List[UUID]:
+        """
+        Get IDs of pending transactions matching a bulk action filter
+        """
+        return self.transaction_repository.get_pending_ids(
+            db,
+            transaction_type=transaction_type,
+            user_id=user_id,
+            created_before=created_before,
+            max_amount=max_amount,
+            limit=limit
         )
+    
+    def bulk_approve_transactions(self, db: Session, transaction_ids: List[UUID], actor_id: UUID,
+                                  transaction_type: Optional[TransactionType] = None,
+                                  chunk_size: int = BULK_CHUNK_SIZE) -> List[Dict[str, Any]]:
+        """
+        Approve many pending transactions and update wallet balances
+        """
+        return self._bulk_update_status(
+            db, transaction_ids, TransactionStatus.COMPLETED, actor_id,
+            transaction_type=transaction_type, chunk_size=chunk_size
+        )
+    
+    def bulk_reject_transactions(self, db: Session, transaction_ids: List[UUID], actor_id: UUID,
+                                 rejection_reason: Optional[str] = None,
+                                 transaction_type: Optional[TransactionType] = None,
+                                 chunk_size: int = BULK_CHUNK_SIZE) -> List[Dict[str, Any]]:
+        """
+        Reject many pending transactions
+        """
+        return self._bulk_update_status(
+            db, transaction_ids, TransactionStatus.REJECTED, actor_id, rejection_reason=rejection_reason,
+            transaction_type=transaction_type, chunk_size=chunk_size
+        )
+    
+    def _bulk_update_status(self, db: Session, transaction_ids: List[UUID], status: TransactionStatus,
+                            actor_id: UUID, rejection_reason: Optional[str] = None,
+                            transaction_type: Optional[TransactionType] = None,
+                            chunk_size: int = BULK_CHUNK_SIZE) -> List[Dict[str, Any]]:
+        """
+        Move pending transactions to `status` with one database transaction per
+        chunk covering the status changes, balance deltas, ledger postings and
+        audit rows. Transaction rows and then wallet rows are locked in ID order,
+        so concurrent bulk runs and single approvals cannot deadlock each other.
+        Returns one result per requested ID, in request order.
+        """
+        outcome = "approved" if status == TransactionStatus.COMPLETED else "rejected"
+        requested_ids = list(dict.fromkeys(transaction_ids))
+        ordered_ids = sorted(requested_ids)
+        results = {}
         
-        # Update wallet balance based on transaction type
-        if transaction.type in [TransactionType.DEPOSIT, TransactionType.INTEREST]:
-            self.wallet_repository.update_balance(db, transaction.wallet_id, abs(transaction.amount))
-        elif transaction.type in [TransactionType.WITHDRAWAL, TransactionType.INVESTMENT, TransactionType.LOAN_PAYMENT]:
-            self.wallet_repository.update_balance(db, transaction.wallet_id, -abs(transaction.amount))
-            
-        return updated_transaction
+        for i in range(0, len(ordered_ids), chunk_size):
+            chunk = ordered_ids[i:i + chunk_size]
+            chunk_results = {}
+            pending = []
+            try:
+                transactions = {t.id: t for t in self.transaction_repository.lock_by_ids(db, chunk)}
+                for transaction_id in chunk:
+                    transaction = transactions.get(transaction_id)
+                    if transaction is None or (transaction_type and transaction.type != transaction_type):
+                        chunk_results[transaction_id] = {"id": transaction_id, "status": "not_found", "detail": "Transaction not found"}
+                    elif transaction.status != TransactionStatus.PENDING:
+                        chunk_results[transaction_id] = {"id": transaction_id, "status": "skipped", "detail": f"Transaction is {transaction.status.value}"}
+                    else:
+                        pending.append(transaction)
+                
+                for transaction in pending:
+                    transaction.status = status
+                    if status == TransactionStatus.REJECTED and rejection_reason:
+                        transaction.rejection_reason = rejection_reason
+                
+                if status == TransactionStatus.COMPLETED and pending:
+                    wallet_ids = sorted({t.wallet_id for t in pending if t.wallet_id})
+                    wallets = {w.id: w for w in self.wallet_repository.lock_by_ids(db, wallet_ids)}
+                    postings = []
+                    for transaction in pending:
+                        amount = self._signed_amount(transaction)
+                        wallet = wallets.get(transaction.wallet_id)
+                        if amount is not None and wallet:
+                            postings.append((wallet, transaction, amount))
+                    if postings:
+                        self.ledger_service.apply_transactions(db, postings)
+                
+                self.audit_repository.create_many(db, [{
+                    "user_id": actor_id,
+                    "action": f"Updated transaction {transaction.id} status to {status.value}",
+                    "entity_type": "transaction",
+                    "entity_id": str(transaction.id),
+                    "details": json.dumps({"bulk": True, "rejection_reason": rejection_reason})
+                } for transaction in pending])
+                
+                db.commit()
+                for transaction in pending:
+                    chunk_results[transaction.id] = {"id": transaction.id, "status": outcome, "detail": None}
+            except Exception as e:
+                db.rollback()
+                for transaction in pending:
+                    chunk_results[transaction.id] = {"id": transaction.id, "status": "failed", "detail": str(e)}
+                for transaction_id in chunk:
+                    chunk_results.setdefault(transaction_id, {"id": transaction_id, "status": "failed", "detail": str(e)})
+            results.update(chunk_results)
+        
+        return [results[transaction_id] for transaction_id in requested_ids]
         
     def reject_transaction(self, db: Session, transaction_id: UUID, rejection_reason: Optional[str] = None) -> Optional[TransactionModel]:
         """
@@ -3,4 +3,11 @@
 from tasks.investment_tasks import *
 from tasks.loan_tasks import *
 from tasks.crypto_tasks import *
-from tasks.notification_tasks import *
\ No newline at end of file
+from tasks.notification_tasks import *
+from tasks.reconciliation_tasks import *
+from tasks.ledger_tasks import *
+from tasks.idempotency_tasks import *
+from tasks.partition_tasks import *
+from tasks.archive_tasks import *
+from tasks.analytics_tasks import *
+from tasks.sync_tasks import *
\ No newline at end of file
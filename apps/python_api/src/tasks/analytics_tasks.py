@@ -0,0 +1,19 @@
+from tasks.celery_app import celery_app
+
+from db.database import SessionLocal
+from services.analytics_service import AnalyticsService
+
+analytics_service = AnalyticsService()
+
+@celery_app.task
+def update_analytics_rollups(full=False):
+    """
+    Fold transactions and loan disbursements changed since the last run into
+    the hourly and daily analytics rollups
+    """
+    db = SessionLocal()
+    try:
+        result = analytics_service.update_rollups(db, full=full)
+        return f"Rebuilt {result['hours_rebuilt']} hours of analytics rollups ({result['mode']})"
+    finally:
+        db.close()
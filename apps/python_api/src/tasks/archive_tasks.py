@@ -0,0 +1,21 @@
+from tasks.celery_app import celery_app
+
+from core.metrics import record_task_rows
+from db.database import SessionLocal
+from services.archive_service import ArchiveService
+
+archive_service = ArchiveService()
+
+@celery_app.task
+def archive_old_records():
+    """
+    Move transactions and audit logs past the retention window to cold storage
+    """
+    db = SessionLocal()
+    try:
+        transactions = archive_service.archive_transactions(db)
+        audit_logs = archive_service.archive_audit_logs(db)
+        record_task_rows(transactions + audit_logs)
+        return f"Archived {transactions} transactions and {audit_logs} audit logs"
+    finally:
+        db.close()
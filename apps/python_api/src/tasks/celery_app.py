@@ -3,6 +3,9 @@ from celery.schedules import crontab
 import os
 from dotenv import load_dotenv
 
+from core.metrics import instrument_celery
+from core.tracing import trace_celery_tasks
+
 # Load environment variables
 load_dotenv()
 
@@ -22,6 +25,12 @@ celery_app.conf.update(
     enable_utc=True,
 )
 
+# Task durations for /metrics (and CELERY_METRICS_PORT on workers on other hosts)
+instrument_celery()
+
+# Carry traces from requests into the tasks they queue, and trace sampled task runs
+trace_celery_tasks()
+
 # Configure periodic tasks
 celery_app.conf.beat_schedule = {
     "process-investment-returns-daily": {
@@ -44,4 +53,32 @@ celery_app.conf.beat_schedule = {
         "task": "tasks.notification_tasks.send_reminders",
         "schedule": crontab(hour=9, minute=0),  # Run at 9 AM every day
     },
+    "take-balance-snapshots-daily": {
+        "task": "tasks.ledger_tasks.take_balance_snapshots",
+        "schedule": crontab(hour=1, minute=0),  # Run at 1 AM every day
+    },
+    "purge-expired-idempotency-keys": {
+        "task": "tasks.idempotency_tasks.purge_expired_idempotency_keys",
+        "schedule": crontab(minute=30),  # Run every hour
+    },
+    "create-future-partitions-daily": {
+        "task": "tasks.partition_tasks.create_future_partitions",
+        "schedule": crontab(hour=3, minute=0),  # Run at 3 AM every day
+    },
+    "archive-old-records-monthly": {
+        "task": "tasks.archive_tasks.archive_old_records",
+        "schedule": crontab(day_of_month=1, hour=4, minute=0),  # Run on the 1st of every month
+    },
+    "update-analytics-rollups": {
+        "task": "tasks.analytics_tasks.update_analytics_rollups",
+        "schedule": crontab(minute="*/5"),  # Run every 5 minutes
+    },
+    "reconcile-wallet-balances-nightly": {
+        "task": "tasks.reconciliation_tasks.reconcile_all_wallet_balances",
+        "schedule": crontab(hour=2, minute=0),  # Run at 2 AM every day
+    },
+    "purge-expired-sync-tombstones-daily": {
+        "task": "tasks.sync_tasks.purge_expired_sync_tombstones",
+        "schedule": crontab(hour=5, minute=0),  # Run at 5 AM every day
+    },
 }
\ No newline at end of file
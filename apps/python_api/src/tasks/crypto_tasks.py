@@ -2,6 +2,7 @@ from tasks.celery_app import celery_app
 from sqlalchemy.orm import Session
 from datetime import datetime, timedelta
 
+from core.metrics import record_task_rows
 from db.database import SessionLocal
 from models.models import OrderStatus, TransactionType, TransactionStatus
 from services.crypto_service import CryptoService
@@ -56,6 +57,7 @@ def check_pending_orders():
                     # Log the error but don't fail the task
                     print(f"Error checking order {order.id}: {str(e)}")
         
+        record_task_rows(len(pending_orders))
         return f"Checked {len(pending_orders)} pending orders"
     finally:
         db.close()
@@ -120,6 +122,7 @@ def retry_failed_deposits():
                 # Log the error but don't fail the task
                 print(f"Error retrying order {order.id}: {str(e)}")
         
+        record_task_rows(retried_count)
         return f"Retried {retried_count} failed deposits"
     finally:
         db.close()
\ No newline at end of file
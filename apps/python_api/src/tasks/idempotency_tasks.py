@@ -0,0 +1,20 @@
+from tasks.celery_app import celery_app
+
+from core.metrics import record_task_rows
+from db.database import SessionLocal
+from services.idempotency_service import IdempotencyService
+
+idempotency_service = IdempotencyService()
+
+@celery_app.task
+def purge_expired_idempotency_keys():
+    """
+    Delete idempotency keys past their TTL
+    """
+    db = SessionLocal()
+    try:
+        deleted = idempotency_service.delete_expired_keys(db)
+        record_task_rows(deleted)
+        return f"Deleted {deleted} expired idempotency keys"
+    finally:
+        db.close()
@@ -2,6 +2,7 @@ from tasks.celery_app import celery_app
 from sqlalchemy.orm import Session
 from datetime import datetime, timedelta
 
+from core.metrics import record_task_rows
 from db.database import SessionLocal
 from models.models import InvestmentStatus, TransactionType, TransactionStatus
 from services.investment_service import InvestmentService
@@ -43,6 +44,7 @@ def process_investment_returns():
                 # Process investment maturity
                 process_investment_maturity.delay(str(investment.id))
         
+        record_task_rows(len(active_investments))
         return f"Processed returns for {len(active_investments)} active investments"
     finally:
         db.close()
@@ -127,6 +129,7 @@ def check_investments_ending_soon():
                 message=f"Your investment of {investment.amount} will mature in {days_left} days with an estimated return of {investment.current_value - investment.amount}."
             )
         
+        record_task_rows(len(investments))
         return f"Sent notifications for {len(investments)} investments ending soon"
     finally:
         db.close()
\ No newline at end of file
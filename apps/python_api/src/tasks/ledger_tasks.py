@@ -0,0 +1,20 @@
+from tasks.celery_app import celery_app
+
+from core.metrics import record_task_rows
+from db.database import SessionLocal
+from services.ledger_service import LedgerService
+
+ledger_service = LedgerService()
+
+@celery_app.task
+def take_balance_snapshots():
+    """
+    Snapshot wallet balances so balance-as-of and statement queries read a short ledger tail
+    """
+    db = SessionLocal()
+    try:
+        count = ledger_service.take_snapshots(db)
+        record_task_rows(count)
+        return f"Took {count} wallet balance snapshots"
+    finally:
+        db.close()
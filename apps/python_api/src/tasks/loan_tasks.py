@@ -2,6 +2,7 @@ from tasks.celery_app import celery_app
 from sqlalchemy.orm import Session
 from datetime import datetime
 
+from core.metrics import record_task_rows
 from db.database import SessionLocal
 from models.models import LoanStatus, TransactionType, TransactionStatus
 from services.loan_service import LoanService
@@ -35,6 +36,7 @@ def calculate_monthly_interest():
                     message=f"Monthly interest has been applied to your loan. Your remaining balance is now {updated_loan.remaining_amount}."
                 )
         
+        record_task_rows(len(active_loans))
         return f"Applied monthly interest to {len(active_loans)} active loans"
     finally:
         db.close()
@@ -61,6 +63,7 @@ def process_due_payments():
             # Check if auto-payment is enabled (future feature)
             # For now, just remind the user
         
+        record_task_rows(len(due_loans))
         return f"Processed {len(due_loans)} loans with payments due"
     finally:
         db.close()
@@ -100,6 +103,7 @@ def check_overdue_loans():
                         message=f"Your loan payment of {loan.monthly_payment} is {days_overdue} days overdue. Please make your payment as soon as possible to avoid additional fees."
                     )
         
+        record_task_rows(len(overdue_loans))
         return f"Sent reminders for {len(overdue_loans)} overdue loans"
     finally:
         db.close()
\ No newline at end of file
@@ -2,6 +2,7 @@ from tasks.celery_app import celery_app
 from sqlalchemy.orm import Session
 from datetime import datetime, timedelta
 
+from core.metrics import record_task_rows
 from db.database import SessionLocal
 from models.models import NotificationStatus, LoanStatus, InvestmentStatus
 from services.user_service import UserService
@@ -200,6 +201,7 @@ def broadcast_notification(title, message, user_role=None, notification_type="IN
                 notification_type=notification_type
             )
         
+        record_task_rows(len(users))
         return f"Broadcast notification to {len(users)} users"
     finally:
         db.close()
\ No newline at end of file
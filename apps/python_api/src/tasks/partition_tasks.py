@@ -0,0 +1,29 @@
+from tasks.celery_app import celery_app
+
+from db.database import SessionLocal
+from db.partitioning import PARTITIONING_ENABLED, PARTITIONED_TABLES, is_supported, is_partitioned, ensure_partitions
+
+@celery_app.task
+def create_future_partitions():
+    """
+    Make sure upcoming monthly partitions exist before rows are written to them
+    """
+    if not PARTITIONING_ENABLED:
+        return "Partitioning is disabled"
+    
+    db = SessionLocal()
+    try:
+        if not is_supported(db):
+            return "Partitioning requires PostgreSQL"
+        
+        created = []
+        for table in PARTITIONED_TABLES:
+            if is_partitioned(db, table):
+                created.extend(ensure_partitions(db, table))
+        db.commit()
+        return f"Created {len(created)} partitions"
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
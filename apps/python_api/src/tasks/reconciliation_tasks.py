@@ -0,0 +1,48 @@
+from tasks.celery_app import celery_app
+from celery.utils.log import get_task_logger
+import os
+
+from core.metrics import record_task_rows
+from db.database import SessionLocal
+from services.reconciliation_service import ReconciliationService
+
+logger = get_task_logger(__name__)
+
+reconciliation_service = ReconciliationService()
+
+# Number of parallel shards the nightly reconciliation is split into
+RECONCILIATION_SHARDS = int(os.getenv("RECONCILIATION_SHARDS", "4"))
+
+@celery_app.task
+def reconcile_wallet_balances(full=False, shard_index=0, shard_count=1):
+    """
+    Reconcile wallet balances for one shard against the transaction ledger
+    """
+    db = SessionLocal()
+    try:
+        run = reconciliation_service.reconcile(
+            db,
+            full=full,
+            shard_index=shard_index,
+            shard_count=shard_count
+        )
+        
+        if run.mismatches_found:
+            logger.warning("Reconciliation run %s (shard %d/%d) found %d wallet balance mismatches",
+                           run.id, shard_index, shard_count, run.mismatches_found)
+        
+        record_task_rows(run.wallets_checked)
+        return f"Checked {run.wallets_checked} wallets ({run.mode}), found {run.mismatches_found} mismatches"
+    finally:
+        db.close()
+
+@celery_app.task
+def reconcile_all_wallet_balances(full=False, shard_count=None):
+    """
+    Fan reconciliation out across shards so workers can run them in parallel
+    """
+    shard_count = shard_count or RECONCILIATION_SHARDS
+    for shard_index in range(shard_count):
+        reconcile_wallet_balances.delay(full=full, shard_index=shard_index, shard_count=shard_count)
+    
+    return f"Dispatched {shard_count} reconciliation shards"
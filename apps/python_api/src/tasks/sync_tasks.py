@@ -0,0 +1,20 @@
+from tasks.celery_app import celery_app
+
+from core.metrics import record_task_rows
+from db.database import SessionLocal
+from services.sync_service import SyncService
+
+sync_service = SyncService()
+
+@celery_app.task
+def purge_expired_sync_tombstones():
+    """
+    Delete sync tombstones past their retention window
+    """
+    db = SessionLocal()
+    try:
+        deleted = sync_service.delete_expired_tombstones(db)
+        record_task_rows(deleted)
+        return f"Deleted {deleted} expired sync tombstones"
+    finally:
+        db.close()
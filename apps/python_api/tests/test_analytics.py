@@ -0,0 +1,84 @@
+import pytest
+from datetime import datetime, timedelta
+
+from core.archive import ArchiveStore
+from models.models import User, Loan, LoanStatus, Transaction, TransactionType, TransactionStatus
+from services.analytics_service import AnalyticsService
+
+DAY_ONE = (datetime.utcnow() - timedelta(days=3)).replace(hour=0, minute=0, second=0, microsecond=0)
+
+def _service(tmp_path):
+    service = AnalyticsService()
+    service.analytics_repository.archive_store = ArchiveStore(str(tmp_path))
+    return service
+
+def _activity(db):
+    user = User(email="analytics@example.com", first_name="Ana", last_name="Lytics")
+    db.add(user)
+    db.flush()
+    for hours, transaction_type, amount, status in [
+        (1, TransactionType.DEPOSIT, 100.0, TransactionStatus.COMPLETED),
+        (1, TransactionType.DEPOSIT, 50.0, TransactionStatus.COMPLETED),
+        (2, TransactionType.WITHDRAWAL, 30.0, TransactionStatus.PENDING),
+        (26, TransactionType.DEPOSIT, 10.0, TransactionStatus.COMPLETED),
+    ]:
+        db.add(Transaction(
+            user_id=user.id, type=transaction_type, amount=amount, status=status,
+            created_at=DAY_ONE + timedelta(hours=hours, minutes=15)
+        ))
+    db.add(Loan(user_id=user.id, amount=1000.0, status=LoanStatus.ACTIVE, start_date=DAY_ONE + timedelta(hours=5)))
+    db.commit()
+    return user
+
+def _points(result, metric, status):
+    series = [s for s in result["series"] if s["metric"] == metric and s["status"] == status]
+    return [(p["count"], p["total"]) for p in series[0]["points"]] if series else []
+
+def test_rollups_serve_hourly_and_daily_series(test_db, tmp_path):
+    _activity(test_db)
+    service = _service(tmp_path)
+    assert service.update_rollups(test_db)["mode"] == "full"
+    
+    hourly = service.get_timeseries(test_db, DAY_ONE, DAY_ONE + timedelta(hours=3), granularity="hour")
+    assert _points(hourly, "deposit", "completed") == [(0, 0.0), (2, 150.0), (0, 0.0)]
+    assert _points(hourly, "withdrawal", "pending") == [(0, 0.0), (0, 0.0), (1, 30.0)]
+    
+    daily = service.get_timeseries(test_db, DAY_ONE, DAY_ONE + timedelta(days=2), metrics=["deposit", "loan_disbursement"])
+    assert _points(daily, "deposit", "completed") == [(2, 150.0), (1, 10.0)]
+    assert _points(daily, "loan_disbursement", "active") == [(1, 1000.0), (0, 0.0)]
+    assert {s["metric"] for s in daily["series"]} == {"deposit", "loan_disbursement"}
+    
+    monthly = service.get_timeseries(test_db, DAY_ONE, DAY_ONE + timedelta(days=1), granularity="month",
+                                     statuses=["completed"])
+    assert sum(count for count, _ in _points(monthly, "deposit", "completed")) == 3
+
+def test_incremental_update_moves_status_changes(test_db, tmp_path):
+    user = _activity(test_db)
+    service = _service(tmp_path)
+    service.update_rollups(test_db)
+    
+    withdrawal = test_db.query(Transaction).filter(Transaction.type == TransactionType.WITHDRAWAL).one()
+    withdrawal.status = TransactionStatus.COMPLETED
+    withdrawal.updated_at = datetime.utcnow()
+    test_db.add(Transaction(user_id=user.id, type=TransactionType.INVESTMENT, amount=20.0,
+                            status=TransactionStatus.COMPLETED, created_at=datetime.utcnow()))
+    test_db.commit()
+    
+    result = service.update_rollups(test_db)
+    assert result["mode"] == "incremental"
+    # The withdrawal's and investment's hours, plus the loan's (created within the overlap window)
+    assert result["hours_rebuilt"] == 3
+    
+    daily = service.get_timeseries(test_db, DAY_ONE, datetime.utcnow())
+    assert sum(count for count, _ in _points(daily, "withdrawal", "pending")) == 0
+    assert sum(total for _, total in _points(daily, "withdrawal", "completed")) == 30.0
+    assert sum(total for _, total in _points(daily, "investment", "completed")) == 20.0
+
+def test_timeseries_rejects_bad_requests(test_db, tmp_path):
+    service = _service(tmp_path)
+    with pytest.raises(ValueError):
+        service.get_timeseries(test_db, DAY_ONE, DAY_ONE + timedelta(days=1), granularity="minute")
+    with pytest.raises(ValueError):
+        service.get_timeseries(test_db, DAY_ONE, DAY_ONE + timedelta(days=1), metrics=["refunds"])
+    with pytest.raises(ValueError):
+        service.get_timeseries(test_db, DAY_ONE, DAY_ONE + timedelta(days=365), granularity="hour")
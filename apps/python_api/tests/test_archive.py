@@ -0,0 +1,214 @@
+import json
+import os
+from datetime import datetime, timedelta
+
+from core.archive import ArchiveStore, encode_row
+from models.models import (
+    User, Wallet, Transaction, AuditLog, LedgerEntry, WalletBalanceSnapshot, TransactionType, TransactionStatus
+)
+from repositories.audit_repository import AuditRepository
+from repositories.transaction_repository import TransactionRepository
+from services.archive_service import ArchiveService, archive_file_name
+from services.export_service import TRANSACTION_EXPORT_COLUMNS
+from services.ledger_service import LedgerService
+from services.reconciliation_service import ReconciliationService
+
+LONG_AGO = datetime(2024, 1, 15)
+CUTOFF = datetime(2025, 1, 1)
+
+def _wallet_with_history(db):
+    user = User(email="archive@example.com", first_name="Arc", last_name="Hive")
+    db.add(user)
+    db.flush()
+    wallet = Wallet(user_id=user.id, balance=120.0)
+    db.add(wallet)
+    db.flush()
+    for days, transaction_type, amount, status in [
+        (0, TransactionType.DEPOSIT, 100.0, TransactionStatus.COMPLETED),
+        (1, TransactionType.WITHDRAWAL, -30.0, TransactionStatus.COMPLETED),
+        (2, TransactionType.WITHDRAWAL, -500.0, TransactionStatus.PENDING),
+        (3, TransactionType.DEPOSIT, 999.0, TransactionStatus.REJECTED),
+    ]:
+        db.add(Transaction(
+            user_id=user.id, wallet_id=wallet.id, type=transaction_type, amount=amount,
+            status=status, created_at=LONG_AGO + timedelta(days=days)
+        ))
+    db.add(Transaction(
+        user_id=user.id, wallet_id=wallet.id, type=TransactionType.DEPOSIT, amount=50.0,
+        status=TransactionStatus.COMPLETED, created_at=datetime.utcnow()
+    ))
+    db.commit()
+    return wallet
+
+def test_archive_moves_settled_transactions_and_keeps_reads_and_reconciliation(test_db, tmp_path):
+    wallet = _wallet_with_history(test_db)
+    store = ArchiveStore(str(tmp_path))
+    service = ArchiveService(store)
+    
+    assert service.archive_transactions(test_db, before=CUTOFF, batch_size=2) == 3
+    assert service.archive_transactions(test_db, before=CUTOFF) == 0
+    
+    # Pending and recent transactions stay live
+    live = test_db.query(Transaction).all()
+    assert sorted(t.status.value for t in live) == ["completed", "pending"]
+    
+    manifest = store.get_manifest("transactions")
+    assert [entry["rows"] for entry in manifest] == [2, 1]
+    assert all(os.path.exists(tmp_path / "transactions" / entry["file"]) for entry in manifest)
+    
+    # A date range reaching into the archive merges both sources, newest first
+    repository = TransactionRepository()
+    repository.archive_store = store
+    rows = repository.get_by_wallet_id(test_db, wallet.id, start_date=datetime(2023, 1, 1))
+    assert [t.amount for t in rows] == [50.0, 999.0, -500.0, -30.0, 100.0]
+    assert rows[-1].type == TransactionType.DEPOSIT
+    assert len(repository.get_by_wallet_id(test_db, wallet.id, start_date=datetime(2023, 1, 1), skip=1, limit=2)) == 2
+    assert len(repository.get_by_wallet_id(test_db, wallet.id)) == 2
+    
+    # Archived completed transactions still count towards the expected balance
+    run = ReconciliationService().reconcile(test_db, full=True)
+    assert run.mismatches_found == 0
+
+def test_archive_moves_postings_behind_the_latest_snapshot(test_db, tmp_path):
+    wallets = []
+    for name in ("posted", "other"):
+        user = User(email=f"{name}@example.com", first_name=name, last_name="Wallet")
+        test_db.add(user)
+        test_db.flush()
+        wallet = Wallet(user_id=user.id, balance=0.0)
+        test_db.add(wallet)
+        test_db.flush()
+        wallets.append(wallet)
+    wallet, other = wallets
+    for day in range(3):
+        created_at = LONG_AGO + timedelta(days=day)
+        transaction = Transaction(
+            user_id=wallet.user_id, wallet_id=wallet.id, type=TransactionType.DEPOSIT, amount=10.0,
+            status=TransactionStatus.COMPLETED, created_at=created_at
+        )
+        test_db.add(transaction)
+        test_db.flush()
+        test_db.add_all([
+            LedgerEntry(transaction_id=transaction.id, account="wallet", wallet_id=wallet.id, sequence=day + 1,
+                        amount=10.0, balance_after=10.0 * (day + 1), created_at=created_at),
+            LedgerEntry(transaction_id=transaction.id, account="platform:deposit", amount=-10.0, created_at=created_at),
+        ])
+    test_db.add(Transaction(
+        user_id=other.user_id, wallet_id=other.id, type=TransactionType.DEPOSIT, amount=5.0,
+        status=TransactionStatus.COMPLETED, created_at=LONG_AGO
+    ))
+    test_db.add(WalletBalanceSnapshot(wallet_id=wallet.id, sequence=2, balance=20.0,
+                                      as_of=LONG_AGO + timedelta(days=1)))
+    test_db.commit()
+    store = ArchiveStore(str(tmp_path))
+    
+    # The first posting is carried by the snapshot; the snapshot's own posting and the last one stay live
+    assert ArchiveService(store).archive_transactions(test_db, before=CUTOFF) == 2
+    assert sorted(entry.sequence for entry in test_db.query(LedgerEntry).filter(LedgerEntry.wallet_id == wallet.id)) == [2, 3]
+    assert test_db.query(LedgerEntry).count() == 4
+    archived = [row for entry in store.get_manifest("ledger_entries")
+                for row in store.read_file("ledger_entries", entry["file"])]
+    assert sorted(row["account"] for row in archived) == ["platform:deposit", "wallet"]
+    
+    # Archived rows are filtered to the requested wallet
+    repository = TransactionRepository()
+    repository.archive_store = store
+    assert [t.amount for t in repository.get_by_wallet_id(test_db, wallet.id, start_date=datetime(2023, 1, 1))] == [10.0] * 3
+    assert [t.amount for t in repository.get_by_wallet_id(test_db, other.id, start_date=datetime(2023, 1, 1))] == [5.0]
+
+def test_archive_rerun_after_crash_does_not_duplicate(test_db, tmp_path):
+    for days in range(3):
+        test_db.add(AuditLog(action="login", entity_type="user", entity_id=str(days),
+                             created_at=LONG_AGO + timedelta(days=days)))
+    test_db.commit()
+    
+    store = ArchiveStore(str(tmp_path))
+    # A previous run wrote the first batch but died before deleting its rows
+    pending = test_db.query(AuditLog).order_by(AuditLog.created_at, AuditLog.id).limit(2).all()
+    store.write_file("audit_logs", archive_file_name(pending), [encode_row(row) for row in pending])
+    
+    assert ArchiveService(store).archive_audit_logs(test_db, before=CUTOFF, batch_size=2) == 3
+    assert test_db.query(AuditLog).count() == 0
+    assert sum(entry["rows"] for entry in store.get_manifest("audit_logs")) == 3
+    
+    repository = AuditRepository()
+    repository.archive_store = store
+    logs = repository.get_by_date_range(test_db, datetime(2023, 1, 1), datetime(2024, 1, 16, 12))
+    assert [log.entity_id for log in logs] == ["1", "0"]
+    
+    with open(tmp_path / "audit_logs" / "manifest.json") as f:
+        assert json.load(f)["table"] == "audit_logs"
+
+def test_archived_transactions_are_exported_projected_and_paged_lazily(test_db, tmp_path):
+    wallet = _wallet_with_history(test_db)
+    store = ArchiveStore(str(tmp_path))
+    ArchiveService(store).archive_transactions(test_db, before=CUTOFF, batch_size=2)
+    repository = TransactionRepository()
+    repository.archive_store = store
+    
+    # Exports merge the archive in, oldest first, as rows of the export columns
+    rows = list(repository.iter_for_export(test_db, TRANSACTION_EXPORT_COLUMNS, wallet_id=wallet.id))
+    assert [row.amount for row in rows] == [100.0, -30.0, -500.0, 999.0, 50.0]
+    assert {len(row) for row in rows} == {len(TRANSACTION_EXPORT_COLUMNS)}
+    assert rows[0].type == TransactionType.DEPOSIT
+    
+    # With columns, archived rows come back as rows of the same columns
+    rows = repository.get_by_wallet_id(test_db, wallet.id, start_date=datetime(2023, 1, 1),
+                                       columns=[Transaction.amount, Transaction.created_at])
+    assert [tuple(row) for row in rows][-1] == (100.0, LONG_AGO)
+    assert not any(isinstance(row, Transaction) for row in rows)
+    
+    # A page is read from the newest archive file only as far as it needs
+    opened = []
+    read_file = store.read_file
+    store.read_file = lambda table, name: opened.append(name) or read_file(table, name)
+    rows = repository.get_by_wallet_id(test_db, wallet.id, start_date=datetime(2023, 1, 1), limit=2)
+    assert [t.amount for t in rows] == [50.0, 999.0]
+    assert opened == [store.get_manifest("transactions")[-1]["file"]]
+
+def test_archived_audit_logs_and_postings_stay_searchable(test_db, tmp_path):
+    for days in range(3):
+        test_db.add(AuditLog(action="login", entity_type="user", entity_id=str(days),
+                             details=json.dumps({"device": f"Phone-{days}"}), created_at=LONG_AGO + timedelta(days=days)))
+    test_db.add(AuditLog(action="login", entity_type="user", entity_id="live", created_at=datetime.utcnow()))
+    test_db.commit()
+    store = ArchiveStore(str(tmp_path))
+    assert ArchiveService(store).archive_audit_logs(test_db, before=CUTOFF) == 3
+    
+    repository = AuditRepository()
+    repository.archive_store = store
+    logs = repository.search(test_db, action="login")
+    assert [log.entity_id for log in logs] == ["live", "2", "1", "0"]
+    assert [log.entity_id for log in repository.search(test_db, text="phone-1")] == ["1"]
+    before = (logs[2].created_at, logs[2].id)
+    assert [log.entity_id for log in repository.search(test_db, action="login", before=before)] == ["0"]
+
+def test_statement_includes_archived_postings(test_db, tmp_path):
+    user = User(email="statement@example.com", first_name="State", last_name="Ment")
+    test_db.add(user)
+    test_db.flush()
+    wallet = Wallet(user_id=user.id, balance=30.0)
+    test_db.add(wallet)
+    test_db.flush()
+    for day in range(3):
+        created_at = LONG_AGO + timedelta(days=day)
+        transaction = Transaction(
+            user_id=user.id, wallet_id=wallet.id, type=TransactionType.DEPOSIT, amount=10.0,
+            status=TransactionStatus.COMPLETED, created_at=created_at
+        )
+        test_db.add(transaction)
+        test_db.flush()
+        test_db.add(LedgerEntry(transaction_id=transaction.id, account="wallet", wallet_id=wallet.id,
+                                sequence=day + 1, amount=10.0, balance_after=10.0 * (day + 1), created_at=created_at))
+    test_db.add(WalletBalanceSnapshot(wallet_id=wallet.id, sequence=2, balance=20.0,
+                                      as_of=LONG_AGO + timedelta(days=1)))
+    test_db.commit()
+    store = ArchiveStore(str(tmp_path))
+    ArchiveService(store).archive_transactions(test_db, before=CUTOFF)
+    
+    service = LedgerService()
+    service.ledger_repository.archive_store = store
+    statement = service.get_statement(test_db, wallet, LONG_AGO - timedelta(days=1), CUTOFF)
+    assert [entry.sequence for entry in statement["entries"]] == [1, 2, 3]
+    assert (statement["opening_balance"], statement["closing_balance"]) == (0.0, 30.0)
+    assert service.get_balance_as_of(test_db, wallet.id, LONG_AGO + timedelta(hours=12)) == 10.0
@@ -0,0 +1,64 @@
+import json
+import uuid
+from datetime import datetime, timedelta
+
+import pytest
+
+from models.models import AuditLog
+from services.audit_service import AuditService
+
+def _seed(db):
+    user_id = uuid.uuid4()
+    start = datetime(2026, 1, 1)
+    for i in range(25):
+        db.add(AuditLog(
+            user_id=user_id if i % 2 == 0 else None,
+            action="approve_transaction" if i % 3 == 0 else "login",
+            entity_type="transaction",
+            entity_id=str(i % 5),
+            details=json.dumps({"note": "100% refund" if i == 7 else f"entry {i}"}),
+            created_at=start + timedelta(hours=i // 2)  # Pairs share a timestamp
+        ))
+    db.commit()
+    return user_id
+
+def test_keyset_pages_cover_every_row_once_in_order(test_db):
+    _seed(test_db)
+    service = AuditService()
+    
+    seen = []
+    cursor = None
+    while True:
+        page = service.get_audit_logs(test_db, limit=4, cursor=cursor)
+        seen.extend(page["items"])
+        cursor = page["next_cursor"]
+        if cursor is None:
+            break
+    
+    assert len({log.id for log in seen}) == 25
+    keys = [(log.created_at, str(log.id)) for log in seen]
+    assert keys == sorted(keys, reverse=True)
+
+def test_filters_combine(test_db):
+    user_id = _seed(test_db)
+    service = AuditService()
+    
+    page = service.get_audit_logs(
+        test_db, user_id=user_id, action="approve_transaction", entity_type="transaction",
+        start_date=datetime(2026, 1, 1, 3), end_date=datetime(2026, 1, 1, 12)
+    )
+    assert {int(json.loads(log.details)["note"].split()[-1]) for log in page["items"]} == {6, 12, 18}
+    assert page["next_cursor"] is None
+    
+    assert len(service.get_audit_logs(test_db, entity_type="transaction", entity_id="3")["items"]) == 5
+
+def test_text_search_treats_wildcards_literally(test_db):
+    _seed(test_db)
+    service = AuditService()
+    
+    matches = service.get_audit_logs(test_db, search="100%")["items"]
+    assert [json.loads(log.details)["note"] for log in matches] == ["100% refund"]
+    assert service.get_audit_logs(test_db, search="entry_1")["items"] == []
+    
+    with pytest.raises(ValueError):
+        service.get_audit_logs(test_db, cursor="not-a-cursor")
@@ -0,0 +1,76 @@
+import os
+
+from sqlalchemy.exc import OperationalError
+
+from models.models import AuditLog
+from services.audit_writer import AuditWriter, new_audit_event
+
+def _event(action="login"):
+    return new_audit_event(user_id=None, action=action, entity_type="user", entity_id="1")
+
+def test_events_are_batched_and_flushed_on_close(test_db, tmp_path):
+    writer = AuditWriter(session_factory=lambda: test_db, batch_size=10, flush_interval_ms=5000,
+                         spool_path=str(tmp_path / "spool.ndjson"))
+    
+    for i in range(25):
+        writer.submit(_event(f"action-{i}"))
+    writer.close()
+    
+    assert test_db.query(AuditLog).count() == 25
+    assert writer.written == 25
+    assert not os.path.exists(tmp_path / "spool.ndjson")
+
+def test_failed_writes_spool_to_disk_and_replay_once(test_db, tmp_path):
+    spool_path = str(tmp_path / "spool.ndjson")
+    
+    class Unavailable:
+        def bulk_insert_mappings(self, *args):
+            raise OperationalError("INSERT", {}, Exception("database is down"))
+        
+        def rollback(self):
+            pass
+        
+        def close(self):
+            pass
+    
+    down = AuditWriter(session_factory=Unavailable, spool_path=spool_path)
+    events = [_event() for _ in range(3)]
+    for event in events:
+        down.submit(event)
+    down.close()
+    
+    assert down.spooled == 3
+    assert test_db.query(AuditLog).count() == 0
+    
+    # The first event made it in before the outage ended; replay must not duplicate it
+    test_db.add(AuditLog(**events[0]))
+    test_db.commit()
+    
+    up = AuditWriter(session_factory=lambda: test_db, spool_path=spool_path)
+    up.submit(_event("after-recovery"))
+    up.close()
+    
+    assert test_db.query(AuditLog).count() == 4
+    assert {log.id for log in test_db.query(AuditLog)} >= {event["id"] for event in events}
+    assert not os.path.exists(spool_path)
+
+def test_events_spooled_by_another_process_during_a_replay_are_kept(test_db, tmp_path):
+    spool_path = str(tmp_path / "spool.ndjson")
+    replaying = AuditWriter(session_factory=lambda: test_db, spool_path=spool_path)
+    other_worker = AuditWriter(session_factory=lambda: test_db, spool_path=spool_path)
+    replaying._spool([_event("spooled-first")])
+    late = _event("spooled-during-replay")
+    
+    def session_while_another_worker_spools():
+        # Another gunicorn worker hits the outage while this replay is running
+        other_worker._spool([late])
+        return test_db
+    
+    replaying.session_factory = session_while_another_worker_spools
+    replaying._replay_spool()
+    assert [log.action for log in test_db.query(AuditLog)] == ["spooled-first"]
+    
+    replaying.session_factory = lambda: test_db
+    replaying._replay_spool()
+    assert {log.action for log in test_db.query(AuditLog)} == {"spooled-first", "spooled-during-replay"}
+    assert os.listdir(tmp_path) == []
@@ -0,0 +1,79 @@
+import json
+from uuid import uuid4
+
+from models.models import User, Wallet, LedgerEntry, AuditLog, TransactionType, TransactionStatus
+from services.wallet_service import WalletService
+
+def _wallet(db, balance=0.0):
+    user = User(email="bulk@example.com", first_name="Bu", last_name="Lk")
+    db.add(user)
+    db.flush()
+    wallet = Wallet(user_id=user.id, balance=balance)
+    db.add(wallet)
+    db.commit()
+    return wallet
+
+def _pending(service, db, wallet, amount, transaction_type):
+    return service.create_transaction(db, wallet.user_id, wallet.id, amount, transaction_type, auto_approve=False)
+
+def test_bulk_approve_updates_balances_ledger_and_audit(test_db):
+    wallet = _wallet(test_db, balance=100.0)
+    service = WalletService()
+    admin_id = uuid4()
+    
+    deposit = _pending(service, test_db, wallet, 50.0, TransactionType.DEPOSIT)
+    withdrawal = _pending(service, test_db, wallet, -30.0, TransactionType.WITHDRAWAL)
+    missing_id = uuid4()
+    
+    results = service.bulk_approve_transactions(test_db, [withdrawal.id, missing_id, deposit.id], admin_id, chunk_size=1)
+    
+    assert [(r["id"], r["status"]) for r in results] == [
+        (withdrawal.id, "approved"), (missing_id, "not_found"), (deposit.id, "approved")
+    ]
+    assert service.get_wallet(test_db, wallet.id).balance == 120.0
+    
+    entries = test_db.query(LedgerEntry).filter(LedgerEntry.wallet_id == wallet.id).order_by(LedgerEntry.sequence).all()
+    assert [e.sequence for e in entries] == [1, 2]
+    assert entries[-1].balance_after == 120.0
+    
+    audit_logs = test_db.query(AuditLog).filter(AuditLog.user_id == admin_id).all()
+    assert {log.entity_id for log in audit_logs} == {str(deposit.id), str(withdrawal.id)}
+    
+    # Already-completed transactions are skipped on a second run
+    again = service.bulk_approve_transactions(test_db, [deposit.id], admin_id)
+    assert again[0]["status"] == "skipped"
+    assert service.get_wallet(test_db, wallet.id).balance == 120.0
+
+def test_bulk_reject_records_reason_without_touching_balance(test_db):
+    wallet = _wallet(test_db, balance=100.0)
+    service = WalletService()
+    
+    withdrawal = _pending(service, test_db, wallet, -30.0, TransactionType.WITHDRAWAL)
+    
+    results = service.bulk_reject_transactions(test_db, [withdrawal.id], uuid4(), rejection_reason="KYC incomplete")
+    
+    assert results[0]["status"] == "rejected"
+    rejected = service.get_transaction(test_db, withdrawal.id)
+    assert rejected.status == TransactionStatus.REJECTED
+    assert rejected.rejection_reason == "KYC incomplete"
+    assert service.get_wallet(test_db, wallet.id).balance == 100.0
+    
+    audit_log = test_db.query(AuditLog).filter(AuditLog.entity_id == str(withdrawal.id)).one()
+    assert json.loads(audit_log.details)["rejection_reason"] == "KYC incomplete"
+
+def test_bulk_withdrawal_actions_ignore_other_types(test_db):
+    wallet = _wallet(test_db, balance=100.0)
+    service = WalletService()
+    
+    deposit = _pending(service, test_db, wallet, 50.0, TransactionType.DEPOSIT)
+    withdrawal = _pending(service, test_db, wallet, -30.0, TransactionType.WITHDRAWAL)
+    
+    pending_ids = service.find_pending_transaction_ids(test_db, transaction_type=TransactionType.WITHDRAWAL)
+    assert pending_ids == [withdrawal.id]
+    
+    results = service.bulk_approve_transactions(
+        test_db, [deposit.id, withdrawal.id], uuid4(), transaction_type=TransactionType.WITHDRAWAL
+    )
+    assert [r["status"] for r in results] == ["not_found", "approved"]
+    assert service.get_transaction(test_db, deposit.id).status == TransactionStatus.PENDING
+    assert service.get_wallet(test_db, wallet.id).balance == 70.0
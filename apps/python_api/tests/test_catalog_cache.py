@@ -0,0 +1,64 @@
+from uuid import UUID
+
+from sqlalchemy import event
+from fastapi.testclient import TestClient
+
+from main import app
+from models.models import InvestmentPlan, LoanProduct
+from routers.auth import get_current_active_user
+from services.catalog_cache import CatalogCache
+from services.investment_service import InvestmentService
+from services.loan_service import LoanService
+
+def _plan_data(name):
+    return {"name": name, "description": "Plan", "min_amount": 100.0, "max_amount": 1000.0,
+            "roi_percentage": 8.0, "duration_days": 90}
+
+def test_catalog_is_served_from_memory_and_reloaded_after_writes(test_db):
+    test_db.add(InvestmentPlan(**_plan_data("Starter")))
+    test_db.add(LoanProduct(name="Personal", description="Loan", min_amount=500.0, max_amount=5000.0,
+                            interest_rate=10.0, term_months=12))
+    test_db.commit()
+    service = InvestmentService()
+    plan = service.get_active_plans(test_db)[0]
+    
+    statements = []
+    listener = lambda conn, cursor, statement, *args: statements.append(statement)
+    event.listen(test_db.get_bind(), "before_cursor_execute", listener)
+    try:
+        assert service.get_plan(test_db, plan.id).name == "Starter"
+        assert [product.name for product in LoanService().get_active_products(test_db)] == ["Personal"]
+    finally:
+        event.remove(test_db.get_bind(), "before_cursor_execute", listener)
+    assert statements == []
+    
+    # Another process holding the catalog picks up the write on its next version check
+    other_process = CatalogCache(check_seconds=0)
+    assert len(other_process.get_active_plans(test_db)[0]) == 1
+    service.create_plan(test_db, _plan_data("Growth"))
+    assert sorted(plan.name for plan in service.get_active_plans(test_db)) == ["Growth", "Starter"]
+    assert len(other_process.get_active_plans(test_db)[0]) == 2
+    
+    service.delete_plan(test_db, plan.id)
+    assert [plan.name for plan in service.get_active_plans(test_db)] == ["Growth"]
+    assert service.get_plan(test_db, plan.id).is_active is False
+
+def test_plan_list_returns_304_for_a_matching_etag(test_db, override_get_db):
+    test_db.add(InvestmentPlan(**_plan_data("Starter")))
+    test_db.commit()
+    app.dependency_overrides[get_current_active_user] = lambda: None
+    client = TestClient(app)
+    
+    first = client.get("/investments/plans")
+    assert first.status_code == 200
+    etag = first.headers["ETag"]
+    
+    cached = client.get("/investments/plans", headers={"If-None-Match": etag})
+    assert cached.status_code == 304
+    assert cached.headers["ETag"] == etag
+    assert client.get("/investments/plans?limit=10", headers={"If-None-Match": etag}).status_code == 200
+    
+    InvestmentService().update_plan(test_db, UUID(first.json()[0]["id"]), {"roi_percentage": 9.0})
+    changed = client.get("/investments/plans", headers={"If-None-Match": etag})
+    assert changed.status_code == 200
+    assert changed.headers["ETag"] != etag
@@ -0,0 +1,105 @@
+import asyncio
+import pytest
+from unittest.mock import patch
+
+from core.circuit_breaker import CircuitBreaker, RetryBudget, CLOSED, OPEN, HALF_OPEN
+from services.crypto_service import CryptoService, ProviderUnavailableError
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
+def test_breaker_opens_after_consecutive_failures(clock):
+    breaker = CircuitBreaker("test", failure_threshold=3, recovery_timeout=10, clock=clock)
+
+    breaker.record_failure()
+    breaker.record_failure()
+    assert breaker.state == CLOSED
+
+    breaker.record_failure()
+    assert breaker.state == OPEN
+    assert not breaker.allow_request()
+    assert breaker.snapshot()["total_rejected"] == 1
+
+def test_breaker_success_resets_failure_count(clock):
+    breaker = CircuitBreaker("test", failure_threshold=2, clock=clock)
+
+    breaker.record_failure()
+    breaker.record_success()
+    breaker.record_failure()
+
+    assert breaker.state == CLOSED
+
+def test_breaker_half_open_probe(clock):
+    breaker = CircuitBreaker("test", failure_threshold=1, recovery_timeout=10, clock=clock)
+    breaker.record_failure()
+
+    clock.now = 10
+    assert breaker.state == HALF_OPEN
+    # Only one probe is let through while half-open
+    assert breaker.allow_request()
+    assert not breaker.allow_request()
+
+    # A failed probe re-opens the breaker for another recovery period
+    breaker.record_failure()
+    assert breaker.state == OPEN
+
+    clock.now = 20
+    assert breaker.allow_request()
+    breaker.record_success()
+    assert breaker.state == CLOSED
+
+def test_retry_budget_limits_retries_to_ratio_of_traffic(clock):
+    budget = RetryBudget(ratio=0.5, min_retries_per_second=0, window_seconds=10, clock=clock)
+
+    for _ in range(4):
+        budget.record_request()
+
+    assert budget.try_acquire()
+    assert budget.try_acquire()
+    assert not budget.try_acquire()
+
+    # Budget refills once the window slides past old retries
+    clock.now = 11
+    for _ in range(2):
+        budget.record_request()
+    assert budget.try_acquire()
+
+@patch.dict("os.environ", {"CRYPTO_API_KEY": "key", "CRYPTO_API_BASE_URL": "http://provider.invalid"})
+def test_crypto_service_fails_fast_when_breaker_open():
+    service = CryptoService()
+
+    with patch("services.crypto_service.get_breaker") as mock_get_breaker, \
+         patch("httpx.AsyncClient") as mock_client:
+        mock_get_breaker.return_value.allow_request.return_value = False
+        mock_get_breaker.return_value.retry_after.return_value = 12
+
+        with pytest.raises(ProviderUnavailableError):
+            asyncio.run(service._get_supported_currencies())
+
+        mock_client.assert_not_called()
+
+@patch.dict("os.environ", {"CRYPTO_API_KEY": "key", "CRYPTO_API_BASE_URL": "http://provider.invalid"})
+def test_cancelled_probe_gives_back_its_half_open_slot(clock):
+    service = CryptoService()
+    breaker = CircuitBreaker("test", failure_threshold=1, recovery_timeout=10, clock=clock)
+    breaker.record_failure()
+    clock.now = 10
+
+    with patch("services.crypto_service.get_breaker", return_value=breaker), \
+         patch("httpx.AsyncClient") as mock_client:
+        mock_client.return_value.__aenter__.return_value.request.side_effect = asyncio.CancelledError
+        with pytest.raises(asyncio.CancelledError):
+            asyncio.run(service._get_supported_currencies())
+
+    # The breaker stays half-open and lets the next probe through
+    assert breaker.state == HALF_OPEN
+    assert breaker.allow_request()
+    assert not breaker.allow_request()
@@ -0,0 +1,71 @@
+import pytest
+from fastapi.testclient import TestClient
+from unittest.mock import patch, MagicMock, AsyncMock
+
+from main import app
+from db.database import get_db
+from models.models import User, Wallet, Order, Transaction
+from services.crypto_service import CryptoService
+
+client = TestClient(app)
+
+@pytest.fixture
+def mock_db():
+    db = MagicMock()
+    app.dependency_overrides[get_db] = lambda: db
+    yield db
+    app.dependency_overrides = {}
+
+def test_duplicate_completion_credits_the_wallet_once(test_db):
+    user = User(email="deposit@example.com", first_name="De", last_name="Posit", is_active=True, role="user")
+    test_db.add(user)
+    test_db.flush()
+    wallet = Wallet(user_id=user.id, balance=0.0)
+    order = Order(user_id=user.id, external_id="ext-1", amount=50.0, currency="BTC", status="completed",
+                  is_processed=False)
+    test_db.add_all([wallet, order])
+    test_db.commit()
+    
+    service = CryptoService()
+    # Both deliveries saw the order unprocessed before either credited it
+    service._credit_completed_order(test_db, order)
+    service._credit_completed_order(test_db, order)
+    
+    test_db.refresh(wallet)
+    test_db.refresh(order)
+    assert wallet.balance == 50.0
+    assert order.is_processed
+    assert test_db.query(Transaction).filter(Transaction.wallet_id == wallet.id).count() == 1
+    assert order.transaction_id is not None
+
+@patch("routers.crypto_deposits.crypto_service")
+def test_webhook_rejects_an_invalid_signature(mock_crypto_service, mock_db):
+    mock_crypto_service.verify_webhook_signature.return_value = False
+    
+    response = client.post(
+        "/crypto-deposits/webhook",
+        json={"order_id": "ord_123", "status": "completed"},
+        headers={"X-Signature": "invalid"}
+    )
+    
+    assert response.status_code == 400
+    mock_crypto_service.process_webhook_notification.assert_not_called()
+
+@patch("routers.crypto_deposits.crypto_service")
+def test_webhook_processes_a_signed_payload(mock_crypto_service, mock_db):
+    mock_crypto_service.verify_webhook_signature.return_value = True
+    mock_crypto_service.process_webhook_notification = AsyncMock(
+        return_value="Order ord_123 completed and processed"
+    )
+    
+    response = client.post(
+        "/crypto-deposits/webhook",
+        json={"order_id": "ord_123", "status": "completed"},
+        headers={"X-Signature": "valid"}
+    )
+    
+    assert response.status_code == 200
+    assert response.json()["status"] == "success"
+    mock_crypto_service.process_webhook_notification.assert_awaited_once_with(
+        mock_db, {"order_id": "ord_123", "status": "completed"}
+    )
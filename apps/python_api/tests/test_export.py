@@ -0,0 +1,78 @@
+import csv
+import gzip
+import io
+import json
+import uuid
+from datetime import datetime, timedelta
+
+from models.models import User, Wallet, Transaction, TransactionType, TransactionStatus
+from services.export_service import ExportService
+
+def _seed(db, count=5):
+    user = User(email="export@example.com", first_name="Ex", last_name="Port")
+    db.add(user)
+    db.flush()
+    wallet = Wallet(user_id=user.id, balance=0.0)
+    db.add(wallet)
+    db.flush()
+    
+    start = datetime(2024, 1, 1)
+    for i in range(count):
+        db.add(Transaction(
+            user_id=user.id,
+            wallet_id=wallet.id,
+            type=TransactionType.DEPOSIT if i % 2 == 0 else TransactionType.WITHDRAWAL,
+            status=TransactionStatus.COMPLETED,
+            amount=10.0 * (i + 1),
+            description=f"tx, {i}",
+            created_at=start + timedelta(days=i)
+        ))
+    db.commit()
+    return user, wallet
+
+def test_export_csv_streams_all_rows_in_order(test_db):
+    _, wallet = _seed(test_db)
+    
+    body = b"".join(ExportService().stream_transactions(test_db, wallet_id=wallet.id, flush_rows=2))
+    rows = list(csv.DictReader(io.StringIO(body.decode())))
+    
+    assert len(rows) == 5
+    assert [row["amount"] for row in rows] == ["10.0", "20.0", "30.0", "40.0", "50.0"]
+    assert rows[0]["type"] == "deposit"
+    assert rows[0]["description"] == "tx, 0"
+    assert rows[0]["loan_id"] == ""
+
+def test_export_ndjson_gzip_round_trip(test_db):
+    _, wallet = _seed(test_db)
+    
+    body = b"".join(ExportService().stream_transactions(
+        test_db, export_format="ndjson", compress=True, wallet_id=wallet.id
+    ))
+    records = [json.loads(line) for line in gzip.decompress(body).decode().splitlines()]
+    
+    assert len(records) == 5
+    assert records[1]["type"] == "withdrawal"
+    assert records[1]["status"] == "completed"
+    assert uuid.UUID(records[1]["wallet_id"]) == wallet.id
+    assert records[1]["investment_id"] is None
+
+def test_export_applies_filters(test_db):
+    _, wallet = _seed(test_db)
+    
+    body = b"".join(ExportService().stream_transactions(
+        test_db,
+        export_format="ndjson",
+        wallet_id=wallet.id,
+        start_date=datetime(2024, 1, 2),
+        end_date=datetime(2024, 1, 5),
+        transaction_type=TransactionType.WITHDRAWAL
+    ))
+    records = [json.loads(line) for line in body.decode().splitlines()]
+    
+    assert [record["amount"] for record in records] == [20.0, 40.0]
+
+def test_export_empty_csv_has_header_only(test_db):
+    body = b"".join(ExportService().stream_transactions(test_db, user_id=uuid.uuid4()))
+    
+    assert body.decode().strip().split(",")[0] == "id"
+    assert len(body.decode().strip().splitlines()) == 1
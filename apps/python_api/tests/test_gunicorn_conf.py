@@ -0,0 +1,27 @@
+import os
+import runpy
+
+CONFIG_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "gunicorn.conf.py")
+
+def _load(monkeypatch, **env):
+    environ = {name: value for name, value in os.environ.items()
+               if name not in ("WEB_CONCURRENCY", "DB_MAX_CONNECTIONS", "DB_POOL_SIZE", "DB_MAX_OVERFLOW")}
+    environ.update(env)
+    monkeypatch.setattr(os, "environ", environ)
+    return runpy.run_path(CONFIG_PATH)
+
+def test_workers_follow_cpus_and_split_the_connection_budget(monkeypatch):
+    config = _load(monkeypatch)
+    assert config["workers"] == max(2, config["available_cpus"]())
+    assert config["preload_app"] is True
+    assert config["worker_class"] == "uvicorn_worker.UvicornWorker"
+    assert "DB_POOL_SIZE" not in os.environ
+    
+    config = _load(monkeypatch, WEB_CONCURRENCY="4", DB_MAX_CONNECTIONS="40")
+    assert config["workers"] == 4
+    assert os.environ["DB_POOL_SIZE"] == "10"
+    assert os.environ["DB_MAX_OVERFLOW"] == "0"
+    
+    # An explicit pool size wins over the split
+    _load(monkeypatch, WEB_CONCURRENCY="4", DB_MAX_CONNECTIONS="40", DB_POOL_SIZE="3")
+    assert os.environ["DB_POOL_SIZE"] == "3"
@@ -0,0 +1,104 @@
+import asyncio
+from datetime import datetime, timedelta
+
+from sqlalchemy import create_engine, event, text
+from sqlalchemy.orm import Session
+
+from models.models import (
+    User, Wallet, Transaction, TransactionType, TransactionStatus, InvestmentPlan, Investment,
+    InvestmentStatus, LoanProduct, Loan, LoanStatus, Notification
+)
+from db.database import Base
+from schemas.schemas import HomeScreen
+from services import home_service
+from services.home_service import HomeService, HOME_RECENT_TRANSACTIONS
+
+def _user_with_home_screen(test_db):
+    user = User(email="home@example.com", first_name="Ho", last_name="Me", is_active=True)
+    test_db.add(user)
+    test_db.flush()
+    wallet = Wallet(user_id=user.id, balance=250.0)
+    plan = InvestmentPlan(name="Growth", description="Growth plan", min_amount=10.0, max_amount=1000.0, roi_percentage=12.0, duration_days=90)
+    product = LoanProduct(name="Starter", description="Starter loan", min_amount=10.0, max_amount=1000.0, interest_rate=10.0, term_months=6)
+    test_db.add_all([wallet, plan, product])
+    test_db.flush()
+    
+    now = datetime.utcnow()
+    term = {"start_date": now, "end_date": now + timedelta(days=90)}
+    for i in range(HOME_RECENT_TRANSACTIONS + 5):
+        test_db.add(Transaction(user_id=user.id, wallet_id=wallet.id, type=TransactionType.DEPOSIT, amount=10.0,
+                                status=TransactionStatus.COMPLETED, created_at=now - timedelta(minutes=i)))
+    for i in range(3):
+        test_db.add(Investment(user_id=user.id, plan_id=plan.id, amount=100.0, current_value=110.0,
+                               expected_return=130.0, status=InvestmentStatus.ACTIVE, **term))
+    test_db.add(Investment(user_id=user.id, plan_id=plan.id, amount=50.0, current_value=55.0,
+                           expected_return=55.0, status=InvestmentStatus.COMPLETED, **term))
+    test_db.add(Loan(user_id=user.id, product_id=product.id, amount=500.0, remaining_balance=300.0,
+                     total_payment=550.0, interest_rate=10.0, term_months=6,
+                     status=LoanStatus.ACTIVE))
+    test_db.add(Loan(user_id=user.id, product_id=product.id, amount=200.0, remaining_balance=0.0,
+                     total_payment=220.0, interest_rate=10.0, term_months=6,
+                     status=LoanStatus.PAID))
+    test_db.add_all([
+        Notification(user_id=user.id, title="Hi", message="Unread", is_read=False, type="system"),
+        Notification(user_id=user.id, title="Hi", message="Unread", is_read=False, type="system"),
+        Notification(user_id=user.id, title="Hi", message="Read", is_read=True, type="system")
+    ])
+    test_db.commit()
+    test_db.refresh(user)
+    return user
+
+def test_home_gathers_every_section_in_one_query_each(test_db):
+    user = _user_with_home_screen(test_db)
+    
+    statements = []
+    listener = lambda conn, cursor, statement, *args: statements.append(statement)
+    event.listen(test_db.get_bind(), "before_cursor_execute", listener)
+    try:
+        home = asyncio.run(HomeService().get_home(test_db, user))
+    finally:
+        event.remove(test_db.get_bind(), "before_cursor_execute", listener)
+    
+    # Wallet, transactions, investments, loans, unread count and portfolio totals
+    assert len(statements) == 6
+    assert home["wallet"].balance == 250.0
+    assert len(home["recent_transactions"]) == HOME_RECENT_TRANSACTIONS
+    assert len(home["active_investments"]) == 3
+    assert [loan.status for loan in home["active_loans"]] == [LoanStatus.ACTIVE]
+    assert home["unread_notifications"] == 2
+    assert home["portfolio"]["investments"]["count"] == 4
+    
+    screen = HomeScreen.model_validate(home)
+    assert screen.active_investments[0].plan.name == "Growth"
+    assert screen.active_loans[0].product.name == "Starter"
+
+def test_parallel_reads_stay_within_the_connection_pool(tmp_path, monkeypatch):
+    # A real pool with no overflow, as under gunicorn, sized for one connection per request plus one
+    # parallel slot; with no pool timeout, waiting for a connection fails the request
+    engine = create_engine(f"sqlite:///{tmp_path / 'home.db'}", connect_args={"check_same_thread": False},
+                           pool_size=4, max_overflow=0, pool_timeout=0)
+    Base.metadata.create_all(bind=engine)
+    monkeypatch.setattr(home_service, "SERIAL_DIALECTS", set())
+    monkeypatch.setattr(home_service, "_parallel_slots", home_service.threading.BoundedSemaphore(1))
+    with Session(bind=engine) as db:
+        user_id = _user_with_home_screen(db).id
+    
+    checked_out = []
+    event.listen(engine, "checkout", lambda *args: checked_out.append(engine.pool.checkedout()))
+    sessions = [Session(bind=engine) for _ in range(3)]
+    try:
+        for session in sessions:
+            session.execute(text("SELECT 1"))  # the request's own connection
+        users = [session.get(User, user_id) for session in sessions]
+        
+        async def burst():
+            return await asyncio.gather(*(HomeService().get_home(session, user) for session, user in zip(sessions, users)))
+        homes = asyncio.run(burst())
+    finally:
+        for session in sessions:
+            session.close()
+        engine.dispose()
+    
+    assert max(checked_out) <= 4
+    assert all(home["portfolio"]["investments"]["count"] == 4 for home in homes)
+    assert all(len(home["recent_transactions"]) == HOME_RECENT_TRANSACTIONS for home in homes)
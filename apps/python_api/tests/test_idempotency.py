@@ -0,0 +1,121 @@
+import json
+import pytest
+from datetime import datetime, timedelta
+from unittest.mock import MagicMock, patch
+
+from fastapi import HTTPException
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+
+from models.models import User, IdempotencyKey
+from services.idempotency_service import (
+    IdempotencyService, IdempotencyConflictError, IdempotencyKeyInvalidError, request_hash
+)
+
+class Result(BaseModel):
+    id: int
+    amount: float
+
+@pytest.fixture
+def user(test_db):
+    user = User(email="idem@example.com", first_name="Idem", last_name="Potent")
+    test_db.add(user)
+    test_db.commit()
+    return user
+
+def test_retry_replays_stored_response_without_rerunning_handler(test_db, user):
+    service = IdempotencyService()
+    handler = MagicMock(return_value={"id": 1, "amount": 50.0})
+    request = {"endpoint": "wallets.deposit", "amount": 50.0}
+    
+    first = service.execute(test_db, "key-1", user.id, request, handler, Result, status_code=201)
+    replay = service.execute(test_db, "key-1", user.id, request, handler, Result, status_code=201)
+    
+    assert first == {"id": 1, "amount": 50.0}
+    assert handler.call_count == 1
+    assert isinstance(replay, JSONResponse)
+    assert replay.status_code == 201
+    assert replay.headers["Idempotent-Replayed"] == "true"
+    assert json.loads(replay.body) == {"id": 1, "amount": 50.0}
+
+def test_key_reused_with_different_request_is_rejected(test_db, user):
+    service = IdempotencyService()
+    handler = MagicMock(return_value={"id": 1, "amount": 50.0})
+    
+    service.execute(test_db, "key-1", user.id, {"amount": 50.0}, handler, Result)
+    
+    with pytest.raises(IdempotencyKeyInvalidError):
+        service.execute(test_db, "key-1", user.id, {"amount": 60.0}, handler, Result)
+
+def test_in_flight_duplicate_gets_conflict(test_db, user):
+    service = IdempotencyService()
+    
+    def handler():
+        # A duplicate arriving while the first request is still running
+        with pytest.raises(IdempotencyConflictError) as exc:
+            service.execute(test_db, "key-1", user.id, {"amount": 5.0}, MagicMock(), Result)
+        assert exc.value.retry_after >= 1
+        return {"id": 1, "amount": 5.0}
+    
+    assert service.execute(test_db, "key-1", user.id, {"amount": 5.0}, handler, Result)["id"] == 1
+
+def test_failed_request_releases_key(test_db, user):
+    service = IdempotencyService()
+    failing = MagicMock(side_effect=HTTPException(status_code=400, detail="Insufficient balance"))
+    
+    with pytest.raises(HTTPException):
+        service.execute(test_db, "key-1", user.id, {"amount": 5.0}, failing, Result)
+    
+    succeeding = MagicMock(return_value={"id": 2, "amount": 5.0})
+    assert service.execute(test_db, "key-1", user.id, {"amount": 5.0}, succeeding, Result)["id"] == 2
+
+def test_expired_keys_are_taken_over_and_purged(test_db, user):
+    service = IdempotencyService()
+    service.execute(test_db, "key-1", user.id, {"amount": 5.0}, MagicMock(return_value={"id": 1, "amount": 5.0}), Result)
+    service.execute(test_db, "key-2", user.id, {"amount": 5.0}, MagicMock(return_value={"id": 2, "amount": 5.0}), Result)
+    test_db.query(IdempotencyKey).update({"expires_at": datetime.utcnow() - timedelta(seconds=1)})
+    test_db.commit()
+    
+    handler = MagicMock(return_value={"id": 3, "amount": 5.0})
+    assert service.execute(test_db, "key-1", user.id, {"amount": 5.0}, handler, Result)["id"] == 3
+    
+    assert service.delete_expired_keys(test_db, batch_size=1) == 1
+    assert test_db.query(IdempotencyKey).count() == 1
+
+def test_key_commits_with_the_handler_and_is_never_rerun(test_db, user):
+    service = IdempotencyService()
+    
+    def handler():
+        # The money movement commits, then the request fails before its response is stored
+        user.first_name = "Charged"
+        test_db.commit()
+        raise RuntimeError("worker died")
+    
+    with pytest.raises(RuntimeError):
+        service.execute(test_db, "key-1", user.id, {"amount": 5.0}, handler, Result)
+    assert test_db.query(IdempotencyKey).one().status == "committed"
+    
+    retry = MagicMock(return_value={"id": 2, "amount": 5.0})
+    with pytest.raises(IdempotencyConflictError) as exc:
+        service.execute(test_db, "key-1", user.id, {"amount": 5.0}, retry, Result)
+    assert exc.value.retry_after is None
+    assert retry.call_count == 0
+
+def test_in_progress_key_is_taken_over_only_when_its_request_is_gone(test_db, user):
+    service = IdempotencyService()
+    now = datetime.utcnow()
+    test_db.add(IdempotencyKey(user_id=user.id, key="key-1", request_hash=request_hash({"amount": 5.0}),
+                               status="in_progress", locked_until=now - timedelta(seconds=1),
+                               expires_at=now + timedelta(hours=1)))
+    test_db.commit()
+    handler = MagicMock(return_value={"id": 3, "amount": 5.0})
+    
+    # Past its lock time but its row is still locked: the request is only slow
+    with patch.object(service.idempotency_repository, "get_for_update", return_value=None):
+        with pytest.raises(IdempotencyConflictError):
+            service.execute(test_db, "key-1", user.id, {"amount": 5.0}, handler, Result)
+    assert handler.call_count == 0
+    
+    # Its transaction is gone, so nobody holds the row
+    assert service.execute(test_db, "key-1", user.id, {"amount": 5.0}, handler, Result)["id"] == 3
+    assert handler.call_count == 1
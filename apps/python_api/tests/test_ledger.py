@@ -0,0 +1,91 @@
+from datetime import timedelta
+
+from models.models import User, Wallet, LedgerEntry, Transaction, TransactionType, TransactionStatus
+from schemas.schemas import WalletUpdate
+from services.reconciliation_service import ReconciliationService
+from services.wallet_service import WalletService
+
+def _wallet(db, balance=0.0):
+    user = User(email="ledger@example.com", first_name="Led", last_name="Ger")
+    db.add(user)
+    db.flush()
+    wallet = Wallet(user_id=user.id, balance=balance)
+    db.add(wallet)
+    db.commit()
+    return wallet
+
+def _wallet_entries(db, wallet_id):
+    return db.query(LedgerEntry).filter(LedgerEntry.wallet_id == wallet_id).order_by(LedgerEntry.sequence).all()
+
+def test_completed_transactions_post_balanced_entries_with_running_balance(test_db):
+    wallet = _wallet(test_db)
+    service = WalletService()
+    
+    deposit = service.create_transaction(test_db, wallet.user_id, wallet.id, 100.0, TransactionType.DEPOSIT)
+    service.create_transaction(test_db, wallet.user_id, wallet.id, -30.0, TransactionType.WITHDRAWAL)
+    
+    entries = _wallet_entries(test_db, wallet.id)
+    assert [(e.sequence, e.amount, e.balance_after) for e in entries] == [(1, 100.0, 100.0), (2, -30.0, 70.0)]
+    assert service.get_wallet(test_db, wallet.id).balance == 70.0
+    
+    deposit_entries = test_db.query(LedgerEntry).filter(LedgerEntry.transaction_id == deposit.id).all()
+    assert sum(e.amount for e in deposit_entries) == 0
+    assert {e.account for e in deposit_entries} == {"wallet", "platform:deposit"}
+
+def test_pending_transaction_posts_on_approval_only(test_db):
+    wallet = _wallet(test_db, balance=50.0)
+    service = WalletService()
+    
+    pending = service.create_transaction(
+        test_db, wallet.user_id, wallet.id, -20.0, TransactionType.WITHDRAWAL, auto_approve=False
+    )
+    assert _wallet_entries(test_db, wallet.id) == []
+    
+    approved = service.approve_transaction(test_db, pending.id)
+    assert approved.status == TransactionStatus.COMPLETED
+    assert [e.balance_after for e in _wallet_entries(test_db, wallet.id)] == [30.0]
+    
+    # A second approval is a no-op
+    assert service.approve_transaction(test_db, pending.id) is None
+    assert len(_wallet_entries(test_db, wallet.id)) == 1
+
+def test_balance_as_of_and_statement_use_snapshots_and_tail(test_db):
+    wallet = _wallet(test_db, balance=10.0)
+    service = WalletService()
+    ledger_service = service.ledger_service
+    
+    service.create_transaction(test_db, wallet.user_id, wallet.id, 100.0, TransactionType.DEPOSIT)
+    assert ledger_service.take_snapshots(test_db) == 1
+    assert ledger_service.take_snapshots(test_db) == 0
+    service.create_transaction(test_db, wallet.user_id, wallet.id, 5.0, TransactionType.INTEREST)
+    service.create_transaction(test_db, wallet.user_id, wallet.id, -40.0, TransactionType.INVESTMENT)
+    
+    first, second, third = _wallet_entries(test_db, wallet.id)
+    
+    # Before the first posting the wallet carried its pre-ledger balance
+    assert ledger_service.get_balance_as_of(test_db, wallet.id, first.created_at - timedelta(seconds=1)) == 10.0
+    assert ledger_service.get_balance_as_of(test_db, wallet.id, first.created_at) == 110.0
+    assert ledger_service.get_balance_as_of(test_db, wallet.id, third.created_at) == 75.0
+    
+    statement = ledger_service.get_statement(
+        test_db, wallet, second.created_at, third.created_at + timedelta(seconds=1)
+    )
+    assert statement["opening_balance"] == 110.0
+    assert statement["closing_balance"] == 75.0
+    assert [e.sequence for e in statement["entries"]] == [2, 3]
+
+def test_admin_balance_update_posts_an_adjustment(test_db):
+    wallet = _wallet(test_db)
+    service = WalletService()
+    service.create_transaction(test_db, wallet.user_id, wallet.id, 100.0, TransactionType.DEPOSIT)
+    
+    updated = service.update_wallet(test_db, wallet.id, WalletUpdate(balance=60.0, currency="EUR"))
+    assert (updated.balance, updated.currency) == (60.0, "EUR")
+    assert [(e.amount, e.balance_after) for e in _wallet_entries(test_db, wallet.id)] == [(100.0, 100.0), (-40.0, 60.0)]
+    adjustment = test_db.query(Transaction).filter(Transaction.description == "Balance adjustment").one()
+    assert (adjustment.type, adjustment.amount) == (TransactionType.WITHDRAWAL, 40.0)
+    
+    # Setting the current balance posts nothing
+    service.update_wallet(test_db, wallet.id, WalletUpdate(balance=60.0))
+    assert len(_wallet_entries(test_db, wallet.id)) == 2
+    assert ReconciliationService().reconcile(test_db, full=True).mismatches_found == 0
@@ -0,0 +1,44 @@
+from typing import List
+
+from fastapi.testclient import TestClient
+from prometheus_client import REGISTRY
+from sqlalchemy import create_engine, text
+from sqlalchemy.pool import QueuePool
+
+from core.metrics import instrument_engine, sample_pools
+from core.response_cache import response_cache
+from main import app
+from schemas.schemas import InvestmentPlan
+
+def _sample(name, **labels):
+    return REGISTRY.get_sample_value(name, labels) or 0.0
+
+def test_metrics_endpoint_reports_routes_queries_pool_and_caches():
+    client = TestClient(app)
+    before = _sample("http_request_duration_seconds_count", method="GET", route="/investments/plans", status="401")
+    client.get("/investments/plans")
+    client.get("/investments/plans")
+    assert _sample("http_request_duration_seconds_count", method="GET", route="/investments/plans",
+                   status="401") == before + 2
+    
+    engine = create_engine("sqlite:///:memory:", poolclass=QueuePool)
+    instrument_engine(engine)
+    selects = _sample("db_query_duration_seconds_count", operation="SELECT")
+    with engine.connect() as conn:
+        conn.execute(text("SELECT 1"))
+        sample_pools()
+        assert _sample("db_pool_connections_checked_out") >= 1
+    assert _sample("db_query_duration_seconds_count", operation="SELECT") == selects + 1
+    
+    misses = _sample("cache_requests_total", cache="response", result="miss")
+    hits = _sample("cache_requests_total", cache="response", result="hit")
+    etag = response_cache.etag("metrics-test", None, "plan", 1, 1)
+    for _ in range(3):
+        response_cache.respond(None, etag, "no-cache", List[InvestmentPlan], lambda: [])
+    assert _sample("cache_requests_total", cache="response", result="miss") == misses + 1
+    assert _sample("cache_requests_total", cache="response", result="hit") == hits + 2
+    
+    body = client.get("/metrics").text
+    assert 'http_request_duration_seconds_bucket{le="0.005",method="GET",route="/investments/plans",status="401"}' in body
+    assert "db_pool_connections_open" in body
+    assert "celery_task_duration_seconds" in body
@@ -0,0 +1,146 @@
+import os
+import uuid
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import Session
+
+from db import partitioning
+from db.database import Base
+from db.partitioning import month_start, add_months, partition_name, partition_month, is_supported
+from models.models import (
+    User, Wallet, Transaction, TransactionType, TransactionStatus, LedgerEntry, Notification, AuditLog
+)
+from repositories.transaction_repository import TransactionRepository
+
+# PostgreSQL database the conversion test may create and drop a schema in
+TEST_POSTGRES_URL = os.getenv("TEST_POSTGRES_URL")
+
+def test_partition_month_arithmetic():
+    month = month_start(datetime(2026, 11, 17, 13, 45))
+    assert month == datetime(2026, 11, 1)
+    assert add_months(month, 1) == datetime(2026, 12, 1)
+    assert add_months(month, 2) == datetime(2027, 1, 1)
+    assert add_months(month, -11) == datetime(2025, 12, 1)
+    
+    name = partition_name("transactions", add_months(month, 2))
+    assert name == "transactions_p2027_01"
+    assert partition_month(name) == datetime(2027, 1, 1)
+    assert partition_month("transactions_unpartitioned") is None
+
+def test_partitioning_is_postgres_only(test_db):
+    assert not is_supported(test_db)
+
+def test_transaction_lists_accept_created_at_bounds(test_db):
+    user = User(email="partition@example.com", first_name="Par", last_name="Tition")
+    test_db.add(user)
+    test_db.flush()
+    wallet = Wallet(user_id=user.id, balance=0.0)
+    test_db.add(wallet)
+    test_db.flush()
+    
+    now = datetime.utcnow()
+    for days_ago in (40, 10, 1):
+        test_db.add(Transaction(
+            user_id=user.id, wallet_id=wallet.id, amount=1.0, type=TransactionType.DEPOSIT,
+            status=TransactionStatus.COMPLETED, created_at=now - timedelta(days=days_ago)
+        ))
+    test_db.commit()
+    
+    repository = TransactionRepository()
+    assert len(repository.get_by_wallet_id(test_db, wallet.id)) == 3
+    assert len(repository.get_by_wallet_id(test_db, wallet.id, start_date=now - timedelta(days=30))) == 2
+    assert len(repository.get_by_user_id(
+        test_db, user.id, start_date=now - timedelta(days=30), end_date=now - timedelta(days=5)
+    )) == 1
+
+@pytest.fixture
+def postgres_db():
+    if not TEST_POSTGRES_URL:
+        pytest.skip("TEST_POSTGRES_URL is not set")
+    schema = f"partitioning_{uuid.uuid4().hex[:8]}"
+    admin = create_engine(TEST_POSTGRES_URL)
+    with admin.begin() as conn:
+        conn.execute(text(f'CREATE SCHEMA "{schema}"'))
+    engine = create_engine(TEST_POSTGRES_URL, connect_args={"options": f"-csearch_path={schema}"})
+    Base.metadata.create_all(bind=engine)
+    db = Session(bind=engine)
+    try:
+        yield db
+    finally:
+        db.close()
+        engine.dispose()
+        with admin.begin() as conn:
+            conn.execute(text(f'DROP SCHEMA "{schema}" CASCADE'))
+        admin.dispose()
+
+def test_convert_populated_tables_to_partitions(postgres_db, monkeypatch):
+    db = postgres_db
+    user = User(email="convert@example.com", first_name="Con", last_name="Vert")
+    db.add(user)
+    db.flush()
+    wallet = Wallet(user_id=user.id, balance=0.0)
+    db.add(wallet)
+    db.flush()
+    now = datetime.utcnow()
+    for sequence, days_ago in enumerate((400, 60, 0), start=1):
+        created_at = now - timedelta(days=days_ago)
+        transaction = Transaction(user_id=user.id, wallet_id=wallet.id, amount=1.0, type=TransactionType.DEPOSIT,
+                                  status=TransactionStatus.COMPLETED, created_at=created_at)
+        db.add(transaction)
+        db.flush()
+        db.add(LedgerEntry(transaction_id=transaction.id, account="wallet", wallet_id=wallet.id,
+                           sequence=sequence, amount=1.0, created_at=created_at))
+        db.add(Notification(user_id=user.id, title="Hi", message="Hello", type="system", created_at=created_at))
+        db.add(AuditLog(user_id=user.id, action="deposit", entity_type="wallet", entity_id=str(wallet.id),
+                        created_at=created_at))
+    db.commit()
+    
+    # Conversion is opt-in on top of PARTITIONING_ENABLED
+    partitioning.partition_tables(db)
+    assert not any(partitioning.is_partitioned(db, table) for table in partitioning.PARTITIONED_TABLES)
+    
+    monkeypatch.setattr(partitioning, "PARTITIONING_CONVERT_TABLES", True)
+    partitioning.partition_tables(db)
+    for table in partitioning.PARTITIONED_TABLES:
+        assert partitioning.is_partitioned(db, table)
+        assert db.execute(text(f'SELECT count(*) FROM "{table}"')).scalar() == 3
+        partitions = partitioning.get_partitions(db, table)
+        assert partitions[0] == partition_name(table, month_start(now - timedelta(days=400)))
+        assert partitions[-2] == partition_name(table, add_months(month_start(now), partitioning.PARTITION_PRECREATE_MONTHS))
+        assert partitions[-1] == f"{table}_default"
+        primary_key = db.execute(text(
+            "SELECT array_agg(a.attname ORDER BY a.attname) FROM pg_constraint c "
+            "JOIN pg_attribute a ON a.attrelid = c.conrelid AND a.attnum = ANY(c.conkey) "
+            "WHERE c.contype = 'p' AND c.conrelid = CAST(:table AS regclass)"
+        ), {"table": table}).scalar()
+        assert primary_key == ["created_at", "id"]
+        indexes = {row[0] for row in db.execute(text(
+            "SELECT indexname FROM pg_indexes WHERE tablename = :table AND schemaname = current_schema()"
+        ), {"table": table})}
+        assert {index.name for index in Base.metadata.tables[table].indexes} <= indexes
+    
+    def foreign_keys(table, referenced):
+        return db.execute(text(
+            "SELECT count(*) FROM pg_constraint WHERE contype = 'f' "
+            "AND conrelid = CAST(:table AS regclass) AND confrelid = CAST(:referenced AS regclass)"
+        ), {"table": table, "referenced": referenced}).scalar()
+    
+    # Foreign keys out of the table are recreated; those into it cannot include created_at and are gone
+    assert foreign_keys("transactions", "users") == 1
+    assert foreign_keys("transactions", "wallets") == 1
+    assert foreign_keys("ledger_entries", "transactions") == 0
+    assert foreign_keys("orders", "transactions") == 0
+    
+    db.add(Transaction(user_id=user.id, wallet_id=wallet.id, amount=1.0, type=TransactionType.DEPOSIT,
+                       status=TransactionStatus.COMPLETED, created_at=now))
+    db.commit()
+    assert len(TransactionRepository().get_by_wallet_id(db, wallet.id, start_date=now - timedelta(days=30))) == 2
+    assert partitioning.ensure_partitions(db, "transactions") == []
+    
+    # Beyond the precreated months: kept by the DEFAULT partition
+    db.add(Transaction(user_id=user.id, wallet_id=wallet.id, amount=1.0, type=TransactionType.DEPOSIT,
+                       status=TransactionStatus.COMPLETED, created_at=now + timedelta(days=3650)))
+    db.commit()
+    assert db.execute(text('SELECT count(*) FROM "transactions_default"')).scalar() == 1
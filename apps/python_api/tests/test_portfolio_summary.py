@@ -0,0 +1,49 @@
+from sqlalchemy import event
+
+from models.models import User, Investment, InvestmentStatus, Loan, LoanStatus
+from services.investment_service import InvestmentService
+
+def test_summary_totals_every_investment_and_loan_in_one_query(test_db):
+    user = User(email="summary@example.com", first_name="Sum", last_name="Mary")
+    other = User(email="other@example.com", first_name="Oth", last_name="Er")
+    test_db.add_all([user, other])
+    test_db.flush()
+    
+    # More rows than any page of /investments/my-investments
+    for i in range(120):
+        test_db.add(Investment(user_id=user.id, amount=10.0, current_value=11.0, expected_return=12.0,
+                               status=InvestmentStatus.ACTIVE))
+    test_db.add(Investment(user_id=user.id, amount=500.0, current_value=550.0, expected_return=550.0,
+                           status=InvestmentStatus.COMPLETED))
+    test_db.add(Investment(user_id=other.id, amount=999.0, current_value=999.0, expected_return=999.0,
+                           status=InvestmentStatus.ACTIVE))
+    test_db.add(Loan(user_id=user.id, amount=1000.0, remaining_balance=400.0, total_payment=1100.0,
+                     status=LoanStatus.ACTIVE))
+    test_db.add(Loan(user_id=user.id, amount=300.0, remaining_balance=0.0, total_payment=330.0,
+                     status=LoanStatus.PAID))
+    test_db.commit()
+    user_id = user.id
+    
+    statements = []
+    listener = lambda conn, cursor, statement, *args: statements.append(statement)
+    event.listen(test_db.get_bind(), "before_cursor_execute", listener)
+    try:
+        summary = InvestmentService().get_portfolio_summary(test_db, user_id)
+    finally:
+        event.remove(test_db.get_bind(), "before_cursor_execute", listener)
+    
+    assert len(statements) == 1
+    investments = summary["investments"]
+    assert investments["count"] == 121
+    assert investments["active_count"] == 120
+    assert investments["total_invested"] == 1200.0
+    assert investments["current_value"] == 1320.0
+    assert investments["expected_return"] == 1440.0
+    assert investments["lifetime_invested"] == 1700.0
+    assert investments["by_status"]["cancelled"] == {"count": 0, "amount": 0.0}
+    
+    loans = summary["loans"]
+    assert loans["count"] == 2
+    assert loans["outstanding_count"] == 1
+    assert loans["outstanding_balance"] == 400.0
+    assert loans["by_status"]["paid"] == {"count": 1, "amount": 300.0}
@@ -0,0 +1,67 @@
+import asyncio
+import numpy as np
+from datetime import datetime, timedelta
+
+import services.projection_service as projection_module
+from core.projection import project_portfolio
+from models.models import User, Investment, InvestmentPlan, InvestmentStatus
+from services.projection_service import ProjectionService
+
+def test_projection_accrues_until_maturity_and_optionally_reinvests():
+    args = (
+        np.array([1000.0, 365.0]),  # principal
+        np.array([1000.0, 400.0]),  # current value
+        np.array([36.5, 10.0]),  # annual ROI %
+        np.array([10, 0]),  # days to maturity
+        np.array([10, 30]),  # plan term
+    )
+    days, totals, final_values = project_portfolio(*args, horizon_days=25, step_days=10)
+    
+    assert days.tolist() == [0, 10, 20, 25]
+    # 1 per day on the first investment until day 10, the matured second one is flat
+    assert totals.tolist() == [1400.0, 1410.0, 1410.0, 1410.0]
+    
+    _, _, reinvested = project_portfolio(*args, horizon_days=25, step_days=10, reinvest=True)
+    # Day 10: 1010, one more 10-day term at 1% -> 1020.1, then 5 days at 0.1%/day
+    assert round(reinvested[0], 4) == round(1010 * 1.01 * 1.005, 4)
+    assert reinvested[1] > final_values[1]
+
+def _portfolio(db):
+    user = User(email="projection@example.com", first_name="Pro", last_name="Jection")
+    plan = InvestmentPlan(name="Growth", min_amount=10, max_amount=10000, roi_percentage=36.5, duration_days=100)
+    db.add_all([user, plan])
+    db.flush()
+    investment = Investment(
+        user_id=user.id, plan_id=plan.id, amount=1000.0, current_value=1000.0, status=InvestmentStatus.ACTIVE,
+        start_date=datetime.utcnow(), end_date=datetime.utcnow() + timedelta(days=100, hours=1)
+    )
+    db.add(investment)
+    db.commit()
+    return user, investment
+
+def test_service_caches_until_portfolio_changes(test_db):
+    user, investment = _portfolio(test_db)
+    service = ProjectionService()
+    
+    first = asyncio.run(service.get_portfolio_projection(test_db, user.id, horizon_days=30))
+    assert first["projected_value"] == 1030.0
+    assert len(first["points"]) == 31
+    assert asyncio.run(service.get_portfolio_projection(test_db, user.id, horizon_days=30)) is first
+    
+    investment.current_value = 1100.0
+    test_db.commit()
+    updated = asyncio.run(service.get_portfolio_projection(test_db, user.id, horizon_days=30))
+    assert updated is not first
+    assert updated["projected_value"] == 1130.0
+    
+    what_if = asyncio.run(service.get_portfolio_projection(test_db, user.id, horizon_days=30, roi_delta=-36.5))
+    assert what_if["projected_gain"] == 0.0
+
+def test_large_projection_runs_in_worker_process(test_db, monkeypatch):
+    user, _ = _portfolio(test_db)
+    monkeypatch.setattr(projection_module, "PROJECTION_OFFLOAD_CELLS", 0)
+    try:
+        result = asyncio.run(ProjectionService().get_portfolio_projection(test_db, user.id, horizon_days=30))
+    finally:
+        projection_module.shutdown_projection_pool()
+    assert result["projected_value"] == 1030.0
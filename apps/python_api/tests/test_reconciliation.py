@@ -0,0 +1,115 @@
+import pytest
+from datetime import datetime, timedelta
+from unittest.mock import patch
+
+from models.models import User, Wallet, Transaction, TransactionType, TransactionStatus
+from services.reconciliation_service import ReconciliationService, shard_bounds
+
+LONG_AGO = datetime(2024, 1, 1)
+
+def _wallet(db, balance, transactions=()):
+    user = User(email=f"user-{balance}-{len(transactions)}@example.com", first_name="Test", last_name="User")
+    db.add(user)
+    db.flush()
+    wallet = Wallet(user_id=user.id, balance=balance, created_at=LONG_AGO)
+    db.add(wallet)
+    db.flush()
+    for transaction_type, amount, status in transactions:
+        db.add(Transaction(
+            user_id=user.id,
+            wallet_id=wallet.id,
+            type=transaction_type,
+            amount=amount,
+            status=status,
+            created_at=LONG_AGO
+        ))
+    db.commit()
+    return wallet
+
+def test_full_run_reports_only_drifted_wallets(test_db):
+    balanced = _wallet(test_db, 70.0, [
+        (TransactionType.DEPOSIT, 100.0, TransactionStatus.COMPLETED),
+        (TransactionType.WITHDRAWAL, 30.0, TransactionStatus.COMPLETED),
+        (TransactionType.WITHDRAWAL, 500.0, TransactionStatus.PENDING),
+    ])
+    drifted = _wallet(test_db, 150.0, [
+        (TransactionType.DEPOSIT, 100.0, TransactionStatus.COMPLETED),
+    ])
+    _wallet(test_db, 0.0)
+    
+    service = ReconciliationService()
+    run = service.reconcile(test_db)
+    
+    assert run.mode == "full"
+    assert run.status == "completed"
+    assert run.wallets_checked == 3
+    assert run.mismatches_found == 1
+    
+    mismatches = service.get_mismatches(test_db, run.id)
+    assert [m.wallet_id for m in mismatches] == [drifted.id]
+    assert mismatches[0].expected_balance == 100.0
+    assert mismatches[0].difference == 50.0
+
+@patch("core.watermark.WATERMARK_OVERLAP", timedelta(0))
+def test_incremental_run_checks_only_changed_wallets(test_db):
+    touched = _wallet(test_db, 100.0, [(TransactionType.DEPOSIT, 100.0, TransactionStatus.COMPLETED)])
+    _wallet(test_db, 50.0, [(TransactionType.DEPOSIT, 50.0, TransactionStatus.COMPLETED)])
+    
+    service = ReconciliationService()
+    service.reconcile(test_db)
+    
+    # A completed deposit recorded without crediting the wallet
+    test_db.add(Transaction(
+        user_id=touched.user_id,
+        wallet_id=touched.id,
+        type=TransactionType.DEPOSIT,
+        amount=25.0,
+        status=TransactionStatus.COMPLETED,
+        created_at=datetime.utcnow() + timedelta(seconds=1)
+    ))
+    test_db.commit()
+    
+    run = service.reconcile(test_db)
+    
+    assert run.mode == "incremental"
+    assert run.wallets_checked == 1
+    assert run.mismatches_found == 1
+    assert service.get_mismatches(test_db, run.id)[0].difference == -25.0
+
+@patch("core.watermark.WATERMARK_OVERLAP", timedelta(0))
+def test_incremental_run_rechecks_open_mismatches(test_db):
+    drifted = _wallet(test_db, 150.0, [(TransactionType.DEPOSIT, 100.0, TransactionStatus.COMPLETED)])
+    _wallet(test_db, 50.0, [(TransactionType.DEPOSIT, 50.0, TransactionStatus.COMPLETED)])
+    
+    service = ReconciliationService()
+    assert service.reconcile(test_db).mismatches_found == 1
+    
+    # Nothing changed, but the drifted wallet is still out of balance
+    for _ in range(2):
+        run = service.reconcile(test_db)
+        assert run.mode == "incremental"
+        assert run.wallets_checked == 1
+        assert [m.wallet_id for m in service.get_mismatches(test_db, run.id)] == [drifted.id]
+    
+    # Once corrected it is checked one last time and then dropped
+    drifted.balance = 100.0
+    test_db.commit()
+    run = service.reconcile(test_db)
+    assert run.wallets_checked == 1
+    assert run.mismatches_found == 0
+    assert service.reconcile(test_db).wallets_checked == 0
+
+def test_shards_cover_every_wallet_once(test_db):
+    for i in range(20):
+        _wallet(test_db, float(i), [(TransactionType.DEPOSIT, float(i), TransactionStatus.COMPLETED)])
+    
+    service = ReconciliationService()
+    runs = [service.reconcile(test_db, shard_index=i, shard_count=4, chunk_size=3) for i in range(4)]
+    
+    assert sum(run.wallets_checked for run in runs) == 20
+    assert all(run.mismatches_found == 0 for run in runs)
+
+def test_shard_bounds_rejects_invalid_shard():
+    assert shard_bounds(0, 1) == (None, None)
+    with pytest.raises(ValueError):
+        shard_bounds(4, 4)
@@ -0,0 +1,59 @@
+from fastapi.testclient import TestClient
+
+from core.response_cache import ResponseCache, response_cache, row_version, USER_CACHE_CONTROL
+from main import app
+from models.models import User, Wallet, TransactionType
+from routers.auth import get_current_active_user
+from schemas.schemas import UserUpdate
+from services.user_service import UserService
+from services.wallet_service import WalletService
+
+def _client(test_db):
+    user = User(email="cache@example.com", first_name="Ca", last_name="Che", is_active=True, role="user")
+    test_db.add(user)
+    test_db.flush()
+    wallet = Wallet(user_id=user.id, balance=100.0)
+    test_db.add(wallet)
+    test_db.commit()
+    app.dependency_overrides[get_current_active_user] = lambda: user
+    return TestClient(app), user, wallet
+
+def test_me_revalidates_with_304_until_the_user_changes(test_db, override_get_db):
+    client, user, _ = _client(test_db)
+    
+    first = client.get("/auth/me")
+    assert first.status_code == 200
+    assert first.headers["Cache-Control"] == USER_CACHE_CONTROL
+    etag = first.headers["ETag"]
+    
+    hits = response_cache.hits
+    assert client.get("/auth/me").content == first.content
+    assert response_cache.hits == hits + 1
+    not_modified = client.get("/auth/me", headers={"If-None-Match": etag})
+    assert not_modified.status_code == 304
+    assert not_modified.content == b""
+    
+    # Within the same second too: the ETag is built from the whole row, not updated_at
+    UserService().update_user(test_db, user.id, UserUpdate(first_name="Renamed"))
+    changed = client.get("/auth/me", headers={"If-None-Match": etag})
+    assert changed.status_code == 200
+    assert changed.json()["first_name"] == "Renamed"
+    assert changed.headers["ETag"] != etag
+    
+    # Nothing process-local goes into the ETag, so every worker derives the same one
+    test_db.refresh(user)
+    other_worker = ResponseCache().etag("auth.me", user.id, "user", user.id, row_version(user))
+    assert other_worker == changed.headers["ETag"]
+
+def test_wallet_etag_changes_when_a_transaction_moves_the_balance(test_db, override_get_db):
+    client, user, wallet = _client(test_db)
+    
+    first = client.get("/wallets/me")
+    assert first.json()["balance"] == 100.0
+    etag = first.headers["ETag"]
+    assert client.get("/wallets/me", headers={"If-None-Match": etag}).status_code == 304
+    
+    WalletService().create_transaction(test_db, user.id, wallet.id, 25.0, TransactionType.DEPOSIT)
+    changed = client.get("/wallets/me", headers={"If-None-Match": etag})
+    assert changed.status_code == 200
+    assert changed.json()["balance"] == 125.0
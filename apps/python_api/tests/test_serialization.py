@@ -0,0 +1,123 @@
+import json
+from datetime import datetime, timedelta
+
+from fastapi import FastAPI
+from fastapi.responses import PlainTextResponse, Response, StreamingResponse
+from fastapi.testclient import TestClient
+from sqlalchemy import event
+
+from core.compression import CompressionMiddleware, accepted_encodings
+from core.serialization import dump_json_list
+from main import app
+from models.models import (
+    User, Wallet, Notification as NotificationModel, TransactionType, InvestmentPlan, Investment, InvestmentStatus
+)
+from repositories.transaction_repository import TransactionRepository
+from routers.auth import get_current_active_user
+from schemas.schemas import Transaction, Notification
+from services.notification_service import NotificationService
+from services.wallet_service import WalletService
+
+def test_transaction_list_rows_render_like_orm_objects(test_db, override_get_db):
+    user = User(email="rows@example.com", first_name="Ro", last_name="Ws", is_active=True, role="user")
+    test_db.add(user)
+    test_db.flush()
+    wallet = Wallet(user_id=user.id, balance=0.0)
+    test_db.add(wallet)
+    test_db.commit()
+    for amount in (10.0, 20.0, 30.0):
+        WalletService().create_transaction(test_db, user.id, wallet.id, amount, TransactionType.DEPOSIT,
+                                           description="Deposit " * 40)
+    app.dependency_overrides[get_current_active_user] = lambda: user
+    
+    response = TestClient(app).get("/wallets/me/transactions", headers={"Accept-Encoding": "br, gzip"})
+    assert response.status_code == 200
+    assert response.headers["Content-Encoding"] == "br"
+    
+    orm_objects = TransactionRepository().get_by_wallet_id(test_db, wallet.id)
+    expected = json.loads(dump_json_list(Transaction, orm_objects))
+    assert sorted(response.json(), key=lambda t: t["id"]) == sorted(expected, key=lambda t: t["id"])
+
+def test_notification_lists_are_column_rows(test_db):
+    user = User(email="notes@example.com", first_name="No", last_name="Tes", is_active=True, role="user")
+    test_db.add(user)
+    test_db.flush()
+    test_db.add(NotificationModel(user_id=user.id, title="Hi", message="Hello", type="system"))
+    test_db.commit()
+    
+    rows = NotificationService().get_all_notifications(test_db)
+    assert not isinstance(rows[0], NotificationModel)
+    rendered = json.loads(dump_json_list(Notification, rows))
+    assert rendered[0]["user_id"] == str(user.id)
+    assert rendered[0]["title"] == "Hi"
+    assert json.loads(dump_json_list(Notification, NotificationService().get_user_notifications(test_db, user.id))) == rendered
+
+def test_compression_picks_encoding_above_threshold():
+    compressed_app = FastAPI()
+    compressed_app.add_middleware(CompressionMiddleware, minimum_size=100)
+    
+    @compressed_app.get("/text")
+    def text(size: int):
+        return PlainTextResponse("x" * size)
+    
+    client = TestClient(compressed_app)
+    small = client.get("/text?size=10", headers={"Accept-Encoding": "br, gzip"})
+    assert "Content-Encoding" not in small.headers
+    
+    large = client.get("/text?size=5000", headers={"Accept-Encoding": "br, gzip"})
+    assert large.headers["Content-Encoding"] == "br"
+    assert large.headers["Vary"] == "Accept-Encoding"
+    assert len(large.text) == 5000
+    
+    refused = client.get("/text?size=5000", headers={"Accept-Encoding": "br;q=0, gzip"})
+    assert refused.headers["Content-Encoding"] == "gzip"
+    assert refused.text == "x" * 5000
+    
+    @compressed_app.get("/stream")
+    def stream():
+        return StreamingResponse(iter([b"line\n" * 100] * 5), media_type="text/csv")
+    
+    @compressed_app.get("/image")
+    def image():
+        return Response(b"\x89PNG" * 1000, media_type="image/png")
+    
+    streamed = client.get("/stream", headers={"Accept-Encoding": "gzip"})
+    assert streamed.headers["Content-Encoding"] == "gzip"
+    assert streamed.text == "line\n" * 500
+    assert "Content-Encoding" not in client.get("/image", headers={"Accept-Encoding": "br, gzip"}).headers
+    assert "Content-Encoding" not in client.get("/text?size=5000", headers={"Accept-Encoding": "identity"}).headers
+    
+    assert accepted_encodings("gzip;q=1.0, br;q=0, identity") == {"gzip", "identity"}
+
+def test_fields_selects_columns_and_narrows_the_response(test_db, override_get_db):
+    user = User(email="sparse@example.com", first_name="Sp", last_name="Arse", is_active=True, role="user")
+    test_db.add(user)
+    test_db.flush()
+    wallet = Wallet(user_id=user.id, balance=0.0)
+    plan = InvestmentPlan(name="Growth", description="Growth plan", min_amount=10.0, max_amount=1000.0,
+                          roi_percentage=12.0, duration_days=90)
+    test_db.add_all([wallet, plan])
+    test_db.flush()
+    now = datetime.utcnow()
+    test_db.add(Investment(user_id=user.id, plan_id=plan.id, amount=100.0, current_value=110.0, expected_return=130.0,
+                           status=InvestmentStatus.ACTIVE, start_date=now, end_date=now + timedelta(days=90)))
+    test_db.commit()
+    WalletService().create_transaction(test_db, user.id, wallet.id, 15.0, TransactionType.DEPOSIT)
+    app.dependency_overrides[get_current_active_user] = lambda: user
+    client = TestClient(app)
+    
+    statements = []
+    event.listen(test_db.get_bind(), "before_cursor_execute", lambda *args: statements.append(args[2]))
+    transactions = client.get("/wallets/me/transactions?fields=amount,type").json()
+    assert transactions == [{"id": transactions[0]["id"], "type": "deposit", "amount": 15.0}]
+    select = next(statement for statement in statements if "FROM transactions" in statement)
+    assert "transactions.description" not in select
+    
+    investments = client.get("/investments/my-investments?fields=amount,plan").json()
+    assert set(investments[0]) == {"id", "amount", "plan"}
+    assert investments[0]["plan"]["name"] == "Growth"
+    assert set(client.get("/investments/my-investments?fields=status").json()[0]) == {"id", "status"}
+    
+    unknown = client.get("/wallets/me/transactions?fields=amount,password")
+    assert unknown.status_code == 400
+    assert "password" in unknown.json()["detail"]
@@ -0,0 +1,23 @@
+import os
+import subprocess
+import sys
+
+SRC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src")
+
+PROBE = (
+    "import sys\n"
+    "import main\n"
+    "from db import database\n"
+    "print(sorted(m for m in ('celery', 'numpy', 'psutil', 'httpx') if m in sys.modules))\n"
+    "print(database._engine is None)\n"
+)
+
+def test_importing_the_app_defers_the_database_and_heavy_modules():
+    env = dict(os.environ, PYTHONPATH=SRC_DIR)
+    env.pop("DATABASE_URL", None)
+    # Without DATABASE_URL the import used to sleep through five connection retries
+    result = subprocess.run([sys.executable, "-c", PROBE], cwd=SRC_DIR, env=env, capture_output=True, text=True,
+                            timeout=10, check=True)
+    deferred_imported, engine_missing = result.stdout.strip().splitlines()[-2:]
+    assert deferred_imported == "[]"
+    assert engine_missing == "True"
@@ -0,0 +1,84 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from models.models import (
+    User, Wallet, Transaction, TransactionType, TransactionStatus, Investment, InvestmentStatus,
+    Notification, SyncTombstone
+)
+from services.notification_service import NotificationService
+from services.sync_service import SyncService, encode_sync_token
+
+def _seed(test_db):
+    user = User(email="sync@example.com", first_name="Sy", last_name="Nc", is_active=True)
+    other = User(email="other@example.com", first_name="Oth", last_name="Er", is_active=True)
+    test_db.add_all([user, other])
+    test_db.flush()
+    wallet = Wallet(user_id=user.id, balance=100.0)
+    test_db.add(wallet)
+    test_db.flush()
+    
+    yesterday = datetime.utcnow() - timedelta(days=1)
+    for i in range(5):
+        test_db.add(Transaction(user_id=user.id, wallet_id=wallet.id, type=TransactionType.DEPOSIT, amount=10.0,
+                                status=TransactionStatus.COMPLETED, created_at=yesterday + timedelta(minutes=i)))
+    # Same timestamp on every row, as after a bulk update
+    for i in range(5):
+        test_db.add(Notification(user_id=user.id, title=f"N{i}", message="Hello", type="system", created_at=yesterday))
+    test_db.add(Notification(user_id=other.id, title="Other", message="Hello", type="system", created_at=yesterday))
+    test_db.commit()
+    return user.id
+
+def test_full_sync_pages_through_every_row_once(test_db):
+    user_id = _seed(test_db)
+    service = SyncService()
+    
+    pages = [service.get_changes(test_db, user_id, limit=2)]
+    while pages[-1]["has_more"]:
+        pages.append(service.get_changes(test_db, user_id, token=pages[-1]["next_token"], limit=2))
+    
+    assert len(pages) == 3
+    assert [page["reset"] for page in pages] == [True, False, False]
+    transaction_ids = [row.id for page in pages for row in page["transactions"]["created"]]
+    notification_ids = [row.id for page in pages for row in page["notifications"]["created"]]
+    assert len(transaction_ids) == len(set(transaction_ids)) == 5
+    assert len(notification_ids) == len(set(notification_ids)) == 5
+    
+    # Nothing changed since the completed sync
+    refresh = service.get_changes(test_db, user_id, token=pages[-1]["next_token"])
+    assert not refresh["reset"] and not refresh["has_more"]
+    assert all(not any(changes.values()) for key, changes in refresh.items() if isinstance(changes, dict))
+
+def test_incremental_sync_returns_updates_and_deletions(test_db):
+    user_id = _seed(test_db)
+    service = SyncService()
+    token = service.get_changes(test_db, user_id)["next_token"]
+    
+    transaction = test_db.query(Transaction).filter(Transaction.user_id == user_id).first()
+    transaction.status = TransactionStatus.FAILED
+    notification = test_db.query(Notification).filter(Notification.user_id == user_id).first()
+    NotificationService().delete_notification(test_db, notification.id)
+    test_db.add(Investment(user_id=user_id, amount=50.0, status=InvestmentStatus.ACTIVE))
+    test_db.commit()
+    
+    changes = service.get_changes(test_db, user_id, token=token)
+    
+    assert not changes["reset"]
+    assert [row.id for row in changes["transactions"]["updated"]] == [transaction.id]
+    assert changes["transactions"]["created"] == []
+    assert len(changes["investments"]["created"]) == 1
+    assert changes["notifications"]["deleted"] == [notification.id]
+    assert test_db.query(SyncTombstone).count() == 1
+
+def test_invalid_or_expired_token(test_db):
+    user_id = _seed(test_db)
+    service = SyncService()
+    
+    with pytest.raises(ValueError):
+        service.get_changes(test_db, user_id, token="not-a-token")
+    
+    # Older than the tombstone retention: start over with a full sync
+    stale = encode_sync_token({"since": (datetime.utcnow() - timedelta(days=365)).isoformat()})
+    changes = service.get_changes(test_db, user_id, token=stale)
+    assert changes["reset"]
+    assert len(changes["transactions"]["created"]) == 5
@@ -0,0 +1,107 @@
+from fastapi.testclient import TestClient
+
+from core import tracing
+from core.metrics import instrument_engine
+from core.tracing import activate, clear_traces, deactivate, finish, get_trace, recent_traces, span, start_trace
+from main import app
+from models.models import User, Wallet, TransactionType
+from routers.admin import get_current_admin
+from routers.auth import get_current_active_user
+from services.wallet_service import WalletService
+from tasks.celery_app import celery_app
+
+TRACE_ID = "4bf92f3577b34da6a3ce929d0e0e4736"
+PARENT_ID = "00f067aa0ba902b7"
+
+def test_sampled_request_is_traced_through_services_and_queries(test_db, override_get_db, monkeypatch):
+    clear_traces()
+    monkeypatch.setattr(tracing, "TRACE_SAMPLE_RATE", 0.0)
+    instrument_engine(test_db.get_bind())
+    user = User(email="traced@example.com", first_name="Tra", last_name="Ced", is_active=True, role="admin")
+    test_db.add(user)
+    test_db.flush()
+    wallet = Wallet(user_id=user.id, balance=0.0)
+    test_db.add(wallet)
+    test_db.commit()
+    WalletService().create_transaction(test_db, user.id, wallet.id, 10.0, TransactionType.DEPOSIT)
+    app.dependency_overrides[get_current_active_user] = lambda: user
+    app.dependency_overrides[get_current_admin] = lambda: user
+    client = TestClient(app)
+    
+    # A client's sampled flag is ignored unless callers are trusted
+    untrusted = client.get("/wallets/me/transactions", headers={"traceparent": f"00-{TRACE_ID}-{PARENT_ID}-01"})
+    assert untrusted.status_code == 200
+    assert "X-Trace-Id" not in untrusted.headers
+    
+    monkeypatch.setattr(tracing, "TRACE_TRUST_TRACEPARENT", True)
+    unsampled = client.get("/wallets/me/transactions", headers={"traceparent": f"00-{TRACE_ID}-{PARENT_ID}-00"})
+    assert unsampled.status_code == 200
+    assert "X-Trace-Id" not in unsampled.headers
+    
+    response = client.get("/wallets/me/transactions", headers={"traceparent": f"00-{TRACE_ID}-{PARENT_ID}-01"})
+    assert response.status_code == 200
+    assert response.headers["X-Trace-Id"] == TRACE_ID
+    
+    trace = get_trace(TRACE_ID)
+    assert trace["name"] == "GET /wallets/me/transactions"
+    root, *children = trace["spans"]
+    assert root["parent_id"] == PARENT_ID
+    assert root["attributes"]["http.status_code"] == 200
+    names = [child["name"] for child in children]
+    assert any(name.startswith("WalletService.") for name in names)
+    repository = next(child for child in children if child["name"] == "TransactionRepository.get_by_wallet_id")
+    query = next(child for child in children if child["parent_id"] == repository["span_id"])
+    assert query["name"] == "db.query"
+    assert query["attributes"]["statement"].startswith("SELECT transactions.")
+    
+    summaries = client.get("/admin/traces", params={"name": "/wallets/me"}).json()
+    assert [summary["trace_id"] for summary in summaries] == [TRACE_ID]
+    assert "spans" not in summaries[0]
+    detail = client.get(f"/admin/traces/{TRACE_ID}").json()
+    assert detail["span_count"] == len(detail["spans"]) == len(trace["spans"])
+    assert client.get(f"/admin/traces/{'0' * 31}1").status_code == 404
+
+def test_queued_task_joins_the_trace_of_the_request():
+    clear_traces()
+    
+    @celery_app.task(name="tests.traced_task")
+    def traced_task():
+        with span("work"):
+            return "done"
+    
+    root = start_trace("GET /test", f"00-{TRACE_ID}-{PARENT_ID}-01")
+    token = activate(root)
+    headers = {}
+    try:
+        from celery import signals
+        signals.before_task_publish.send(sender="tests.traced_task", body=((), {}, {}), headers=headers)
+    finally:
+        deactivate(token)
+        finish(root)
+    assert headers["traceparent"] == root.traceparent
+    
+    assert traced_task.apply(headers=headers).get() == "done"
+    spans = {span["name"]: span for span in get_trace(TRACE_ID)["spans"]}
+    assert spans["task tests.traced_task"]["parent_id"] == root.span_id
+    assert spans["work"]["parent_id"] == spans["task tests.traced_task"]["span_id"]
+    assert spans["task tests.traced_task"]["attributes"]["state"] == "SUCCESS"
+
+def test_export_file_is_rotated_and_read_from_the_end(tmp_path, monkeypatch):
+    export_file = tmp_path / "traces.jsonl"
+    monkeypatch.setattr(tracing, "TRACE_EXPORT_FILE", str(export_file))
+    monkeypatch.setattr(tracing, "TRACE_EXPORT_MAX_BYTES", 2000)
+    monkeypatch.setattr(tracing, "TRACE_BUFFER_SIZE", 5)
+    monkeypatch.setattr(tracing, "_export_file", None)
+    try:
+        for i in range(40):
+            finish(start_trace(f"GET /traced/{i}", sample_rate=1.0))
+    finally:
+        if tracing._export_file is not None:
+            tracing._export_file[1].close()
+    
+    # Only the current file and one rotated file are kept, each about the size limit (the
+    # current file is only recreated by the next write if the last one rotated it)
+    names = {path.name for path in tmp_path.iterdir()}
+    assert "traces.jsonl.1" in names and names <= {"traces.jsonl", "traces.jsonl.1"}
+    assert all(path.stat().st_size < 2000 + 500 for path in tmp_path.iterdir())
+    assert [trace["name"] for trace in recent_traces(limit=10)] == [f"GET /traced/{i}" for i in range(39, 34, -1)]
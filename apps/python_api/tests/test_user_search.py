@@ -0,0 +1,81 @@
+import pytest
+
+from core import ngram_index
+from core.ngram_index import NgramIndex
+from models.models import User, UserRole
+from services.user_service import UserService, UserSearchIndex
+
+def _users(db):
+    for email, first_name, last_name, phone, role, is_active in [
+        ("jane.smith@example.com", "Jane", "Smith", "+1 (555) 123-4567", UserRole.USER, True),
+        ("john.smithers@example.com", "John", "Smithers", None, UserRole.USER, True),
+        ("ann.blacksmith@example.com", "Ann", "Blacksmith", None, UserRole.USER, False),
+        ("smith@example.com", "Sam", "Jones", None, UserRole.ADMIN, True),
+        ("zoe@example.com", "Zoe", "Miller", "+44 20 7946 0000", UserRole.USER, True),
+    ]:
+        db.add(User(email=email, first_name=first_name, last_name=last_name, phone=phone, role=role, is_active=is_active))
+    db.commit()
+
+def _service():
+    service = UserService()
+    service.search_index = UserSearchIndex()
+    return service
+
+def test_exact_then_prefix_then_substring_ranking(test_db):
+    _users(test_db)
+    results = _service().search_users(test_db, "smith")
+    
+    assert [u.last_name for u in results[:2]] == ["Smith", "Jones"]  # Exact field matches first
+    assert results[2].last_name == "Smithers"
+    assert results[-1].last_name == "Blacksmith"
+
+def test_fuzzy_phone_and_filters(test_db):
+    _users(test_db)
+    service = _service()
+    
+    assert [u.last_name for u in service.search_users(test_db, "milller")] == ["Miller"]
+    assert [u.last_name for u in service.search_users(test_db, "5551234")] == ["Smith"]
+    assert [u.last_name for u in service.search_users(test_db, "smith", role=UserRole.ADMIN)] == ["Jones"]
+    assert "Blacksmith" not in [u.last_name for u in service.search_users(test_db, "smith", is_active=True)]
+    
+    with pytest.raises(ValueError):
+        service.search_users(test_db, "sm")
+
+def test_index_follows_inserts_updates_and_deletes(test_db):
+    _users(test_db)
+    service = _service()
+    assert service.search_users(test_db, "zoe")
+    
+    zoe = test_db.query(User).filter(User.first_name == "Zoe").one()
+    test_db.delete(zoe)
+    test_db.add(User(email="new.person@example.com", first_name="Newton", last_name="Person"))
+    test_db.commit()
+    
+    assert service.search_users(test_db, "zoe") == []
+    assert [u.first_name for u in service.search_users(test_db, "newton")] == ["Newton"]
+
+def test_ngram_index_remove():
+    index = NgramIndex()
+    index.add(1, ["alpha"])
+    index.add(2, ["alphabet"])
+    index.remove(1)
+    assert [key for key, _ in index.search("alpha")] == [2]
+
+def test_ngram_index_ranks_a_bounded_number_of_broad_matches(monkeypatch):
+    monkeypatch.setattr(ngram_index, "CANDIDATES_PER_RESULT", 2)
+    index = NgramIndex()
+    for i in range(50):
+        index.add(i, [f"mary.smith{i}@example.com", "Mary", "Smith"])
+    index.add("exact", ["smi@example.com", "Smi"])
+    index.add("substring", ["blacksmith@example.com", "Blacksmith"])
+    
+    # Exact and prefix matches fill the page without visiting the substring tier
+    results = index.search("smi", limit=3)
+    assert len(results) == 3
+    assert results[0][0] == "exact"
+    assert "substring" not in [key for key, _ in results]
+    
+    # Whole words of the query narrow the candidates to documents having them
+    assert [key for key, _ in index.search("mary.smith7@example.com", limit=3)] == [7]
+    assert [key for key, _ in index.search("y.smith7@", limit=3)] == [7]
+    assert [key for key, _ in index.search("ksmi", limit=3)] == ["substring"]